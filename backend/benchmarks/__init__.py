@@ -0,0 +1 @@
+"""Performance benchmarks for the AIMS backend (run with `python -m backend.benchmarks.<name>`)."""
@@ -0,0 +1,55 @@
+"""
+Benchmark vectorized batch scoring against per-row scoring.
+
+Reports rows/sec of predict_fault_batch for batch sizes from 1 to 10k, next to
+the throughput of calling predict_fault once per reading.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_batch
+"""
+import sys
+
+from backend.benchmarks.common import best_of, load_artifacts, load_sensor_inputs
+from backend.services.predictor import predict_fault, predict_fault_batch
+
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+# Per-row scoring is slow, so it is only timed on this many readings and
+# reported as a rate
+PER_ROW_SAMPLE = 200
+
+
+def main() -> int:
+    try:
+        model, preprocessor, shap_explainer = load_artifacts()
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+    
+    readings = load_sensor_inputs(max(BATCH_SIZES))
+    
+    per_row = readings[:PER_ROW_SAMPLE]
+    elapsed = best_of(lambda: [
+        predict_fault(reading, model, preprocessor, shap_explainer) for reading in per_row
+    ], repeats=1)
+    per_row_rate = len(per_row) / elapsed
+    
+    print(f"{'batch size':>10} | {'batch rows/sec':>14} | {'per-row rows/sec':>16} | {'speedup':>7}")
+    print("-" * 58)
+    for batch_size in BATCH_SIZES:
+        batch = readings[:batch_size]
+        repeats = 3 if batch_size <= 1000 else 1
+        elapsed = best_of(
+            lambda: predict_fault_batch(batch, model, preprocessor, shap_explainer),
+            repeats=repeats
+        )
+        rate = batch_size / elapsed
+        print(f"{batch_size:>10} | {rate:>14,.0f} | {per_row_rate:>16,.0f} | {rate / per_row_rate:>6.1f}x")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Compare the shap TreeExplainer with LightGBM's native pred_contrib explainer.
+
+Each engine is measured in a fresh subprocess, so import costs are not shared:
+  - startup: importing the serving modules and loading the artifacts
+  - RSS: peak resident memory of the process after startup
+  - latency: mean predict_fault_row time per reading (including SHAP)
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_explainer
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+EXPLAINERS = ["shap", "lightgbm"]
+
+NUM_READINGS = 200
+
+
+def measure(explainer: str) -> None:
+    """Measure one engine in this process and print the results as JSON."""
+    import resource
+    import time
+
+    start = time.perf_counter()
+    from backend.services.artifacts import load_serving_artifacts
+    from backend.services.predictor import predict_fault_row
+    imported = time.perf_counter()
+    artifacts = load_serving_artifacts()
+    loaded = time.perf_counter()
+    rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    from backend.benchmarks.common import load_sensor_inputs
+    readings = load_sensor_inputs(NUM_READINGS)
+    predict_fault_row(readings[0], **artifacts)
+    latency_start = time.perf_counter()
+    for reading in readings:
+        predict_fault_row(reading, **artifacts)
+    latency = (time.perf_counter() - latency_start) / len(readings)
+
+    print(json.dumps({
+        "explainer": explainer,
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "rss_mib": rss_kib / 1024,
+        "latency_ms": latency * 1000,
+        "shap_imported": "shap" in sys.modules,
+    }))
+
+
+def main() -> int:
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        measure(sys.argv[2])
+        return 0
+
+    print(f"{'explainer':>9} | {'import s':>8} | {'load s':>6} | {'RSS MiB':>7} | {'latency ms':>10} | {'shap imported':>13}")
+    print("-" * 69)
+    for explainer in EXPLAINERS:
+        result = subprocess.run(
+            [sys.executable, "-m", "backend.benchmarks.bench_explainer", "--child", explainer],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, "AIMS_EXPLAINER": explainer},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"✗ {explainer} run failed:\n{result.stderr}")
+            return 1
+
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{explainer:>9} | {stats['import_s']:>8.2f} | {stats['load_s']:>6.2f} | {stats['rss_mib']:>7.0f} | "
+            f"{stats['latency_ms']:>10.3f} | {str(stats['shap_imported']):>13}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
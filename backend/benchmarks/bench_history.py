@@ -0,0 +1,102 @@
+"""
+Measure the memory and speed of the per-engine history store.
+
+Fills the history of many engines to their retention with dataset readings
+and reports:
+  - memory: resident memory the filled history added, against the size of
+    its arrays, and what the same readings take as one dict per reading
+  - record: time to record one reading, and a frame of readings
+  - query: time to read back an engine's whole history and a 60 s range
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_history [--engines 10000] [--retention 600]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend.benchmarks.common import load_feature_matrix
+from backend.services.history import EngineHistory
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+
+def resident_bytes() -> int:
+    """Current resident memory of this process."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def dict_bytes(readings: np.ndarray, probabilities: np.ndarray) -> float:
+    """Bytes per reading of keeping each reading and prediction as a dict, as a response model would."""
+    labels = list(FAULT_LABELS.values())
+    tracemalloc.start()
+    kept = [
+        {
+            "timestamp": float(second),
+            "readings": dict(zip(FEATURE_NAMES, reading)),
+            "prediction_label": labels[int(np.argmax(probability))],
+            "probabilities": dict(zip(labels, probability)),
+        }
+        for second, (reading, probability) in enumerate(zip(readings.tolist(), probabilities.tolist()))
+    ]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return used / len(readings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", type=int, default=10000, help="engines to fill")
+    parser.add_argument("--retention", type=int, default=600, help="readings kept per engine")
+    parser.add_argument("--frame", type=int, default=60, help="readings recorded per call while filling")
+    args = parser.parse_args()
+
+    readings = load_feature_matrix(args.retention)
+    rng = np.random.default_rng(0)
+    probabilities = rng.dirichlet(np.ones(len(FAULT_LABELS)), size=args.retention)
+    timestamps = np.arange(args.retention, dtype=np.float64)
+
+    before = resident_bytes()
+    history = EngineHistory(retention=args.retention, max_engines=args.engines)
+    allocated = resident_bytes()
+    started = time.perf_counter()
+    for engine in range(args.engines):
+        for first in range(0, args.retention, args.frame):
+            frame = slice(first, first + args.frame)
+            history.record(f"engine-{engine}", timestamps[frame], readings[frame], probabilities[frame])
+    fill_s = time.perf_counter() - started
+    filled = resident_bytes()
+
+    stats = history.stats()
+    total_readings = args.engines * args.retention
+    print(f"{args.engines:,} engines x {args.retention} readings = {total_readings:,} readings")
+    print(f"  arrays:            {stats['bytes'] / 2 ** 20:>9,.1f} MiB ({stats['bytes_per_engine'] / args.retention:.0f} B per reading)")
+    print(f"  resident increase: {(filled - before) / 2 ** 20:>9,.1f} MiB "
+          f"(of which {(allocated - before) / 2 ** 20:,.1f} MiB before the first reading)")
+    print(f"  as dicts:          {dict_bytes(readings, probabilities) * total_readings / 2 ** 20:>9,.1f} MiB (estimated)")
+
+    single = 20000
+    started = time.perf_counter()
+    for index in range(single):
+        row = slice(index % args.retention, index % args.retention + 1)
+        history.record(f"engine-{index % args.engines}", timestamps[row], readings[row], probabilities[row])
+    record_us = (time.perf_counter() - started) / single * 1e6
+    print(f"\nrecord: {record_us:.1f} us per single reading, "
+          f"{fill_s / (total_readings / args.frame) * 1e6:.1f} us per frame of {args.frame} "
+          f"({total_readings / fill_s:,.0f} readings/s)")
+
+    queries = 2000
+    for label, kwargs in [("whole history", {}), ("60 s range", {"start": 100.0, "end": 159.0})]:
+        started = time.perf_counter()
+        for index in range(queries):
+            history.query(f"engine-{index % args.engines}", **kwargs)
+        print(f"query ({label}): {(time.perf_counter() - started) / queries * 1e6:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
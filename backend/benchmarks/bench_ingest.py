@@ -0,0 +1,82 @@
+"""
+Compare the cost of turning a batch request body into a feature matrix.
+
+Encodes the same dataset readings in every request format /predict/batch
+accepts and reports, per format, the payload size and the time to parse and
+validate it into the float64 matrix the model is scored on:
+  - json: BatchSensorInput.model_validate_json, then sensor_inputs_to_matrix
+  - raw: little-endian float32 rows, parse_readings
+  - npy: a float32 .npy array, parse_readings
+  - arrow: an Arrow IPC stream of float32 columns, parse_readings (needs pyarrow)
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_ingest [--rows 10000]
+"""
+import argparse
+import io
+import json
+import sys
+
+import numpy as np
+
+from backend.benchmarks.common import best_of, load_feature_matrix
+from backend.models.request import BatchSensorInput
+from backend.services.ingest import parse_readings
+from backend.services.predictor import FEATURE_NAMES, sensor_inputs_to_matrix
+
+
+def encode(features: np.ndarray) -> dict[str, bytes]:
+    """The readings in every available request format; binary formats carry them as float32."""
+    readings = features.astype(np.float32)
+    payloads = {
+        "json": json.dumps({"readings": [dict(zip(FEATURE_NAMES, row)) for row in features.tolist()]}).encode(),
+        "raw": readings.astype("<f4").tobytes(),
+    }
+    buffer = io.BytesIO()
+    np.save(buffer, readings)
+    payloads["npy"] = buffer.getvalue()
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("⚠ Warning: pyarrow not installed, skipping arrow")
+        return payloads
+    table = pa.table({name: readings[:, index] for index, name in enumerate(FEATURE_NAMES)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    payloads["arrow"] = sink.getvalue().to_pybytes()
+    return payloads
+
+
+def parse(payload_format: str, payload: bytes) -> np.ndarray:
+    """Parse and validate a payload into the feature matrix, as /predict/batch does."""
+    if payload_format == "json":
+        return sensor_inputs_to_matrix(BatchSensorInput.model_validate_json(payload).readings)
+    return parse_readings(payload, payload_format)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="readings per payload")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per format; the fastest is reported")
+    args = parser.parse_args()
+
+    features = load_feature_matrix(args.rows)
+    payloads = encode(features)
+    expected = parse("json", payloads["json"])
+
+    print(f"{args.rows:,} readings per payload, best of {args.repeats}")
+    print(f"{'format':<8}{'payload':>12}{'parse + validate':>20}{'per 10k rows':>16}{'speedup':>10}")
+    json_s = None
+    for payload_format, payload in payloads.items():
+        np.testing.assert_allclose(parse(payload_format, payload), expected, rtol=1e-6)
+        elapsed = best_of(lambda: parse(payload_format, payload), args.repeats)
+        json_s = json_s or elapsed
+        print(f"{payload_format:<8}{len(payload) / 2 ** 10:>9,.0f} KiB{elapsed * 1e3:>17.2f} ms"
+              f"{elapsed / args.rows * 1e4 * 1e3:>13.2f} ms{json_s / elapsed:>9.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark micro-batched against unbatched single-reading predictions.
+
+Simulates concurrent clients that each send one reading at a time, as many
+/predict callers do, and reports throughput and p50/p99 latency with and
+without the MicroBatcher in front of the inference executor.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_microbatch [--clients 64] [--requests 2000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from backend.benchmarks.common import load_artifacts, load_sensor_inputs, percentile_ms
+from backend.services.batcher import MicroBatcher
+from backend.services.executor import InferenceExecutor
+from backend.services.predictor import predict_fault_row
+
+
+async def run_clients(score, readings, num_clients: int) -> tuple[float, list[float]]:
+    """Drive `score` from num_clients concurrent clients until all readings are sent."""
+    latencies = []
+    next_index = 0
+    
+    async def client():
+        nonlocal next_index
+        while next_index < len(readings):
+            reading = readings[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            await score(reading)
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(num_clients)))
+    return time.perf_counter() - started, latencies
+
+
+async def benchmark(args) -> None:
+    model, preprocessor, shap_explainer = load_artifacts()
+    artifacts = {"model": model, "preprocessor": preprocessor, "shap_explainer": shap_explainer}
+    readings = load_sensor_inputs(args.requests)
+    
+    executor = InferenceExecutor(max_workers=args.workers, max_queue=args.clients)
+    batcher = MicroBatcher(executor, window_ms=args.window_ms, max_batch_size=args.max_batch_size)
+    
+    modes = {
+        "unbatched": lambda reading: executor.run_inference(predict_fault_row, reading, **artifacts),
+        "micro-batched": lambda reading: batcher.submit(reading, **artifacts),
+    }
+    
+    print(f"{args.requests} requests from {args.clients} concurrent clients, {args.workers} workers, "
+          f"window {args.window_ms} ms, max batch {args.max_batch_size}")
+    print(f"{'mode':>14} | {'req/sec':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 49)
+    try:
+        for name, score in modes.items():
+            elapsed, latencies = await run_clients(score, readings, args.clients)
+            print(f"{name:>14} | {len(readings) / elapsed:>9,.0f} | "
+                  f"{percentile_ms(latencies, 50):>8.1f} | {percentile_ms(latencies, 99):>8.1f}")
+    finally:
+        executor.shutdown()
+    
+    stats = batcher.stats()
+    print(f"\nMean batch size: {stats['mean_batch_size']:.1f} over {stats['batches']} batches")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests per mode")
+    parser.add_argument("--workers", type=int, default=2, help="inference executor workers")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="batching window")
+    parser.add_argument("--max-batch-size", type=int, default=256, help="readings per batch")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(benchmark(args))
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
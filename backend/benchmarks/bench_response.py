@@ -0,0 +1,84 @@
+"""
+Compare the size and serialization time of /predict/batch response layouts.
+
+Scores dataset readings once with the production artifacts, then times how
+long each layout takes to turn the scored arrays into the response body:
+  - records: one PredictionResponse per reading in a BatchPredictionResponse,
+    validated and rendered as FastAPI does for a response_model
+  - columnar (orjson): columnar_predictions written by orjson
+  - columnar (json): the same layout written by the standard library, the
+    fallback without orjson
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_response [--rows 10000]
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from backend.benchmarks.common import best_of, load_artifacts, load_feature_matrix
+from backend.models.response import BatchPredictionResponse
+from backend.services import columnar
+from backend.services.columnar import columnar_predictions
+from backend.services.predictor import build_prediction_response, predict_fault_matrix
+
+
+def records_body(predictions: np.ndarray, probabilities: np.ndarray, shap_values) -> bytes:
+    """Build and render a BatchPredictionResponse the way FastAPI handles a response_model."""
+    rows = shap_values if shap_values is not None else [None] * len(predictions)
+    response = BatchPredictionResponse(predictions=[
+        build_prediction_response(prediction, row_probabilities, row_shap_values)
+        for prediction, row_probabilities, row_shap_values in zip(predictions, probabilities, rows)
+    ])
+    # FastAPI validates the returned model, dumps it in JSON mode and renders it with JSONResponse
+    content = BatchPredictionResponse.model_validate(response).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def columnar_body(predictions: np.ndarray, probabilities: np.ndarray, shap_values, use_orjson: bool) -> bytes:
+    """Render the columnar layout with orjson or the standard library."""
+    encoder = columnar.orjson
+    columnar.orjson = encoder if use_orjson else None
+    try:
+        return columnar.dumps(columnar_predictions(predictions, probabilities, shap_values))
+    finally:
+        columnar.orjson = encoder
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="readings per response")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per layout; the fastest is reported")
+    args = parser.parse_args()
+
+    if columnar.orjson is None:
+        print("⚠ Warning: orjson not installed, skipping columnar (orjson)")
+
+    model, preprocessor, shap_explainer = load_artifacts()
+    predictions, probabilities, shap_values = predict_fault_matrix(
+        load_feature_matrix(args.rows), model, preprocessor, shap_explainer, explain=True
+    )
+
+    print(f"{args.rows:,} predictions per response, best of {args.repeats}")
+    for explain in (True, False):
+        shap = shap_values if explain else None
+        layouts = {"records": lambda: records_body(predictions, probabilities, shap)}
+        if columnar.orjson is not None:
+            layouts["columnar (orjson)"] = lambda: columnar_body(predictions, probabilities, shap, True)
+        layouts["columnar (json)"] = lambda: columnar_body(predictions, probabilities, shap, False)
+
+        print(f"\nexplain={str(explain).lower()}")
+        print(f"{'layout':<20}{'payload':>12}{'serialize':>14}{'speedup':>10}")
+        baseline = None
+        for name, render in layouts.items():
+            size = len(render())
+            elapsed = best_of(render, args.repeats)
+            baseline = baseline or elapsed
+            print(f"{name:<20}{size / 2 ** 10:>8,.0f} KiB{elapsed * 1e3:>11.1f} ms{baseline / elapsed:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
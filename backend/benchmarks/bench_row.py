@@ -0,0 +1,95 @@
+"""
+Benchmark per-request allocations of the single-row fast path.
+
+Scores the same readings with predict_fault (pandas DataFrames, predict +
+predict_proba) and with predict_fault_row (preallocated buffers, one
+predict_proba call), and reports per request:
+  - peak KiB: peak memory allocated while scoring one reading (tracemalloc),
+    i.e. the DataFrames, intermediate arrays and dicts alive at the same time
+  - latency in milliseconds (measured without tracing)
+
+Each path is measured with the real SHAP explainer and with a stub explainer
+returning precomputed values, which isolates the allocations of the
+preprocessing and model stages.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_row
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend.benchmarks.common import load_artifacts, load_sensor_inputs
+from backend.services.predictor import predict_fault, predict_fault_row
+
+
+NUM_READINGS = 200
+
+
+class PrecomputedExplainer:
+    """Explainer stub returning the same (1, 18, 8) array on every call."""
+
+    def __init__(self, num_classes: int):
+        self._values = np.zeros((1, 18, num_classes))
+
+    def shap_values(self, X):
+        return self._values
+
+
+def peak_allocated_kib(predictor, readings, artifacts) -> float:
+    """Peak traced memory per request in KiB, averaged over readings."""
+    peak_bytes = 0
+    tracemalloc.start()
+    try:
+        for reading in readings:
+            tracemalloc.clear_traces()
+            tracemalloc.reset_peak()
+            predictor(reading, **artifacts)
+            peak_bytes += tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak_bytes / len(readings) / 1024
+
+
+def mean_latency_ms(predictor, readings, artifacts) -> float:
+    """Mean wall time per request in milliseconds."""
+    start = time.perf_counter()
+    for reading in readings:
+        predictor(reading, **artifacts)
+    return (time.perf_counter() - start) / len(readings) * 1000
+
+
+def main() -> int:
+    try:
+        model, preprocessor, shap_explainer = load_artifacts()
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+
+    readings = load_sensor_inputs(NUM_READINGS)
+    explainers = {
+        "with SHAP": shap_explainer,
+        "SHAP stubbed": PrecomputedExplainer(model.n_classes_),
+    }
+
+    print(f"{'explainer':<13} | {'path':<17} | {'peak KiB':>8} | {'latency ms':>10}")
+    print("-" * 58)
+    for explainer_name, explainer in explainers.items():
+        artifacts = {"model": model, "preprocessor": preprocessor, "shap_explainer": explainer}
+        for predictor in (predict_fault, predict_fault_row):
+            # Warm up lazily initialised state (buffers, LightGBM handles)
+            predictor(readings[0], **artifacts)
+            peak_kib = peak_allocated_kib(predictor, readings, artifacts)
+            latency = mean_latency_ms(predictor, readings, artifacts)
+            print(
+                f"{explainer_name:<13} | {predictor.__name__:<17} | {peak_kib:>8.1f} | {latency:>10.3f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Replay the dataset through the SHAP cache and report its hit ratio.
+
+Readings are explained one at a time, as /predict does, in three scenarios:
+  - replay: the first --rows readings of the dataset in file order
+  - replay xN: the same readings replayed --repeats times
+  - steady state: every reading reported --repeats times in a row, with
+    Gaussian jitter of --jitter standard deviations per feature
+
+For each scenario the table shows the cache hit ratio, the hit ratio a
+pred_leaf key would reach (an upper bound, as equal leaves do not imply equal
+SHAP values), mean latency per reading with the cache, and its memory use.
+Uncached latency is measured once on the plain replay.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_shap_cache --rows 1000 --repeats 5 --jitter 1e-4
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.benchmarks.common import DATASET_PATH, load_artifacts
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.shap_cache import CachedExplainer
+
+
+def mean_latency_ms(explainer, X: np.ndarray) -> float:
+    """Mean wall time of explaining every row on its own, in milliseconds."""
+    start = time.perf_counter()
+    for row in range(len(X)):
+        explainer.shap_values(X[row:row + 1])
+    return (time.perf_counter() - start) / len(X) * 1000
+
+
+def leaf_key_hit_ratio(model, X: np.ndarray) -> float:
+    """Hit ratio of an unbounded cache keyed on the pred_leaf vector."""
+    leaves = model.booster_.predict(X, pred_leaf=True)
+    return 1.0 - len(np.unique(leaves, axis=0)) / len(X)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Dataset readings to replay")
+    parser.add_argument("--repeats", type=int, default=5, help="Times each reading is reported")
+    parser.add_argument("--jitter", type=float, default=1e-4, help="Steady-state noise in standard deviations")
+    parser.add_argument("--max-mb", type=float, default=64, help="Memory cap of the cache in MiB")
+    args = parser.parse_args()
+
+    try:
+        model, preprocessor, shap_explainer = load_artifacts()
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+
+    raw = pd.read_csv(DATASET_PATH, usecols=FEATURE_NAMES, nrows=args.rows)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    X = preprocessor.transform(raw)
+    rng = np.random.default_rng(0)
+    steady = np.repeat(X, args.repeats, axis=0)
+    # Scaled features have unit standard deviation
+    steady += rng.normal(size=steady.shape) * args.jitter
+    scenarios = {
+        "replay": X,
+        f"replay x{args.repeats}": np.tile(X, (args.repeats, 1)),
+        "steady state": steady,
+    }
+
+    shap_explainer.shap_values(X[:1])
+    uncached_ms = mean_latency_ms(shap_explainer, X)
+    print(f"Uncached: {uncached_ms:.3f} ms per reading")
+    print()
+
+    print(f"{'scenario':<14} | {'readings':>8} | {'hit ratio':>9} | {'pred_leaf':>9} | {'latency ms':>10} | {'MiB':>6}")
+    print("-" * 70)
+    for name, readings in scenarios.items():
+        cache = CachedExplainer(shap_explainer, model, max_bytes=int(args.max_mb * 1024 * 1024))
+        latency = mean_latency_ms(cache, readings)
+        stats = cache.stats()
+        print(
+            f"{name:<14} | {len(readings):>8} | {stats['hit_ratio']:>9.1%} | "
+            f"{leaf_key_hit_ratio(model, readings):>9.1%} | {latency:>10.3f} | {stats['bytes'] / 2 ** 20:>6.2f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
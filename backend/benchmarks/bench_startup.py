@@ -0,0 +1,163 @@
+"""
+Measure the cold-start budget of the API process.
+
+For each explainer, with and without the startup warm-up (AIMS_WARMUP), in
+fresh processes:
+  - import s: importing backend.main, and which heavy modules that pulls in
+  - model s / explainer s: the two artifact loading stages run in the
+    background by the lifespan (load_serving_model, load_serving_explainer)
+  - live s: from spawning uvicorn until GET /health/live answers
+  - ready s: from spawning uvicorn until GET /health/ready answers 200
+  - first ms: latency of the first POST /predict (with SHAP values) once ready
+  - steady ms: median latency of the next 50 POST /predict calls
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_startup
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+EXPLAINERS = ["shap", "lightgbm"]
+
+HEAVY_MODULES = ["lightgbm", "pandas", "sklearn", "shap", "joblib"]
+
+POLL_INTERVAL_S = 0.01
+
+STEADY_REQUESTS = 50
+
+STARTUP_TIMEOUT_S = 60.0
+
+
+def measure_stages() -> None:
+    """Time the import and both loading stages in this process and print them as JSON."""
+    start = time.perf_counter()
+    import backend.main  # noqa: F401
+    imported = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from backend.services.artifacts import load_serving_explainer, load_serving_model
+    artifacts = load_serving_model()
+    model_loaded = time.perf_counter()
+    load_serving_explainer(artifacts["model"])
+    explainer_loaded = time.perf_counter()
+
+    print(json.dumps({
+        "import_s": imported - start,
+        "model_s": model_loaded - imported,
+        "explainer_s": explainer_loaded - model_loaded,
+        "heavy_modules": heavy,
+    }))
+
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request_ok(url: str, payload: dict | None = None) -> bool:
+    """Whether a GET (or a JSON POST when payload is given) answers 200."""
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=STARTUP_TIMEOUT_S) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+
+def timed_predict(url: str, payload: dict) -> float:
+    """Milliseconds one POST /predict takes."""
+    start = time.perf_counter()
+    if not request_ok(url, payload):
+        raise RuntimeError("/predict failed")
+    return (time.perf_counter() - start) * 1000
+
+
+def measure_server(env: dict[str, str], payload: dict) -> tuple[float, float, float, float]:
+    """Spawn uvicorn; return seconds until live and ready, and first and steady /predict ms."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while not request_ok(f"{base_url}/health/live"):
+            if server.poll() is not None or time.perf_counter() - start > STARTUP_TIMEOUT_S:
+                raise RuntimeError("server did not start")
+            time.sleep(POLL_INTERVAL_S)
+        live = time.perf_counter() - start
+
+        while not request_ok(f"{base_url}/health/ready"):
+            if server.poll() is not None or time.perf_counter() - start > STARTUP_TIMEOUT_S:
+                raise RuntimeError("server did not get ready")
+            time.sleep(POLL_INTERVAL_S)
+        ready = time.perf_counter() - start
+
+        first = timed_predict(f"{base_url}/predict", payload)
+        steady = statistics.median(timed_predict(f"{base_url}/predict", payload) for _ in range(STEADY_REQUESTS))
+    finally:
+        server.terminate()
+        server.wait()
+    return live, ready, first, steady
+
+
+def main() -> int:
+    if len(sys.argv) == 2 and sys.argv[1] == "--child":
+        measure_stages()
+        return 0
+
+    from backend.benchmarks.common import load_sensor_inputs
+    payload = load_sensor_inputs(1)[0].model_dump()
+
+    print(f"{'explainer':>9} | {'warmup':>6} | {'import s':>8} | {'model s':>7} | {'explainer s':>11} | "
+          f"{'live s':>6} | {'ready s':>7} | {'first ms':>8} | {'steady ms':>9} | heavy modules at import")
+    print("-" * 130)
+    for explainer, warmup in [(explainer, warmup) for explainer in EXPLAINERS for warmup in ("0", "1")]:
+        env = {**os.environ, "AIMS_EXPLAINER": explainer, "AIMS_WARMUP": warmup}
+        result = subprocess.run(
+            [sys.executable, "-m", "backend.benchmarks.bench_startup", "--child"],
+            cwd=PROJECT_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"✗ {explainer} run failed:\n{result.stderr}")
+            return 1
+        stages = json.loads(result.stdout.strip().splitlines()[-1])
+
+        try:
+            live, ready, first, steady = measure_server(env, payload)
+        except RuntimeError as e:
+            print(f"✗ {explainer} server {e}")
+            return 1
+
+        print(
+            f"{explainer:>9} | {'on' if warmup == '1' else 'off':>6} | {stages['import_s']:>8.2f} | {stages['model_s']:>7.2f} | "
+            f"{stages['explainer_s']:>11.2f} | {live:>6.2f} | {ready:>7.2f} | {first:>8.2f} | {steady:>9.2f} | "
+            f"{', '.join(stages['heavy_modules']) or 'none'}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
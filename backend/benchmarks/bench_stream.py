@@ -0,0 +1,200 @@
+"""
+Benchmark WebSocket streams against one /predict request per reading.
+
+Simulates many engines, each streaming its readings over its own connection
+to /ws/engines/{engine_id}, and compares throughput and p50/p99 latency with
+the same engines sending every reading as its own POST /predict. Both run
+in-process against the ASGI app, so connection handling by the network stack
+is not included; the HTTP figures are a lower bound for real clients.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_stream [--engines 200] [--readings 20] [--hz 0] [--no-explain]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from backend.benchmarks.common import load_feature_matrix, percentile_ms
+from backend.main import app, get_stream_batcher, get_streams
+from backend.services.executor import InferenceExecutor
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.reload import load_artifact_set
+
+
+class InProcessWebSocket:
+    """Minimal WebSocket client talking to an ASGI app in the same event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def connect(self) -> None:
+        path, _, query = self.path.partition("?")
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"Connection refused: {message}")
+
+    async def send_text(self, text: str) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] != "websocket.send":
+            raise RuntimeError(f"Connection closed: {message}")
+        return message["text"]
+
+    async def close(self) -> None:
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self._task
+
+
+async def stream_engine(
+    engine_id: int,
+    frames: list[str],
+    explain: bool,
+    window: int,
+    interval_s: float,
+    latencies: list
+) -> None:
+    """Stream frames over one connection, keeping at most window frames unanswered."""
+    websocket = InProcessWebSocket(f"/ws/engines/engine-{engine_id}?explain={str(explain).lower()}")
+    await websocket.connect()
+    slots = asyncio.Semaphore(window)
+    sent_at = []
+
+    async def send():
+        for frame in frames:
+            await slots.acquire()
+            sent_at.append(time.perf_counter())
+            await websocket.send_text(frame)
+            if interval_s:
+                await asyncio.sleep(interval_s)
+
+    async def receive():
+        for index in range(len(frames)):
+            reply = json.loads(await websocket.receive_text())
+            if "status_code" in reply:
+                raise RuntimeError(reply["detail"])
+            latencies.append(time.perf_counter() - sent_at[index])
+            slots.release()
+
+    await asyncio.gather(send(), receive())
+    await websocket.close()
+
+
+async def post_engine(
+    client: httpx.AsyncClient,
+    frames: list[str],
+    explain: bool,
+    interval_s: float,
+    latencies: list
+) -> None:
+    """Send every reading of one engine as its own POST /predict, one at a time."""
+    for frame in frames:
+        started = time.perf_counter()
+        response = await client.post(
+            "/predict",
+            params={"explain": str(explain).lower()},
+            content=frame,
+            headers={"content-type": "application/json"}
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        if interval_s:
+            await asyncio.sleep(interval_s)
+
+
+async def benchmark(args) -> None:
+    artifacts, _ = load_artifact_set()
+    app.state.model = artifacts["model"]
+    app.state.preprocessor = artifacts["preprocessor"]
+    app.state.shap_explainer = artifacts["shap_explainer"]
+    app.state.executor = InferenceExecutor(max_workers=args.workers, max_queue=args.engines * args.window)
+
+    features = load_feature_matrix(args.engines * args.readings)
+    frames = [
+        [
+            json.dumps({**dict(zip(FEATURE_NAMES, row)), "Timestamp": second})
+            for second, row in enumerate(features[engine::args.engines].tolist())
+        ]
+        for engine in range(args.engines)
+    ]
+    interval_s = 1.0 / args.hz if args.hz else 0.0
+    explain = not args.no_explain
+    total = args.engines * args.readings
+
+    print(f"{args.engines} engines x {args.readings} readings, {args.workers} workers, "
+          f"{'as fast as possible' if not interval_s else f'{args.hz:g} Hz per engine'}, "
+          f"{args.window} frames in flight per connection, explain={explain}")
+    print(f"{'mode':>10} | {'readings/sec':>12} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 49)
+    try:
+        latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            stream_engine(engine, engine_frames, explain, args.window, interval_s, latencies)
+            for engine, engine_frames in enumerate(frames)
+        ))
+        elapsed = time.perf_counter() - started
+        print(f"{'websocket':>10} | {total / elapsed:>12,.0f} | "
+              f"{percentile_ms(latencies, 50):>8.1f} | {percentile_ms(latencies, 99):>8.1f}")
+        stream_batches = get_stream_batcher().stats()
+        streams = get_streams().stats()
+
+        latencies = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(post_engine(client, engine_frames, explain, interval_s, latencies) for engine_frames in frames))
+            elapsed = time.perf_counter() - started
+        print(f"{'http':>10} | {total / elapsed:>12,.0f} | "
+              f"{percentile_ms(latencies, 50):>8.1f} | {percentile_ms(latencies, 99):>8.1f}")
+    finally:
+        app.state.executor.shutdown()
+
+    print(f"\nStreams: mean batch size {stream_batches['mean_batch_size']:.1f} over {stream_batches['batches']} batches, "
+          f"{streams['throttled']} reads paused by flow control")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", type=int, default=200, help="simulated engines, one connection each")
+    parser.add_argument("--readings", type=int, default=20, help="readings sent per engine")
+    parser.add_argument("--hz", type=float, default=0.0, help="readings per second per engine (0: as fast as possible)")
+    parser.add_argument("--window", type=int, default=8, help="unanswered frames a client allows per connection")
+    parser.add_argument("--no-explain", action="store_true", help="skip SHAP values (explain=false)")
+    parser.add_argument("--workers", type=int, default=2, help="inference executor workers")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(benchmark(args))
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Benchmark the pure-NumPy tree engine against the LightGBM sklearn wrapper.
+
+Reports the time of one predict_proba call on already-scaled features for batch
+sizes from 1 to 10k, for LGBMClassifier and for the flattened FlatTreeEnsemble.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_tree_engine
+"""
+import sys
+import warnings
+
+import numpy as np
+
+from backend.benchmarks.common import best_of, load_artifacts, load_feature_matrix
+from backend.services.tree_engine import build_numpy_engine
+
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+# Calls per timing at batch size 10, scaled down for larger batches so
+# single-row timings are not dominated by timer noise
+CALLS = 50
+
+
+def main() -> int:
+    try:
+        model, preprocessor, _ = load_artifacts()
+    except FileNotFoundError as e:
+        print(f"✗ Could not load model artifacts: {e}")
+        print("  Run backend/run_notebooks.py to generate them first.")
+        return 1
+
+    engine = build_numpy_engine(model)
+    with warnings.catch_warnings():
+        # The scaler was fitted with feature names; plain arrays are fine here
+        warnings.simplefilter("ignore", UserWarning)
+        X = preprocessor.transform(load_feature_matrix(max(BATCH_SIZES)))
+
+    print(f"{len(engine.roots)} trees, max depth {engine.max_depth}")
+    print(f"{'batch size':>10} | {'lightgbm ms':>11} | {'numpy ms':>9} | {'speedup':>7} | {'max |diff|':>10}")
+    print("-" * 62)
+    for batch_size in BATCH_SIZES:
+        batch = X[:batch_size]
+        calls = max(1, CALLS * 10 // batch_size)
+        reference = model.predict_proba(batch)
+        difference = float(np.abs(engine.predict_proba(batch) - reference).max())
+
+        lightgbm_s = best_of(lambda: [model.predict_proba(batch) for _ in range(calls)]) / calls
+        numpy_s = best_of(lambda: [engine.predict_proba(batch) for _ in range(calls)]) / calls
+        print(
+            f"{batch_size:>10} | {lightgbm_s * 1000:>11.3f} | {numpy_s * 1000:>9.3f} | "
+            f"{lightgbm_s / numpy_s:>6.1f}x | {difference:>10.1e}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
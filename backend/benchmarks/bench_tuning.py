@@ -0,0 +1,134 @@
+"""
+Compare hyperparameter tuning with notebook 03's loop against the training pipeline's tune stage.
+
+Both search the same space with the same seeded TPE sampler on the scaled
+training set of the dataset:
+  - notebook loop: serial trials, every one trained to its full n_estimators
+    and scored on the test set
+  - pipeline: the binning and tune stages. Trials are scored on a validation
+    split of the training set, with early stopping and median pruning, run on
+    --n-jobs threads, and share the Datasets binned once per thread
+
+For each the wall time until the best trial finished, the total time and the
+test macro F1 of the model refitted with the chosen parameters are reported.
+The notebook loop selects on the test set, so its test F1 is optimistic.
+
+Then the binning the pipeline saves is reported: the time LGBMClassifier.fit
+would spend binning a trial's training and validation sets from the raw
+readings, for every trial, against binning them once per thread.
+
+Usage (from the project root):
+    python -m backend.benchmarks.bench_tuning [--n-trials 50] [--n-jobs 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from backend.benchmarks.common import DATASET_PATH, best_of
+from backend.training import stages
+
+
+def notebook_tune(X_train_scaled, y_train, X_test_scaled, y_test, n_trials: int, seed: int) -> dict:
+    """The tuning loop of notebook 03, with a seeded sampler and trial times recorded."""
+    import lightgbm as lgb
+    import optuna
+    from sklearn.metrics import f1_score
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    def objective(trial):
+        params = {
+            **stages.BASE_PARAMS,
+            "num_leaves": trial.suggest_int("num_leaves", 20, 100),
+            "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+            "n_estimators": trial.suggest_int("n_estimators", 100, 500),
+            "max_depth": trial.suggest_int("max_depth", 3, 10),
+            "min_child_samples": trial.suggest_int("min_child_samples", 10, 50),
+            "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+        }
+        model = lgb.LGBMClassifier(**params)
+        model.fit(X_train_scaled, y_train)
+        return f1_score(y_test, model.predict(X_test_scaled), average="macro")
+
+    finished = {}
+    started = time.perf_counter()
+    study = optuna.create_study(direction="maximize", sampler=optuna.samplers.TPESampler(seed=seed))
+    study.optimize(
+        objective,
+        n_trials=n_trials,
+        callbacks=[lambda study, trial: finished.__setitem__(trial.number, time.perf_counter() - started)]
+    )
+    return {
+        "best_params": study.best_params,
+        "best_f1": study.best_value,
+        "trial_f1": [trial.value for trial in study.trials],
+        "trial_seconds": [finished[trial.number] for trial in study.trials],
+        "seconds_to_best": finished[study.best_trial.number],
+    }
+
+
+def rebin_trial_sets(X_train_scaled, y_train, validation_size: float = 0.2, random_state: int = 42) -> None:
+    """Bin a trial's training and validation sets from the raw readings, as LGBMClassifier.fit and tune do."""
+    import lightgbm as lgb
+    from sklearn.model_selection import train_test_split
+
+    X_part, X_valid, y_part, y_valid = train_test_split(
+        X_train_scaled, y_train, test_size=validation_size, random_state=random_state, stratify=y_train
+    )
+    train_set = lgb.Dataset(X_part, y_part, params=stages.DATASET_PARAMS).construct()
+    lgb.Dataset(X_valid, y_valid, params=stages.DATASET_PARAMS, reference=train_set).construct()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n-trials", type=int, default=50, help="Optuna trials per method")
+    parser.add_argument("--n-jobs", type=int, default=1, help="concurrent trials of the pipeline (-1: one per CPU)")
+    parser.add_argument("--seed", type=int, default=42, help="seed of both samplers")
+    args = parser.parse_args()
+
+    data = stages.load(str(DATASET_PATH))
+    data = stages.split(data["X"], data["y"], test_size=0.2, random_state=42)
+    data.update(stages.scale(data["X_train"], data["X_test"]))
+    X_train, y_train = data["X_train_scaled"], data["y_train"].to_numpy()
+    X_test, y_test = data["X_test_scaled"], data["y_test"]
+
+    binned_dir = tempfile.TemporaryDirectory()
+
+    def pipeline_tune():
+        return stages.tune(
+            X_train, y_train, stages.BASE_PARAMS, args.n_trials, args.seed,
+            use_smote=False, validation_size=0.2, random_state=42, n_jobs=args.n_jobs
+        )
+
+    methods = {
+        "notebook loop": lambda: notebook_tune(X_train, y_train, X_test, y_test, args.n_trials, args.seed),
+        "pipeline": pipeline_tune,
+    }
+
+    print(f"{args.n_trials} trials per method")
+    print(f"{'method':<16}{'to best':>10}{'total':>10}{'pruned':>8}{'select F1':>11}{'test F1':>9}")
+    for name, run in methods.items():
+        started = time.perf_counter()
+        result = run()
+        total = time.perf_counter() - started
+        binned = stages.binning(X_train, y_train, {}, binned_dir.name)["binned"]
+        fitted = stages.fit(binned, X_test, y_test, stages.BASE_PARAMS, result["best_params"])
+        pruned = sum(value is None for value in result["trial_f1"])
+        print(f"{name:<16}{result['seconds_to_best']:>9.1f}s{total:>9.1f}s{pruned:>8}"
+              f"{result['best_f1']:>11.4f}{fitted['metrics']['f1_macro']:>9.4f}")
+
+    per_trial = best_of(lambda: rebin_trial_sets(X_train, y_train), 10)
+    threads = min((os.cpu_count() or 1) if args.n_jobs == -1 else args.n_jobs, args.n_trials)
+    rebinned, once = per_trial * args.n_trials, per_trial * threads
+    print(f"\nbinning, re-binned every trial: {per_trial * 1e3:.1f} ms x {args.n_trials} trials = {rebinned:.2f}s")
+    print(f"binning, once per thread: {per_trial * 1e3:.1f} ms x {threads} threads = {once:.2f}s")
+    print(f"saved {rebinned - once:.2f}s of {total:.1f}s tuning")
+    binned_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Shared helpers for the backend benchmarks.
+Loads the production artifacts and real sensor readings from the dataset.
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.models.request import SensorInput
+from backend.services import artifacts
+from backend.services.predictor import FEATURE_NAMES
+
+
+DATASET_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+
+def load_artifacts() -> tuple:
+    """Load (model, preprocessor, shap_explainer) from backend/artifacts."""
+    loaded = artifacts.load_artifacts()
+    return loaded["model"], loaded["preprocessor"], loaded["shap_explainer"]
+
+
+def load_feature_matrix(num_rows: int, seed: int = 42) -> np.ndarray:
+    """
+    Sample num_rows raw readings from the dataset as an (N, 18) matrix.
+    Rows are drawn with replacement so any size can be requested.
+    """
+    features = pd.read_csv(DATASET_PATH, usecols=FEATURE_NAMES)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    return features[rng.integers(0, len(features), size=num_rows)]
+
+
+def load_sensor_inputs(num_rows: int, seed: int = 42) -> list[SensorInput]:
+    """Sample num_rows readings from the dataset as SensorInput objects."""
+    return [
+        SensorInput(**dict(zip(FEATURE_NAMES, row)))
+        for row in load_feature_matrix(num_rows, seed).tolist()
+    ]
+
+
+def best_of(func, repeats: int = 3) -> float:
+    """Run func `repeats` times and return the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def percentile_ms(latencies_s: list[float], percentile: float) -> float:
+    """Return the given percentile of a list of latencies (seconds) in milliseconds."""
+    return float(np.percentile(np.asarray(latencies_s), percentile) * 1000.0)
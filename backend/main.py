@@ -1,43 +1,215 @@
-import os
+import asyncio
+import math
+import secrets
+import time
 from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Optional
 
-import joblib
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
-from backend.models.request import SensorInput
-from backend.models.response import PredictionResponse
-from backend.services.predictor import predict_fault
+from backend.models.request import MAX_BATCH_SIZE, BatchSensorInput, SensorInput
+from backend.models.response import (
+    BatchPredictionResponse,
+    EngineHistoryResponse,
+    ExplanationResponse,
+    PredictionResponse,
+)
+from backend.services.artifacts import (
+    ARTIFACTS_DIR,
+    explainer_from_env,
+    inference_engine_from_env,
+    load_serving_explainer,
+    load_serving_model,
+)
+from backend.services.batcher import MicroBatcher
+from backend.services.bulk import (
+    OUTPUT_FORMATS,
+    CsvChunker,
+    CsvFormatError,
+    UploadStreamingResponse,
+    score_csv_upload,
+)
+from backend.services.columnar import BATCH_OUTPUT_FORMATS, columnar_predictions, dumps
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+from backend.services.explanations import ExplanationStore
+from backend.services.history import EngineHistory, timestamp_seconds
+from backend.services.ingest import (
+    BINARY_FORMATS,
+    BINARY_MEDIA_TYPES,
+    PayloadError,
+    UnsupportedFormatError,
+    binary_format,
+    parse_readings,
+)
+from backend.services.prediction_cache import PredictionCache
+from backend.services.registry import (
+    PRIMARY_VERSION,
+    ModelRegistry,
+    UnknownVersionError,
+    VersionNotLoadedError,
+    timed_inference,
+)
+from backend.services.reload import (
+    ArtifactWatcher,
+    admin_token_from_env,
+    artifacts_fingerprint,
+    artifacts_version,
+    load_artifact_set,
+    warm_up,
+)
+from backend.services.streaming import EngineStreams
+from backend.services.warmup import Warmup
+from backend.services.windows import EngineWindows
+from backend.services.predictor import (
+    FAULT_LABEL_INDICES,
+    FAULT_LABELS,
+    FEATURE_NAMES,
+    explain_reading,
+    predict_fault_batch,
+    predict_fault_matrix,
+    predict_fault_row,
+    sensor_inputs_to_matrix,
+)
+
+
+async def _load_artifacts_in_background(app: FastAPI):
+    """
+    Load the model, then the explainer, on worker threads.
+    
+    The server answers requests meanwhile; predictions wait for the stage they
+    need (see wait_for_artifacts), so predictions without explanations can be
+    served before shap and the explainer have been loaded.
+    """
+    try:
+        fingerprint = artifacts_fingerprint(ARTIFACTS_DIR)
+        version = artifacts_version(ARTIFACTS_DIR)
+        artifacts = await asyncio.to_thread(load_serving_model, ARTIFACTS_DIR)
+        app.state.model = artifacts["model"]
+        app.state.preprocessor = artifacts["preprocessor"]
+        app.state.artifacts_fingerprint = fingerprint
+        app.state.artifacts_version = version
+        app.state.model_loaded.set()
+        
+        app.state.shap_explainer = await asyncio.to_thread(load_serving_explainer, artifacts["model"], ARTIFACTS_DIR)
+        app.state.explainer_loaded.set()
+        source = f"bundle {version}" if version else ".pkl files"
+        print(f"✓ Model artifacts loaded successfully (from {source})")
+        print(f"✓ Inference engine: {inference_engine_from_env()}, explainer: {explainer_from_env()}")
+        
+        # Pay for first-call costs before reporting ready
+        warmup = get_warmup()
+        if warmup is not None:
+            await warmup.run(
+                get_executor(),
+                model=app.state.model,
+                preprocessor=app.state.preprocessor,
+                shap_explainer=app.state.shap_explainer
+            )
+            stats = warmup.stats()
+            if warmup.state != "done":
+                print(f"⚠ Warning: Warm-up {warmup.state}: {warmup.error}")
+            else:
+                print(f"✓ Warm-up done in {stats['duration_s']:.2f} s ({stats['rounds']} rounds, "
+                      f"p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms)")
+        
+        # Extra versions load last; until then their traffic goes to the primary
+        registry = get_registry()
+        if registry is not None:
+            await asyncio.to_thread(registry.load)
+    except FileNotFoundError as e:
+        print(f"⚠ Warning: Could not load model artifacts: {e}")
+        print("  Make sure to run the notebooks to generate the artifacts first.")
+    except Exception as e:
+        print(f"⚠ Warning: Could not load model artifacts: {e}")
+    finally:
+        app.state.model_loaded.set()
+        app.state.explainer_loaded.set()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Startup event handler to load model artifacts.
-    Artifacts are stored in app.state for reuse across requests.
+    Artifacts are loaded in the background and stored in app.state for reuse
+    across requests, so the server is live before they are ready.
     """
-    artifacts_dir = os.path.join(os.path.dirname(__file__), "artifacts")
+    # Fail fast on misconfiguration; loading itself happens in the background
+    inference_engine_from_env()
+    explainer_from_env()
+    app.state.registry = ModelRegistry.from_env()
+    if app.state.registry is not None:
+        print(f"✓ Model versions: {', '.join(app.state.registry.version_dirs)} "
+              f"(routes {app.state.registry.routes or 'none'}, shadow {app.state.registry.shadow_version or 'none'})")
     
-    # Load model artifacts
-    model_path = os.path.join(artifacts_dir, "lgbm_model.pkl")
-    preprocessor_path = os.path.join(artifacts_dir, "preprocessor.pkl")
-    explainer_path = os.path.join(artifacts_dir, "shap_explainer.pkl")
+    app.state.model = None
+    app.state.preprocessor = None
+    app.state.shap_explainer = None
+    app.state.artifacts_fingerprint = None
+    app.state.artifacts_version = None
+    app.state.model_loaded = asyncio.Event()
+    app.state.explainer_loaded = asyncio.Event()
+    app.state.reload_lock = asyncio.Lock()
+    app.state.warmup = Warmup.from_env()
+    app.state.warmup_task = None
+    artifacts_loading = asyncio.create_task(_load_artifacts_in_background(app))
     
-    try:
-        app.state.model = joblib.load(model_path)
-        app.state.preprocessor = joblib.load(preprocessor_path)
-        app.state.shap_explainer = joblib.load(explainer_path)
-        print("✓ Model artifacts loaded successfully")
-    except FileNotFoundError as e:
-        print(f"⚠ Warning: Could not load model artifacts: {e}")
-        print("  Make sure to run the notebooks to generate the artifacts first.")
-        app.state.model = None
-        app.state.preprocessor = None
-        app.state.shap_explainer = None
+    # Inference runs on a bounded pool so the event loop stays responsive
+    app.state.executor = InferenceExecutor.from_env(ARTIFACTS_DIR)
+    print(f"✓ Inference executor ready ({app.state.executor.kind}, {app.state.executor.max_workers} workers)")
+    
+    # Optionally coalesce concurrent /predict calls into vectorized batches
+    app.state.batcher = MicroBatcher.from_env(app.state.executor)
+    if app.state.batcher is not None:
+        print(f"✓ Micro-batching enabled (window {app.state.batcher.window_s * 1000:.1f} ms, "
+              f"up to {app.state.batcher.max_batch_size} readings)")
+    
+    # Inputs of recent predictions, for explanations fetched later
+    app.state.explanation_store = ExplanationStore.from_env()
+    
+    # Per-engine WebSocket streams, batched across connections
+    app.state.streams = EngineStreams.from_env()
+    app.state.stream_batcher = None
+    
+    # Rolling-window features of the engines streaming readings
+    app.state.windows = EngineWindows.from_env()
+    
+    # Recent readings and predictions of the engines streaming readings
+    app.state.history = EngineHistory.from_env()
+    
+    # Predictions for repeated readings, keyed on the quantized reading
+    app.state.prediction_cache = PredictionCache.from_env()
+    if app.state.prediction_cache is not None:
+        print(f"✓ Prediction cache enabled (resolution {app.state.prediction_cache.resolution}, "
+              f"{app.state.prediction_cache.max_bytes // (1024 * 1024)} MiB)")
+    
+    # Optionally swap in new artifacts when they change on disk
+    watcher = ArtifactWatcher.from_env(partial(reload_artifacts, force=False), ARTIFACTS_DIR)
+    watching = asyncio.create_task(watcher.run()) if watcher is not None else None
+    if watcher is not None:
+        print(f"✓ Watching {ARTIFACTS_DIR} for new artifacts (every {watcher.poll_s:g} s)")
     
     yield
     
     # Cleanup (if needed)
+    if watching is not None:
+        watching.cancel()
+    artifacts_loading.cancel()
+    if app.state.warmup_task is not None:
+        app.state.warmup_task.cancel()
+    app.state.warmup = None
+    del app.state.model_loaded
+    del app.state.explainer_loaded
+    app.state.executor.shutdown()
+    app.state.executor = None
+    del app.state.batcher
+    app.state.stream_batcher = None
     print("Shutting down AIMS API")
 
 
@@ -59,9 +231,321 @@ app.add_middleware(
 )
 
 
+def _json_safe(value: Any) -> Any:
+    """Replace NaN and infinite floats, which JSON cannot carry, by their names."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    Report invalid requests as FastAPI does, with JSON-safe inputs.
+    
+    A reading rejected for a NaN or Infinity value carries that value as its
+    error input, which the default handler cannot encode.
+    """
+    return await request_validation_exception_handler(
+        request,
+        RequestValidationError([{**error, "input": _json_safe(error.get("input"))} for error in exc.errors()])
+    )
+
+
+def get_executor() -> InferenceExecutor:
+    """Return the inference executor, creating it if the lifespan has not run."""
+    executor = getattr(app.state, "executor", None)
+    if executor is None:
+        executor = InferenceExecutor.from_env(ARTIFACTS_DIR)
+        app.state.executor = executor
+    return executor
+
+
+def get_batcher() -> MicroBatcher | None:
+    """Return the micro-batcher, or None when micro-batching is disabled."""
+    if not hasattr(app.state, "batcher"):
+        app.state.batcher = MicroBatcher.from_env(get_executor())
+    return app.state.batcher
+
+
+def get_stream_batcher() -> MicroBatcher:
+    """
+    Return the batcher scoring streamed readings.
+    
+    Streams always batch across connections: they share the micro-batcher
+    when AIMS_MICROBATCH is enabled, and use their own otherwise.
+    """
+    batcher = get_batcher()
+    if batcher is not None:
+        return batcher
+    stream_batcher = getattr(app.state, "stream_batcher", None)
+    if stream_batcher is None:
+        stream_batcher = MicroBatcher(get_executor())
+        app.state.stream_batcher = stream_batcher
+    return stream_batcher
+
+
+def get_streams() -> EngineStreams:
+    """Return the WebSocket stream server, creating it if the lifespan has not run."""
+    streams = getattr(app.state, "streams", None)
+    if streams is None:
+        streams = EngineStreams.from_env()
+        app.state.streams = streams
+    return streams
+
+
+def get_windows() -> EngineWindows:
+    """Return the per-engine rolling windows, creating them if the lifespan has not run."""
+    windows = getattr(app.state, "windows", None)
+    if windows is None:
+        windows = EngineWindows.from_env()
+        app.state.windows = windows
+    return windows
+
+
+def get_history() -> EngineHistory:
+    """Return the per-engine history store, creating it if the lifespan has not run."""
+    history = getattr(app.state, "history", None)
+    if history is None:
+        history = EngineHistory.from_env()
+        app.state.history = history
+    return history
+
+
+def get_explanation_store() -> ExplanationStore:
+    """Return the explanation store, creating it if the lifespan has not run."""
+    store = getattr(app.state, "explanation_store", None)
+    if store is None:
+        store = ExplanationStore.from_env()
+        app.state.explanation_store = store
+    return store
+
+
+async def wait_for_artifacts(explain: bool) -> None:
+    """
+    Wait for artifacts still loading in the background.
+    
+    Returns at once when they have loaded (or failed to), or when the lifespan
+    has not run. Requests without explanations only wait for the model.
+    """
+    loaded = getattr(app.state, "explainer_loaded" if explain else "model_loaded", None)
+    if loaded is not None:
+        await loaded.wait()
+
+
+def get_prediction_cache() -> PredictionCache | None:
+    """Return the prediction cache, or None when caching is disabled."""
+    if not hasattr(app.state, "prediction_cache"):
+        app.state.prediction_cache = PredictionCache.from_env()
+    return app.state.prediction_cache
+
+
+def get_warmup() -> Warmup | None:
+    """Return the startup warm-up, or None when it is disabled or the lifespan has not run."""
+    return getattr(app.state, "warmup", None)
+
+
+def rewarm_in_background() -> None:
+    """Warm the pool up again on the artifacts being served, replacing a warm-up still running."""
+    warmup = get_warmup()
+    if warmup is None:
+        return
+    previous = getattr(app.state, "warmup_task", None)
+    if previous is not None:
+        previous.cancel()
+    app.state.warmup_task = asyncio.create_task(warmup.run(
+        get_executor(),
+        model=app.state.model,
+        preprocessor=app.state.preprocessor,
+        shap_explainer=app.state.shap_explainer
+    ))
+
+
+def get_reload_lock() -> asyncio.Lock:
+    """Return the lock serializing reloads, creating it if the lifespan has not run."""
+    lock = getattr(app.state, "reload_lock", None)
+    if lock is None:
+        lock = asyncio.Lock()
+        app.state.reload_lock = lock
+    return lock
+
+
+async def reload_artifacts(force: bool = True) -> dict[str, Any]:
+    """
+    Load the artifacts again from disk and swap them in without downtime.
+    
+    The new set is loaded and warmed up with synthetic predictions on a worker
+    thread while the current one keeps serving. It is then swapped in between
+    two requests: requests already scoring finish on the artifacts they
+    started with, and later ones use the new set. In process mode a new pool
+    is started and warmed up with the new artifacts, and the old pool stops
+    once its queued jobs are done. If anything fails, nothing is swapped.
+    After a swap the startup warm-up, if enabled, runs again in the background.
+    
+    Args:
+        force: Whether to reload when the files are unchanged since the last load
+    
+    Returns:
+        Dict with "status" ("reloaded" or "unchanged"), "version" and
+        "previous_version" (bundle versions, None for .pkl artifacts) and
+        "load_s" (seconds spent loading and warming up)
+    
+    Raises:
+        FileNotFoundError: If any of the artifacts is missing
+        ValueError: If the new artifacts fail validation or warm-up
+    """
+    async with get_reload_lock():
+        # Let the startup load finish so it cannot overwrite the new set
+        await wait_for_artifacts(explain=True)
+        
+        previous_version = getattr(app.state, "artifacts_version", None)
+        fingerprint = artifacts_fingerprint(ARTIFACTS_DIR)
+        if not force and fingerprint == getattr(app.state, "artifacts_fingerprint", None):
+            return {"status": "unchanged", "version": previous_version, "previous_version": previous_version, "load_s": 0.0}
+        
+        start = time.perf_counter()
+        artifacts, version = await asyncio.to_thread(load_artifact_set, ARTIFACTS_DIR)
+        
+        executor = get_executor()
+        new_executor = None
+        if executor.kind == "process":
+            # Workers load their own artifacts; warm every one of them up
+            new_executor = InferenceExecutor.from_env(ARTIFACTS_DIR)
+            try:
+                await asyncio.gather(*(new_executor.run_inference(warm_up) for _ in range(new_executor.max_workers)))
+            except Exception:
+                await asyncio.to_thread(new_executor.shutdown)
+                raise
+        load_s = time.perf_counter() - start
+        
+        # No await until every reference is swapped, so each request sees
+        # either the old set or the new one
+        app.state.model = artifacts["model"]
+        app.state.preprocessor = artifacts["preprocessor"]
+        app.state.shap_explainer = artifacts["shap_explainer"]
+        app.state.artifacts_fingerprint = fingerprint
+        app.state.artifacts_version = version
+        if new_executor is not None:
+            app.state.executor = new_executor
+            for batcher in (get_batcher(), getattr(app.state, "stream_batcher", None)):
+                if batcher is not None:
+                    batcher.executor = new_executor
+        # Stored predictions would be explained by a model that did not make them
+        get_explanation_store().clear()
+        cache = get_prediction_cache()
+        if cache is not None:
+            cache.clear()
+        
+        if new_executor is not None:
+            await asyncio.to_thread(executor.shutdown, cancel_queued=False)
+    
+    print(f"✓ Model artifacts reloaded (version {version or 'unversioned'}, {load_s:.2f} s)")
+    # Latency measured on the old artifacts no longer applies, and a failed warm-up deserves another try
+    rewarm_in_background()
+    return {"status": "reloaded", "version": version, "previous_version": previous_version, "load_s": load_s}
+
+
+def get_registry() -> ModelRegistry | None:
+    """Return the model version registry, or None when no extra versions are configured."""
+    if not hasattr(app.state, "registry"):
+        app.state.registry = ModelRegistry.from_env()
+    return app.state.registry
+
+
+def _route(requested: Optional[str]) -> str:
+    """
+    Pick the model version serving a request.
+    
+    Raises:
+        HTTPException: 404 if the requested version is unknown, 503 if it is
+            still loading or failed to load
+    """
+    registry = get_registry()
+    try:
+        if registry is not None:
+            return registry.route(requested)
+        if requested not in (None, PRIMARY_VERSION):
+            raise UnknownVersionError(f"Unknown model version '{requested}', expected one of ['{PRIMARY_VERSION}']")
+        return PRIMARY_VERSION
+    except UnknownVersionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except VersionNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=f"{e}. Please retry shortly.", headers={"Retry-After": "1"})
+
+
+async def _score_shadow(
+    registry: ModelRegistry,
+    sensor_input: SensorInput,
+    explain: bool,
+    primary_response: PredictionResponse,
+    primary_s: Optional[float]
+) -> None:
+    """
+    Score a reading with the shadow version and record how it compares with the primary.
+    
+    Runs as a background task once the primary's response has been sent.
+    """
+    executor = get_executor()
+    # Shadow work only uses idle workers, so it never queues ahead of live requests
+    if executor.queue_depth > 0:
+        registry.record_shadow_skipped()
+        return
+    try:
+        shadow_s, shadow_response = await executor.run_inference(
+            partial(timed_inference, partial(predict_fault_row, explain=explain)),
+            sensor_input,
+            version=registry.shadow_version,
+            **registry.versions[registry.shadow_version]
+        )
+    except ExecutorSaturatedError:
+        registry.record_shadow_skipped()
+        return
+    except Exception as e:
+        print(f"⚠ Warning: Shadow scoring with version '{registry.shadow_version}' failed: {e}")
+        registry.record_shadow_skipped(failed=True)
+        return
+    registry.record_shadow(primary_response.probabilities, shadow_response.probabilities, primary_s, shadow_s)
+
+
+def _remember_predictions(
+    sensor_inputs: list[SensorInput] | np.ndarray,
+    responses: list[PredictionResponse],
+    version: str = PRIMARY_VERSION
+) -> None:
+    """Store the inputs of predictions (readings or a feature matrix) and give each response its prediction_id."""
+    if not isinstance(sensor_inputs, np.ndarray):
+        sensor_inputs = sensor_inputs_to_matrix(sensor_inputs)
+    prediction_ids = _store_predictions(
+        sensor_inputs,
+        [FAULT_LABEL_INDICES[response.prediction_label] for response in responses],
+        version
+    )
+    for response, prediction_id in zip(responses, prediction_ids):
+        response.prediction_id = prediction_id
+
+
+def _store_predictions(features: np.ndarray, predictions: list[int], version: str = PRIMARY_VERSION) -> list[str]:
+    """Store the inputs of predictions for GET /explain/{prediction_id} and return their prediction_ids."""
+    store = get_explanation_store() if version == PRIMARY_VERSION else get_registry().explanation_stores[version]
+    return [store.put(row, prediction) for row, prediction in zip(features, predictions)]
+
+
+def _saturated_exception(error: ExecutorSaturatedError) -> HTTPException:
+    """Build the 503 returned when the inference queue is full."""
+    return HTTPException(
+        status_code=503,
+        detail=f"Server is busy: {error}. Please retry shortly.",
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.get("/")
 async def root():
-    """Health check endpoint."""
+    """Health check endpoint; answers as soon as the server is up (see /health/ready)."""
     return {
         "message": "AIMS API is running",
         "version": "1.0",
@@ -69,41 +553,162 @@ async def root():
     }
 
 
+@app.get("/health/live")
+async def health_live():
+    """
+    Liveness probe.
+    
+    Returns:
+        200 as long as the server process answers requests
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready(response: Response):
+    """
+    Readiness probe.
+    
+    Ready once the model, preprocessor and explainer are loaded and the
+    startup warm-up has finished. A warm-up that failed or was skipped does
+    not hold readiness back, since the artifacts serve regardless; neither
+    does warming up again after a reload.
+    
+    Returns:
+        Status ("ready", "loading", "warming_up" or "failed"), which artifacts
+        are loaded, the artifacts version, and warm-up progress with the warm
+        p50/p99 latency in milliseconds; HTTP 503 unless ready
+    """
+    model_loaded = getattr(app.state, "model", None) is not None and getattr(app.state, "preprocessor", None) is not None
+    explainer_loaded = getattr(app.state, "shap_explainer", None) is not None
+    loading = getattr(app.state, "explainer_loaded", None)
+    warmup = get_warmup()
+    
+    if not (model_loaded and explainer_loaded):
+        status = "loading" if loading is not None and not loading.is_set() else "failed"
+    elif warmup is not None and warmup.runs == 0 and not warmup.done:
+        status = "warming_up"
+    else:
+        status = "ready"
+    
+    if status != "ready":
+        response.status_code = 503
+    return {
+        "status": status,
+        "model_loaded": model_loaded,
+        "explainer_loaded": explainer_loaded,
+        "artifacts_version": getattr(app.state, "artifacts_version", None),
+        "warmup": warmup.stats() if warmup is not None else None,
+    }
+
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(sensor_input: SensorInput):
+async def predict(
+    sensor_input: SensorInput,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    explain: bool = True,
+    x_model_version: Optional[str] = Header(None)
+):
     """
     Predict marine engine fault from sensor readings.
     
     Args:
         sensor_input: Validated sensor readings (18 features)
+        response: Response whose X-Model-Version header names the version used
+        background_tasks: Tasks run after the response is sent (shadow scoring)
+        explain: Query parameter; false skips SHAP, which can then be fetched
+            from GET /explain/{prediction_id}
+        x_model_version: X-Model-Version header; scores with that model
+            version instead of routing the request (see ModelRegistry)
     
     Returns:
         PredictionResponse containing:
         - prediction_label: Human-readable fault type
         - probabilities: Confidence scores for all 8 fault types
-        - shap_values: Feature importance explanations
+        - shap_values: Feature importance explanations (null if explain=false)
+        - prediction_id: Identifier for GET /explain/{prediction_id} (only if explain=false)
     
     Raises:
-        HTTPException: 500 if model artifacts are not loaded or prediction fails
+        HTTPException: 404 if the requested model version is unknown,
+            500 if model artifacts are not loaded or prediction fails,
+            503 if the inference queue is full or the requested version is not loaded
     """
     try:
-        # Check if model artifacts are loaded
-        if app.state.model is None or app.state.preprocessor is None or app.state.shap_explainer is None:
+        await wait_for_artifacts(explain)
+        
+        # Check if model artifacts are loaded; the explainer is only needed
+        # when SHAP values are computed inline
+        if app.state.model is None or app.state.preprocessor is None or (explain and app.state.shap_explainer is None):
             raise HTTPException(
                 status_code=500,
                 detail="Model artifacts not loaded. Please ensure notebooks have been run to generate model files."
             )
         
-        # Call predict_fault function with input and app.state artifacts
-        prediction_response = predict_fault(
-            sensor_input=sensor_input,
-            model=app.state.model,
-            preprocessor=app.state.preprocessor,
-            shap_explainer=app.state.shap_explainer
-        )
+        version = _route(x_model_version)
+        response.headers["X-Model-Version"] = version
+        if version != PRIMARY_VERSION:
+            # Extra versions skip the prediction cache and the micro-batcher,
+            # which serve the primary artifacts
+            prediction_response = await get_executor().run_inference(
+                partial(predict_fault_row, explain=explain),
+                sensor_input,
+                version=version,
+                **get_registry().versions[version]
+            )
+            if not explain:
+                _remember_predictions([sensor_input], [prediction_response], version)
+            return prediction_response
+        
+        artifacts = {
+            "model": app.state.model,
+            "preprocessor": app.state.preprocessor,
+            "shap_explainer": app.state.shap_explainer
+        }
+        registry = get_registry()
+        shadow = registry is not None and registry.should_shadow(version)
+        primary_s = None
+        
+        cache = get_prediction_cache()
+        if cache is not None:
+            features = sensor_inputs_to_matrix([sensor_input])[0]
+            cached_response = cache.get(features, explain, **artifacts)
+            if cached_response is not None:
+                if not explain:
+                    _remember_predictions([sensor_input], [cached_response])
+                if shadow:
+                    background_tasks.add_task(_score_shadow, registry, sensor_input, explain, cached_response, primary_s)
+                return cached_response
         
+        batcher = get_batcher()
+        if batcher is not None:
+            # Coalesced with concurrent requests into one vectorized batch
+            prediction_response = await batcher.submit(sensor_input, explain=explain, **artifacts)
+        elif shadow:
+            # Timed in the worker, to compare with the shadow version
+            primary_s, prediction_response = await get_executor().run_inference(
+                partial(timed_inference, partial(predict_fault_row, explain=explain)),
+                sensor_input,
+                **artifacts
+            )
+        else:
+            # Run the single-row fast path on the inference pool with the app.state artifacts
+            prediction_response = await get_executor().run_inference(
+                partial(predict_fault_row, explain=explain),
+                sensor_input,
+                **artifacts
+            )
+        
+        if shadow:
+            background_tasks.add_task(_score_shadow, registry, sensor_input, explain, prediction_response, primary_s)
+        if cache is not None:
+            cache.put(features, prediction_response, **artifacts)
+        if not explain:
+            _remember_predictions([sensor_input], [prediction_response])
         return prediction_response
         
+    except ExecutorSaturatedError as e:
+        raise _saturated_exception(e)
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -113,3 +718,577 @@ async def predict(sensor_input: SensorInput):
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
+
+
+async def _batch_readings(request: Request) -> list[SensorInput] | np.ndarray:
+    """
+    Readings of a /predict/batch body.
+    
+    A binary Content-Type (see BINARY_MEDIA_TYPES) is parsed and validated as
+    a whole into a feature matrix; anything else is validated as a JSON
+    BatchSensorInput, with the errors FastAPI reports for a body parameter.
+    
+    Raises:
+        HTTPException: 413 if a binary payload holds more than MAX_BATCH_SIZE
+            readings, 415 if its format is not available, 422 if it is invalid
+        RequestValidationError: If a JSON body is invalid
+    """
+    body = await request.body()
+    payload_format = binary_format(request.headers.get("content-type"))
+    if payload_format is None:
+        try:
+            return BatchSensorInput.model_validate_json(body).readings
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+    
+    try:
+        features = parse_readings(body, payload_format)
+    except UnsupportedFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except PayloadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if len(features) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch holds at most {MAX_BATCH_SIZE} readings, got {len(features)}"
+        )
+    return features
+
+
+# The body is read by _batch_readings, so its schema is declared here
+_BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    key: value
+                    for key, value in BatchSensorInput.model_json_schema(
+                        ref_template="#/components/schemas/{model}"
+                    ).items()
+                    if key != "$defs"
+                }
+            },
+            **{
+                media_type: {"schema": {"type": "string", "format": "binary"}}
+                for media_type in BINARY_MEDIA_TYPES
+            },
+        },
+    }
+}
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, openapi_extra=_BATCH_REQUEST_BODY)
+async def predict_batch(
+    request: Request,
+    response: Response,
+    explain: bool = True,
+    output_format: str = Query("records", alias="format"),
+    x_model_version: Optional[str] = Header(None)
+):
+    """
+    Predict marine engine faults for many sensor readings at once.
+    
+    All readings are scored with a single vectorized scaler/model/SHAP pass,
+    which is far cheaper per row than calling /predict once per reading.
+    
+    The body is a JSON BatchSensorInput, or a binary payload of readings with
+    Content-Type application/octet-stream (raw little-endian float32 rows in
+    FEATURE_NAMES order), application/x-npy or
+    application/vnd.apache.arrow.stream / .file (see parse_readings).
+    
+    With format=columnar the response sends the label and feature order once,
+    followed by one entry per reading in prediction_labels, probabilities,
+    shap_values and prediction_ids (see columnar_predictions). It is
+    serialized straight from the scored arrays, skipping PredictionResponse.
+    
+    Args:
+        request: Request whose body holds the readings
+        response: Response whose X-Model-Version header names the version used
+        explain: Query parameter; false skips SHAP for the whole batch, which
+            can then be fetched per reading from GET /explain/{prediction_id}
+        output_format: "format" query parameter; "records" (default) for a
+            BatchPredictionResponse, "columnar" for the columnar layout
+        x_model_version: X-Model-Version header; scores the whole batch with
+            that model version instead of routing the request
+    
+    Returns:
+        BatchPredictionResponse with one prediction per reading, in request
+        order, or the columnar layout of the same predictions
+    
+    Raises:
+        HTTPException: 404 if the requested model version is unknown,
+            413 if a binary payload holds too many readings,
+            415 if a binary format is not available, 422 if the readings are
+            invalid or the format is unknown,
+            500 if model artifacts are not loaded or prediction fails,
+            503 if the inference queue is full or the requested version is not loaded
+    """
+    if output_format not in BATCH_OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown format '{output_format}', expected one of {list(BATCH_OUTPUT_FORMATS)}"
+        )
+    
+    readings = await _batch_readings(request)
+    try:
+        await wait_for_artifacts(explain)
+        
+        # The explainer is only needed when SHAP values are computed inline
+        if app.state.model is None or app.state.preprocessor is None or (explain and app.state.shap_explainer is None):
+            raise HTTPException(
+                status_code=500,
+                detail="Model artifacts not loaded. Please ensure notebooks have been run to generate model files."
+            )
+        
+        version = _route(x_model_version)
+        response.headers["X-Model-Version"] = version
+        if version == PRIMARY_VERSION:
+            artifacts = {
+                "model": app.state.model,
+                "preprocessor": app.state.preprocessor,
+                "shap_explainer": app.state.shap_explainer
+            }
+        else:
+            artifacts = get_registry().versions[version]
+        
+        if output_format == "columnar":
+            features = readings if isinstance(readings, np.ndarray) else sensor_inputs_to_matrix(readings)
+            predictions, probabilities, shap_values = await get_executor().run_inference(
+                partial(predict_fault_matrix, explain=explain),
+                features,
+                version=None if version == PRIMARY_VERSION else version,
+                **artifacts
+            )
+            prediction_ids = None if explain else _store_predictions(features, predictions.tolist(), version)
+            return Response(
+                content=dumps(columnar_predictions(predictions, probabilities, shap_values, prediction_ids)),
+                media_type="application/json",
+                headers={"X-Model-Version": version}
+            )
+        
+        predictions = await get_executor().run_inference(
+            partial(predict_fault_batch, explain=explain),
+            readings,
+            version=None if version == PRIMARY_VERSION else version,
+            **artifacts
+        )
+        
+        if not explain:
+            _remember_predictions(readings, predictions, version)
+        return BatchPredictionResponse(predictions=predictions)
+        
+    except ExecutorSaturatedError as e:
+        raise _saturated_exception(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
+        )
+
+
+@app.post("/predict/csv")
+async def predict_csv(
+    request: Request,
+    output_format: str = Query("ndjson", alias="format"),
+    explain: bool = False,
+    stream: bool = False
+):
+    """
+    Score a CSV log uploaded as the request body, streaming the results back.
+    
+    The upload needs a header with the 18 sensor columns; other columns are
+    ignored except Timestamp and Fault_Label, which are copied to the results.
+    Rows are scored in chunks of AIMS_BULK_CHUNK_ROWS as the upload arrives,
+    and the results are held in a temporary file until the whole upload is
+    scored (see score_csv_upload), so neither the upload nor the results are
+    ever held in memory whole.
+    
+    Args:
+        request: Request whose body is the CSV log
+        output_format: "format" query parameter; "ndjson" (default) for one
+            /predict-style JSON object per row, or "csv" for one row per row
+            with a probability_<label> column per fault type
+        explain: Query parameter; true adds SHAP values, which costs far more
+            than scoring (default: false)
+        stream: Query parameter; true sends each chunk's results as soon as
+            it is scored, for clients that read the response while they send
+            the body; a failure after the first chunk then ends the results
+            with an error record (default: false)
+    
+    Returns:
+        Streaming response with one result per data row, in upload order
+    
+    Raises:
+        HTTPException: 422 if the format is unknown, the header lacks sensor
+            columns or a row cannot be parsed, 500 if model
+            artifacts are not loaded or prediction fails, 503 if the inference
+            queue is full
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown format '{output_format}', expected one of {sorted(OUTPUT_FORMATS)}"
+        )
+    
+    try:
+        await wait_for_artifacts(explain)
+        
+        if app.state.model is None or app.state.preprocessor is None or (explain and app.state.shap_explainer is None):
+            raise HTTPException(
+                status_code=500,
+                detail="Model artifacts not loaded. Please ensure notebooks have been run to generate model files."
+            )
+        
+        artifacts = {
+            "model": app.state.model,
+            "preprocessor": app.state.preprocessor,
+            "shap_explainer": app.state.shap_explainer
+        }
+        results = score_csv_upload(
+            request.stream(),
+            get_executor(),
+            CsvChunker.from_env(),
+            output_format,
+            explain,
+            stream,
+            **artifacts
+        )
+        # Scores the whole upload (with stream, the first chunk), so a bad header fails before the response starts
+        first = await anext(results)
+        
+    except CsvFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ExecutorSaturatedError as e:
+        raise _saturated_exception(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    async def body():
+        yield first
+        async for part in results:
+            yield part
+    
+    if stream:
+        return UploadStreamingResponse(body(), media_type=OUTPUT_FORMATS[output_format])
+    # The upload has been read, so the response may watch for a disconnect
+    return StreamingResponse(body(), media_type=OUTPUT_FORMATS[output_format])
+
+
+@app.websocket("/ws/engines/{engine_id}")
+async def stream_engine(
+    websocket: WebSocket,
+    engine_id: str,
+    explain: bool = True,
+    window: bool = False,
+    payload_format: str = Query("json", alias="format")
+):
+    """
+    Stream readings of one engine and receive a prediction for each.
+    
+    Each text frame holds a reading as sent to /predict, or a JSON array of
+    readings, and is answered on the same connection with the prediction (or
+    array of predictions) plus engine_id, and the reading's Timestamp when it
+    has one. Readings of all connections are scored together in micro-batches
+    with the primary artifacts. Replies come back in the order the frames were
+    sent; a reading that cannot be scored is answered with its status_code and
+    detail instead. See EngineStreams for flow control.
+    
+    With format=raw, npy or arrow, binary frames hold readings in that format
+    instead (see parse_readings), are validated as a whole and are answered
+    with an array; text frames are still JSON.
+    
+    Every valid reading updates the engine's rolling window (see
+    EngineWindows), whether or not the window features are sent, and every
+    scored reading is recorded in the engine's history (see
+    GET /engines/{engine_id}/history).
+    
+    Args:
+        websocket: Connection the readings arrive on
+        engine_id: Engine the readings come from
+        explain: Query parameter; false skips SHAP, which can then be fetched
+            from GET /explain/{prediction_id}
+        window: Query parameter; true adds the reading's rolling mean and
+            standard deviation, delta and EWMA as window_features
+        payload_format: "format" query parameter; "json" (default), "raw",
+            "npy" or "arrow", the payload of binary frames
+    
+    The connection is closed with code 1008 for an unknown format, and with
+    code 1011 if the model artifacts are not loaded.
+    """
+    await websocket.accept()
+    if payload_format != "json" and payload_format not in BINARY_FORMATS:
+        await websocket.close(
+            code=1008,
+            reason=f"Unknown format '{payload_format}', expected one of json, {', '.join(BINARY_FORMATS)}"
+        )
+        return
+    await wait_for_artifacts(explain)
+    if app.state.model is None or app.state.preprocessor is None or (explain and app.state.shap_explainer is None):
+        await websocket.close(code=1011, reason="Model artifacts not loaded")
+        return
+    
+    batcher = get_stream_batcher()
+    
+    async def score(sensor_input: SensorInput) -> PredictionResponse:
+        # Artifacts are looked up per reading, so a reload applies to open streams
+        prediction_response = await batcher.submit(
+            sensor_input,
+            explain=explain,
+            model=app.state.model,
+            preprocessor=app.state.preprocessor,
+            shap_explainer=app.state.shap_explainer
+        )
+        if not explain:
+            _remember_predictions([sensor_input], [prediction_response])
+        return prediction_response
+    
+    await get_streams().serve(
+        websocket,
+        engine_id,
+        score,
+        windows=get_windows(),
+        window_features=window,
+        history=get_history(),
+        payload_format=None if payload_format == "json" else payload_format
+    )
+
+
+def _query_timestamp(name: str, value: Optional[str]) -> Optional[float]:
+    """Seconds since the epoch of a start/end query parameter, given as seconds or ISO 8601."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        seconds = timestamp_seconds(value, default=float("nan"))
+    if seconds != seconds:
+        raise HTTPException(
+            status_code=422,
+            detail=f"'{name}' must be seconds since the epoch or an ISO 8601 timestamp, got '{value}'"
+        )
+    return seconds
+
+
+@app.get("/engines/{engine_id}/history", response_model=EngineHistoryResponse)
+async def engine_history(
+    engine_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Recent readings and predictions of an engine streamed over /ws/engines/{engine_id}.
+    
+    Args:
+        engine_id: Engine to look up
+        start: Query parameter; earliest reading timestamp included, as seconds
+            since the epoch or ISO 8601 (UTC unless it has an offset)
+        end: Query parameter; latest reading timestamp included, same formats
+        limit: Query parameter; only the most recent readings in the range, at most this many
+    
+    Returns:
+        EngineHistoryResponse with the engine's readings in the range, oldest first
+    
+    Raises:
+        HTTPException: 404 if the engine has no history, 422 if start or end
+            cannot be parsed, 500 if the lookup fails
+    """
+    try:
+        history = get_history().query(
+            engine_id,
+            start=_query_timestamp("start", start),
+            end=_query_timestamp("end", end),
+            limit=limit
+        )
+        if history is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No history for engine '{engine_id}'. Only engines streaming readings have history."
+            )
+        
+        labels = list(FAULT_LABELS.values())
+        return EngineHistoryResponse(
+            engine_id=engine_id,
+            feature_names=FEATURE_NAMES,
+            labels=labels,
+            timestamps=history["timestamps"].tolist(),
+            readings=history["readings"].tolist(),
+            prediction_labels=[labels[prediction] for prediction in history["predictions"].tolist()],
+            probabilities=history["probabilities"].tolist()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"History lookup failed: {str(e)}"
+        )
+
+
+@app.get("/explain/{prediction_id}", response_model=ExplanationResponse)
+async def explain_prediction(prediction_id: str):
+    """
+    Compute the SHAP values of an earlier prediction made with explain=false.
+    
+    The explanation is computed by the model version that made the prediction.
+    
+    Args:
+        prediction_id: Identifier returned by /predict or /predict/batch
+    
+    Returns:
+        ExplanationResponse with the SHAP values of the predicted class
+    
+    Raises:
+        HTTPException: 404 if the prediction is unknown, has expired or was
+            evicted by newer predictions,
+            500 if model artifacts are not loaded or the explanation fails,
+            503 if the inference queue is full
+    """
+    try:
+        stored = get_explanation_store().get(prediction_id)
+        version = PRIMARY_VERSION
+        registry = get_registry()
+        if stored is None and registry is not None:
+            found = registry.find_explanation(prediction_id)
+            if found is not None:
+                version, *stored = found
+        if stored is None:
+            raise HTTPException(
+                status_code=404,
+                detail=(
+                    f"Prediction '{prediction_id}' not found or expired. Only the most recent "
+                    f"{get_explanation_store().max_entries} predictions made with explain=false are kept, "
+                    f"so large batches evict older ones. Please predict again."
+                )
+            )
+        
+        await wait_for_artifacts(explain=True)
+        
+        if app.state.model is None or app.state.preprocessor is None or app.state.shap_explainer is None:
+            raise HTTPException(
+                status_code=500,
+                detail="Model artifacts not loaded. Please ensure notebooks have been run to generate model files."
+            )
+        
+        if version == PRIMARY_VERSION:
+            artifacts = {
+                "model": app.state.model,
+                "preprocessor": app.state.preprocessor,
+                "shap_explainer": app.state.shap_explainer
+            }
+        else:
+            artifacts = registry.versions[version]
+        
+        features, prediction = stored
+        shap_values = await get_executor().run_inference(
+            explain_reading,
+            features,
+            prediction,
+            version=None if version == PRIMARY_VERSION else version,
+            **artifacts
+        )
+        
+        return ExplanationResponse(
+            prediction_id=prediction_id,
+            prediction_label=FAULT_LABELS[prediction],
+            shap_values=shap_values
+        )
+        
+    except ExecutorSaturatedError as e:
+        raise _saturated_exception(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Explanation failed: {str(e)}"
+        )
+
+
+@app.post("/admin/reload")
+async def reload_model(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load new model artifacts from disk and swap them in without downtime.
+    
+    Disabled unless AIMS_ADMIN_TOKEN is set; the request must then carry the
+    token in the X-Admin-Token header.
+    
+    Returns:
+        Reload status, the new and previous bundle versions, and the seconds
+        spent loading and warming up the new artifacts
+    
+    Raises:
+        HTTPException: 403 if AIMS_ADMIN_TOKEN is not set, 401 if X-Admin-Token
+            is missing or wrong, 409 if a reload is already in progress, 500 if
+            the new artifacts fail to load or validate; the previous artifacts
+            keep serving
+    """
+    token = admin_token_from_env()
+    if token is None:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled. Set AIMS_ADMIN_TOKEN to enable them."
+        )
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token header.")
+    
+    if get_reload_lock().locked():
+        raise HTTPException(
+            status_code=409,
+            detail="A reload is already in progress. Please retry once it has finished."
+        )
+    
+    try:
+        return await reload_artifacts()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Reload failed, still serving the previous artifacts: {str(e)}"
+        )
+
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    """
+    Inference pool metrics for sizing workers.
+    
+    Returns:
+        Pool configuration, current queue depth and in-flight jobs, completed
+        and rejected counts, queue wait time statistics in milliseconds, batch
+        statistics when micro-batching is enabled, WebSocket stream counts,
+        rolling window and engine history counts and memory,
+        explanation store counts, prediction cache and SHAP cache hit/miss
+        counts when caching is enabled, the version of the artifacts being
+        served, and model version routing
+        and shadow comparison statistics when extra versions are configured
+    """
+    stats = get_executor().stats()
+    stats["artifacts_version"] = getattr(app.state, "artifacts_version", None)
+    registry = get_registry()
+    stats["registry"] = registry.stats() if registry is not None else None
+    batcher = get_batcher()
+    stats["microbatch"] = batcher.stats() if batcher is not None else None
+    stats["streams"] = get_streams().stats()
+    stats["windows"] = get_windows().stats()
+    stats["history"] = get_history().stats()
+    stats["explanations"] = get_explanation_store().stats()
+    cache = get_prediction_cache()
+    stats["prediction_cache"] = cache.stats() if cache is not None else None
+    # Imported on use, as it pulls in LightGBM
+    from backend.services.shap_cache import CachedExplainer
+    
+    shap_explainer = getattr(app.state, "shap_explainer", None)
+    stats["shap_cache"] = shap_explainer.stats() if isinstance(shap_explainer, CachedExplainer) else None
+    return stats
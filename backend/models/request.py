@@ -2,6 +2,11 @@
 from pydantic import BaseModel, Field
 
 
+# Upper bound on readings per batch request, keeps a single request from
+# monopolising the scoring workers
+MAX_BATCH_SIZE = 10000
+
+
 class SensorInput(BaseModel):
     """
     Sensor input model for marine engine fault prediction.
@@ -28,6 +33,9 @@ class SensorInput(BaseModel):
     Cylinder4_Exhaust_Temp: float = Field(..., description="Cylinder 4 exhaust gas temperature in degrees Celsius")
     
     class Config:
+        # NaN and Infinity are valid JSON tokens for Python's parser; reject
+        # them as binary payloads are rejected (see ingest.validate_readings)
+        allow_inf_nan = False
         json_schema_extra = {
             "example": {
                 "Shaft_RPM": 1800.0,
@@ -50,3 +58,16 @@ class SensorInput(BaseModel):
                 "Cylinder4_Exhaust_Temp": 349.0
             }
         }
+
+
+class BatchSensorInput(BaseModel):
+    """
+    Batch input model for scoring many sensor readings in one request.
+    Readings are scored together in a single vectorized pass.
+    """
+    readings: list[SensorInput] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description=f"Sensor readings to score (1 to {MAX_BATCH_SIZE} per request)"
+    )
@@ -1,4 +1,6 @@
 """Response models for AIMS API."""
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -6,6 +8,8 @@ class PredictionResponse(BaseModel):
     """
     Prediction response model for marine engine fault prediction.
     Contains the predicted fault label, class probabilities, and SHAP feature importance values.
+    SHAP values are None when the request skipped them (explain=false); they can
+    then be fetched later from GET /explain/{prediction_id}.
     """
     prediction_label: str = Field(
         ..., 
@@ -15,14 +19,19 @@ class PredictionResponse(BaseModel):
         ..., 
         description="Confidence scores for all 8 fault types"
     )
-    shap_values: dict[str, float] = Field(
-        ..., 
-        description="Feature importance values for all 18 sensor features"
+    shap_values: Optional[dict[str, float]] = Field(
+        None,
+        description="Feature importance values for all 18 sensor features, null if not requested"
+    )
+    prediction_id: Optional[str] = Field(
+        None,
+        description="Identifier to fetch the explanation later from GET /explain/{prediction_id}"
     )
     
     class Config:
         json_schema_extra = {
             "example": {
+                "prediction_id": "3f2b9c4e8a1d4c0fa6b7e5d2c1a09f87",
                 "prediction_label": "Normal Operation",
                 "probabilities": {
                     "Normal Operation": 0.85,
@@ -56,3 +65,69 @@ class PredictionResponse(BaseModel):
                 }
             }
         }
+
+
+class BatchPredictionResponse(BaseModel):
+    """
+    Batch prediction response model.
+    Contains one PredictionResponse per submitted reading, in request order.
+    """
+    predictions: list[PredictionResponse] = Field(
+        ...,
+        description="Prediction for each reading, in the same order as the request"
+    )
+
+
+class ExplanationResponse(BaseModel):
+    """
+    Deferred explanation of an earlier prediction.
+    Contains the SHAP values of the predicted class, computed on demand.
+    """
+    prediction_id: str = Field(
+        ...,
+        description="Identifier returned by /predict"
+    )
+    prediction_label: str = Field(
+        ...,
+        description="Fault label the explanation refers to"
+    )
+    shap_values: dict[str, float] = Field(
+        ...,
+        description="Feature importance values for all 18 sensor features"
+    )
+
+
+class EngineHistoryResponse(BaseModel):
+    """
+    Recent readings and predictions of one engine, oldest first.
+    Columnar: the feature and label order are sent once, and every reading
+    contributes one entry to each list.
+    """
+    engine_id: str = Field(
+        ...,
+        description="Engine the history belongs to"
+    )
+    feature_names: list[str] = Field(
+        ...,
+        description="Order of the values in each row of readings"
+    )
+    labels: list[str] = Field(
+        ...,
+        description="Order of the values in each row of probabilities"
+    )
+    timestamps: list[float] = Field(
+        ...,
+        description="Reading timestamps, in seconds since the epoch"
+    )
+    readings: list[list[float]] = Field(
+        ...,
+        description="Raw sensor values of each reading"
+    )
+    prediction_labels: list[str] = Field(
+        ...,
+        description="Fault label predicted for each reading"
+    )
+    probabilities: list[list[float]] = Field(
+        ...,
+        description="Class probabilities of each reading"
+    )
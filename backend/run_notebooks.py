@@ -1,12 +1,20 @@
 """
 Script to execute all Jupyter notebooks in sequence.
-This ensures the ML pipeline runs in the correct order and generates all required artifacts.
+This ensures the ML pipeline runs in the correct order and generates all required artifacts,
+then packs the model and scaler into the versioned bundle served by the API.
+
+Usage (from the backend directory):
+    python run_notebooks.py                 # run the notebooks, then build the bundle
+    python run_notebooks.py --bundle-only   # rebuild the bundle from existing .pkl files
 """
 import os
 import sys
 import subprocess
 from pathlib import Path
 
+# Allow `backend.` imports when run as a script from the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 # Define notebook execution order (relative to project root)
 NOTEBOOKS = [
     "../notebooks/01_Data_Exploration_Cleaning.ipynb",
@@ -22,6 +30,13 @@ ARTIFACTS = [
     "artifacts/shap_explainer.pkl"
 ]
 
+# Bundle built from the artifacts (relative to backend directory)
+BUNDLE_DIR = "artifacts/bundle"
+
+# Dataset readings the bundle's predictions are checked on
+DATASET_PATH = "../data/marine_engine_fault_dataset.csv"
+VALIDATION_ROWS = 2000
+
 def check_jupyter_installed():
     """Check if jupyter is installed."""
     try:
@@ -85,12 +100,57 @@ def verify_artifacts():
     
     return all_exist
 
+def build_bundle():
+    """Pack the model and scaler into the bundle and validate it against the pickles."""
+    print(f"\n{'='*60}")
+    print("Building artifact bundle...")
+    print(f"{'='*60}")
+    
+    import numpy as np
+    import pandas as pd
+    from backend.services.artifacts import BUNDLE_SOURCES, load_artifacts
+    from backend.services.bundle import BundleError, load_bundle, write_bundle
+    from backend.services.predictor import FEATURE_NAMES
+    
+    artifacts = load_artifacts("artifacts", load_explainer=False)
+    try:
+        manifest = write_bundle(
+            artifacts["model"],
+            artifacts["preprocessor"],
+            BUNDLE_DIR,
+            sources={filename: os.path.join("artifacts", filename) for filename in BUNDLE_SOURCES}
+        )
+        bundle = load_bundle(BUNDLE_DIR)
+    except BundleError as e:
+        print(f"✗ Invalid bundle: {e}")
+        return False
+    print(f"✓ Bundle {manifest['version']} written to {BUNDLE_DIR}")
+    
+    # The bundle must reproduce the pickled model exactly
+    raw = pd.read_csv(DATASET_PATH, usecols=FEATURE_NAMES, nrows=VALIDATION_ROWS)[FEATURE_NAMES]
+    expected = artifacts["model"].predict_proba(artifacts["preprocessor"].transform(raw))
+    result = bundle["model"].predict_proba(bundle["preprocessor"].transform(raw))
+    if not np.array_equal(result, expected):
+        print(f"✗ Bundle predictions differ from the pickled model (max diff {np.abs(result - expected).max():.3g})")
+        return False
+    print(f"✓ Bundle predictions match the pickled model on {len(raw)} readings")
+    
+    for filename, digest in manifest["files"].items():
+        print(f"  {filename}: sha256 {digest[:16]}...")
+    return True
+
 def main():
     """Main execution function."""
     print("="*60)
     print("AIMS Notebook Execution Pipeline")
     print("="*60)
     
+    if "--bundle-only" in sys.argv[1:]:
+        if not verify_artifacts():
+            print("\n✗ Run the notebooks first to generate the artifacts.")
+            return 1
+        return 0 if build_bundle() else 1
+    
     # Check if jupyter is installed
     if not check_jupyter_installed():
         print("\n✗ ERROR: Jupyter is not installed or not in PATH")
@@ -129,6 +189,10 @@ def main():
         print("The notebooks may not have completed successfully.")
         return 1
     
+    if not build_bundle():
+        print("\n✗ The artifact bundle could not be built.")
+        return 1
+    
     print("\n" + "="*60)
     print("✓ All notebooks executed successfully!")
     print("✓ All artifacts generated!")
@@ -0,0 +1,304 @@
+"""
+Score sensor logs offline with the production artifacts.
+Reads CSV or Parquet files in chunks of rows, scores the chunks in parallel
+on a process pool and writes the predictions, class probabilities and
+optionally SHAP values of every row to Parquet (or CSV), in input order.
+Meant for fleet-wide rescoring, where one HTTP request per reading would be
+far too slow.
+
+Usage (from the project root):
+    python backend/score_files.py logs/*.csv --output-dir scored/
+    python backend/score_files.py fleet.parquet --output-dir scored/ --explain --workers 4
+    python backend/score_files.py fleet.csv --output-dir scored/ --format csv --chunk-rows 50000
+
+Every input gets one output in the output directory, named after it:
+fleet.csv is written to scored/fleet.scored.parquet. Output columns are
+Timestamp and Fault_Label when the input has them, prediction_label,
+probability_<label> for the 8 fault labels and, with --explain,
+shap_<feature> for the 18 sensor features. Parquet needs pyarrow.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Allow `backend.` imports when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.services.artifacts import (
+    ARTIFACTS_DIR,
+    load_serving_explainer,
+    load_serving_model,
+    serving_artifact_files,
+)
+from backend.services.bulk import PASSTHROUGH_COLUMNS, results_frame
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, predict_fault_matrix
+
+# Output formats and the file suffix of each
+OUTPUT_SUFFIXES = {
+    "parquet": ".scored.parquet",
+    "csv": ".scored.csv",
+}
+
+# Artifacts of this process, loaded once per pool worker by _init_worker
+_worker_artifacts = {}
+
+def _init_worker(artifacts_dir, explain):
+    """Process pool initializer: load the serving model, and the explainer if needed, once per worker."""
+    _worker_artifacts.update(load_serving_model(artifacts_dir))
+    _worker_artifacts["shap_explainer"] = (
+        load_serving_explainer(_worker_artifacts["model"], artifacts_dir) if explain else None
+    )
+
+def score_chunk(features, passthrough, explain):
+    """
+    Score one chunk of readings in a pool worker.
+
+    Args:
+        features: Raw sensor readings [num_rows, 18] in FEATURE_NAMES order
+        passthrough: DataFrame of the passthrough columns of the same rows
+        explain: Whether SHAP values are computed and included
+
+    Returns:
+        DataFrame of results, one row per reading
+    """
+    import numpy as np
+
+    if len(features) == 0:
+        # The scaler rejects empty input; an empty file still gets its columns
+        shap_values = np.empty((0, len(FEATURE_NAMES))) if explain else None
+        return results_frame(passthrough, np.empty(0, dtype=object), np.empty((0, len(FAULT_LABELS))), shap_values)
+
+    predictions, probabilities, shap_values = predict_fault_matrix(features, explain=explain, **_worker_artifacts)
+    labels = np.array(list(FAULT_LABELS.values()), dtype=object)[predictions]
+    return results_frame(passthrough, labels, probabilities, shap_values)
+
+def read_chunks(path, chunk_rows):
+    """
+    Read a CSV or Parquet file in chunks of rows.
+
+    Args:
+        path: File to read; Parquet if its suffix is .parquet, CSV otherwise
+        chunk_rows: Rows per chunk
+
+    Yields:
+        (features [num_rows, 18] in FEATURE_NAMES order, passthrough DataFrame);
+        a file without rows yields one empty chunk
+
+    Raises:
+        ValueError: If the file lacks any of the 18 sensor columns
+    """
+    import numpy as np
+    import pandas as pd
+
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        columns = parquet.schema_arrow.names
+    else:
+        columns = pd.read_csv(path, nrows=0).columns.tolist()
+
+    missing = [name for name in FEATURE_NAMES if name not in columns]
+    if missing:
+        raise ValueError(f"{path} is missing sensor columns: {', '.join(missing)}")
+
+    passthrough = [name for name in PASSTHROUGH_COLUMNS if name in columns]
+    if path.suffix == ".parquet":
+        batches = (
+            batch.to_pandas()
+            for batch in parquet.iter_batches(batch_size=chunk_rows, columns=[*passthrough, *FEATURE_NAMES])
+        )
+    else:
+        batches = pd.read_csv(
+            path,
+            usecols=[*passthrough, *FEATURE_NAMES],
+            dtype={name: str for name in passthrough},
+            chunksize=chunk_rows
+        )
+
+    empty = True
+    for frame in batches:
+        empty = False
+        yield frame[FEATURE_NAMES].to_numpy(dtype=np.float64), frame[passthrough]
+    if empty:
+        yield np.empty((0, len(FEATURE_NAMES))), pd.DataFrame(columns=passthrough, dtype=object)
+
+class ResultWriter:
+    """Appends result chunks to one Parquet or CSV file."""
+
+    def __init__(self, path, output_format):
+        """
+        Args:
+            path: File the results are written to
+            output_format: "parquet" or "csv"
+        """
+        self.path = path
+        self.output_format = output_format
+        self._writer = None
+
+    def write(self, result):
+        """Append the rows of a result DataFrame."""
+        if self.output_format == "csv":
+            result.to_csv(self.path, mode="a" if self._writer else "w", header=not self._writer, index=False)
+            self._writer = True
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = pa.Table.from_pandas(result, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Every row group must match the schema of the first
+            table = pa.Table.from_pandas(result, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        """Finish the file."""
+        if self.output_format == "parquet" and self._writer is not None:
+            self._writer.close()
+
+def score_file(path, output_path, pool, chunk_rows, explain, output_format, max_in_flight):
+    """
+    Score one file chunk by chunk and write the results in input order.
+
+    At most max_in_flight chunks are read ahead of the writer, so memory use
+    is bounded by a few chunks whatever the size of the file.
+
+    Args:
+        path: CSV or Parquet file to score
+        output_path: File the results are written to
+        pool: Process pool the chunks are scored on, or None to score in this process
+        chunk_rows: Rows per chunk
+        explain: Whether SHAP values are computed and included
+        output_format: "parquet" or "csv"
+        max_in_flight: Chunks read but not yet written at once
+
+    Returns:
+        Number of rows scored
+    """
+    writer = ResultWriter(output_path, output_format)
+    pending = deque()
+    rows = 0
+    try:
+        for features, passthrough in read_chunks(path, chunk_rows):
+            if pool is None:
+                result = score_chunk(features, passthrough, explain)
+                writer.write(result)
+                rows += len(result)
+                continue
+            pending.append(pool.submit(score_chunk, features, passthrough, explain))
+            if len(pending) >= max_in_flight:
+                result = pending.popleft().result()
+                writer.write(result)
+                rows += len(result)
+        while pending:
+            result = pending.popleft().result()
+            writer.write(result)
+            rows += len(result)
+    finally:
+        for future in pending:
+            future.cancel()
+        writer.close()
+    return rows
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", nargs="+", type=Path, help="CSV or Parquet files to score")
+    parser.add_argument("--output-dir", type=Path, default=Path("."), help="directory the results are written to")
+    parser.add_argument("--format", choices=sorted(OUTPUT_SUFFIXES), default="parquet", help="output format")
+    parser.add_argument("--explain", action="store_true", help="include the SHAP values of the predicted class")
+    parser.add_argument("--chunk-rows", type=int, default=20000, help="rows scored per vectorized pass")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="scoring processes (1: score in this process)"
+    )
+    parser.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="directory containing the .pkl artifacts")
+    args = parser.parse_args(argv)
+    if args.chunk_rows < 1 or args.workers < 1:
+        parser.error("--chunk-rows and --workers must be at least 1")
+    return args
+
+def main(argv=None):
+    """Main execution function."""
+    args = parse_args(argv)
+
+    if args.format == "parquet" or any(path.suffix == ".parquet" for path in args.inputs):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("✗ ERROR: Parquet needs pyarrow")
+            print("Install with: pip install pyarrow, or write CSV with --format csv")
+            return 1
+
+    for path in args.inputs:
+        if not path.is_file():
+            print(f"✗ ERROR: Input not found: {path}")
+            return 1
+
+    # Workers load the artifacts themselves; check the ones they need are there before starting any
+    try:
+        required = serving_artifact_files(args.artifacts_dir, load_explainer=args.explain)
+    except ValueError as e:
+        print(f"✗ ERROR: {e}")
+        return 1
+    for filename in required:
+        if not os.path.exists(os.path.join(args.artifacts_dir, filename)):
+            print(f"✗ Could not load model artifacts: {filename} not found in {args.artifacts_dir}")
+            print("  Run backend/run_notebooks.py to generate them first.")
+            return 1
+
+    if args.workers == 1:
+        _init_worker(args.artifacts_dir, args.explain)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.artifacts_dir, args.explain)
+        )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Scoring {len(args.inputs)} file(s) with {args.workers} worker(s), "
+          f"{args.chunk_rows} rows per chunk, explain={args.explain}")
+
+    total_rows = 0
+    started = time.perf_counter()
+    try:
+        for path in args.inputs:
+            output_path = args.output_dir / (path.stem + OUTPUT_SUFFIXES[args.format])
+            file_started = time.perf_counter()
+            try:
+                rows = score_file(
+                    path,
+                    output_path,
+                    pool,
+                    args.chunk_rows,
+                    args.explain,
+                    args.format,
+                    max_in_flight=2 * args.workers
+                )
+            except Exception as e:
+                print(f"✗ Scoring {path} failed: {e}")
+                return 1
+            elapsed = time.perf_counter() - file_started
+            total_rows += rows
+            print(f"✓ {path}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/sec) -> {output_path}")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ Scored {total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/sec)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
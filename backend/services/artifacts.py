@@ -0,0 +1,283 @@
+"""
+Model artifact loading.
+Reads the serialized model, preprocessor and SHAP explainer produced by the notebooks,
+and applies the serving-time optimisations enabled through environment variables.
+
+joblib, LightGBM and shap are imported on first use rather than with this
+module, so importing the API does not pay for them.
+"""
+import os
+from typing import Any
+
+from backend.services.bundle import changed_sources, is_bundle, load_bundle
+
+
+# Default location of the artifacts generated by backend/run_notebooks.py
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts")
+
+MODEL_FILENAME = "lgbm_model.pkl"
+PREPROCESSOR_FILENAME = "preprocessor.pkl"
+EXPLAINER_FILENAME = "shap_explainer.pkl"
+
+# Versioned bundle written by backend/run_notebooks.py; preferred over the pickles
+BUNDLE_DIRNAME = "bundle"
+
+# Pickles a bundle is written from; the bundle is not served once they change
+BUNDLE_SOURCES = (MODEL_FILENAME, PREPROCESSOR_FILENAME)
+
+# Engines that can evaluate the trees at serving time
+INFERENCE_ENGINES = ("lightgbm", "numpy")
+
+# Engines that can compute the SHAP explanations at serving time
+EXPLAINERS = ("shap", "lightgbm")
+
+
+def load_artifacts(artifacts_dir: str = ARTIFACTS_DIR, load_explainer: bool = True) -> dict[str, Any]:
+    """
+    Load the model artifacts from disk.
+    
+    Args:
+        artifacts_dir: Directory containing the .pkl artifacts
+        load_explainer: Whether to unpickle shap_explainer.pkl (which imports shap);
+            if False the "shap_explainer" entry is None
+    
+    Returns:
+        Dict with "model", "preprocessor" and "shap_explainer" keys, matching
+        the keyword arguments of predict_fault
+    
+    Raises:
+        FileNotFoundError: If any of the artifacts is missing
+    """
+    import joblib
+    
+    return {
+        "model": joblib.load(os.path.join(artifacts_dir, MODEL_FILENAME)),
+        "preprocessor": joblib.load(os.path.join(artifacts_dir, PREPROCESSOR_FILENAME)),
+        "shap_explainer": (
+            joblib.load(os.path.join(artifacts_dir, EXPLAINER_FILENAME)) if load_explainer else None
+        ),
+    }
+
+
+def stale_bundle_sources(artifacts_dir: str = ARTIFACTS_DIR) -> list[str]:
+    """
+    Pickles of artifacts_dir that changed after its bundle was written from them.
+
+    Non-empty when the pickles were regenerated without rebuilding the bundle;
+    the pickles are then served instead (see serves_bundle).
+    """
+    bundle_dir = os.path.join(artifacts_dir, BUNDLE_DIRNAME)
+    if not is_bundle(bundle_dir):
+        return []
+    return changed_sources(bundle_dir, artifacts_dir, BUNDLE_SOURCES)
+
+
+def serves_bundle(artifacts_dir: str = ARTIFACTS_DIR) -> bool:
+    """Whether artifacts_dir is served from its bundle rather than its .pkl files."""
+    return is_bundle(os.path.join(artifacts_dir, BUNDLE_DIRNAME)) and not stale_bundle_sources(artifacts_dir)
+
+
+def fold_artifacts(artifacts: dict[str, Any]) -> dict[str, Any]:
+    """
+    Fold the StandardScaler into the model's split thresholds.
+    
+    The folded model takes raw sensor readings, so the preprocessor becomes an
+    IdentityScaler and the SHAP explainer is rebuilt over the folded booster
+    (TreeSHAP values do not depend on threshold values, so they are unchanged).
+    
+    Args:
+        artifacts: Dict returned by load_artifacts
+    
+    Returns:
+        New artifacts dict with the same keys; "shap_explainer" stays None if
+        no explainer was loaded
+    """
+    from backend.services.folding import IdentityScaler, fold_scaler_into_model
+    
+    folded_model = fold_scaler_into_model(artifacts["model"], artifacts["preprocessor"])
+    shap_explainer = None
+    if artifacts["shap_explainer"] is not None:
+        # shap is only needed here when folding with the shap explainer
+        import shap
+        shap_explainer = shap.TreeExplainer(folded_model.booster_)
+    
+    return {
+        "model": folded_model,
+        "preprocessor": IdentityScaler(
+            feature_scale=getattr(artifacts["preprocessor"], "scale_", None),
+            feature_mean=getattr(artifacts["preprocessor"], "mean_", None)
+        ),
+        "shap_explainer": shap_explainer,
+    }
+
+
+def inference_engine_from_env() -> str:
+    """
+    Return the inference engine selected by AIMS_INFERENCE_ENGINE.
+    
+    Raises:
+        ValueError: If the variable names an unknown engine
+    """
+    engine = os.environ.get("AIMS_INFERENCE_ENGINE", "lightgbm").lower()
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Unknown inference engine '{engine}', expected one of {INFERENCE_ENGINES}")
+    return engine
+
+
+def explainer_from_env() -> str:
+    """
+    Return the explanation engine selected by AIMS_EXPLAINER.
+    
+    Raises:
+        ValueError: If the variable names an unknown explainer
+    """
+    explainer = os.environ.get("AIMS_EXPLAINER", "shap").lower()
+    if explainer not in EXPLAINERS:
+        raise ValueError(f"Unknown explainer '{explainer}', expected one of {EXPLAINERS}")
+    return explainer
+
+
+def _flag_from_env(name: str) -> bool:
+    """Whether a boolean environment variable is enabled."""
+    return os.environ.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def serving_artifact_files(artifacts_dir: str = ARTIFACTS_DIR, load_explainer: bool = True) -> list[str]:
+    """
+    Return the files of artifacts_dir that serving will read.
+    
+    Nothing besides the bundle is read when it is served. Otherwise the model
+    and preprocessor pickles are, and shap_explainer.pkl only when the shap
+    explainer is loaded rather than rebuilt (see load_serving_explainer).
+    
+    Args:
+        artifacts_dir: Directory containing the .pkl artifacts
+        load_explainer: Whether load_serving_explainer will be called
+    
+    Returns:
+        File names, relative to artifacts_dir; empty when serving from a bundle
+    
+    Raises:
+        ValueError: If AIMS_EXPLAINER names an unknown explainer
+    """
+    explainer = explainer_from_env()
+    if serves_bundle(artifacts_dir):
+        return []
+    files = [MODEL_FILENAME, PREPROCESSOR_FILENAME]
+    if load_explainer and explainer == "shap" and not _flag_from_env("AIMS_FOLD_SCALER"):
+        files.append(EXPLAINER_FILENAME)
+    return files
+
+
+def load_serving_model(artifacts_dir: str = ARTIFACTS_DIR) -> dict[str, Any]:
+    """
+    Load the model and preprocessor and prepare them for serving.
+    
+    They are read from the bundle in artifacts_dir/bundle when there is one,
+    and from the .pkl files otherwise, or when the model or preprocessor
+    pickle changed after the bundle was written from them (a warning is
+    printed then; rebuild the bundle to serve it again).
+    
+    AIMS_FOLD_SCALER: "1" to fold the scaler into the model at load time
+    AIMS_INFERENCE_ENGINE: "lightgbm" (default) or "numpy" to evaluate the
+        trees with the flattened NumPy engine instead of the sklearn wrapper
+    
+    Args:
+        artifacts_dir: Directory containing the .pkl artifacts
+    
+    Returns:
+        Dict with "model" and "preprocessor" keys
+    
+    Raises:
+        FileNotFoundError: If any of the artifacts is missing
+        ValueError: If AIMS_INFERENCE_ENGINE names an unknown engine, or the
+            bundle fails validation (BundleError)
+    """
+    engine = inference_engine_from_env()
+    
+    bundle_dir = os.path.join(artifacts_dir, BUNDLE_DIRNAME)
+    stale = stale_bundle_sources(artifacts_dir)
+    if stale:
+        print(f"⚠ Warning: {', '.join(stale)} changed after the bundle in {bundle_dir} was written; "
+              f"serving the .pkl files")
+    if is_bundle(bundle_dir) and not stale:
+        artifacts = load_bundle(bundle_dir)
+    else:
+        artifacts = load_artifacts(artifacts_dir, load_explainer=False)
+    if _flag_from_env("AIMS_FOLD_SCALER"):
+        artifacts = fold_artifacts(artifacts)
+    if engine == "numpy":
+        from backend.services.tree_engine import build_numpy_engine
+        artifacts["model"] = build_numpy_engine(artifacts["model"])
+    return {"model": artifacts["model"], "preprocessor": artifacts["preprocessor"]}
+
+
+def load_serving_explainer(model: Any, artifacts_dir: str = ARTIFACTS_DIR) -> Any:
+    """
+    Load the SHAP explainer for a model returned by load_serving_model.
+    
+    AIMS_EXPLAINER: "shap" (default) or "lightgbm" to compute SHAP values with
+        the booster's pred_contrib, without loading shap_explainer.pkl or shap
+    AIMS_SHAP_CACHE: "1" to reuse the SHAP values of readings that fall on the
+        same side of every split threshold
+    AIMS_SHAP_CACHE_MAX_MB: memory cap of the SHAP cache in MiB (default: 64)
+    
+    The shap explainer is built over the model's booster instead of being
+    loaded when serving from a bundle (see serves_bundle), or with
+    AIMS_FOLD_SCALER (TreeSHAP values do not depend on threshold values).
+    
+    Args:
+        model: Serving model, whose inputs the explainer must accept
+        artifacts_dir: Directory containing the .pkl artifacts
+    
+    Returns:
+        Explainer with a shap_values method
+    
+    Raises:
+        FileNotFoundError: If shap_explainer.pkl is needed and missing
+        ValueError: If AIMS_EXPLAINER names an unknown explainer
+    """
+    explainer = explainer_from_env()
+    
+    if explainer == "lightgbm":
+        from backend.services.explainer import build_contrib_explainer
+        shap_explainer = build_contrib_explainer(model)
+    elif _flag_from_env("AIMS_FOLD_SCALER") or serves_bundle(artifacts_dir):
+        import shap
+        shap_explainer = shap.TreeExplainer(model.booster_)
+    else:
+        import joblib
+        shap_explainer = joblib.load(os.path.join(artifacts_dir, EXPLAINER_FILENAME))
+    
+    if _flag_from_env("AIMS_SHAP_CACHE"):
+        from backend.services.shap_cache import CachedExplainer
+        shap_explainer = CachedExplainer(
+            shap_explainer,
+            model,
+            max_bytes=int(float(os.environ.get("AIMS_SHAP_CACHE_MAX_MB", 64)) * 1024 * 1024)
+        )
+    return shap_explainer
+
+
+def load_serving_artifacts(artifacts_dir: str = ARTIFACTS_DIR) -> dict[str, Any]:
+    """
+    Load the model artifacts and prepare them for serving.
+    
+    Runs load_serving_model followed by load_serving_explainer; see those for
+    the environment variables that apply.
+    
+    Args:
+        artifacts_dir: Directory containing the .pkl artifacts
+    
+    Returns:
+        Dict with "model", "preprocessor" and "shap_explainer" keys
+    
+    Raises:
+        FileNotFoundError: If any of the artifacts is missing
+        ValueError: If AIMS_INFERENCE_ENGINE or AIMS_EXPLAINER names an unknown engine
+    """
+    # Reject an unknown explainer before spending time on the model
+    explainer_from_env()
+    artifacts = load_serving_model(artifacts_dir)
+    artifacts["shap_explainer"] = load_serving_explainer(artifacts["model"], artifacts_dir)
+    return artifacts
@@ -0,0 +1,187 @@
+"""
+Adaptive micro-batching for single-reading predictions.
+Coalesces concurrent /predict calls into one vectorized predict_fault_batch pass
+and hands every caller its own PredictionResponse.
+"""
+import asyncio
+import os
+from functools import partial
+from typing import Any, Callable, Optional
+
+from backend.models.request import SensorInput
+from backend.models.response import PredictionResponse
+from backend.services.executor import InferenceExecutor
+from backend.services.predictor import predict_fault_batch
+
+
+class MicroBatcher:
+    """
+    Collects readings submitted concurrently and scores them as one batch.
+
+    A batch is dispatched as soon as it holds max_batch_size readings, or when
+    the window expires. When no batch is being scored the window is skipped and
+    the batch is dispatched on the next event loop iteration, so an idle server
+    adds no latency while a busy one coalesces requests up to the window.
+    """
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        window_ms: float = 2.0,
+        max_batch_size: int = 256,
+        predict_batch: Callable[..., list[PredictionResponse]] = predict_fault_batch
+    ):
+        """
+        Args:
+            executor: Pool the batches are scored on
+            window_ms: Longest time a reading waits for others to join its batch
+            max_batch_size: Readings per batch that trigger an immediate dispatch
+            predict_batch: Batch predictor, called as predict_batch(readings, explain=..., **artifacts)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.executor = executor
+        self.window_s = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._predict_batch = predict_batch
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[SensorInput, asyncio.Future]] = []
+        self._pending_artifacts: dict[str, Any] = {}
+        self._pending_explain = True
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._batches_in_flight = 0
+        self._tasks: set[asyncio.Task] = set()
+
+        self._batches = 0
+        self._readings = 0
+
+    @classmethod
+    def from_env(cls, executor: InferenceExecutor) -> Optional["MicroBatcher"]:
+        """
+        Build a batcher configured from environment variables, or None if disabled.
+
+        AIMS_MICROBATCH: "1" to enable micro-batching (default: disabled)
+        AIMS_MICROBATCH_WINDOW_MS: batching window in milliseconds (default: 2)
+        AIMS_MICROBATCH_MAX_SIZE: readings per batch (default: 256)
+        """
+        if os.environ.get("AIMS_MICROBATCH", "0").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            executor,
+            window_ms=float(os.environ.get("AIMS_MICROBATCH_WINDOW_MS", 2.0)),
+            max_batch_size=int(os.environ.get("AIMS_MICROBATCH_MAX_SIZE", 256))
+        )
+
+    async def submit(self, sensor_input: SensorInput, explain: bool = True, **artifacts: Any) -> PredictionResponse:
+        """
+        Queue one reading for the next batch and wait for its prediction.
+
+        Args:
+            sensor_input: Validated sensor readings
+            explain: Whether SHAP values are computed for this reading
+            **artifacts: model, preprocessor and shap_explainer to score with.
+                Readings are only batched with readings using the same artifacts
+                and the same explain flag.
+
+        Returns:
+            The PredictionResponse for this reading
+
+        Raises:
+            ExecutorSaturatedError: If the executor rejected the batch
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pending work belongs to an event loop that is gone
+            self._reset(loop)
+
+        if self._pending and (explain != self._pending_explain or not self._same_artifacts(artifacts)):
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((sensor_input, future))
+        self._pending_artifacts = artifacts
+        self._pending_explain = explain
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self._batches_in_flight == 0:
+                self._flush_handle = loop.call_soon(self._flush)
+            else:
+                self._flush_handle = loop.call_later(self.window_s, self._flush)
+
+        return await future
+
+    def stats(self) -> dict[str, Any]:
+        """Batch counts and average batch size."""
+        return {
+            "window_ms": self.window_s * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self._batches,
+            "readings": self._readings,
+            "mean_batch_size": self._readings / self._batches if self._batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    def _same_artifacts(self, artifacts: dict[str, Any]) -> bool:
+        """Check artifacts are the very same objects as those of the pending batch."""
+        return artifacts.keys() == self._pending_artifacts.keys() and all(
+            artifacts[key] is self._pending_artifacts[key] for key in artifacts
+        )
+
+    def _reset(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Bind the batcher to a new event loop and drop stale state."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._loop = loop
+        self._pending = []
+        self._pending_artifacts = {}
+        self._flush_handle = None
+        self._batches_in_flight = 0
+        self._tasks = set()
+
+    def _flush(self) -> None:
+        """Dispatch the pending readings as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        artifacts, self._pending_artifacts = self._pending_artifacts, {}
+        self._batches_in_flight += 1
+        task = self._loop.create_task(self._score(batch, artifacts, self._pending_explain))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(
+        self,
+        batch: list[tuple[SensorInput, asyncio.Future]],
+        artifacts: dict[str, Any],
+        explain: bool
+    ) -> None:
+        """Score a batch on the executor and resolve every caller's future."""
+        try:
+            # explain is bound into the callable so it also reaches process workers,
+            # which substitute their own artifacts for the keyword arguments
+            responses = await self.executor.run_inference(
+                partial(self._predict_batch, explain=explain),
+                [sensor_input for sensor_input, _ in batch],
+                **artifacts
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self._batches += 1
+            self._readings += len(batch)
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+        finally:
+            self._batches_in_flight = max(0, self._batches_in_flight - 1)
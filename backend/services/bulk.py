@@ -0,0 +1,455 @@
+"""
+Bulk CSV scoring.
+Splits an uploaded CSV log into chunks of rows as it arrives, scores every
+chunk with one vectorized pass and sends the results back as NDJSON or CSV,
+so rescoring a log never holds more than a few chunks in memory.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import deque
+from functools import partial
+from typing import Any, AsyncIterator, Optional
+
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, predict_fault_matrix
+
+try:
+    from uvicorn.protocols.utils import ClientDisconnected as _ServerClientDisconnected
+except ImportError:
+    # Optional: other servers report a client that went away as a ConnectionError
+    _ServerClientDisconnected = ConnectionError
+
+
+# Media type of each output format
+OUTPUT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Columns of the dataset copied from each input row to its result when present
+PASSTHROUGH_COLUMNS = ("Timestamp", "Fault_Label")
+
+# Results held in memory before they are spooled to a temporary file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# Size of the blocks spooled results are streamed back in
+RESPONSE_BLOCK_BYTES = 1024 * 1024
+
+# First field of the CSV row that ends a streamed result which failed part way
+ERROR_MARKER = "#error"
+
+# Errors the server's send raises once the client has gone away
+DISCONNECT_ERRORS = (ConnectionError, _ServerClientDisconnected)
+
+
+class CsvFormatError(ValueError):
+    """Raised when an uploaded CSV lacks sensor columns or has rows that cannot be parsed."""
+
+
+def parse_header(line: bytes) -> list[str]:
+    """
+    Column names of an uploaded CSV.
+
+    Args:
+        line: First line of the upload
+
+    Returns:
+        Column names in file order
+
+    Raises:
+        CsvFormatError: If any of the 18 sensor columns is missing
+    """
+    columns = [name.strip() for name in next(csv.reader([line.decode("utf-8-sig").strip()]), [])]
+    missing = [name for name in FEATURE_NAMES if name not in columns]
+    if missing:
+        raise CsvFormatError(f"CSV header is missing sensor columns: {', '.join(missing)}")
+    return columns
+
+
+class CsvChunker:
+    """
+    Cuts a CSV upload into chunks of whole rows as its bytes arrive.
+
+    The first line is parsed as the header. Rows are split on newlines, so
+    quoted fields must not contain line breaks, which sensor logs never do.
+    Only the rows of the chunk being filled are buffered.
+    """
+
+    def __init__(self, chunk_rows: int = 10000):
+        """
+        Args:
+            chunk_rows: Rows per chunk scored in one vectorized pass
+        """
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+
+        self.chunk_rows = chunk_rows
+        self.header: Optional[list[str]] = None
+        self._buffer = bytearray()
+        self._lines = 0
+        # Line number of the first buffered row, counting the header as line 1
+        self._next_line = 2
+
+    @classmethod
+    def from_env(cls) -> "CsvChunker":
+        """
+        Build a chunker configured from environment variables.
+
+        AIMS_BULK_CHUNK_ROWS: rows scored per vectorized pass (default: 10000)
+        """
+        return cls(chunk_rows=int(os.environ.get("AIMS_BULK_CHUNK_ROWS", 10000)))
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        """
+        Add bytes of the upload.
+
+        Args:
+            data: Next bytes of the upload
+
+        Returns:
+            Chunks completed by data, as (line number of their first row, rows)
+
+        Raises:
+            CsvFormatError: If the header lacks sensor columns
+        """
+        self._buffer += data
+        if self.header is None:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                return []
+            self.header = parse_header(bytes(self._buffer[:end]))
+            del self._buffer[:end + 1]
+            self._lines = self._buffer.count(b"\n")
+        else:
+            self._lines += data.count(b"\n")
+
+        chunks = []
+        while self._lines >= self.chunk_rows:
+            end = -1
+            for _ in range(self.chunk_rows):
+                end = self._buffer.find(b"\n", end + 1)
+            chunks.append((self._next_line, bytes(self._buffer[:end + 1])))
+            del self._buffer[:end + 1]
+            self._lines -= self.chunk_rows
+            self._next_line += self.chunk_rows
+        return chunks
+
+    def flush(self) -> Optional[tuple[int, bytes]]:
+        """
+        End the upload.
+
+        Returns:
+            The last, partial chunk, or None when no rows are left
+
+        Raises:
+            CsvFormatError: If the upload is empty or its header lacks sensor columns
+        """
+        if self.header is None:
+            if not self._buffer.strip():
+                raise CsvFormatError("CSV upload is empty")
+            self.header = parse_header(bytes(self._buffer))
+            self._buffer.clear()
+        if not self._buffer.strip():
+            return None
+        chunk = (self._next_line, bytes(self._buffer))
+        self._buffer.clear()
+        return chunk
+
+
+def output_columns(columns: list[str], explain: bool) -> list[str]:
+    """Columns of a CSV result for an upload with the given columns."""
+    return [
+        *(name for name in PASSTHROUGH_COLUMNS if name in columns),
+        "prediction_label",
+        *(f"probability_{label}" for label in FAULT_LABELS.values()),
+        *((f"shap_{name}" for name in FEATURE_NAMES) if explain else ()),
+    ]
+
+
+def output_header(columns: list[str], output_format: str, explain: bool) -> bytes:
+    """Bytes starting the result: the CSV header line, or nothing for NDJSON."""
+    if output_format != "csv":
+        return b""
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(output_columns(columns, explain))
+    return out.getvalue().encode()
+
+
+def error_record(output_format: str, status_code: int, detail: str) -> bytes:
+    """
+    Line ending a streamed result whose upload failed after the response started.
+
+    For NDJSON a {"error": {"status_code", "detail"}} object; for CSV a row
+    of ERROR_MARKER, the status code and the detail.
+    """
+    if output_format != "csv":
+        return (json.dumps({"error": {"status_code": status_code, "detail": detail}}) + "\n").encode()
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow([ERROR_MARKER, status_code, detail])
+    return out.getvalue().encode()
+
+
+def _failure_status(error: Exception) -> tuple[int, str]:
+    """Status code and detail /predict/csv answers a scoring failure with."""
+    if isinstance(error, CsvFormatError):
+        return 422, str(error)
+    if isinstance(error, ExecutorSaturatedError):
+        return 503, f"Server is busy: {error}. Please retry shortly."
+    return 500, f"Prediction failed: {error}"
+
+
+def results_frame(
+    passthrough: Any,
+    labels: np.ndarray,
+    probabilities: np.ndarray,
+    shap_values: Optional[np.ndarray]
+) -> Any:
+    """
+    Results of scored rows as a DataFrame with the columns of output_columns.
+
+    Args:
+        passthrough: DataFrame of the passthrough columns of the scored rows
+        labels: Predicted label of every row
+        probabilities: Class probabilities [num_rows, 8]
+        shap_values: SHAP values of the predicted class [num_rows, 18], or None
+
+    Returns:
+        DataFrame with one row per scored row
+    """
+    result = passthrough.reset_index(drop=True)
+    result["prediction_label"] = labels
+    for index, label in enumerate(FAULT_LABELS.values()):
+        result[f"probability_{label}"] = probabilities[:, index]
+    if shap_values is not None:
+        for index, name in enumerate(FEATURE_NAMES):
+            result[f"shap_{name}"] = shap_values[:, index]
+    return result
+
+
+def score_csv_chunk(
+    chunk: bytes,
+    first_line: int,
+    columns: list[str],
+    output_format: str,
+    explain: bool,
+    model: Any,
+    preprocessor: Any,
+    shap_explainer: Any
+) -> bytes:
+    """
+    Parse, score and format one chunk of an upload; runs in the pool worker.
+
+    Empty sensor values are scored as missing, as LightGBM does in training.
+
+    Args:
+        chunk: Whole CSV rows, without the header
+        first_line: Line number of the chunk's first row in the upload
+        columns: Column names from the upload's header
+        output_format: "ndjson" or "csv"
+        explain: Whether SHAP values are computed and included
+        model: Trained LightGBM classifier
+        preprocessor: Fitted StandardScaler for feature transformation
+        shap_explainer: Fitted SHAP TreeExplainer for computing explanations
+
+    Returns:
+        The results of every row, one line each, in upload order
+
+    Raises:
+        CsvFormatError: If a row has more fields than the header or a
+            non-numeric sensor value
+    """
+    # pandas is imported on first use, not with the API
+    import pandas as pd
+
+    passthrough = [name for name in PASSTHROUGH_COLUMNS if name in columns]
+    try:
+        frame = pd.read_csv(
+            io.BytesIO(chunk),
+            header=None,
+            names=columns,
+            usecols=[*passthrough, *FEATURE_NAMES],
+            dtype={**{name: str for name in passthrough}, **{name: np.float64 for name in FEATURE_NAMES}},
+            keep_default_na=False,
+            na_values={name: [""] for name in FEATURE_NAMES},
+        )
+    except ValueError as e:
+        last_line = first_line + chunk.rstrip(b"\n").count(b"\n")
+        raise CsvFormatError(f"Could not parse lines {first_line}-{last_line}: {e}")
+
+    predictions, probabilities, shap_values = predict_fault_matrix(
+        frame[FEATURE_NAMES].to_numpy(dtype=np.float64),
+        model,
+        preprocessor,
+        shap_explainer,
+        explain=explain
+    )
+    labels = np.array(list(FAULT_LABELS.values()), dtype=object)[predictions]
+
+    if output_format == "csv":
+        result = results_frame(frame[passthrough], labels, probabilities, shap_values)
+        return result.to_csv(index=False, header=False, lineterminator="\n").encode()
+
+    passthrough_values = [frame[name].tolist() for name in passthrough]
+    probability_rows = probabilities.tolist()
+    shap_rows = shap_values.tolist() if explain else [None] * len(labels)
+    lines = []
+    for row, label in enumerate(labels.tolist()):
+        result = {name: values[row] for name, values in zip(passthrough, passthrough_values)}
+        result["prediction_label"] = label
+        result["probabilities"] = dict(zip(FAULT_LABELS.values(), probability_rows[row]))
+        result["shap_values"] = dict(zip(FEATURE_NAMES, shap_rows[row])) if explain else None
+        lines.append(json.dumps(result))
+    return ("\n".join(lines) + "\n").encode()
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body may go on reading the request body.
+
+    Under ASGI spec versions before 2.4, StreamingResponse consumes the
+    request's receive channel to watch for a disconnect, which would take the
+    rest of an upload away from request.stream(). This response leaves the
+    channel to the body, which sees a disconnect as ClientDisconnect from
+    request.stream() or as one of DISCONNECT_ERRORS from sending. Other
+    errors, such as OSErrors of the body, propagate.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except DISCONNECT_ERRORS:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def score_csv_upload(
+    upload: AsyncIterator[bytes],
+    executor: InferenceExecutor,
+    chunker: CsvChunker,
+    output_format: str,
+    explain: bool,
+    stream: bool = False,
+    **artifacts: Any
+) -> AsyncIterator[bytes]:
+    """
+    Score a CSV upload chunk by chunk while it is being received.
+
+    Up to one chunk per pool worker is scored at once, and reading the upload
+    pauses beyond that, so memory use stays bounded by a few chunks whatever
+    the size of the upload. The results are held back in a temporary file, in
+    memory up to SPOOL_MAX_BYTES, until the whole upload has been read and
+    scored. Nothing is yielded until then, so a bad header or a bad row
+    anywhere fails before a response has started; the file needs disk space
+    for all the results.
+
+    With stream=True each chunk's results are yielded as soon as it has been
+    scored, while the rest of the upload is still arriving. The first block,
+    the result header with the first chunk's results, is yielded once the
+    first chunk has been scored, so a failure in the first chunk still raises.
+    A later failure is yielded as a last error_record and ends the results.
+    Clients that send the whole body before reading the response, as most
+    HTTP clients do, stop reading the results once the socket buffers are
+    full, and the upload then stalls; only clients that read while they send
+    can use stream.
+
+    Args:
+        upload: Bytes of the upload as they arrive
+        executor: Pool the chunks are scored on
+        chunker: Chunker the upload is cut into chunks with
+        output_format: "ndjson" or "csv"
+        explain: Whether SHAP values are computed and included
+        stream: Whether results are yielded while the upload is still arriving
+        **artifacts: model, preprocessor and shap_explainer to score with
+
+    Yields:
+        The result header, then the results of every row in upload order,
+        then with stream an error_record if scoring failed part way
+
+    Raises:
+        CsvFormatError: If the header lacks sensor columns or a row cannot be parsed
+        ExecutorSaturatedError: If the executor rejected a chunk
+    """
+    pending: deque = deque()
+    spool_file = None if stream else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    started = False
+
+    def score(chunk: tuple[int, bytes]) -> asyncio.Future:
+        first_line, rows = chunk
+        return asyncio.ensure_future(executor.run_inference(
+            partial(
+                score_csv_chunk,
+                first_line=first_line,
+                columns=chunker.header,
+                output_format=output_format,
+                explain=explain
+            ),
+            rows,
+            **artifacts
+        ))
+
+    def ready(upload_done: bool) -> bool:
+        """Whether the oldest chunk's results are to be taken now."""
+        if not pending:
+            return False
+        return upload_done or len(pending) >= executor.max_workers or (spool_file is None and pending[0].done())
+
+    try:
+        upload_done = False
+        try:
+            while True:
+                if not upload_done:
+                    try:
+                        data = await anext(upload)
+                    except StopAsyncIteration:
+                        upload_done = True
+                        last = chunker.flush()
+                        if last is not None:
+                            pending.append(score(last))
+                    else:
+                        for chunk in chunker.feed(data):
+                            pending.append(score(chunk))
+
+                while ready(upload_done):
+                    block = await pending.popleft()
+                    if spool_file is not None:
+                        await asyncio.to_thread(spool_file.write, block)
+                        continue
+                    if not started:
+                        block = output_header(chunker.header, output_format, explain) + block
+                        started = True
+                    yield block
+
+                if upload_done:
+                    break
+        except ClientDisconnect:
+            raise
+        except Exception as e:
+            if not started:
+                raise
+            # Part of the results has been sent; end them with the failure rather than cutting them short
+            yield error_record(output_format, *_failure_status(e))
+            return
+
+        if spool_file is not None:
+            spool_file.seek(0)
+            yield output_header(chunker.header, output_format, explain)
+            while block := await asyncio.to_thread(spool_file.read, RESPONSE_BLOCK_BYTES):
+                yield block
+        elif not started:
+            # A header without rows
+            yield output_header(chunker.header, output_format, explain)
+    finally:
+        for scoring in pending:
+            scoring.cancel()
+        if spool_file is not None:
+            spool_file.close()
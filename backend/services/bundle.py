@@ -0,0 +1,237 @@
+"""
+Versioned artifact bundle.
+Stores the model as LightGBM text and the scaler as plain .npy arrays next to a
+manifest of content hashes, feature order and label map, so serving does not
+depend on pickles and the scaler can be memory-mapped by every worker process.
+"""
+import datetime
+import hashlib
+import json
+import os
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+
+BUNDLE_FORMAT_VERSION = 1
+
+MANIFEST_FILENAME = "manifest.json"
+BOOSTER_FILENAME = "model.txt"
+SCALER_MEAN_FILENAME = "scaler_mean.npy"
+SCALER_SCALE_FILENAME = "scaler_scale.npy"
+
+# Files every bundle holds besides its manifest
+BUNDLE_FILES = (BOOSTER_FILENAME, SCALER_MEAN_FILENAME, SCALER_SCALE_FILENAME)
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is incomplete, corrupted or does not match the API."""
+
+
+def _sha256(path: str) -> str:
+    """Hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_bundle(bundle_dir: str) -> bool:
+    """Whether bundle_dir holds a complete bundle (the manifest is written last)."""
+    return os.path.isfile(os.path.join(bundle_dir, MANIFEST_FILENAME))
+
+
+def write_bundle(
+    model: Any,
+    preprocessor: Any,
+    bundle_dir: str,
+    version: Optional[str] = None,
+    sources: Optional[dict[str, str]] = None
+) -> dict[str, Any]:
+    """
+    Write a trained model and its scaler as a bundle.
+
+    Args:
+        model: LGBMClassifier, BoosterClassifier or lightgbm.Booster trained on scaled features
+        preprocessor: Fitted StandardScaler the model's inputs were scaled with
+        bundle_dir: Directory to write to; created if missing
+        version: Bundle version; defaults to a prefix of the content hash
+        sources: Paths of the files model and preprocessor were saved to or
+            loaded from, by file name; their hashes are recorded so that
+            changed_sources can tell when they are regenerated
+
+    Returns:
+        The manifest that was written
+
+    Raises:
+        BundleError: If the model does not have 18 features and 8 classes, or
+            the scaler was fitted on differently ordered features
+    """
+    import lightgbm as lgb
+    from backend.services.folding import standard_scaler_params
+
+    booster = model if isinstance(model, lgb.Booster) else model.booster_
+    if booster.num_feature() != len(FEATURE_NAMES):
+        raise BundleError(f"Model has {booster.num_feature()} features, expected {len(FEATURE_NAMES)}")
+    if booster.num_model_per_iteration() != len(FAULT_LABELS):
+        raise BundleError(f"Model has {booster.num_model_per_iteration()} classes, expected {len(FAULT_LABELS)}")
+    scaler_features = getattr(preprocessor, "feature_names_in_", None)
+    if scaler_features is not None and list(scaler_features) != FEATURE_NAMES:
+        raise BundleError("Scaler was fitted on features in a different order than FEATURE_NAMES")
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    manifest_path = os.path.join(bundle_dir, MANIFEST_FILENAME)
+    if os.path.exists(manifest_path):
+        # The bundle is incomplete until the new manifest is in place
+        os.remove(manifest_path)
+
+    booster.save_model(os.path.join(bundle_dir, BOOSTER_FILENAME))
+    mean, scale = standard_scaler_params(preprocessor, len(FEATURE_NAMES))
+    np.save(os.path.join(bundle_dir, SCALER_MEAN_FILENAME), mean)
+    np.save(os.path.join(bundle_dir, SCALER_SCALE_FILENAME), scale)
+
+    files = {filename: _sha256(os.path.join(bundle_dir, filename)) for filename in BUNDLE_FILES}
+    content_hash = hashlib.sha256("".join(files[name] for name in sorted(files)).encode()).hexdigest()
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": version or content_hash[:12],
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "lightgbm_version": lgb.__version__,
+        "feature_names": FEATURE_NAMES,
+        "labels": {str(index): label for index, label in FAULT_LABELS.items()},
+        "files": files,
+    }
+    if sources:
+        manifest["source_files"] = {filename: _sha256(path) for filename, path in sources.items()}
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def validate_bundle(bundle_dir: str) -> dict[str, Any]:
+    """
+    Check a bundle's manifest and file hashes against this API.
+
+    Args:
+        bundle_dir: Directory containing the bundle
+
+    Returns:
+        The bundle's manifest
+
+    Raises:
+        BundleError: If the manifest is missing or unsupported, the feature
+            order or labels differ from FEATURE_NAMES / FAULT_LABELS, the
+            manifest does not list every file of BUNDLE_FILES, or a file is
+            missing or does not match its hash
+    """
+    manifest_path = os.path.join(bundle_dir, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise BundleError(f"Could not read bundle manifest {manifest_path}: {e}") from e
+
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleError(
+            f"Unsupported bundle format {manifest.get('format_version')}, expected {BUNDLE_FORMAT_VERSION}"
+        )
+    if manifest.get("feature_names") != FEATURE_NAMES:
+        raise BundleError("Bundle feature order does not match FEATURE_NAMES")
+    if manifest.get("labels") != {str(index): label for index, label in FAULT_LABELS.items()}:
+        raise BundleError("Bundle labels do not match FAULT_LABELS")
+
+    files = manifest.get("files")
+    if not isinstance(files, dict):
+        raise BundleError("Bundle manifest does not list its files")
+    unlisted = [filename for filename in BUNDLE_FILES if filename not in files]
+    if unlisted:
+        raise BundleError(f"Bundle manifest does not list {', '.join(unlisted)}")
+
+    for filename, expected in files.items():
+        path = os.path.join(bundle_dir, filename)
+        if not os.path.isfile(path):
+            raise BundleError(f"Bundle file {filename} is missing")
+        if _sha256(path) != expected:
+            raise BundleError(f"Bundle file {filename} does not match its hash")
+
+    return manifest
+
+
+def changed_sources(bundle_dir: str, source_dir: str, filenames: Iterable[str]) -> list[str]:
+    """
+    Files of source_dir that changed after the bundle was written from them.
+
+    Files whose hash the manifest records (see write_bundle's sources) are
+    compared by hash; others count as changed when they are newer than the
+    manifest. Files missing from source_dir never count as changed.
+
+    Args:
+        bundle_dir: Directory containing the bundle
+        source_dir: Directory of the files the bundle may have been written from
+        filenames: Names of the files to check
+
+    Returns:
+        Names of the changed files; empty if the manifest cannot be read,
+        which load_bundle reports
+    """
+    manifest_path = os.path.join(bundle_dir, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path) as f:
+            recorded = json.load(f).get("source_files") or {}
+        manifest_mtime = os.path.getmtime(manifest_path)
+    except (OSError, json.JSONDecodeError):
+        return []
+
+    changed = []
+    for filename in filenames:
+        path = os.path.join(source_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        if filename in recorded:
+            if _sha256(path) != recorded[filename]:
+                changed.append(filename)
+        elif os.path.getmtime(path) > manifest_mtime:
+            changed.append(filename)
+    return changed
+
+
+def load_bundle(bundle_dir: str) -> dict[str, Any]:
+    """
+    Load a bundle after validating it.
+
+    The scaler arrays are memory-mapped read-only, so worker processes loading
+    the same bundle share their pages.
+
+    Args:
+        bundle_dir: Directory containing the bundle
+
+    Returns:
+        Dict with "model" (BoosterClassifier), "preprocessor" (StandardScaler)
+        and "shap_explainer" keys, matching load_artifacts(load_explainer=False);
+        the explainer is built from the booster, so "shap_explainer" is None
+
+    Raises:
+        BundleError: If the bundle fails validate_bundle
+    """
+    import lightgbm as lgb
+    from sklearn.preprocessing import StandardScaler
+    from backend.services.folding import BoosterClassifier
+
+    validate_bundle(bundle_dir)
+
+    booster = lgb.Booster(model_file=os.path.join(bundle_dir, BOOSTER_FILENAME))
+
+    preprocessor = StandardScaler()
+    preprocessor.mean_ = np.load(os.path.join(bundle_dir, SCALER_MEAN_FILENAME), mmap_mode="r")
+    preprocessor.scale_ = np.load(os.path.join(bundle_dir, SCALER_SCALE_FILENAME), mmap_mode="r")
+    preprocessor.var_ = np.square(preprocessor.scale_)
+    preprocessor.n_features_in_ = len(FEATURE_NAMES)
+    preprocessor.feature_names_in_ = np.array(FEATURE_NAMES, dtype=object)
+
+    return {"model": BoosterClassifier(booster), "preprocessor": preprocessor, "shap_explainer": None}
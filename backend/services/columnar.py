@@ -0,0 +1,78 @@
+"""
+Columnar batch responses.
+A batch response with one PredictionResponse per reading repeats the 8 fault
+labels and 18 feature names as keys in every prediction. The columnar layout
+sends them once, followed by dense arrays of probabilities and SHAP values,
+and is serialized straight from the NumPy arrays with orjson, without a
+pydantic model or Python float per value.
+"""
+import json
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+try:
+    import orjson
+except ImportError:
+    # Optional: the standard library serializes the same JSON, more slowly
+    orjson = None
+
+
+# Layouts of a /predict/batch response
+BATCH_OUTPUT_FORMATS = ("records", "columnar")
+
+
+def columnar_predictions(
+    predictions: np.ndarray,
+    probabilities: np.ndarray,
+    shap_values: Optional[np.ndarray],
+    prediction_ids: Optional[list[str]] = None
+) -> dict[str, Any]:
+    """
+    Lay out scored readings column by column.
+
+    Args:
+        predictions: Predicted class index of each reading [num_readings]
+        probabilities: Class probabilities [num_readings, 8] in FAULT_LABELS order
+        shap_values: SHAP values of the predicted class [num_readings, 18] in
+            FEATURE_NAMES order, or None when the explanation was skipped
+        prediction_ids: Identifier of each prediction for GET /explain/{prediction_id},
+            or None
+
+    Returns:
+        Dict of "labels", "feature_names", "prediction_labels",
+        "probabilities", "shap_values" and "prediction_ids", with the
+        probabilities and SHAP values as C-contiguous float64 arrays
+    """
+    labels = list(FAULT_LABELS.values())
+    return {
+        "labels": labels,
+        "feature_names": FEATURE_NAMES,
+        "prediction_labels": [labels[prediction] for prediction in np.asarray(predictions).tolist()],
+        "probabilities": np.ascontiguousarray(probabilities, dtype=np.float64),
+        "shap_values": None if shap_values is None else np.ascontiguousarray(shap_values, dtype=np.float64),
+        "prediction_ids": prediction_ids,
+    }
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize a response to JSON, NumPy arrays included.
+
+    Uses orjson, which writes C-contiguous arrays without converting them to
+    Python lists; falls back to the standard library when orjson is missing.
+    Floats are written with the shortest representation that reads back
+    exactly, as json.dumps does.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_tolist, separators=(",", ":")).encode()
+
+
+def _tolist(value: Any) -> Any:
+    """json.dumps fallback for NumPy arrays."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
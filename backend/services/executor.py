@@ -0,0 +1,220 @@
+"""
+Bounded inference executor.
+Runs CPU-bound prediction work (LightGBM, SHAP) on a thread or process pool so
+the asyncio event loop stays responsive, and sheds load once its queue is full.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.services.artifacts import ARTIFACTS_DIR, load_serving_artifacts
+from backend.services.registry import model_versions_from_env
+
+
+# Number of recent queue wait times kept for the wait-time percentiles
+WAIT_TIME_WINDOW = 1000
+
+# Artifacts loaded once per worker process when running in process mode
+_worker_artifacts: dict[str, Any] = {}
+
+# Extra model versions (AIMS_MODEL_VERSIONS) loaded once per worker process
+_worker_versions: dict[str, dict[str, Any]] = {}
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the inference queue is full and new work is rejected."""
+
+
+def _init_worker(artifacts_dir: str) -> None:
+    """Process pool initializer: load the model artifacts and extra versions once per worker."""
+    _worker_artifacts.update(load_serving_artifacts(artifacts_dir))
+    for name, version_dir in model_versions_from_env().items():
+        try:
+            _worker_versions[name] = load_serving_artifacts(version_dir)
+        except Exception:
+            # Reported by the API process, which never routes to versions it failed to load
+            pass
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> tuple[float, Any]:
+    """Run fn in the worker and report when it started (monotonic clock)."""
+    started_at = time.monotonic()
+    return started_at, fn(*args, **kwargs)
+
+
+def _call_with_worker_artifacts(fn: Callable, args: tuple, version: Optional[str] = None) -> Any:
+    """Run fn in a worker process with that process's own artifacts (of an extra version if given)."""
+    return fn(*args, **(_worker_artifacts if version is None else _worker_versions[version]))
+
+
+class InferenceExecutor:
+    """
+    Thread or process pool with a bounded queue in front of it.
+
+    At most max_workers jobs run at once and at most max_queue more wait for a
+    worker. Submissions beyond that raise ExecutorSaturatedError immediately,
+    so callers can answer 503 instead of letting latency grow without limit.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        kind: str = "thread",
+        artifacts_dir: str = ARTIFACTS_DIR
+    ):
+        """
+        Args:
+            max_workers: Number of pool workers running inference concurrently
+            max_queue: Number of jobs allowed to wait for a free worker
+            kind: "thread" or "process"
+            artifacts_dir: Artifacts each worker loads in process mode
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind '{kind}', expected 'thread' or 'process'")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must be non-negative")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        if kind == "process":
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(artifacts_dir,)
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aims-inference")
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_times = deque(maxlen=WAIT_TIME_WINDOW)
+
+    @classmethod
+    def from_env(cls, artifacts_dir: str = ARTIFACTS_DIR) -> "InferenceExecutor":
+        """
+        Build an executor configured from environment variables.
+
+        AIMS_INFERENCE_EXECUTOR: "thread" (default) or "process"
+        AIMS_INFERENCE_WORKERS: pool size (default: CPU count, at most 4)
+        AIMS_INFERENCE_QUEUE_SIZE: jobs allowed to wait for a worker (default: 64)
+        """
+        return cls(
+            max_workers=int(os.environ.get("AIMS_INFERENCE_WORKERS", min(4, os.cpu_count() or 1))),
+            max_queue=int(os.environ.get("AIMS_INFERENCE_QUEUE_SIZE", 64)),
+            kind=os.environ.get("AIMS_INFERENCE_EXECUTOR", "thread"),
+            artifacts_dir=artifacts_dir
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs accepted but not finished yet (running or queued)."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self._in_flight - self.max_workers)
+
+    async def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and await its result.
+
+        The job holds its slot until the pool is done with it: cancelling the
+        caller cancels a job still waiting for a worker, but a running job
+        keeps counting towards in_flight until it finishes.
+
+        Raises:
+            ExecutorSaturatedError: If max_workers jobs are running and max_queue are waiting
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Inference queue is full ({self.queue_depth} waiting, {self.max_workers} running)"
+                )
+            self._in_flight += 1
+
+        submitted_at = time.monotonic()
+        try:
+            future = self._pool.submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(partial(self._job_done, submitted_at))
+
+        _, result = await asyncio.wrap_future(future)
+        return result
+
+    def _job_done(self, submitted_at: float, future: Future) -> None:
+        """Pool callback: free the job's slot and record its queue wait time."""
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled() and future.exception() is None:
+                started_at, _ = future.result()
+                self._completed += 1
+                self._wait_times.append(max(0.0, started_at - submitted_at))
+
+    async def run_inference(self, fn: Callable, *args: Any, version: Optional[str] = None, **artifacts: Any) -> Any:
+        """
+        Run a predictor function with model artifacts.
+
+        In thread mode the given artifacts are passed straight to fn. In
+        process mode they are ignored and each worker uses the artifacts it
+        loaded at startup, so the model is never pickled per request; version
+        names the extra model version (see ModelRegistry) to use instead of
+        the primary artifacts.
+        """
+        if self.kind == "process":
+            return await self.run(_call_with_worker_artifacts, fn, args, version)
+        return await self.run(fn, *args, **artifacts)
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of queue depth and wait times, for sizing the worker pool."""
+        with self._lock:
+            wait_times_ms = np.asarray(self._wait_times, dtype=np.float64) * 1000.0
+            stats = {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+        if len(wait_times_ms):
+            stats["wait_ms"] = {
+                "mean": float(wait_times_ms.mean()),
+                "p50": float(np.percentile(wait_times_ms, 50)),
+                "p99": float(np.percentile(wait_times_ms, 99)),
+                "max": float(wait_times_ms.max()),
+            }
+        else:
+            stats["wait_ms"] = {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+
+        return stats
+
+    def shutdown(self, cancel_queued: bool = True) -> None:
+        """
+        Stop the pool, letting running jobs finish.
+
+        Args:
+            cancel_queued: Whether jobs still waiting for a worker are
+                cancelled; if False they run before the pool stops
+        """
+        self._pool.shutdown(wait=True, cancel_futures=cancel_queued)
@@ -0,0 +1,70 @@
+"""
+Native LightGBM explanations.
+Computes TreeSHAP contributions with the booster's own pred_contrib, so serving
+does not need the shap package or shap_explainer.pkl.
+"""
+from typing import Any
+
+import lightgbm as lgb
+import numpy as np
+
+
+class BoosterContribExplainer:
+    """
+    Drop-in replacement for shap.TreeExplainer backed by Booster.predict(pred_contrib=True).
+
+    shap_values returns the same [num_samples, num_features, num_classes] layout
+    as shap's TreeExplainer for multiclass LightGBM models.
+    """
+
+    def __init__(self, booster: lgb.Booster):
+        """
+        Args:
+            booster: Trained LightGBM booster the predictions come from
+        """
+        self.booster = booster
+        self.n_classes = booster.num_model_per_iteration()
+        self.n_features = booster.num_feature()
+
+    def contributions(self, X: Any) -> np.ndarray:
+        """
+        Per-class feature contributions plus bias.
+
+        Returns:
+            Array of shape [num_samples, num_classes, num_features + 1], the last
+            column holding the expected value of each class
+        """
+        X = np.asarray(X, dtype=np.float64)
+        contributions = self.booster.predict(X, pred_contrib=True)
+        return np.asarray(contributions).reshape(len(X), self.n_classes, self.n_features + 1)
+
+    def shap_values(self, X: Any) -> np.ndarray:
+        """
+        SHAP values of every feature for every class.
+
+        Args:
+            X: Model inputs of shape [num_samples, num_features]
+
+        Returns:
+            Array of shape [num_samples, num_features, num_classes]
+        """
+        return self.contributions(X)[:, :, :self.n_features].transpose(0, 2, 1)
+
+    @property
+    def expected_value(self) -> np.ndarray:
+        """Per-class expected raw score, as reported by shap's TreeExplainer."""
+        return self.contributions(np.zeros((1, self.n_features)))[0, :, self.n_features]
+
+
+def build_contrib_explainer(model: Any) -> BoosterContribExplainer:
+    """
+    Build a native explainer for a trained model.
+
+    Args:
+        model: LGBMClassifier, BoosterClassifier, FlatTreeEnsemble or lightgbm.Booster
+
+    Returns:
+        BoosterContribExplainer over the model's booster
+    """
+    booster = model if isinstance(model, lgb.Booster) else model.booster_
+    return BoosterContribExplainer(booster)
@@ -0,0 +1,138 @@
+"""
+Deferred explanations.
+Keeps the input of recent predictions in a bounded, expiring store so their SHAP
+values can be computed later by GET /explain/{prediction_id} instead of on every
+/predict call.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from backend.models.request import MAX_BATCH_SIZE
+
+
+# Default store size: a maximum-size explain=false batch takes a quarter of it,
+# so it cannot evict every other client's pending predictions (about 19 MiB full)
+DEFAULT_MAX_ENTRIES = 4 * MAX_BATCH_SIZE
+
+
+class ExplanationStore:
+    """
+    Bounded map from prediction_id to the (features, predicted class) of a prediction.
+
+    Entries expire ttl_s seconds after they were stored, and the oldest entries
+    are evicted once max_entries is reached, so memory stays bounded no matter
+    how many predictions are never explained. A batch stores one entry per
+    reading, so max_entries should stay well above MAX_BATCH_SIZE.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = 600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_entries: Most predictions kept at once
+            ttl_s: Seconds a prediction can be explained after it was made
+            clock: Monotonic time source, in seconds
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, np.ndarray, int]] = OrderedDict()
+
+        self._explained = 0
+        self._expired = 0
+        self._evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "ExplanationStore":
+        """
+        Build a store configured from environment variables.
+
+        AIMS_EXPLANATION_STORE_SIZE: predictions kept for later explanation (default: DEFAULT_MAX_ENTRIES)
+        AIMS_EXPLANATION_TTL_S: seconds a prediction stays explainable (default: 600)
+        """
+        return cls(
+            max_entries=int(os.environ.get("AIMS_EXPLANATION_STORE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl_s=float(os.environ.get("AIMS_EXPLANATION_TTL_S", 600.0))
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, features: np.ndarray, prediction: int) -> str:
+        """
+        Store the input of one prediction.
+
+        Args:
+            features: Raw sensor readings of the prediction, shape [18]
+            prediction: Predicted class index
+
+        Returns:
+            prediction_id to pass to get()
+        """
+        prediction_id = uuid.uuid4().hex
+        now = self._clock()
+        with self._lock:
+            self._evict_expired(now)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+            self._entries[prediction_id] = (now + self.ttl_s, np.array(features, dtype=np.float64), int(prediction))
+        return prediction_id
+
+    def get(self, prediction_id: str) -> Optional[tuple[np.ndarray, int]]:
+        """
+        Look up a stored prediction.
+
+        Returns:
+            (features, predicted class index), or None if unknown or expired
+        """
+        with self._lock:
+            self._evict_expired(self._clock())
+            entry = self._entries.get(prediction_id)
+            if entry is None:
+                return None
+            self._explained += 1
+            _, features, prediction = entry
+            return features, prediction
+
+    def clear(self) -> None:
+        """Drop every stored prediction."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Store size and how entries left it."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "explained": self._explained,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop expired entries; they are in insertion order, so oldest first."""
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))[0]
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            self._expired += 1
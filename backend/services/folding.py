@@ -0,0 +1,180 @@
+"""
+Scaler folding for LightGBM models.
+Rewrites the split thresholds of a model trained on StandardScaler output into
+raw sensor units, so serving can skip the scaling stage entirely.
+"""
+from typing import Any, Optional
+
+import lightgbm as lgb
+import numpy as np
+
+
+# Bits of LightGBM's per-node decision_type field
+_CATEGORICAL_MASK = 1
+_MISSING_TYPE_SHIFT = 2
+_MISSING_TYPE_ZERO = 1
+
+# Upper bound on the ulp-by-ulp threshold adjustment; the first estimate is
+# normally off by at most a couple of ulps
+_MAX_ULP_STEPS = 64
+
+
+class BoosterClassifier:
+    """
+    Minimal classifier interface over a raw lightgbm.Booster.
+
+    Exposes predict/predict_proba like LGBMClassifier (classes are 0..num_class-1)
+    without the sklearn wrapper, and keeps the booster available as booster_.
+    """
+
+    def __init__(self, booster: lgb.Booster):
+        self.booster_ = booster
+        self.n_classes_ = booster.num_model_per_iteration()
+        self.n_features_in_ = booster.num_feature()
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities of shape [num_samples, num_classes]."""
+        return self.booster_.predict(np.asarray(X, dtype=np.float64))
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Predicted class index for every row."""
+        return self.predict_proba(X).argmax(axis=1)
+
+
+class IdentityScaler:
+    """
+    Stand-in preprocessor for folded models, whose thresholds already are in raw units.
+    """
+
+    def __init__(self, feature_scale: Optional[np.ndarray] = None, feature_mean: Optional[np.ndarray] = None):
+        """
+        Args:
+            feature_scale: Per-feature spread of the raw readings (the folded
+                scaler's scale_), kept for consumers that work in feature units
+            feature_mean: Per-feature mean of the raw readings (the folded
+                scaler's mean_), kept for consumers sampling typical readings
+        """
+        self.feature_scale = feature_scale
+        self.feature_mean = feature_mean
+
+    def transform(self, X: Any) -> np.ndarray:
+        """Return the raw features unchanged, as a float64 array."""
+        return np.asarray(X, dtype=np.float64)
+
+
+def standard_scaler_params(preprocessor: Any, num_features: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the (mean, scale) the StandardScaler applies, with identity defaults."""
+    mean = getattr(preprocessor, "mean_", None)
+    scale = getattr(preprocessor, "scale_", None)
+    if not getattr(preprocessor, "with_mean", True) or mean is None:
+        mean = np.zeros(num_features)
+    if not getattr(preprocessor, "with_std", True) or scale is None:
+        scale = np.ones(num_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def raw_thresholds(
+    thresholds: np.ndarray,
+    mean: np.ndarray,
+    scale: np.ndarray
+) -> np.ndarray:
+    """
+    Map thresholds on scaled features to equivalent thresholds on raw features.
+
+    StandardScaler computes (x - mean) / scale in float64. That map is monotone,
+    so {x : (x - mean) / scale <= t} is exactly {x : x <= T} for one double T.
+    T starts at t * scale + mean and is then moved ulp by ulp until it is the
+    largest double that still goes left, which makes the split decision
+    identical to the scaled one for every finite input.
+
+    Args:
+        thresholds: Split thresholds in scaled units
+        mean: Per-split scaler mean of the split feature
+        scale: Per-split scaler scale of the split feature (positive)
+
+    Returns:
+        Split thresholds in raw sensor units
+    """
+    def goes_left(x):
+        return (x - mean) / scale <= thresholds
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        raw = thresholds * scale + mean
+
+        for _ in range(_MAX_ULP_STEPS):
+            too_high = ~goes_left(raw)
+            if not too_high.any():
+                break
+            raw = np.where(too_high, np.nextafter(raw, -np.inf), raw)
+        else:
+            raise ValueError("Could not fold scaler into split thresholds")
+
+        for _ in range(_MAX_ULP_STEPS):
+            above = np.nextafter(raw, np.inf)
+            too_low = goes_left(above)
+            if not too_low.any():
+                break
+            raw = np.where(too_low, above, raw)
+        else:
+            raise ValueError("Could not fold scaler into split thresholds")
+
+    return raw
+
+
+def fold_scaler_into_model(model: Any, preprocessor: Any) -> BoosterClassifier:
+    """
+    Build a model that takes raw sensor readings directly.
+
+    Every numerical split threshold of the booster is rewritten with
+    raw_thresholds, so model.predict_proba(raw) of the result is bit-identical
+    to model.predict_proba(preprocessor.transform(raw)) of the original pair
+    for all finite inputs. Leaf values, tree structure and node statistics are
+    untouched, so TreeSHAP values are unchanged too.
+
+    Args:
+        model: Trained LGBMClassifier (or lightgbm.Booster) fitted on scaled features
+        preprocessor: Fitted StandardScaler the model was trained behind
+
+    Returns:
+        BoosterClassifier over the folded booster
+
+    Raises:
+        ValueError: If the model uses categorical splits or zero-as-missing,
+            neither of which survives an affine change of units
+    """
+    booster = model if isinstance(model, lgb.Booster) else model.booster_
+    mean, scale = standard_scaler_params(preprocessor, booster.num_feature())
+    if np.any(scale <= 0):
+        raise ValueError("Scaler has non-positive scale, cannot fold")
+
+    lines = booster.model_to_string().split("\n")
+    split_features = None
+    decision_types = None
+    threshold_line = None
+
+    for index, line in enumerate(lines):
+        if line.startswith("tree_sizes="):
+            # Byte sizes of the tree blocks change with the new thresholds;
+            # without this line LightGBM parses the trees sequentially
+            lines[index] = None
+        elif line.startswith("split_feature="):
+            split_features = np.array(line[len("split_feature="):].split(), dtype=np.int64)
+        elif line.startswith("threshold="):
+            threshold_line = index
+        elif line.startswith("decision_type="):
+            decision_types = np.array(line[len("decision_type="):].split(), dtype=np.int64)
+        elif line.startswith("left_child=") and threshold_line is not None:
+            # All per-node arrays of this tree have been read
+            if len(split_features):
+                if np.any(decision_types & _CATEGORICAL_MASK):
+                    raise ValueError("Cannot fold scaler into a model with categorical splits")
+                if np.any((decision_types >> _MISSING_TYPE_SHIFT) & 3 == _MISSING_TYPE_ZERO):
+                    raise ValueError("Cannot fold scaler into a model using zero as missing value")
+
+                thresholds = np.array(lines[threshold_line][len("threshold="):].split(), dtype=np.float64)
+                folded = raw_thresholds(thresholds, mean[split_features], scale[split_features])
+                lines[threshold_line] = "threshold=" + " ".join(repr(float(t)) for t in folded)
+            split_features = decision_types = threshold_line = None
+
+    folded_booster = lgb.Booster(model_str="\n".join(line for line in lines if line is not None))
+    return BoosterClassifier(folded_booster)
@@ -0,0 +1,213 @@
+"""
+Per-engine history of readings and predictions.
+Keeps each engine's most recent readings, with the probabilities and label
+predicted for them, in columnar NumPy ring buffers, so the
+dashboard can show recent history without a Python object per reading.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+
+def timestamp_seconds(value: Any, default: float) -> float:
+    """
+    Seconds since the epoch of a reading's Timestamp.
+
+    Args:
+        value: Seconds since the epoch, or an ISO 8601 string such as the
+            dataset's "2024-01-01 00:00:05" (UTC unless it has an offset)
+        default: Seconds returned when value is missing or cannot be parsed
+
+    Returns:
+        Seconds since the epoch
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return default
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return default
+
+
+class EngineHistory:
+    """
+    Ring buffers of the last `retention` scored readings of each engine.
+
+    Each engine's slot holds arrays of `retention` rows: timestamps
+    (float64), raw readings (float32, FEATURE_NAMES order), class
+    probabilities (float32, FAULT_LABELS order) and predicted class (int8).
+    A slot is allocated the first time its engine records, so memory grows
+    with the engines that have reported, up to max_engines times
+    bytes_per_engine. Once max_engines engines have history, the engine that
+    reported least recently loses its slot, arrays included, to the new one.
+    """
+
+    def __init__(self, retention: int = 600, max_engines: int = 10000):
+        """
+        Args:
+            retention: Readings kept per engine
+            max_engines: Engines history is kept for at once
+        """
+        if retention < 1:
+            raise ValueError("retention must be at least 1")
+        if max_engines < 1:
+            raise ValueError("max_engines must be at least 1")
+
+        self.retention = retention
+        self.max_engines = max_engines
+        # Arrays of every slot allocated so far, indexed by slot
+        self._timestamps: list[np.ndarray] = []
+        self._readings: list[np.ndarray] = []
+        self._probabilities: list[np.ndarray] = []
+        self._predictions: list[np.ndarray] = []
+        self._position: list[int] = []
+        self._count: list[int] = []
+        self._lock = threading.Lock()
+        self._slots: OrderedDict[str, int] = OrderedDict()
+        self._recorded = 0
+        self._evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "EngineHistory":
+        """
+        Build the history store configured from environment variables.
+
+        AIMS_HISTORY_RETENTION: readings kept per engine (default: 600)
+        AIMS_HISTORY_MAX_ENGINES: engines history is kept for (default: 10000)
+        """
+        return cls(
+            retention=int(os.environ.get("AIMS_HISTORY_RETENTION", 600)),
+            max_engines=int(os.environ.get("AIMS_HISTORY_MAX_ENGINES", 10000))
+        )
+
+    @property
+    def bytes_per_engine(self) -> int:
+        """Bytes of the arrays of one engine's slot."""
+        return self.retention * (
+            np.dtype(np.float64).itemsize
+            + len(FEATURE_NAMES) * np.dtype(np.float32).itemsize
+            + len(FAULT_LABELS) * np.dtype(np.float32).itemsize
+            + np.dtype(np.int8).itemsize
+        )
+
+    def _allocate_slot(self) -> int:
+        """Allocate the arrays of a new slot and return its index."""
+        self._timestamps.append(np.zeros(self.retention, dtype=np.float64))
+        self._readings.append(np.zeros((self.retention, len(FEATURE_NAMES)), dtype=np.float32))
+        self._probabilities.append(np.zeros((self.retention, len(FAULT_LABELS)), dtype=np.float32))
+        self._predictions.append(np.zeros(self.retention, dtype=np.int8))
+        self._position.append(0)
+        self._count.append(0)
+        return len(self._timestamps) - 1
+
+    def record(
+        self,
+        engine_id: str,
+        timestamps: np.ndarray,
+        readings: np.ndarray,
+        probabilities: np.ndarray
+    ) -> None:
+        """
+        Append scored readings of an engine, oldest first.
+
+        Args:
+            engine_id: Engine the readings come from
+            timestamps: Seconds since the epoch of each reading [num_readings]
+            readings: Raw sensor readings [num_readings, 18] in FEATURE_NAMES order
+            probabilities: Class probabilities [num_readings, 8] in FAULT_LABELS order
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)[-self.retention:]
+        readings = np.asarray(readings)[-self.retention:]
+        probabilities = np.asarray(probabilities)[-self.retention:]
+        num_readings = len(timestamps)
+        if num_readings == 0:
+            return
+
+        with self._lock:
+            slot = self._slots.get(engine_id)
+            if slot is None:
+                if len(self._slots) < self.max_engines:
+                    slot = self._allocate_slot()
+                else:
+                    _, slot = self._slots.popitem(last=False)
+                    self._evicted += 1
+                    self._position[slot] = 0
+                    self._count[slot] = 0
+                self._slots[engine_id] = slot
+            else:
+                self._slots.move_to_end(engine_id)
+
+            rows = (self._position[slot] + np.arange(num_readings)) % self.retention
+            self._timestamps[slot][rows] = timestamps
+            self._readings[slot][rows] = readings
+            self._probabilities[slot][rows] = probabilities
+            self._predictions[slot][rows] = probabilities.argmax(axis=1)
+            self._position[slot] = (self._position[slot] + num_readings) % self.retention
+            self._count[slot] = min(self._count[slot] + num_readings, self.retention)
+            self._recorded += num_readings
+
+    def query(
+        self,
+        engine_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> Optional[dict[str, np.ndarray]]:
+        """
+        Readings of an engine within a time range, oldest first.
+
+        Args:
+            engine_id: Engine to look up
+            start: Earliest timestamp included, in seconds since the epoch
+            end: Latest timestamp included, in seconds since the epoch
+            limit: Keep only the most recent readings in the range, at most this many
+
+        Returns:
+            Copies of the "timestamps", "readings", "probabilities" and
+            "predictions" arrays, or None if the engine has no history
+        """
+        with self._lock:
+            slot = self._slots.get(engine_id)
+            if slot is None:
+                return None
+            count = self._count[slot]
+            rows = (self._position[slot] - count + np.arange(count)) % self.retention
+            timestamps = self._timestamps[slot][rows]
+            selected = np.ones(count, dtype=bool)
+            if start is not None:
+                selected &= timestamps >= start
+            if end is not None:
+                selected &= timestamps <= end
+            rows = rows[selected]
+            if limit is not None:
+                rows = rows[len(rows) - min(limit, len(rows)):]
+            return {
+                "timestamps": self._timestamps[slot][rows],
+                "readings": self._readings[slot][rows],
+                "probabilities": self._probabilities[slot][rows],
+                "predictions": self._predictions[slot][rows],
+            }
+
+    def stats(self) -> dict[str, Any]:
+        """Retention, engine counts and memory held."""
+        with self._lock:
+            return {
+                "retention": self.retention,
+                "engines": len(self._slots),
+                "max_engines": self.max_engines,
+                "bytes_per_engine": self.bytes_per_engine,
+                "bytes": len(self._timestamps) * self.bytes_per_engine,
+                "recorded": self._recorded,
+                "evicted": self._evicted,
+            }
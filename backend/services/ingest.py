@@ -0,0 +1,167 @@
+"""
+Binary request payloads.
+Parses readings sent as raw little-endian float32 rows, .npy arrays or Arrow
+IPC tables into a feature matrix, and validates the whole matrix at once, so
+high-rate clients skip JSON parsing and per-field validation.
+"""
+import io
+from typing import Optional
+
+import numpy as np
+
+from backend.services.predictor import FEATURE_NAMES
+
+
+# Binary payload format of each media type
+BINARY_MEDIA_TYPES = {
+    "application/octet-stream": "raw",
+    "application/x-npy": "npy",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+# Binary payload formats
+BINARY_FORMATS = ("raw", "npy", "arrow")
+
+# Bytes of one raw reading: 18 little-endian float32 values
+RAW_READING_BYTES = len(FEATURE_NAMES) * 4
+
+# Non-finite values named in a validation error, at most
+_MAX_REPORTED = 5
+
+
+class PayloadError(ValueError):
+    """Raised when a binary payload cannot be parsed or holds invalid readings."""
+
+
+class UnsupportedFormatError(PayloadError):
+    """Raised when a binary payload format needs a package the server does not have."""
+
+
+def binary_format(content_type: Optional[str]) -> Optional[str]:
+    """
+    Binary payload format named by a Content-Type header.
+
+    Args:
+        content_type: Content-Type header, possibly with parameters
+
+    Returns:
+        "raw", "npy" or "arrow", or None for anything else (JSON)
+    """
+    if not content_type:
+        return None
+    return BINARY_MEDIA_TYPES.get(content_type.split(";", 1)[0].strip().lower())
+
+
+def validate_readings(features: np.ndarray) -> np.ndarray:
+    """
+    Check a feature matrix the way SensorInput checks one reading, in one pass.
+
+    Both apply the same rules: 18 values per reading, each a finite float.
+    Readings that pass can therefore be wrapped with SensorInput.model_construct
+    without validating them again.
+
+    Args:
+        features: Numeric readings [num_readings, 18] in FEATURE_NAMES order
+
+    Returns:
+        The readings as a C-contiguous float64 matrix
+
+    Raises:
+        PayloadError: If the matrix has the wrong shape, no rows or non-finite values
+    """
+    if features.ndim != 2 or features.shape[1] != len(FEATURE_NAMES):
+        raise PayloadError(f"Readings must have shape [num_readings, {len(FEATURE_NAMES)}], got {list(features.shape)}")
+    if len(features) == 0:
+        raise PayloadError("Payload holds no readings")
+
+    features = np.ascontiguousarray(features, dtype=np.float64)
+    finite = np.isfinite(features)
+    if not finite.all():
+        rows, columns = np.nonzero(~finite)
+        named = ", ".join(
+            f"reading {row} {FEATURE_NAMES[column]}"
+            for row, column in zip(rows[:_MAX_REPORTED].tolist(), columns[:_MAX_REPORTED].tolist())
+        )
+        more = f" and {len(rows) - _MAX_REPORTED} more" if len(rows) > _MAX_REPORTED else ""
+        raise PayloadError(f"Sensor values must be finite: {named}{more}")
+    return features
+
+
+def parse_readings(payload: bytes, payload_format: str) -> np.ndarray:
+    """
+    Parse and validate the readings of a binary payload.
+
+    Formats:
+        raw: consecutive readings of 18 little-endian float32 values in
+            FEATURE_NAMES order, with no header
+        npy: an array saved with numpy.save, of shape [num_readings, 18] or
+            [18], with a float or integer dtype
+        arrow: an Arrow IPC stream or file with a numeric column per sensor,
+            named as in FEATURE_NAMES; other columns are ignored
+
+    Args:
+        payload: Bytes of the request body or WebSocket frame
+        payload_format: "raw", "npy" or "arrow"
+
+    Returns:
+        Validated float64 readings [num_readings, 18] in FEATURE_NAMES order
+
+    Raises:
+        PayloadError: If the payload cannot be parsed or holds invalid readings
+        UnsupportedFormatError: For Arrow payloads when pyarrow is not installed
+    """
+    if payload_format == "raw":
+        if len(payload) % RAW_READING_BYTES:
+            raise PayloadError(
+                f"Raw payload of {len(payload)} bytes is not a whole number of "
+                f"{RAW_READING_BYTES}-byte readings"
+            )
+        features = np.frombuffer(payload, dtype="<f4").reshape(-1, len(FEATURE_NAMES))
+    elif payload_format == "npy":
+        features = _parse_npy(payload)
+    elif payload_format == "arrow":
+        features = _parse_arrow(payload)
+    else:
+        raise PayloadError(f"Unknown payload format '{payload_format}', expected one of {', '.join(BINARY_FORMATS)}")
+    return validate_readings(features)
+
+
+def _parse_npy(payload: bytes) -> np.ndarray:
+    """Readings of a .npy payload."""
+    try:
+        features = np.load(io.BytesIO(payload), allow_pickle=False)
+    except (ValueError, EOFError, OSError) as e:
+        raise PayloadError(f"Payload is not a valid .npy array: {e}")
+    if not isinstance(features, np.ndarray) or features.dtype.kind not in "fiu":
+        raise PayloadError(f"A .npy payload must hold a float or integer array, got {getattr(features, 'dtype', None)}")
+    return features.reshape(1, -1) if features.ndim == 1 else features
+
+
+def _parse_arrow(payload: bytes) -> np.ndarray:
+    """Readings of an Arrow IPC stream or file payload."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedFormatError("Arrow payloads need pyarrow on the server")
+
+    try:
+        if payload[:6] == b"ARROW1":
+            table = pa.ipc.open_file(pa.BufferReader(payload)).read_all()
+        else:
+            table = pa.ipc.open_stream(pa.BufferReader(payload)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise PayloadError(f"Payload is not a valid Arrow IPC stream or file: {e}")
+
+    missing = [name for name in FEATURE_NAMES if name not in table.column_names]
+    if missing:
+        raise PayloadError(f"Arrow payload is missing sensor columns: {', '.join(missing)}")
+    features = np.empty((table.num_rows, len(FEATURE_NAMES)), dtype=np.float64)
+    for index, name in enumerate(FEATURE_NAMES):
+        column = table.column(name)
+        if not (pa.types.is_floating(column.type) or pa.types.is_integer(column.type)):
+            raise PayloadError(f"Arrow column {name} must be numeric, got {column.type}")
+        if column.null_count:
+            raise PayloadError(f"Arrow column {name} has {column.null_count} missing values")
+        features[:, index] = column.to_numpy()
+    return features
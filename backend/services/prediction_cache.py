@@ -0,0 +1,216 @@
+"""
+Prediction cache for repeated readings.
+Engines at steady state report near-identical readings for long periods, so
+predictions are cached under the reading quantized to a per-feature resolution.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.models.response import PredictionResponse
+
+
+# Rough per-entry overhead: OrderedDict slot, tuple, response model and the
+# float/str objects of one probabilities or SHAP dict item
+_ENTRY_OVERHEAD_BYTES = 512
+_DICT_ITEM_BYTES = 120
+
+
+def feature_scale(preprocessor: Any, num_features: int) -> np.ndarray:
+    """
+    Per-feature spread of the raw readings, used to size the quantization step.
+
+    Uses the StandardScaler's scale_, or the scale kept by an IdentityScaler of
+    folded artifacts, and falls back to 1.0 (raw units) otherwise.
+    """
+    scale = getattr(preprocessor, "scale_", None)
+    if scale is None:
+        scale = getattr(preprocessor, "feature_scale", None)
+    if not isinstance(scale, np.ndarray) or scale.shape != (num_features,):
+        return np.ones(num_features)
+    return np.where(scale > 0, scale, 1.0).astype(np.float64)
+
+
+class PredictionCache:
+    """
+    LRU cache of PredictionResponses keyed on quantized sensor readings.
+
+    A reading is quantized to round(x / (resolution * scale)), so readings that
+    differ by less than about `resolution` standard deviations in every feature
+    share one entry. Entries expire after ttl_s seconds, and the least recently
+    used ones are evicted once the estimated size exceeds max_bytes. The cache
+    is cleared whenever it is used with different artifacts than before.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.01,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_s: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            resolution: Quantization step as a fraction of each feature's scale
+            max_bytes: Estimated memory the cached entries may use
+            ttl_s: Seconds an entry stays valid
+            clock: Monotonic time source, in seconds
+        """
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+
+        self.resolution = resolution
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[float, int, PredictionResponse]] = OrderedDict()
+        self._bytes = 0
+        self._artifacts: Optional[dict[str, Any]] = None
+        self._step: Optional[np.ndarray] = None
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["PredictionCache"]:
+        """
+        Build a cache configured from environment variables, or None if disabled.
+
+        AIMS_PREDICTION_CACHE: "1" to enable the prediction cache (default: disabled)
+        AIMS_PREDICTION_CACHE_RESOLUTION: step as a fraction of each feature's scale (default: 0.01)
+        AIMS_PREDICTION_CACHE_MAX_MB: memory cap in MiB (default: 64)
+        AIMS_PREDICTION_CACHE_TTL_S: seconds an entry stays valid (default: 300)
+        """
+        if os.environ.get("AIMS_PREDICTION_CACHE", "0").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            resolution=float(os.environ.get("AIMS_PREDICTION_CACHE_RESOLUTION", 0.01)),
+            max_bytes=int(float(os.environ.get("AIMS_PREDICTION_CACHE_MAX_MB", 64)) * 1024 * 1024),
+            ttl_s=float(os.environ.get("AIMS_PREDICTION_CACHE_TTL_S", 300.0))
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, features: np.ndarray, explain: bool, **artifacts: Any) -> Optional[PredictionResponse]:
+        """
+        Look up the prediction for a reading.
+
+        Args:
+            features: Raw sensor readings, shape [18]
+            explain: Whether the caller needs SHAP values; entries without them
+                only answer callers that do not
+            **artifacts: model, preprocessor and shap_explainer the caller scores with
+
+        Returns:
+            A fresh copy of the cached response, or None on a miss
+        """
+        with self._lock:
+            key = self._key(features, artifacts)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None or (explain and entry[2].shap_values is None):
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            response = entry[2]
+
+        if not explain:
+            return response.model_copy(update={"shap_values": None})
+        return response.model_copy()
+
+    def put(self, features: np.ndarray, response: PredictionResponse, **artifacts: Any) -> None:
+        """
+        Cache the prediction for a reading.
+
+        Args:
+            features: Raw sensor readings, shape [18]
+            response: Prediction computed for them
+            **artifacts: model, preprocessor and shap_explainer it was computed with
+        """
+        response = response.model_copy(update={"prediction_id": None})
+        size = _ENTRY_OVERHEAD_BYTES + _DICT_ITEM_BYTES * (
+            len(response.probabilities) + len(response.shap_values or {})
+        )
+
+        with self._lock:
+            key = self._key(features, artifacts)
+            if key is None or size > self.max_bytes:
+                return
+            existing = self._entries.get(key)
+            if existing is not None:
+                if existing[2].shap_values is not None and response.shap_values is None:
+                    # Keep the richer entry
+                    return
+                self._remove(key)
+
+            self._entries[key] = (self._clock() + self.ttl_s, size + len(key), response)
+            self._bytes += size + len(key)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and memory use."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "resolution": self.resolution,
+                "ttl_s": self.ttl_s,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _key(self, features: np.ndarray, artifacts: dict[str, Any]) -> Optional[bytes]:
+        """Quantize a reading, clearing the cache first if the artifacts changed."""
+        if not self._same_artifacts(artifacts):
+            if self._artifacts is not None:
+                self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._artifacts = dict(artifacts)
+            self._step = self.resolution * feature_scale(artifacts.get("preprocessor"), len(features))
+
+        features = np.asarray(features, dtype=np.float64)
+        if not np.all(np.isfinite(features)):
+            return None
+        return np.floor(features / self._step + 0.5).astype(np.int64).tobytes()
+
+    def _same_artifacts(self, artifacts: dict[str, Any]) -> bool:
+        """Check artifacts are the very same objects the cached entries were computed with."""
+        return self._artifacts is not None and artifacts.keys() == self._artifacts.keys() and all(
+            artifacts[key] is self._artifacts[key] for key in artifacts
+        )
+
+    def _remove(self, key: bytes) -> None:
+        """Drop one entry and release its size."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -3,10 +3,11 @@ Predictor service for marine engine fault diagnosis.
 Handles inference logic, SHAP computation, and response formatting.
 """
 
-from typing import Any
+import threading
+from operator import attrgetter
+from typing import Any, Optional
 
 import numpy as np
-import pandas as pd
 
 from backend.models.request import SensorInput
 from backend.models.response import PredictionResponse
@@ -24,6 +25,9 @@ FAULT_LABELS = {
     7: "Vibration Anomaly"
 }
 
+# Reverse mapping, label string to class index
+FAULT_LABEL_INDICES = {label: index for index, label in FAULT_LABELS.items()}
+
 # Feature names in the correct order (matching training data)
 FEATURE_NAMES = [
     "Shaft_RPM",
@@ -47,6 +51,144 @@ FEATURE_NAMES = [
 ]
 
 
+# Reads all 18 features of a SensorInput as one tuple, in FEATURE_NAMES order
+_read_features = attrgetter(*FEATURE_NAMES)
+
+
+class _RowBuffers(threading.local):
+    """
+    Per-thread scratch arrays for predict_fault_row.
+    
+    Each inference worker thread gets its own buffers, so concurrent requests
+    never share them, and a request reuses them instead of allocating.
+    """
+    
+    def __init__(self):
+        self.raw = np.empty((1, len(FEATURE_NAMES)), dtype=np.float64)
+        self.scaled = np.empty((1, len(FEATURE_NAMES)), dtype=np.float64)
+        self.preprocessor = None
+        self.identity = False
+        self.mean = None
+        self.scale = None
+        self.model = None
+        self.frames = None
+
+
+_row_buffers = _RowBuffers()
+
+
+def sensor_inputs_to_matrix(sensor_inputs: list[SensorInput]) -> np.ndarray:
+    """
+    Stack validated sensor readings into an (N, 18) float64 matrix.
+    
+    Args:
+        sensor_inputs: Validated sensor readings from the request
+    
+    Returns:
+        Raw (unscaled) feature matrix with columns in FEATURE_NAMES order
+    """
+    return np.array(
+        [[getattr(sensor_input, name) for name in FEATURE_NAMES] for sensor_input in sensor_inputs],
+        dtype=np.float64
+    ).reshape(len(sensor_inputs), len(FEATURE_NAMES))
+
+
+def select_predicted_class_shap(shap_values: Any, predictions: np.ndarray) -> np.ndarray:
+    """
+    Pick the SHAP values of each row's predicted class.
+    
+    Args:
+        shap_values: Explainer output, either a list of [num_samples, num_features]
+            arrays (one per class) or a [num_samples, num_features, num_classes] array
+        predictions: Predicted class index for every row
+    
+    Returns:
+        Array of shape [num_samples, num_features]
+    """
+    if isinstance(shap_values, list):
+        shap_values = np.stack(shap_values, axis=-1)
+    else:
+        shap_values = np.asarray(shap_values)
+    
+    rows = np.arange(len(predictions))
+    return shap_values[rows, :, predictions]
+
+
+def predict_fault_matrix(
+    features: np.ndarray,
+    model: Any,
+    preprocessor: Any,
+    shap_explainer: Any,
+    explain: bool = True
+) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Score a matrix of raw sensor readings with one vectorized pass.
+    
+    The scaler, the model and the SHAP explainer are each called exactly once
+    for the whole matrix, so the fixed per-call overhead is shared by all rows.
+    
+    Args:
+        features: Raw sensor readings of shape [num_samples, 18] in FEATURE_NAMES order
+        model: Trained LightGBM classifier
+        preprocessor: Fitted StandardScaler for feature transformation
+        shap_explainer: Fitted SHAP TreeExplainer for computing explanations
+        explain: Whether to compute SHAP values; if False they are None
+    
+    Returns:
+        Tuple of (predictions [num_samples], probabilities [num_samples, 8],
+        SHAP values of the predicted class [num_samples, 18] or None)
+    """
+    # pandas is imported on first use, not with the API
+    import pandas as pd
+    
+    input_df = pd.DataFrame(features, columns=FEATURE_NAMES)
+    input_scaled = pd.DataFrame(preprocessor.transform(input_df), columns=FEATURE_NAMES)
+    
+    # The predicted label is the argmax of the probabilities, so a single
+    # predict_proba call gives us both
+    probabilities = np.asarray(model.predict_proba(input_scaled))
+    predictions = probabilities.argmax(axis=1)
+    
+    if not explain:
+        return predictions, probabilities, None
+    
+    shap_values = select_predicted_class_shap(
+        shap_explainer.shap_values(input_scaled),
+        predictions
+    )
+    
+    return predictions, probabilities, shap_values
+
+
+def shap_values_to_dict(shap_values: np.ndarray) -> dict[str, float]:
+    """Map the 18 SHAP values of one row to their feature names."""
+    return dict(zip(FEATURE_NAMES, np.asarray(shap_values).tolist()))
+
+
+def build_prediction_response(
+    prediction: int,
+    probabilities: np.ndarray,
+    shap_values: Optional[np.ndarray]
+) -> PredictionResponse:
+    """
+    Format one scored row as a PredictionResponse.
+    
+    Args:
+        prediction: Predicted class index (0-7)
+        probabilities: Probabilities for all 8 classes
+        shap_values: SHAP values of the predicted class for all 18 features,
+            or None when the explanation was skipped
+    
+    Returns:
+        PredictionResponse with label strings and feature names as keys
+    """
+    return PredictionResponse(
+        prediction_label=FAULT_LABELS[int(prediction)],
+        probabilities=dict(zip(FAULT_LABELS.values(), np.asarray(probabilities).tolist())),
+        shap_values=shap_values_to_dict(shap_values) if shap_values is not None else None
+    )
+
+
 def predict_fault(
     sensor_input: SensorInput,
     model: Any,
@@ -65,6 +207,9 @@ def predict_fault(
     Returns:
         PredictionResponse containing prediction label, probabilities, and SHAP values
     """
+    # pandas is imported on first use, not with the API
+    import pandas as pd
+    
     # Convert SensorInput to pandas DataFrame with feature names
     input_df = pd.DataFrame([[
         sensor_input.Shaft_RPM,
@@ -132,3 +277,187 @@ def predict_fault(
         probabilities=probabilities_dict,
         shap_values=shap_values_dict
     )
+
+
+def _prepare_scaling(preprocessor: Any, buffers: _RowBuffers, num_features: int) -> None:
+    """Work out once per preprocessor how _scale_row applies it."""
+    # Imported here, where a loaded preprocessor means they are loaded anyway
+    from sklearn.preprocessing import StandardScaler
+    from backend.services.folding import IdentityScaler, standard_scaler_params
+    
+    buffers.preprocessor = preprocessor
+    buffers.identity = isinstance(preprocessor, IdentityScaler)
+    buffers.mean = buffers.scale = None
+    if isinstance(preprocessor, StandardScaler):
+        buffers.mean, buffers.scale = standard_scaler_params(preprocessor, num_features)
+
+
+def _prepare_model_input(model: Any, buffers: _RowBuffers) -> None:
+    """
+    Work out once per model whether _model_input names the columns.
+    
+    A model fitted on a DataFrame has feature_names_in_, and sklearn warns on
+    every call that passes it a bare array. Such a model gets DataFrame views
+    of the buffers instead, so refilling a buffer refills its view.
+    """
+    buffers.model = model
+    buffers.frames = None
+    if isinstance(getattr(model, "feature_names_in_", None), np.ndarray):
+        import pandas as pd
+        
+        buffers.frames = {
+            id(buffer): pd.DataFrame(buffer, columns=FEATURE_NAMES, copy=False)
+            for buffer in (buffers.raw, buffers.scaled)
+        }
+
+
+def _model_input(features: np.ndarray, model: Any, buffers: _RowBuffers) -> Any:
+    """The row as the model expects it: the array, or a named view of it."""
+    if buffers.model is not model:
+        _prepare_model_input(model, buffers)
+    
+    if buffers.frames is None:
+        return features
+    
+    frame = buffers.frames.get(id(features))
+    if frame is None:
+        # A preprocessor without an in-place path returned a new array
+        import pandas as pd
+        
+        frame = pd.DataFrame(features, columns=FEATURE_NAMES)
+    return frame
+
+
+def _scale_row(raw: np.ndarray, preprocessor: Any, buffers: _RowBuffers) -> np.ndarray:
+    """Apply the preprocessor to one buffered row, in place where possible."""
+    if buffers.preprocessor is not preprocessor:
+        _prepare_scaling(preprocessor, buffers, raw.shape[1])
+    
+    if buffers.identity:
+        # Folded model: thresholds already are in raw units
+        return raw
+    
+    if buffers.mean is not None:
+        # Same float64 operations as StandardScaler.transform, so bit-identical
+        np.subtract(raw, buffers.mean, out=buffers.scaled)
+        np.divide(buffers.scaled, buffers.scale, out=buffers.scaled)
+        return buffers.scaled
+    
+    return np.asarray(preprocessor.transform(raw), dtype=np.float64)
+
+
+def predict_fault_row(
+    sensor_input: SensorInput,
+    model: Any,
+    preprocessor: Any,
+    shap_explainer: Any,
+    explain: bool = True
+) -> PredictionResponse:
+    """
+    Single-reading fast path of predict_fault.
+    
+    Fills preallocated per-thread NumPy buffers instead of building pandas
+    DataFrames, scales in place, and derives the label from a single
+    predict_proba call. A model fitted with feature names is given a
+    DataFrame view of the buffer, built once per thread. Results are
+    identical to predict_fault.
+    
+    Args:
+        sensor_input: Validated sensor readings from the request
+        model: Trained LightGBM classifier
+        preprocessor: Fitted StandardScaler for feature transformation
+        shap_explainer: Fitted SHAP TreeExplainer for computing explanations
+        explain: Whether to compute SHAP values; if False shap_values is None
+    
+    Returns:
+        PredictionResponse containing prediction label, probabilities, and SHAP values
+    """
+    buffers = _row_buffers
+    buffers.raw[0] = _read_features(sensor_input)
+    features = _scale_row(buffers.raw, preprocessor, buffers)
+    
+    probabilities = np.asarray(model.predict_proba(_model_input(features, model, buffers)))[0]
+    prediction = int(probabilities.argmax())
+    
+    if not explain:
+        return build_prediction_response(prediction, probabilities, None)
+    
+    shap_values = select_predicted_class_shap(
+        shap_explainer.shap_values(features),
+        np.array([prediction])
+    )[0]
+    
+    return build_prediction_response(prediction, probabilities, shap_values)
+
+
+def explain_reading(
+    features: np.ndarray,
+    prediction: int,
+    model: Any,
+    preprocessor: Any,
+    shap_explainer: Any
+) -> dict[str, float]:
+    """
+    Compute the SHAP values of an earlier prediction.
+    
+    Args:
+        features: Raw sensor readings of the prediction, shape [18] in FEATURE_NAMES order
+        prediction: Class index that was predicted for them
+        model: Trained LightGBM classifier (unused, accepted with the other artifacts)
+        preprocessor: Fitted StandardScaler for feature transformation
+        shap_explainer: Fitted SHAP TreeExplainer for computing explanations
+    
+    Returns:
+        SHAP values of the predicted class, keyed by feature name
+    """
+    buffers = _row_buffers
+    buffers.raw[0] = features
+    scaled = _scale_row(buffers.raw, preprocessor, buffers)
+    
+    shap_values = select_predicted_class_shap(
+        shap_explainer.shap_values(scaled),
+        np.array([prediction])
+    )[0]
+    
+    return shap_values_to_dict(shap_values)
+
+
+def predict_fault_batch(
+    sensor_inputs: list[SensorInput] | np.ndarray,
+    model: Any,
+    preprocessor: Any,
+    shap_explainer: Any,
+    explain: bool = True
+) -> list[PredictionResponse]:
+    """
+    Perform fault prediction with SHAP explanations for many readings at once.
+    
+    Args:
+        sensor_inputs: Validated sensor readings from the request, or a raw
+            feature matrix [num_samples, 18] already validated as a whole
+        model: Trained LightGBM classifier
+        preprocessor: Fitted StandardScaler for feature transformation
+        shap_explainer: Fitted SHAP TreeExplainer for computing explanations
+        explain: Whether to compute SHAP values; if False shap_values is None
+    
+    Returns:
+        One PredictionResponse per reading, in request order
+    """
+    if not isinstance(sensor_inputs, np.ndarray):
+        sensor_inputs = sensor_inputs_to_matrix(sensor_inputs)
+    predictions, probabilities, shap_values = predict_fault_matrix(
+        sensor_inputs,
+        model,
+        preprocessor,
+        shap_explainer,
+        explain=explain
+    )
+    
+    if shap_values is None:
+        shap_values = [None] * len(predictions)
+    
+    return [
+        build_prediction_response(prediction, row_probabilities, row_shap_values)
+        for prediction, row_probabilities, row_shap_values
+        in zip(predictions, probabilities, shap_values)
+    ]
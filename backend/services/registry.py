@@ -0,0 +1,292 @@
+"""
+Model version registry.
+Holds extra model versions next to the primary artifacts in app.state, routes
+requests to them by header or by percentage, and compares a shadow version
+with the primary on live traffic without delaying the response.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.services.explanations import ExplanationStore
+from backend.services.reload import load_artifact_set
+
+
+# Name of the artifacts in app.state, which serve every request not routed elsewhere
+PRIMARY_VERSION = "primary"
+
+# Number of recent shadow comparisons kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class UnknownVersionError(ValueError):
+    """Raised when a request names a model version that is not configured."""
+
+
+class VersionNotLoadedError(RuntimeError):
+    """Raised when a request names a model version that is still loading or failed to load."""
+
+
+def _parse_pairs(value: str, variable: str) -> dict[str, str]:
+    """Parse "name=value,name=value" into a dict."""
+    pairs = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, separator, setting = item.partition("=")
+        if not separator or not name.strip() or not setting.strip():
+            raise ValueError(f"{variable} entries must look like name=value, got '{item}'")
+        pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def model_versions_from_env() -> dict[str, str]:
+    """
+    Extra model versions configured in AIMS_MODEL_VERSIONS.
+
+    AIMS_MODEL_VERSIONS: comma-separated name=artifacts_dir pairs, each
+        directory holding a bundle or the .pkl artifacts (default: none)
+
+    Returns:
+        Dict from version name to artifacts directory
+    """
+    return _parse_pairs(os.environ.get("AIMS_MODEL_VERSIONS", ""), "AIMS_MODEL_VERSIONS")
+
+
+def timed_inference(fn: Callable, *args: Any, **kwargs: Any) -> tuple[float, Any]:
+    """Run fn and return (seconds it took, result); runs in the pool worker."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _latency_stats(latencies_ms: deque) -> dict[str, float]:
+    """Mean and percentiles of a latency window in milliseconds."""
+    if not latencies_ms:
+        return {"mean": 0.0, "p50": 0.0, "p99": 0.0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+    }
+
+
+class ModelRegistry:
+    """
+    Named model versions served next to the primary artifacts.
+
+    Requests are routed to a version named in their X-Model-Version header, or
+    else to a version drawn by the configured percentages, and to the primary
+    otherwise. Each version keeps its own explanation store, so a deferred
+    explanation is computed by the model that made the prediction.
+
+    A shadow version scores a share of the readings answered by the primary,
+    off the critical path. The registry records whether both models agree on
+    the label, how far apart their probabilities are, and how long each took
+    to score the reading in the pool worker.
+    """
+
+    def __init__(
+        self,
+        version_dirs: dict[str, str],
+        routes: Optional[dict[str, float]] = None,
+        shadow_version: Optional[str] = None,
+        shadow_percent: float = 100.0,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Args:
+            version_dirs: Version name -> directory with its bundle or .pkl artifacts
+            routes: Version name -> percentage of requests without a header routed to it
+            shadow_version: Version scoring readings answered by the primary, for comparison
+            shadow_percent: Percentage of those readings the shadow version scores
+            rng: Random source for routing and shadow sampling
+        """
+        routes = routes or {}
+        if PRIMARY_VERSION in version_dirs:
+            raise ValueError(f"'{PRIMARY_VERSION}' is reserved for the artifacts in app.state")
+        for name in [*routes, *([shadow_version] if shadow_version else [])]:
+            if name not in version_dirs:
+                raise ValueError(f"Unknown model version '{name}', expected one of {sorted(version_dirs)}")
+        if any(percent < 0 for percent in routes.values()) or sum(routes.values()) > 100:
+            raise ValueError("Route percentages must be non-negative and add up to at most 100")
+        if not 0 <= shadow_percent <= 100:
+            raise ValueError("shadow_percent must be between 0 and 100")
+
+        self.version_dirs = dict(version_dirs)
+        self.routes = dict(routes)
+        self.shadow_version = shadow_version
+        self.shadow_percent = shadow_percent
+        self._rng = rng or random.Random()
+
+        # Filled by load(); versions that failed to load stay absent
+        self.versions: dict[str, dict[str, Any]] = {}
+        self.versions_info: dict[str, Optional[str]] = {}
+        self.explanation_stores = {name: ExplanationStore.from_env() for name in version_dirs}
+
+        self._lock = threading.Lock()
+        self._routed = {name: 0 for name in [PRIMARY_VERSION, *version_dirs]}
+        self._compared = 0
+        self._agreed = 0
+        self._skipped = 0
+        self._failed = 0
+        self._max_probability_diff = 0.0
+        self._primary_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self._shadow_ms: deque = deque(maxlen=LATENCY_WINDOW)
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelRegistry"]:
+        """
+        Build a registry configured from environment variables.
+
+        AIMS_MODEL_VERSIONS: comma-separated name=artifacts_dir pairs (default: none)
+        AIMS_MODEL_ROUTES: comma-separated name=percent pairs routing requests
+            without an X-Model-Version header (default: none)
+        AIMS_SHADOW_VERSION: version scoring primary traffic for comparison (default: none)
+        AIMS_SHADOW_PERCENT: percentage of primary readings shadowed (default: 100)
+
+        Returns:
+            The registry, or None when no extra versions are configured
+        """
+        version_dirs = model_versions_from_env()
+        if not version_dirs:
+            return None
+        routes = {
+            name: float(percent)
+            for name, percent in _parse_pairs(os.environ.get("AIMS_MODEL_ROUTES", ""), "AIMS_MODEL_ROUTES").items()
+        }
+        return cls(
+            version_dirs,
+            routes=routes,
+            shadow_version=os.environ.get("AIMS_SHADOW_VERSION") or None,
+            shadow_percent=float(os.environ.get("AIMS_SHADOW_PERCENT", 100.0))
+        )
+
+    def load(self) -> None:
+        """Load, validate and warm up every version; failures are reported and skipped."""
+        for name, version_dir in self.version_dirs.items():
+            try:
+                artifacts, bundle_version = load_artifact_set(version_dir)
+            except Exception as e:
+                print(f"⚠ Warning: Could not load model version '{name}' from {version_dir}: {e}")
+                continue
+            self.versions_info[name] = bundle_version
+            self.versions[name] = artifacts
+            print(f"✓ Model version '{name}' loaded (version {bundle_version or 'unversioned'})")
+
+    def route(self, requested: Optional[str] = None) -> str:
+        """
+        Pick the version serving a request.
+
+        Args:
+            requested: Version named by the request, if any
+
+        Returns:
+            A loaded version name, or PRIMARY_VERSION
+
+        Raises:
+            UnknownVersionError: If the requested version is not configured
+            VersionNotLoadedError: If the requested version is configured but not loaded
+        """
+        if requested is not None:
+            if requested != PRIMARY_VERSION and requested not in self.version_dirs:
+                raise UnknownVersionError(
+                    f"Unknown model version '{requested}', expected one of {sorted([PRIMARY_VERSION, *self.version_dirs])}"
+                )
+            if requested != PRIMARY_VERSION and requested not in self.versions:
+                raise VersionNotLoadedError(f"Model version '{requested}' is not loaded")
+            name = requested
+        else:
+            name = PRIMARY_VERSION
+            draw = self._rng.random() * 100
+            for candidate, percent in self.routes.items():
+                if draw < percent:
+                    # Versions still loading (or failed) leave their share to the primary
+                    if candidate in self.versions:
+                        name = candidate
+                    break
+                draw -= percent
+
+        with self._lock:
+            self._routed[name] += 1
+        return name
+
+    def should_shadow(self, version: str) -> bool:
+        """Whether a reading answered by version is also scored by the shadow version."""
+        return (
+            version == PRIMARY_VERSION
+            and self.shadow_version in self.versions
+            and self._rng.random() * 100 < self.shadow_percent
+        )
+
+    def find_explanation(self, prediction_id: str) -> Optional[tuple[str, np.ndarray, int]]:
+        """Look up a deferred explanation stored by one of the versions, as (version, features, prediction)."""
+        for name, store in self.explanation_stores.items():
+            stored = store.get(prediction_id)
+            if stored is not None:
+                return (name, *stored)
+        return None
+
+    def record_shadow(
+        self,
+        primary_probabilities: dict[str, float],
+        shadow_probabilities: dict[str, float],
+        primary_s: Optional[float],
+        shadow_s: float
+    ) -> None:
+        """
+        Record one comparison of the shadow version with the primary.
+
+        Args:
+            primary_probabilities: Probabilities the primary answered with
+            shadow_probabilities: Probabilities of the shadow version for the same reading
+            primary_s: Seconds the primary took in the worker, or None when it
+                was not measured (cached or micro-batched predictions)
+            shadow_s: Seconds the shadow version took in the worker
+        """
+        agreed = max(primary_probabilities, key=primary_probabilities.get) == max(
+            shadow_probabilities, key=shadow_probabilities.get
+        )
+        diff = max(abs(primary_probabilities[label] - shadow_probabilities[label]) for label in primary_probabilities)
+        with self._lock:
+            self._compared += 1
+            self._agreed += int(agreed)
+            self._max_probability_diff = max(self._max_probability_diff, diff)
+            if primary_s is not None:
+                self._primary_ms.append(primary_s * 1000.0)
+            self._shadow_ms.append(shadow_s * 1000.0)
+
+    def record_shadow_skipped(self, failed: bool = False) -> None:
+        """Count a shadow comparison dropped because the pool was busy, or because it failed."""
+        with self._lock:
+            if failed:
+                self._failed += 1
+            else:
+                self._skipped += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Loaded versions, routing counts and shadow comparison statistics."""
+        with self._lock:
+            return {
+                "versions": {
+                    name: {"loaded": name in self.versions, "version": self.versions_info.get(name)}
+                    for name in self.version_dirs
+                },
+                "routes": dict(self.routes),
+                "routed": dict(self._routed),
+                "shadow": {
+                    "version": self.shadow_version,
+                    "percent": self.shadow_percent,
+                    "compared": self._compared,
+                    "agreement": self._agreed / self._compared if self._compared else None,
+                    "max_probability_diff": self._max_probability_diff,
+                    "skipped": self._skipped,
+                    "failed": self._failed,
+                    "primary_ms": _latency_stats(self._primary_ms),
+                    "shadow_ms": _latency_stats(self._shadow_ms),
+                },
+            }
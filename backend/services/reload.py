@@ -0,0 +1,230 @@
+"""
+Hot model reload.
+Loads a new artifact set off the request path, checks it with synthetic
+predictions before it serves any traffic, and watches the artifacts directory
+so a new model can be rolled out without restarting the API.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+import numpy as np
+
+from backend.models.request import SensorInput
+from backend.services.artifacts import (
+    ARTIFACTS_DIR,
+    BUNDLE_DIRNAME,
+    EXPLAINER_FILENAME,
+    MODEL_FILENAME,
+    PREPROCESSOR_FILENAME,
+    load_serving_explainer,
+    load_serving_model,
+    serves_bundle,
+)
+from backend.services.bundle import MANIFEST_FILENAME
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, predict_fault_matrix, predict_fault_row
+
+
+# Synthetic readings scored by a new artifact set before it is swapped in
+WARMUP_READINGS = 32
+
+
+class ArtifactValidationError(ValueError):
+    """Raised when a new artifact set loads but does not predict sensibly."""
+
+
+def artifacts_fingerprint(artifacts_dir: str = ARTIFACTS_DIR) -> tuple:
+    """
+    Size and modification time of every file the artifacts are loaded from.
+
+    A bundle's manifest is written last (see write_bundle), so its entry
+    changes once a new bundle is complete. Missing files are recorded as None.
+    """
+    paths = [
+        os.path.join(artifacts_dir, BUNDLE_DIRNAME, MANIFEST_FILENAME),
+        os.path.join(artifacts_dir, MODEL_FILENAME),
+        os.path.join(artifacts_dir, PREPROCESSOR_FILENAME),
+        os.path.join(artifacts_dir, EXPLAINER_FILENAME),
+    ]
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def artifacts_version(artifacts_dir: str = ARTIFACTS_DIR) -> Optional[str]:
+    """Version of the bundle in artifacts_dir, or None when serving the .pkl files."""
+    if not serves_bundle(artifacts_dir):
+        return None
+    try:
+        with open(os.path.join(artifacts_dir, BUNDLE_DIRNAME, MANIFEST_FILENAME)) as f:
+            return json.load(f).get("version")
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def admin_token_from_env() -> Optional[str]:
+    """
+    Token POST /admin/reload requires in its X-Admin-Token header.
+
+    AIMS_ADMIN_TOKEN: the token; the endpoint is disabled when unset or empty
+    """
+    return os.environ.get("AIMS_ADMIN_TOKEN") or None
+
+
+def synthetic_readings(num_readings: int = WARMUP_READINGS, preprocessor: Any = None) -> np.ndarray:
+    """
+    Plausible raw readings, drawn with a fixed seed.
+
+    When the preprocessor carries the training mean and scale (a fitted
+    StandardScaler, or the IdentityScaler of a folded model), each feature is
+    drawn from a normal distribution with that mean and spread; correlations
+    between features are not reproduced. Otherwise each feature of the API's
+    example reading is scaled by a factor in [0.5, 1.5).
+
+    Args:
+        num_readings: Readings to draw
+        preprocessor: Preprocessor of the artifacts the readings are for
+
+    Returns:
+        Raw readings of shape [num_readings, 18] in FEATURE_NAMES order
+    """
+    rng = np.random.default_rng(0)
+    mean = getattr(preprocessor, "mean_", getattr(preprocessor, "feature_mean", None))
+    scale = getattr(preprocessor, "scale_", getattr(preprocessor, "feature_scale", None))
+    if mean is not None and scale is not None:
+        return np.asarray(mean) + np.asarray(scale) * rng.standard_normal((num_readings, len(FEATURE_NAMES)))
+
+    example = SensorInput.model_config["json_schema_extra"]["example"]
+    base = np.array([example[name] for name in FEATURE_NAMES], dtype=np.float64)
+    readings = base * rng.uniform(0.5, 1.5, size=(num_readings, len(FEATURE_NAMES)))
+    readings[0] = base
+    return readings
+
+
+def warm_up(model: Any, preprocessor: Any, shap_explainer: Any, num_readings: int = WARMUP_READINGS) -> None:
+    """
+    Score synthetic readings through the batch and single-row paths.
+
+    This pays for first-call costs (lazy imports, buffer allocation) before
+    the artifacts serve traffic, and checks their output.
+
+    Args:
+        model: Model returned by load_serving_model
+        preprocessor: Preprocessor returned by load_serving_model
+        shap_explainer: Explainer returned by load_serving_explainer
+        num_readings: Synthetic readings to score
+
+    Raises:
+        ArtifactValidationError: If probabilities are not a finite distribution
+            over the 8 fault types, or SHAP values are not finite per feature
+    """
+    readings = synthetic_readings(num_readings, preprocessor)
+    _, probabilities, shap_values = predict_fault_matrix(readings, model, preprocessor, shap_explainer)
+
+    if probabilities.shape != (num_readings, len(FAULT_LABELS)):
+        raise ArtifactValidationError(
+            f"Model returned probabilities of shape {probabilities.shape}, expected {(num_readings, len(FAULT_LABELS))}"
+        )
+    if not np.all(np.isfinite(probabilities)) or not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-6):
+        raise ArtifactValidationError("Model probabilities are not a finite distribution over the fault types")
+    if shap_values.shape != (num_readings, len(FEATURE_NAMES)) or not np.all(np.isfinite(shap_values)):
+        raise ArtifactValidationError("Explainer did not return finite SHAP values for every feature")
+
+    predict_fault_row(
+        SensorInput(**dict(zip(FEATURE_NAMES, readings[0]))),
+        model=model,
+        preprocessor=preprocessor,
+        shap_explainer=shap_explainer
+    )
+
+
+def load_artifact_set(artifacts_dir: str = ARTIFACTS_DIR) -> tuple[dict[str, Any], Optional[str]]:
+    """
+    Load, validate and warm up a complete artifact set.
+
+    Args:
+        artifacts_dir: Directory containing the bundle or the .pkl artifacts
+
+    Returns:
+        Tuple of (dict with "model", "preprocessor" and "shap_explainer" keys,
+        bundle version or None)
+
+    Raises:
+        FileNotFoundError: If any of the artifacts is missing
+        ValueError: If the bundle fails validation (BundleError) or the
+            artifacts fail warm_up (ArtifactValidationError)
+    """
+    version = artifacts_version(artifacts_dir)
+    artifacts = load_serving_model(artifacts_dir)
+    artifacts["shap_explainer"] = load_serving_explainer(artifacts["model"], artifacts_dir)
+    warm_up(**artifacts)
+    return artifacts, version
+
+
+class ArtifactWatcher:
+    """
+    Polls the artifacts directory and triggers a reload when it changes.
+
+    A change is acted on once the fingerprint has been stable for one poll,
+    so a reload does not start while files are still being copied in. A set
+    that fails to reload is not retried until the files change again.
+    """
+
+    def __init__(
+        self,
+        reload: Callable[[], Awaitable[Any]],
+        artifacts_dir: str = ARTIFACTS_DIR,
+        poll_s: float = 5.0
+    ):
+        """
+        Args:
+            reload: Coroutine function swapping in the artifacts found on disk
+            artifacts_dir: Directory to watch
+            poll_s: Seconds between two looks at the directory
+        """
+        if poll_s <= 0:
+            raise ValueError("poll_s must be positive")
+
+        self.reload = reload
+        self.artifacts_dir = artifacts_dir
+        self.poll_s = poll_s
+
+    @classmethod
+    def from_env(
+        cls,
+        reload: Callable[[], Awaitable[Any]],
+        artifacts_dir: str = ARTIFACTS_DIR
+    ) -> Optional["ArtifactWatcher"]:
+        """
+        Build a watcher configured from environment variables.
+
+        AIMS_RELOAD_WATCH: "1" to reload when the artifacts change on disk (default: off)
+        AIMS_RELOAD_POLL_S: seconds between two looks at the directory (default: 5)
+
+        Returns:
+            The watcher, or None when watching is disabled
+        """
+        if os.environ.get("AIMS_RELOAD_WATCH", "0").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(reload, artifacts_dir=artifacts_dir, poll_s=float(os.environ.get("AIMS_RELOAD_POLL_S", 5.0)))
+
+    async def run(self) -> None:
+        """Poll until cancelled."""
+        attempted = artifacts_fingerprint(self.artifacts_dir)
+        previous = attempted
+        while True:
+            await asyncio.sleep(self.poll_s)
+            current = artifacts_fingerprint(self.artifacts_dir)
+            if current == previous and current != attempted:
+                attempted = current
+                try:
+                    await self.reload()
+                except Exception as e:
+                    print(f"⚠ Warning: Could not reload model artifacts: {e}")
+            previous = current
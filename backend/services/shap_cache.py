@@ -0,0 +1,132 @@
+"""
+SHAP value cache.
+Readings that fall on the same side of every split threshold of the model get
+identical path-dependent TreeSHAP values, so explanations of repeated or similar
+operating points are computed once and reused.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from backend.services.tree_engine import FlatTreeEnsemble, build_numpy_engine
+
+
+# Rough per-entry overhead of the OrderedDict slot, key and array objects
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+class CachedExplainer:
+    """
+    Drop-in wrapper around a SHAP explainer that caches SHAP values per reading.
+
+    Rows are keyed on their split signature (see FlatTreeEnsemble.split_signatures),
+    so a cached value is exactly what the wrapped explainer would return. Only rows
+    without a cached value are passed on, each distinct signature once. The least
+    recently used entries are evicted once their size exceeds max_bytes.
+    """
+
+    def __init__(self, explainer: Any, model: Any, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            explainer: SHAP explainer with a shap_values method, e.g. shap.TreeExplainer
+            model: Model the explainer explains, taking the same inputs
+            max_bytes: Memory the cached SHAP values may use
+
+        Raises:
+            ValueError: If max_bytes is not positive, or the model has splits the
+                NumPy engine cannot represent
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+
+        self.explainer = explainer
+        self.max_bytes = max_bytes
+        self._ensemble = model if isinstance(model, FlatTreeEnsemble) else build_numpy_engine(model)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def expected_value(self) -> Any:
+        """Expected value of the wrapped explainer."""
+        return self.explainer.expected_value
+
+    def shap_values(self, X: Any) -> np.ndarray:
+        """
+        SHAP values of every feature for every class.
+
+        Args:
+            X: Model inputs of shape [num_samples, num_features]
+
+        Returns:
+            Array of shape [num_samples, num_features, num_classes]
+        """
+        X = np.asarray(X, dtype=np.float64)
+        keys = [signature.tobytes() for signature in self._ensemble.split_signatures(X)]
+
+        found: dict[bytes, np.ndarray] = {}
+        missing: dict[bytes, int] = {}
+        with self._lock:
+            for row, key in enumerate(keys):
+                values = self._entries.get(key)
+                if values is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = values
+                elif key not in missing:
+                    missing[key] = row
+            self._misses += len(missing)
+            self._hits += len(keys) - len(missing)
+
+        if missing:
+            computed = self.explainer.shap_values(X[list(missing.values())])
+            if isinstance(computed, list):
+                computed = np.stack(computed, axis=-1)
+            computed = np.asarray(computed)
+            for key, values in zip(missing, computed):
+                found[key] = values.copy()
+            self._store({key: found[key] for key in missing})
+
+        return np.stack([found[key] for key in keys])
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and memory use."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+    def _store(self, entries: dict[bytes, np.ndarray]) -> None:
+        """Insert freshly computed values, evicting the least recently used ones."""
+        with self._lock:
+            for key, values in entries.items():
+                size = _ENTRY_OVERHEAD_BYTES + len(key) + values.nbytes
+                if size > self.max_bytes or key in self._entries:
+                    continue
+                self._entries[key] = values
+                self._bytes += size
+            while self._bytes > self.max_bytes:
+                key, values = self._entries.popitem(last=False)
+                self._bytes -= _ENTRY_OVERHEAD_BYTES + len(key) + values.nbytes
+                self._evictions += 1
@@ -0,0 +1,325 @@
+"""
+Per-engine telemetry streams.
+Scores readings received on a WebSocket connection and sends each prediction
+back on the same connection, in the order the readings arrived, with a bound
+on the readings each connection may have in flight.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import ValidationError
+
+from backend.models.request import MAX_BATCH_SIZE, SensorInput
+from backend.models.response import PredictionResponse
+from backend.services.executor import ExecutorSaturatedError
+from backend.services.history import EngineHistory, timestamp_seconds
+from backend.services.ingest import PayloadError, UnsupportedFormatError, parse_readings
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, sensor_inputs_to_matrix
+from backend.services.windows import WINDOW_FEATURE_NAMES, EngineWindows
+
+
+# Key of the reading timestamp in the dataset; echoed back with the prediction
+TIMESTAMP_KEY = "Timestamp"
+
+
+class EngineStreams:
+    """
+    Serves WebSocket connections streaming readings for one engine each.
+
+    A frame holds one reading (a JSON object) or several (a JSON array of
+    objects) and is answered with one prediction per reading, as an object or
+    an array to match. With a binary payload format, binary frames instead
+    hold readings in that format (see parse_readings) and are always answered
+    with an array. Every frame is scored as soon as it arrives, so frames
+    of all connections are coalesced by the batcher behind score. Replies are
+    sent in the order the frames arrived.
+
+    Flow control: a connection has at most max_in_flight frames scored or
+    waiting to be sent. Beyond that the server stops reading from the
+    connection until a reply has been sent, so a client sending faster than
+    it is served is slowed down by the transport instead of queueing work on
+    the server. A bad frame, or one that fails to be answered, gets an error
+    reply and the connection stays open. If replies can no longer be sent at
+    all, serve stops reading and raises instead of waiting for a free slot.
+
+    With engine windows, every valid reading also updates the engine's
+    rolling window in frame order, and replies can carry the window features.
+    With an engine history, every scored reading is recorded in frame order
+    just before its reply is sent.
+    """
+
+    def __init__(self, max_in_flight: int = 64):
+        """
+        Args:
+            max_in_flight: Frames per connection scored or waiting to be sent at once
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._open = 0
+        self._connections = 0
+        self._frames = 0
+        self._readings = 0
+        self._errors = 0
+        self._throttled = 0
+
+    @classmethod
+    def from_env(cls) -> "EngineStreams":
+        """
+        Build the stream server configured from environment variables.
+
+        AIMS_STREAM_MAX_IN_FLIGHT: frames per connection scored or waiting to be sent (default: 64)
+        """
+        return cls(max_in_flight=int(os.environ.get("AIMS_STREAM_MAX_IN_FLIGHT", 64)))
+
+    async def serve(
+        self,
+        websocket: Any,
+        engine_id: str,
+        score: Callable[[SensorInput], Awaitable[PredictionResponse]],
+        windows: Optional[EngineWindows] = None,
+        window_features: bool = False,
+        history: Optional[EngineHistory] = None,
+        payload_format: Optional[str] = None
+    ) -> None:
+        """
+        Answer the frames of an accepted connection until the client disconnects.
+
+        Args:
+            websocket: Accepted WebSocket connection
+            engine_id: Engine the readings come from, echoed in every reply
+            score: Coroutine function predicting one reading
+            windows: Rolling windows updated with every valid reading, if any
+            window_features: Whether replies carry the reading's window features
+            history: History every scored reading is recorded in, if any
+            payload_format: "raw", "npy" or "arrow" if binary frames hold
+                readings in that format; None if they hold JSON like text frames
+
+        Raises:
+            Exception: Whatever stopped the task sending the replies
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+        replies: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.create_task(self._send_replies(websocket, replies, slots, engine_id, history))
+        with self._lock:
+            self._open += 1
+            self._connections += 1
+        try:
+            while True:
+                message = await self._unless_sender_stops(websocket.receive(), sender)
+                if message["type"] == "websocket.disconnect":
+                    break
+                if slots.locked():
+                    with self._lock:
+                        self._throttled += 1
+                await self._unless_sender_stops(slots.acquire(), sender)
+                frame = message.get("text")
+                frame_format = None
+                if frame is None:
+                    frame = message.get("bytes") or b""
+                    frame_format = payload_format
+                replies.put_nowait(asyncio.ensure_future(
+                    self._answer(frame, frame_format, engine_id, score, windows, window_features, history is not None)
+                ))
+        finally:
+            sender.cancel()
+            while not replies.empty():
+                replies.get_nowait().cancel()
+            with self._lock:
+                self._open -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """Connection, frame and reading counts."""
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "open_connections": self._open,
+                "connections": self._connections,
+                "frames": self._frames,
+                "readings": self._readings,
+                "errors": self._errors,
+                "throttled": self._throttled,
+            }
+
+    @staticmethod
+    async def _unless_sender_stops(awaitable: Awaitable, sender: asyncio.Task) -> Any:
+        """
+        Await awaitable, unless the task sending the replies stops first.
+
+        Raises:
+            Exception: The sender's exception, or RuntimeError if it returned
+        """
+        waiting = asyncio.ensure_future(awaitable)
+        await asyncio.wait((waiting, sender), return_when=asyncio.FIRST_COMPLETED)
+        if not waiting.done():
+            waiting.cancel()
+            sender.result()
+            raise RuntimeError("Stopped sending replies")
+        return waiting.result()
+
+    async def _send_replies(
+        self,
+        websocket: Any,
+        replies: asyncio.Queue,
+        slots: asyncio.Semaphore,
+        engine_id: str,
+        history: Optional[EngineHistory]
+    ) -> None:
+        """Record scored readings and send replies in frame order, freeing a slot after each."""
+        connected = True
+        while True:
+            answer = await replies.get()
+            try:
+                reply, scored = await answer
+                if scored is not None:
+                    history.record(engine_id, *scored)
+                text = json.dumps(reply)
+            except Exception as e:
+                # Answer the frame with the failure; the frames after it are still answered
+                text = json.dumps(self._error(engine_id, None, 500, f"Prediction failed: {str(e)}"))
+            if connected:
+                try:
+                    await websocket.send_text(text)
+                except Exception:
+                    # The client is gone; keep freeing slots until the receive loop notices
+                    connected = False
+            slots.release()
+
+    async def _answer(
+        self,
+        frame: str | bytes,
+        frame_format: Optional[str],
+        engine_id: str,
+        score: Callable[[SensorInput], Awaitable[PredictionResponse]],
+        windows: Optional[EngineWindows],
+        window_features: bool,
+        keep_scored: bool
+    ) -> tuple[dict[str, Any] | list[dict[str, Any]], Optional[tuple]]:
+        """
+        Score the readings of one frame; failures become error replies.
+
+        Frames are answered by tasks started in arrival order, and everything
+        up to scoring runs before the first await, so windows are updated in
+        frame order.
+
+        Returns:
+            The reply, and with keep_scored the (timestamps, readings,
+            probabilities) of the scored readings to record, else None
+        """
+        received_at = time.time()
+        if frame_format is not None:
+            try:
+                matrix = parse_readings(frame, frame_format)
+            except UnsupportedFormatError as e:
+                return self._error(engine_id, None, 415, str(e)), None
+            except PayloadError as e:
+                return self._error(engine_id, None, 422, f"Invalid frame: {e}"), None
+            if len(matrix) > MAX_BATCH_SIZE:
+                return self._error(engine_id, None, 413, f"A frame holds at most {MAX_BATCH_SIZE} readings"), None
+
+            # Validated as a whole above, so the readings are built without validating each field again
+            single = False
+            timestamps = [None] * len(matrix)
+            sensor_inputs = [SensorInput.model_construct(**dict(zip(FEATURE_NAMES, row))) for row in matrix.tolist()]
+            valid = sensor_inputs
+        else:
+            try:
+                readings = json.loads(frame)
+            except ValueError as e:
+                return self._error(engine_id, None, 400, f"Frame is not valid JSON: {e}"), None
+
+            single = not isinstance(readings, list)
+            if single:
+                readings = [readings]
+            if len(readings) > MAX_BATCH_SIZE:
+                return self._error(engine_id, None, 413, f"A frame holds at most {MAX_BATCH_SIZE} readings"), None
+
+            timestamps = [reading.get(TIMESTAMP_KEY) if isinstance(reading, dict) else None for reading in readings]
+            sensor_inputs = []
+            for reading in readings:
+                try:
+                    sensor_inputs.append(SensorInput.model_validate(reading))
+                except ValidationError as e:
+                    sensor_inputs.append(e)
+
+            valid = [sensor_input for sensor_input in sensor_inputs if isinstance(sensor_input, SensorInput)]
+            matrix = sensor_inputs_to_matrix(valid) if valid and (windows is not None or keep_scored) else None
+
+        with self._lock:
+            self._frames += 1
+        features = iter([])
+        if windows is not None and valid:
+            features = iter(windows.update(engine_id, matrix).tolist())
+
+        answers = await asyncio.gather(*(
+            self._answer_reading(
+                sensor_input,
+                timestamp,
+                engine_id,
+                score,
+                next(features, None) if window_features and isinstance(sensor_input, SensorInput) else None
+            )
+            for sensor_input, timestamp in zip(sensor_inputs, timestamps)
+        ))
+        reply = answers[0] if single else answers
+        if not keep_scored or matrix is None:
+            return reply, None
+
+        valid_answers = [
+            (answer, timestamp)
+            for sensor_input, answer, timestamp in zip(sensor_inputs, answers, timestamps)
+            if isinstance(sensor_input, SensorInput)
+        ]
+        scored = [row for row, (answer, _) in enumerate(valid_answers) if "status_code" not in answer]
+        return reply, (
+            [timestamp_seconds(valid_answers[row][1], received_at) for row in scored],
+            matrix[scored],
+            [
+                [valid_answers[row][0]["probabilities"].get(label, 0.0) for label in FAULT_LABELS.values()]
+                for row in scored
+            ]
+        )
+
+    async def _answer_reading(
+        self,
+        sensor_input: SensorInput | ValidationError,
+        timestamp: Any,
+        engine_id: str,
+        score: Callable[[SensorInput], Awaitable[PredictionResponse]],
+        features: Optional[list[float]]
+    ) -> dict[str, Any]:
+        """Score one validated reading of a frame, or answer its validation error."""
+        if isinstance(sensor_input, ValidationError):
+            detail = f"Invalid reading: {sensor_input.errors(include_url=False, include_context=False)}"
+            return self._error(engine_id, timestamp, 422, detail)
+
+        try:
+            prediction = await score(sensor_input)
+        except ExecutorSaturatedError as e:
+            return self._error(engine_id, timestamp, 503, f"Server is busy: {e}. Please retry shortly.")
+        except Exception as e:
+            return self._error(engine_id, timestamp, 500, f"Prediction failed: {str(e)}")
+
+        with self._lock:
+            self._readings += 1
+        reply = {"engine_id": engine_id, **prediction.model_dump()}
+        if timestamp is not None:
+            reply[TIMESTAMP_KEY] = timestamp
+        if features is not None:
+            reply["window_features"] = dict(zip(WINDOW_FEATURE_NAMES, features))
+        return reply
+
+    def _error(self, engine_id: str, timestamp: Any, status_code: int, detail: str) -> dict[str, Any]:
+        """Build the reply to a reading or frame that could not be scored."""
+        with self._lock:
+            self._errors += 1
+        reply = {"engine_id": engine_id, "status_code": status_code, "detail": detail}
+        if timestamp is not None:
+            reply[TIMESTAMP_KEY] = timestamp
+        return reply
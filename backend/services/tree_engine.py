@@ -0,0 +1,251 @@
+"""
+Pure-NumPy tree ensemble evaluator.
+Flattens a trained LightGBM booster into node arrays and evaluates all trees
+over a batch with vectorized NumPy, bypassing the sklearn wrapper's per-call
+validation and booster dispatch.
+"""
+from typing import Any
+
+import lightgbm as lgb
+import numpy as np
+
+
+# Bits of LightGBM's per-node decision_type field
+_CATEGORICAL_MASK = 1
+_DEFAULT_LEFT_MASK = 2
+_MISSING_TYPE_SHIFT = 2
+_MISSING_NONE = 0
+_MISSING_ZERO = 1
+_MISSING_NAN = 2
+
+# LightGBM treats values this close to zero as zero for zero-as-missing splits
+_ZERO_THRESHOLD = 1e-35
+
+# Rows x trees evaluated at once; small enough for the temporary index arrays
+# to stay in cache, which is faster than one pass over a large batch
+_CHUNK_ELEMENTS = 1 << 13
+
+# Up to this many rows, one broadcast comparison against all thresholds is
+# cheaper than a searchsorted call per feature
+_SIGNATURE_COMPARE_ROWS = 16
+
+
+def _parse_trees(model_str: str) -> list[dict[str, np.ndarray]]:
+    """Read the per-tree node arrays from a LightGBM text model."""
+    trees = []
+    tree = None
+    for line in model_str.split("\n"):
+        if line.startswith("Tree="):
+            tree = {}
+            trees.append(tree)
+        elif line == "end of trees":
+            break
+        elif tree is not None and "=" in line:
+            key, _, value = line.partition("=")
+            tree[key] = value
+    return trees
+
+
+def _array(tree: dict[str, str], key: str, dtype) -> np.ndarray:
+    """Parse one space-separated per-node array of a tree."""
+    return np.array(tree.get(key, "").split(), dtype=dtype)
+
+
+class FlatTreeEnsemble:
+    """
+    All trees of a multiclass LightGBM booster flattened into shared node arrays.
+
+    Internal nodes hold (feature, threshold, left, right, decision bits), leaves
+    hold their value and point to themselves, so every row can be advanced
+    through every tree for max_depth vectorized steps without branching.
+    Exposes predict/predict_proba like LGBMClassifier.
+    """
+
+    def __init__(self, booster: lgb.Booster):
+        """
+        Args:
+            booster: Trained LightGBM booster (numerical splits only)
+
+        Raises:
+            ValueError: If the booster has categorical splits or linear trees
+        """
+        self.booster_ = booster
+        self.n_classes_ = booster.num_model_per_iteration()
+        self.n_features_in_ = booster.num_feature()
+
+        features, thresholds, lefts, rights, values, decisions, roots = [], [], [], [], [], [], []
+        depths = []
+        offset = 0
+        for tree in _parse_trees(booster.model_to_string()):
+            if tree.get("is_linear", "0") != "0":
+                raise ValueError("Linear trees are not supported by the NumPy engine")
+
+            num_leaves = int(tree["num_leaves"])
+            num_internal = num_leaves - 1
+            leaf_values = _array(tree, "leaf_value", np.float64)
+            leaf_ids = offset + num_internal + np.arange(num_leaves)
+
+            if num_internal:
+                decision_type = _array(tree, "decision_type", np.int64)
+                if np.any(decision_type & _CATEGORICAL_MASK):
+                    raise ValueError("Categorical splits are not supported by the NumPy engine")
+
+                def node_ids(children):
+                    # Negative children encode leaves as ~leaf_index
+                    return np.where(children >= 0, offset + children, offset + num_internal + ~children)
+
+                left = node_ids(_array(tree, "left_child", np.int64))
+                right = node_ids(_array(tree, "right_child", np.int64))
+
+                features.append(_array(tree, "split_feature", np.int64))
+                thresholds.append(_array(tree, "threshold", np.float64))
+                lefts.append(left)
+                rights.append(right)
+                values.append(np.zeros(num_internal))
+                decisions.append(decision_type)
+                depths.append(self._depth(left - offset, right - offset, num_internal))
+            else:
+                depths.append(0)
+
+            # Leaves loop back to themselves
+            features.append(np.zeros(num_leaves, dtype=np.int64))
+            thresholds.append(np.full(num_leaves, np.inf))
+            lefts.append(leaf_ids)
+            rights.append(leaf_ids)
+            values.append(leaf_values)
+            decisions.append(np.zeros(num_leaves, dtype=np.int64))
+
+            roots.append(offset)
+            offset += num_internal + num_leaves
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+        self.value = np.concatenate(values)
+        decision = np.concatenate(decisions)
+        self.default_left = (decision & _DEFAULT_LEFT_MASK) != 0
+        self.missing_type = (decision >> _MISSING_TYPE_SHIFT) & 3
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = max(depths, default=0)
+        self._has_zero_missing = bool(np.any(self.missing_type == _MISSING_ZERO))
+
+        internal = self.left != np.arange(len(self.left))
+        self.split_thresholds = [
+            np.unique(self.threshold[internal & (self.feature == feature)])
+            for feature in range(self.n_features_in_)
+        ]
+        # Per-feature thresholds padded with +inf into one [num_features, max_splits] array
+        max_splits = max((len(thresholds) for thresholds in self.split_thresholds), default=0)
+        self._padded_thresholds = np.full((self.n_features_in_, max_splits), np.inf)
+        for feature, thresholds in enumerate(self.split_thresholds):
+            self._padded_thresholds[feature, :len(thresholds)] = thresholds
+
+    @staticmethod
+    def _depth(left: np.ndarray, right: np.ndarray, num_internal: int) -> int:
+        """Depth of a tree given its local child arrays (leaves >= num_internal)."""
+        depth = 0
+        level = np.array([0])
+        while len(level):
+            depth += 1
+            children = np.concatenate([left[level], right[level]])
+            level = children[children < num_internal]
+        return depth
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Leaf value reached in every tree, shape [num_samples, num_trees]."""
+        num_samples, num_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(num_samples, dtype=np.intp) * num_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (num_samples, len(self.roots)))
+        handle_missing = self._has_zero_missing or np.isnan(flat_X).any()
+
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_left = x <= self.threshold.take(nodes)
+
+            if handle_missing:
+                missing_type = self.missing_type.take(nodes)
+                is_nan = np.isnan(x)
+                x = np.where(is_nan & (missing_type != _MISSING_NAN), 0.0, x)
+                use_default = (
+                    ((missing_type == _MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD))
+                    | ((missing_type == _MISSING_NAN) & is_nan)
+                )
+                go_left = np.where(use_default, self.default_left.take(nodes), x <= self.threshold.take(nodes))
+
+            # children holds (right, left) pairs, so True selects the left child
+            nodes = self.children.take(2 * nodes + go_left)
+
+        return self.value.take(nodes)
+
+    def split_signatures(self, X: Any) -> np.ndarray:
+        """
+        Which side of every split threshold each feature falls on, shape [num_samples, num_features].
+
+        Rows with equal signatures take the same branch at every node of every
+        tree, not only along their own decision paths, so they get identical
+        predictions and identical path-dependent TreeSHAP values. Equal leaves
+        alone do not guarantee the latter: TreeSHAP also follows the row's
+        branch at the splits off its path. Missing values get their own codes.
+        """
+        X = np.asarray(X, dtype=np.float64)
+
+        # The number of thresholds below x decides x <= t for every threshold t
+        if len(X) <= _SIGNATURE_COMPARE_ROWS:
+            below = np.count_nonzero(self._padded_thresholds < X[:, :, None], axis=2)
+        else:
+            below = np.column_stack([
+                np.searchsorted(thresholds, X[:, feature])
+                for feature, thresholds in enumerate(self.split_thresholds)
+            ])
+
+        # The low bit separates values that zero-as-missing splits treat as zero
+        signatures = (2 * below + (np.abs(X) <= _ZERO_THRESHOLD)).astype(np.int32)
+        signatures[np.isnan(X)] = -1
+        return signatures
+
+    def raw_scores(self, X: Any) -> np.ndarray:
+        """
+        Raw (pre-softmax) class scores, shape [num_samples, num_classes].
+
+        Trees are accumulated in iteration order with a running sum, matching
+        LightGBM's own summation order.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        num_samples = len(X)
+        num_iterations = len(self.roots) // self.n_classes_
+        scores = np.empty((num_samples, self.n_classes_))
+
+        chunk = max(1, _CHUNK_ELEMENTS // max(1, len(self.roots)))
+        for start in range(0, num_samples, chunk):
+            leaf_values = self._leaf_values(X[start:start + chunk])
+            per_class = leaf_values.reshape(len(leaf_values), num_iterations, self.n_classes_)
+            scores[start:start + chunk] = np.cumsum(per_class, axis=1)[:, -1, :]
+
+        return scores
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities of shape [num_samples, num_classes]."""
+        scores = self.raw_scores(X)
+        exp_scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return exp_scores / np.cumsum(exp_scores, axis=1)[:, -1:]
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Predicted class index for every row."""
+        return self.raw_scores(X).argmax(axis=1)
+
+
+def build_numpy_engine(model: Any) -> FlatTreeEnsemble:
+    """
+    Flatten a trained model into a FlatTreeEnsemble.
+
+    Args:
+        model: LGBMClassifier, BoosterClassifier or lightgbm.Booster
+
+    Returns:
+        FlatTreeEnsemble evaluating the same trees
+    """
+    booster = model if isinstance(model, lgb.Booster) else model.booster_
+    return FlatTreeEnsemble(booster)
@@ -0,0 +1,185 @@
+"""
+Startup warm-up.
+Runs representative single-reading predictions on the inference pool until
+their latency stabilises, so the first real requests do not pay for lazy
+initialisation in LightGBM, SHAP and pandas, and readiness can report the
+warm latency.
+"""
+import asyncio
+import os
+import time
+from functools import partial
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from backend.models.request import SensorInput
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+from backend.services.predictor import FEATURE_NAMES, predict_fault_batch, predict_fault_row
+from backend.services.registry import timed_inference
+from backend.services.reload import synthetic_readings
+
+
+# Seconds warm-up waits before retrying a prediction the full inference queue rejected
+SATURATED_RETRY_S = 0.05
+
+
+class Warmup:
+    """
+    Scores rounds of representative readings until latency stabilises.
+
+    Each round scores round_size readings one at a time through the
+    single-row path with explanations, spread over every pool worker, and
+    measures each in the worker. Warm-up ends once the median of a round is
+    within tolerance of the previous round's, after max_rounds rounds, or
+    after max_s seconds. The latency of the last round is reported as the
+    warm p50/p99.
+
+    Warm-up yields to live traffic: a prediction rejected because the
+    inference queue is full is retried until max_s has passed, and warm-up
+    is then skipped, since that traffic warms the pool up instead. It can be
+    run again, e.g. after a reload; `runs` counts the runs that finished.
+    """
+
+    def __init__(
+        self,
+        max_s: float = 30.0,
+        tolerance: float = 0.1,
+        round_size: int = 32,
+        max_rounds: int = 20,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_s: Seconds after which warm-up ends even if latency is not stable
+            tolerance: Relative change of the round median considered stable
+            round_size: Readings scored per round
+            max_rounds: Rounds after which warm-up ends even if latency is not stable
+            clock: Monotonic time source, in seconds
+        """
+        if max_s <= 0:
+            raise ValueError("max_s must be positive")
+        if tolerance <= 0:
+            raise ValueError("tolerance must be positive")
+        if round_size < 1 or max_rounds < 2:
+            raise ValueError("round_size must be at least 1 and max_rounds at least 2")
+
+        self.max_s = max_s
+        self.tolerance = tolerance
+        self.round_size = round_size
+        self.max_rounds = max_rounds
+        self._clock = clock
+
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.runs = 0
+        self._rounds = 0
+        self._stable = False
+        self._duration_s = 0.0
+        self._round_p50_ms: list[float] = []
+        self._latencies_ms = np.zeros(0)
+
+    @classmethod
+    def from_env(cls) -> Optional["Warmup"]:
+        """
+        Build a warm-up configured from environment variables.
+
+        AIMS_WARMUP: "0" to skip warm-up at startup (default: on)
+        AIMS_WARMUP_MAX_S: seconds warm-up may take at most (default: 30)
+        AIMS_WARMUP_TOLERANCE: relative change of the round median considered stable (default: 0.1)
+
+        Returns:
+            The warm-up, or None when disabled
+        """
+        if os.environ.get("AIMS_WARMUP", "1").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            max_s=float(os.environ.get("AIMS_WARMUP_MAX_S", 30.0)),
+            tolerance=float(os.environ.get("AIMS_WARMUP_TOLERANCE", 0.1))
+        )
+
+    @property
+    def done(self) -> bool:
+        """Whether the last run has finished, successfully, skipped or not."""
+        return self.state in ("done", "skipped", "failed")
+
+    async def run(self, executor: InferenceExecutor, **artifacts: Any) -> None:
+        """
+        Warm the pool up with artifacts; never raises, failures are recorded in state.
+
+        The state ends as "done", "skipped" if the inference queue stayed full
+        for max_s, or "failed" with the error.
+
+        Args:
+            executor: Pool serving the requests
+            **artifacts: model, preprocessor and shap_explainer being served
+        """
+        self.state = "running"
+        self.error = None
+        self._rounds = 0
+        self._stable = False
+        self._round_p50_ms = []
+        self._latencies_ms = np.zeros(0)
+        start = self._clock()
+
+        async def run_inference(fn: Callable, *args: Any) -> Any:
+            # Live requests filling the queue take precedence; retry until the budget is spent
+            while True:
+                try:
+                    return await executor.run_inference(fn, *args, **artifacts)
+                except ExecutorSaturatedError:
+                    if self._clock() - start >= self.max_s:
+                        raise
+                    await asyncio.sleep(SATURATED_RETRY_S)
+
+        try:
+            readings = synthetic_readings(self.round_size, artifacts.get("preprocessor"))
+            sensor_inputs = [SensorInput(**dict(zip(FEATURE_NAMES, row))) for row in readings]
+            # One batch call pays for the vectorized path's first-call costs (pandas)
+            await run_inference(predict_fault_batch, sensor_inputs[:2])
+
+            timed_row = partial(timed_inference, predict_fault_row)
+            while self._rounds < self.max_rounds and self._clock() - start < self.max_s:
+                latencies = []
+                # At most one reading per worker at a time, so live requests are not queued behind warm-up
+                for chunk in range(0, len(sensor_inputs), executor.max_workers):
+                    results = await asyncio.gather(*(
+                        run_inference(timed_row, sensor_input)
+                        for sensor_input in sensor_inputs[chunk:chunk + executor.max_workers]
+                    ))
+                    latencies.extend(elapsed * 1000.0 for elapsed, _ in results)
+
+                self._rounds += 1
+                self._latencies_ms = np.asarray(latencies)
+                p50 = float(np.percentile(self._latencies_ms, 50))
+                previous = self._round_p50_ms[-1] if self._round_p50_ms else None
+                self._round_p50_ms.append(p50)
+                if previous is not None and abs(p50 - previous) <= self.tolerance * previous:
+                    self._stable = True
+                    break
+            self.state = "done"
+        except ExecutorSaturatedError as e:
+            self.error = str(e)
+            self.state = "skipped"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self._duration_s = self._clock() - start
+            if self.done:
+                self.runs += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Warm-up progress and the warm latency of the last round in milliseconds."""
+        has_latencies = len(self._latencies_ms) > 0
+        return {
+            "state": self.state,
+            "runs": self.runs,
+            "rounds": self._rounds,
+            "stable": self._stable,
+            "duration_s": self._duration_s,
+            "round_p50_ms": list(self._round_p50_ms),
+            "p50_ms": float(np.percentile(self._latencies_ms, 50)) if has_latencies else None,
+            "p99_ms": float(np.percentile(self._latencies_ms, 99)) if has_latencies else None,
+            "error": self.error,
+        }
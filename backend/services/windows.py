@@ -0,0 +1,272 @@
+"""
+Rolling-window sensor features.
+Faults such as bearing wear and oil degradation build up over many readings,
+which single readings do not show. A RollingWindow per engine keeps its last
+readings in a fixed float32 ring buffer and updates the rolling mean and
+standard deviation, the change since the previous reading and an
+exponentially weighted moving average of the 18 sensors in O(1) per reading.
+Training computes the features with the same code, so they match serving
+exactly.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.services.predictor import FEATURE_NAMES
+
+
+# Statistics computed for every sensor, in the order of WINDOW_FEATURE_NAMES
+WINDOW_STATISTICS = ("rolling_mean", "rolling_std", "delta", "ewma")
+
+# Names of the window features, statistic by statistic, in FEATURE_NAMES order
+WINDOW_FEATURE_NAMES = [f"{name}_{statistic}" for statistic in WINDOW_STATISTICS for name in FEATURE_NAMES]
+
+
+class RollingWindow:
+    """
+    Rolling statistics of one engine's readings.
+
+    The last `window` readings are kept in a float32 ring buffer, with running
+    sums in float64. Each update replaces the oldest reading in the sums; the
+    sums are recomputed from the buffer whenever it wraps around, so rounding
+    errors cannot build up over a long stream and the cost stays O(1) per
+    reading amortized. Until `window` readings have arrived the statistics
+    cover the readings so far. The standard deviation is the population one
+    (ddof=0). The first reading has a delta of 0 and is its own EWMA.
+
+    Readings must be finite; a NaN would stay in the sums until the buffer
+    next wraps around.
+    """
+
+    def __init__(self, window: int = 60, alpha: float = 0.1):
+        """
+        Args:
+            window: Readings the rolling mean and standard deviation cover
+            alpha: Weight of the newest reading in the EWMA
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+
+        num_features = len(FEATURE_NAMES)
+        self.window = window
+        self.alpha = alpha
+        self._ring = np.zeros((window, num_features), dtype=np.float32)
+        self._sum = np.zeros(num_features, dtype=np.float64)
+        self._sum_squares = np.zeros(num_features, dtype=np.float64)
+        self._last = np.zeros(num_features, dtype=np.float32)
+        self._ewma = np.zeros(num_features, dtype=np.float32)
+        self._position = 0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        """Readings in the window, at most `window`."""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the window's arrays."""
+        return (
+            self._ring.nbytes + self._sum.nbytes + self._sum_squares.nbytes
+            + self._last.nbytes + self._ewma.nbytes
+        )
+
+    def update(self, reading: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Add a reading and compute the window features.
+
+        Args:
+            reading: Raw sensor values in FEATURE_NAMES order
+            out: Optional float32 array of len(WINDOW_FEATURE_NAMES) to write the features to
+
+        Returns:
+            The window features, in WINDOW_FEATURE_NAMES order
+        """
+        num_features = len(FEATURE_NAMES)
+        value = np.asarray(reading, dtype=np.float32)
+        if out is None:
+            out = np.empty(len(WINDOW_FEATURE_NAMES), dtype=np.float32)
+
+        first = self._position == 0 and self._count == 0
+        if self._count == self.window:
+            oldest = self._ring[self._position].astype(np.float64)
+            self._sum -= oldest
+            self._sum_squares -= oldest * oldest
+        else:
+            self._count += 1
+        self._ring[self._position] = value
+        self._position = (self._position + 1) % self.window
+        if self._position == 0:
+            # Wrapped around: recompute the sums so rounding errors do not accumulate
+            ring = self._ring.astype(np.float64)
+            self._sum = ring.sum(axis=0)
+            self._sum_squares = (ring * ring).sum(axis=0)
+        else:
+            value64 = value.astype(np.float64)
+            self._sum += value64
+            self._sum_squares += value64 * value64
+
+        mean = self._sum / self._count
+        variance = np.maximum(self._sum_squares / self._count - mean * mean, 0.0)
+        out[:num_features] = mean
+        out[num_features:2 * num_features] = np.sqrt(variance)
+        if first:
+            out[2 * num_features:3 * num_features] = 0.0
+            self._ewma[:] = value
+        else:
+            out[2 * num_features:3 * num_features] = value - self._last
+            self._ewma += np.float32(self.alpha) * (value - self._ewma)
+        out[3 * num_features:] = self._ewma
+        self._last[:] = value
+        return out
+
+
+def rolling_features(features: np.ndarray, window: int = 60, alpha: float = 0.1) -> np.ndarray:
+    """
+    Window features of one engine's readings, in the order they were taken.
+
+    Runs a RollingWindow over the rows, so the features are exactly the ones
+    serving computes for the same readings.
+
+    Args:
+        features: Raw sensor readings [num_readings, 18] in FEATURE_NAMES order, oldest first
+        window: Readings the rolling mean and standard deviation cover
+        alpha: Weight of the newest reading in the EWMA
+
+    Returns:
+        float32 window features [num_readings, len(WINDOW_FEATURE_NAMES)]
+    """
+    rolling = RollingWindow(window, alpha)
+    result = np.empty((len(features), len(WINDOW_FEATURE_NAMES)), dtype=np.float32)
+    for row, reading in enumerate(np.asarray(features, dtype=np.float64)):
+        rolling.update(reading, out=result[row])
+    return result
+
+
+def rolling_features_frame(
+    frame: Any,
+    window: int = 60,
+    alpha: float = 0.1,
+    engine_column: Optional[str] = None,
+    timestamp_column: str = "Timestamp"
+) -> Any:
+    """
+    Window features of a DataFrame of readings, for training.
+
+    Readings are ordered by timestamp within each engine, as they would
+    arrive at the API.
+
+    Args:
+        frame: DataFrame with the 18 sensor columns and the timestamp column
+        window: Readings the rolling mean and standard deviation cover
+        alpha: Weight of the newest reading in the EWMA
+        engine_column: Column identifying the engine, or None if all readings
+            come from one engine
+        timestamp_column: Column the readings are ordered by
+
+    Returns:
+        DataFrame of the window features with the index of frame
+    """
+    # pandas is imported on first use, not with the API
+    import pandas as pd
+
+    engines = [frame] if engine_column is None else [group for _, group in frame.groupby(engine_column, sort=False)]
+    results = []
+    for readings in engines:
+        readings = readings.sort_values(timestamp_column, kind="stable")
+        results.append(pd.DataFrame(
+            rolling_features(readings[FEATURE_NAMES].to_numpy(dtype=np.float64), window, alpha),
+            columns=WINDOW_FEATURE_NAMES,
+            index=readings.index
+        ))
+    return pd.concat(results).loc[frame.index]
+
+
+class EngineWindows:
+    """
+    RollingWindows of the engines streaming to the API.
+
+    Memory is bounded: once max_engines engines have windows, the window of
+    the engine that reported least recently is dropped, and that engine starts
+    a new one when it reports again.
+    """
+
+    def __init__(self, window: int = 60, alpha: float = 0.1, max_engines: int = 10000):
+        """
+        Args:
+            window: Readings the rolling mean and standard deviation cover
+            alpha: Weight of the newest reading in the EWMA
+            max_engines: Engines windows are kept for at once
+        """
+        if max_engines < 1:
+            raise ValueError("max_engines must be at least 1")
+        # Validates window and alpha
+        self._template = RollingWindow(window, alpha)
+
+        self.window = window
+        self.alpha = alpha
+        self.max_engines = max_engines
+        self._lock = threading.Lock()
+        self._windows: OrderedDict[str, RollingWindow] = OrderedDict()
+        self._readings = 0
+        self._evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "EngineWindows":
+        """
+        Build the engine windows configured from environment variables.
+
+        AIMS_WINDOW_SIZE: readings the rolling statistics cover (default: 60)
+        AIMS_WINDOW_ALPHA: weight of the newest reading in the EWMA (default: 0.1)
+        AIMS_WINDOW_MAX_ENGINES: engines windows are kept for (default: 10000)
+        """
+        return cls(
+            window=int(os.environ.get("AIMS_WINDOW_SIZE", 60)),
+            alpha=float(os.environ.get("AIMS_WINDOW_ALPHA", 0.1)),
+            max_engines=int(os.environ.get("AIMS_WINDOW_MAX_ENGINES", 10000))
+        )
+
+    def update(self, engine_id: str, readings: np.ndarray) -> np.ndarray:
+        """
+        Add readings of an engine, oldest first, and compute their window features.
+
+        Args:
+            engine_id: Engine the readings come from
+            readings: Raw sensor readings [num_readings, 18] in FEATURE_NAMES order
+
+        Returns:
+            float32 window features [num_readings, len(WINDOW_FEATURE_NAMES)]
+        """
+        result = np.empty((len(readings), len(WINDOW_FEATURE_NAMES)), dtype=np.float32)
+        with self._lock:
+            rolling = self._windows.get(engine_id)
+            if rolling is None:
+                rolling = RollingWindow(self.window, self.alpha)
+                self._windows[engine_id] = rolling
+                if len(self._windows) > self.max_engines:
+                    self._windows.popitem(last=False)
+                    self._evicted += 1
+            else:
+                self._windows.move_to_end(engine_id)
+            for row, reading in enumerate(readings):
+                rolling.update(reading, out=result[row])
+            self._readings += len(readings)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Window configuration, engine counts and memory held."""
+        with self._lock:
+            return {
+                "window": self.window,
+                "alpha": self.alpha,
+                "engines": len(self._windows),
+                "max_engines": self.max_engines,
+                "bytes": len(self._windows) * self._template.nbytes,
+                "readings": self._readings,
+                "evicted": self._evicted,
+            }
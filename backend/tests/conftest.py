@@ -0,0 +1,38 @@
+"""
+Shared fixtures for the backend tests.
+backend/artifacts is generated by the notebooks and not committed, so tests
+that need a real artifact set train a small one instead.
+"""
+
+from pathlib import Path
+
+import joblib
+import lightgbm as lgb
+import pandas as pd
+import pytest
+import shap
+from sklearn.preprocessing import StandardScaler
+
+from backend.services.artifacts import EXPLAINER_FILENAME, MODEL_FILENAME, PREPROCESSOR_FILENAME
+from backend.services.predictor import FEATURE_NAMES
+
+DATASET_PATH = Path(__file__).parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+
+@pytest.fixture(scope="session")
+def artifacts_dir(tmp_path_factory):
+    """
+    Directory with preprocessor.pkl, lgbm_model.pkl and shap_explainer.pkl,
+    exported the way the notebooks export them, for a small model trained on
+    50 readings of every fault class of the dataset.
+    """
+    df = pd.read_csv(DATASET_PATH).groupby("Fault_Label").sample(50, random_state=0)
+    scaler = StandardScaler().fit(df[FEATURE_NAMES])
+    model = lgb.LGBMClassifier(n_estimators=20, num_leaves=15, verbosity=-1, random_state=0)
+    model.fit(scaler.transform(df[FEATURE_NAMES]), df["Fault_Label"])
+
+    path = tmp_path_factory.mktemp("artifacts")
+    joblib.dump(scaler, path / PREPROCESSOR_FILENAME)
+    joblib.dump(model, path / MODEL_FILENAME)
+    joblib.dump(shap.TreeExplainer(model.booster_), path / EXPLAINER_FILENAME)
+    return path
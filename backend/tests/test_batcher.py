@@ -0,0 +1,168 @@
+"""
+Unit tests for the adaptive micro-batcher.
+Uses a fake batch predictor to observe how readings are grouped.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.services.batcher import MicroBatcher
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+
+
+class RecordingPredictor:
+    """Fake batch predictor that records batch sizes and echoes its inputs."""
+    
+    def __init__(self, delay_s: float = 0.0):
+        self.batches = []
+        self.explain_flags = []
+        self.delay_s = delay_s
+    
+    def __call__(self, readings, explain=True, **artifacts):
+        self.batches.append(list(readings))
+        self.explain_flags.append(explain)
+        time.sleep(self.delay_s)
+        return [(reading, artifacts.get("model")) for reading in readings]
+
+
+@pytest.fixture
+def executor():
+    """Create a single-worker thread executor."""
+    executor = InferenceExecutor(max_workers=1, max_queue=16)
+    yield executor
+    executor.shutdown()
+
+
+class TestMicroBatcher:
+    """Test suite for MicroBatcher."""
+    
+    def test_concurrent_submissions_share_a_batch(self, executor):
+        """Test readings submitted in the same loop iteration are scored together."""
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(executor, window_ms=50, predict_batch=predictor)
+        
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i, model="m") for i in range(10)))
+        
+        results = asyncio.run(scenario())
+        
+        assert results == [(i, "m") for i in range(10)]
+        assert [len(batch) for batch in predictor.batches] == [10]
+    
+    def test_each_caller_gets_its_own_result(self, executor):
+        """Test results are routed back to the caller that submitted the reading."""
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(executor, window_ms=5, predict_batch=predictor)
+        
+        async def scenario():
+            async def call(i):
+                await asyncio.sleep(0.001 * (i % 3))
+                return i, await batcher.submit(i, model="m")
+            return await asyncio.gather(*(call(i) for i in range(30)))
+        
+        for submitted, (reading, _) in asyncio.run(scenario()):
+            assert submitted == reading
+    
+    def test_max_batch_size_triggers_dispatch(self, executor):
+        """Test a full batch is dispatched without waiting for the window."""
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(executor, window_ms=10_000, max_batch_size=4, predict_batch=predictor)
+        
+        async def scenario():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i, model="m") for i in range(8))),
+                timeout=5
+            )
+        
+        asyncio.run(scenario())
+        
+        assert [len(batch) for batch in predictor.batches] == [4, 4]
+    
+    def test_busy_batcher_coalesces_within_window(self, executor):
+        """Test readings arriving while a batch is being scored wait for the window and coalesce."""
+        predictor = RecordingPredictor(delay_s=0.3)
+        batcher = MicroBatcher(executor, window_ms=200, predict_batch=predictor)
+        
+        async def scenario():
+            first = asyncio.ensure_future(batcher.submit("first", model="m"))
+            await asyncio.sleep(0.01)
+            # A batch is in flight, so these arrive spread out and are coalesced
+            later = []
+            for i in range(5):
+                later.append(asyncio.ensure_future(batcher.submit(i, model="m")))
+                await asyncio.sleep(0.002)
+            await asyncio.gather(first, *later)
+        
+        asyncio.run(scenario())
+        
+        assert [len(batch) for batch in predictor.batches] == [1, 5]
+        assert batcher.stats()["mean_batch_size"] == 3.0
+    
+    def test_different_artifacts_are_not_mixed(self, executor):
+        """Test readings scored with different artifacts end up in different batches."""
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(executor, window_ms=50, predict_batch=predictor)
+        
+        async def scenario():
+            return await asyncio.gather(
+                batcher.submit(1, model="old"),
+                batcher.submit(2, model="new"),
+            )
+        
+        assert asyncio.run(scenario()) == [(1, "old"), (2, "new")]
+        assert len(predictor.batches) == 2
+    
+    def test_explain_flag_splits_batches(self, executor):
+        """Test readings that skip SHAP are never batched with readings that need it."""
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(executor, window_ms=50, predict_batch=predictor)
+        
+        async def scenario():
+            return await asyncio.gather(
+                batcher.submit(1, explain=False, model="m"),
+                batcher.submit(2, explain=False, model="m"),
+                batcher.submit(3, model="m"),
+            )
+        
+        asyncio.run(scenario())
+        
+        assert predictor.batches == [[1, 2], [3]]
+        assert predictor.explain_flags == [False, True]
+    
+    def test_executor_errors_reach_every_caller(self):
+        """Test an executor rejection is raised to all callers of the batch."""
+        executor = InferenceExecutor(max_workers=1, max_queue=0)
+        
+        async def saturated(*args, **kwargs):
+            raise ExecutorSaturatedError("queue full")
+        
+        executor.run_inference = saturated
+        batcher = MicroBatcher(executor, predict_batch=RecordingPredictor())
+        
+        async def scenario():
+            return await asyncio.gather(
+                batcher.submit(1, model="m"),
+                batcher.submit(2, model="m"),
+                return_exceptions=True
+            )
+        
+        try:
+            results = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        
+        assert all(isinstance(result, ExecutorSaturatedError) for result in results)
+    
+    def test_from_env_disabled_by_default(self, executor, monkeypatch):
+        """Test micro-batching is off unless AIMS_MICROBATCH is set."""
+        monkeypatch.delenv("AIMS_MICROBATCH", raising=False)
+        assert MicroBatcher.from_env(executor) is None
+        
+        monkeypatch.setenv("AIMS_MICROBATCH", "1")
+        monkeypatch.setenv("AIMS_MICROBATCH_WINDOW_MS", "3")
+        monkeypatch.setenv("AIMS_MICROBATCH_MAX_SIZE", "64")
+        batcher = MicroBatcher.from_env(executor)
+        assert batcher.window_s == pytest.approx(0.003)
+        assert batcher.max_batch_size == 64
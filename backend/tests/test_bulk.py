@@ -0,0 +1,296 @@
+"""
+Tests for bulk CSV scoring.
+Chunks must hold whole rows wherever the upload is split, and results must
+match the vectorized predictor row for row.
+"""
+
+import asyncio
+import csv
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from starlette.requests import ClientDisconnect
+
+from backend.services import bulk
+from backend.services.bulk import (
+    ERROR_MARKER,
+    CsvChunker,
+    CsvFormatError,
+    UploadStreamingResponse,
+    output_columns,
+    score_csv_chunk,
+    score_csv_upload,
+)
+from backend.services.executor import InferenceExecutor
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, predict_fault_matrix
+from backend.services.reload import load_artifact_set
+
+
+DATASET_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+
+@pytest.fixture(scope="module")
+def artifact_set(artifacts_dir):
+    """Trained artifacts, loaded the way the API serves them."""
+    artifacts, _ = load_artifact_set(str(artifacts_dir))
+    return artifacts
+
+
+@pytest.fixture(scope="module")
+def upload() -> bytes:
+    """The first 250 rows of the dataset, with its header."""
+    with open(DATASET_PATH, "rb") as f:
+        return b"".join(f.readline() for _ in range(251))
+
+
+def split(data: bytes, size: int):
+    """Pieces of data of at most size bytes, as they might arrive from the network."""
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+class TestCsvChunker:
+    """Test suite for CsvChunker."""
+
+    @pytest.mark.parametrize("piece_size", [1, 7, 4096, 10 ** 6])
+    def test_chunks_hold_whole_rows(self, upload, piece_size):
+        """Test chunks are the same whatever the sizes of the pieces the upload arrives in."""
+        chunker = CsvChunker(chunk_rows=100)
+        chunks = [chunk for piece in split(upload, piece_size) for chunk in chunker.feed(piece)]
+        last = chunker.flush()
+
+        rows = upload.split(b"\n", 1)[1]
+        assert chunker.header[0] == "Timestamp"
+        assert [first_line for first_line, _ in chunks] == [2, 102]
+        assert [chunk.count(b"\n") for _, chunk in chunks] == [100, 100]
+        assert last[0] == 202
+        assert b"".join(chunk for _, chunk in chunks) + last[1] == rows
+
+    def test_missing_final_newline(self):
+        """Test the last row is scored even when the upload does not end with a newline."""
+        chunker = CsvChunker(chunk_rows=10)
+        chunker.feed((",".join(FEATURE_NAMES) + "\n" + ",".join(["1.0"] * 18)).encode())
+
+        assert chunker.flush() == (2, ",".join(["1.0"] * 18).encode())
+
+    def test_header_only(self):
+        """Test an upload with a header and no rows has no chunks."""
+        chunker = CsvChunker()
+        chunker.feed(",".join(FEATURE_NAMES).encode())
+
+        assert chunker.flush() is None
+        assert chunker.header == FEATURE_NAMES
+
+    def test_rejects_missing_columns(self):
+        """Test a header without every sensor column is refused."""
+        with pytest.raises(CsvFormatError, match="Oil_Temp"):
+            CsvChunker().feed(",".join(name for name in FEATURE_NAMES if name != "Oil_Temp").encode() + b"\n")
+
+    def test_rejects_empty_upload(self):
+        """Test an empty upload is refused."""
+        with pytest.raises(CsvFormatError, match="empty"):
+            CsvChunker().flush()
+
+    def test_from_env(self, monkeypatch):
+        """Test AIMS_BULK_CHUNK_ROWS sets the chunk size."""
+        monkeypatch.setenv("AIMS_BULK_CHUNK_ROWS", "500")
+
+        assert CsvChunker.from_env().chunk_rows == 500
+
+
+class TestScoreCsvChunk:
+    """Test suite for scoring one chunk."""
+
+    @pytest.fixture
+    def chunk(self, upload):
+        """Header and first chunk of the upload."""
+        chunker = CsvChunker(chunk_rows=1000)
+        chunker.feed(upload)
+        return chunker.header, chunker.flush()
+
+    def test_ndjson_matches_predictor(self, artifact_set, chunk):
+        """Test every NDJSON line carries the prediction of the vectorized predictor."""
+        columns, (first_line, rows) = chunk
+        lines = score_csv_chunk(rows, first_line, columns, "ndjson", True, **artifact_set).decode().splitlines()
+        features = np.loadtxt(io.StringIO(rows.decode()), delimiter=",", dtype=object)
+        matrix = features[:, [columns.index(name) for name in FEATURE_NAMES]].astype(np.float64)
+        predictions, probabilities, shap_values = predict_fault_matrix(matrix, **artifact_set)
+
+        results = [json.loads(line) for line in lines]
+
+        assert len(results) == 250
+        assert [result["Timestamp"] for result in results] == features[:, columns.index("Timestamp")].tolist()
+        assert [result["prediction_label"] for result in results] == [FAULT_LABELS[p] for p in predictions]
+        np.testing.assert_allclose([list(result["probabilities"].values()) for result in results], probabilities)
+        np.testing.assert_allclose([list(result["shap_values"].values()) for result in results], shap_values)
+
+    def test_csv_columns(self, artifact_set, chunk):
+        """Test CSV results have the output columns, with probabilities adding up to one."""
+        columns, (first_line, rows) = chunk
+        text = score_csv_chunk(rows, first_line, columns, "csv", False, **artifact_set).decode()
+        header = output_columns(columns, explain=False)
+
+        results = list(csv.DictReader(io.StringIO(text), fieldnames=header))
+
+        assert len(results) == 250
+        assert header[:3] == ["Timestamp", "Fault_Label", "prediction_label"]
+        for result in results:
+            assert sum(float(result[f"probability_{label}"]) for label in FAULT_LABELS.values()) == pytest.approx(1.0)
+
+    def test_empty_values_are_missing(self, artifact_set):
+        """Test empty sensor values are scored as missing instead of failing."""
+        row = ",".join([""] + ["1.0"] * 17).encode() + b"\n"
+
+        result = json.loads(score_csv_chunk(row, 2, FEATURE_NAMES, "ndjson", False, **artifact_set))
+
+        assert result["prediction_label"] in FAULT_LABELS.values()
+
+    def test_unparsable_rows_name_their_lines(self, artifact_set):
+        """Test a non-numeric sensor value fails with the lines of its chunk."""
+        rows = (",".join(["1.0"] * 18) + "\n" + ",".join(["fast"] + ["1.0"] * 17) + "\n").encode()
+
+        with pytest.raises(CsvFormatError, match="lines 12-13"):
+            score_csv_chunk(rows, 12, FEATURE_NAMES, "ndjson", False, **artifact_set)
+
+
+class TestScoreCsvUpload:
+    """Test suite for scoring a whole upload."""
+
+    @pytest.fixture
+    def executor(self):
+        executor = InferenceExecutor(max_workers=2, max_queue=4, kind="thread")
+        yield executor
+        executor.shutdown()
+
+    def run(self, pieces, executor, chunk_rows, artifact_set, output_format="ndjson", stream=False, consumed=None):
+        """
+        Score an upload arriving in pieces, and return the yielded blocks.
+
+        With consumed, the number of pieces read when each block was yielded
+        is appended to it.
+        """
+        read = []
+
+        async def upload():
+            for piece in pieces:
+                read.append(piece)
+                yield piece
+
+        async def collect():
+            blocks = []
+            async for block in score_csv_upload(
+                upload(), executor, CsvChunker(chunk_rows), output_format, False, stream, **artifact_set
+            ):
+                blocks.append(block)
+                if consumed is not None:
+                    consumed.append(len(read))
+            return blocks
+        return asyncio.run(collect())
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_results_in_upload_order(self, artifact_set, upload, executor, monkeypatch, stream):
+        """Test results come back in upload order, spilled from memory to disk or streamed."""
+        monkeypatch.setattr(bulk, "SPOOL_MAX_BYTES", 1024)
+
+        blocks = self.run(split(upload, 333), executor, 16, artifact_set, output_format="csv", stream=stream)
+
+        lines = b"".join(blocks).decode().splitlines()
+        timestamps = [row.split(",")[0] for row in upload.decode().splitlines()[1:]]
+
+        assert lines[0].startswith("Timestamp,Fault_Label,prediction_label")
+        assert [line.split(",")[0] for line in lines[1:]] == timestamps
+
+    def test_streams_while_uploading(self, artifact_set, upload, executor):
+        """Test with stream, results are yielded before the whole upload has been read."""
+        pieces = split(upload, 333)
+        consumed = []
+
+        blocks = self.run(pieces, executor, 16, artifact_set, stream=True, consumed=consumed)
+
+        assert len(blocks) > 1
+        assert consumed[0] < len(pieces)
+
+    def test_results_wait_for_upload(self, artifact_set, upload, executor):
+        """Test by default results are only yielded once the whole upload has been read."""
+        pieces = split(upload, 333)
+        consumed = []
+
+        self.run(pieces, executor, 16, artifact_set, consumed=consumed)
+
+        assert consumed[0] == len(pieces)
+
+    def test_header_only(self, artifact_set, executor):
+        """Test an upload without rows yields just the result header."""
+        header = ",".join(["Timestamp", *FEATURE_NAMES]).encode() + b"\n"
+
+        blocks = self.run([header], executor, 16, artifact_set, output_format="csv")
+
+        assert b"".join(blocks).decode().splitlines() == [",".join(output_columns(["Timestamp"], False))]
+
+    def test_streamed_failure_in_first_chunk(self, artifact_set, upload, executor):
+        """Test with stream, a bad row in the first chunk fails before anything is yielded."""
+        bad_row = b"2024-01-02 00:00:00,not-a-number\n"
+        consumed = []
+
+        with pytest.raises(CsvFormatError):
+            self.run([upload, bad_row], executor, 500, artifact_set, stream=True, consumed=consumed)
+        assert consumed == []
+
+    def test_failure_before_first_block(self, artifact_set, upload, executor):
+        """Test by default, a bad row anywhere in the upload fails before anything is yielded."""
+        bad_row = b"2024-01-02 00:00:00,not-a-number\n"
+        consumed = []
+
+        with pytest.raises(CsvFormatError):
+            self.run([upload, bad_row], executor, 50, artifact_set, consumed=consumed)
+        assert consumed == []
+
+    def test_later_failure_ends_stream_with_error_record(self, artifact_set, upload, executor):
+        """Test with stream, a bad row in a later chunk ends the results with an error record."""
+        bad_row = b"2024-01-02 00:00:00,not-a-number\n"
+
+        blocks = self.run([upload, bad_row], executor, 50, artifact_set, stream=True)
+        lines = b"".join(blocks).decode().splitlines()
+
+        assert len(lines) == 251
+        assert all("prediction_label" in json.loads(line) for line in lines[:-1])
+        error = json.loads(lines[-1])["error"]
+        assert error["status_code"] == 422
+        assert "Could not parse lines 252-252" in error["detail"]
+
+    def test_later_failure_ends_csv_stream_with_error_row(self, artifact_set, upload, executor):
+        """Test a streamed CSV result that fails part way ends with an ERROR_MARKER row."""
+        bad_row = b"2024-01-02 00:00:00,not-a-number\n"
+
+        blocks = self.run([upload, bad_row], executor, 50, artifact_set, output_format="csv", stream=True)
+        rows = list(csv.reader(io.StringIO(b"".join(blocks).decode())))
+
+        assert len(rows) == 252
+        assert rows[-1][:2] == [ERROR_MARKER, "422"]
+        assert "Could not parse lines" in rows[-1][2]
+
+
+class TestUploadStreamingResponse:
+    """Test suite for UploadStreamingResponse."""
+
+    def send_failing_with(self, error):
+        """Run a response whose first send raises error."""
+        async def body():
+            yield b"results"
+
+        async def send(message):
+            raise error
+
+        asyncio.run(UploadStreamingResponse(body())({"type": "http"}, None, send))
+
+    def test_disconnect_is_client_disconnect(self):
+        """Test a client that went away is reported as ClientDisconnect."""
+        with pytest.raises(ClientDisconnect):
+            self.send_failing_with(BrokenPipeError())
+
+    def test_other_os_errors_propagate(self):
+        """Test I/O errors that are not disconnects, such as a full disk, are not hidden."""
+        with pytest.raises(OSError, match="No space left"):
+            self.send_failing_with(OSError(28, "No space left on device"))
@@ -0,0 +1,220 @@
+"""
+Tests for the versioned artifact bundle.
+A bundle must reproduce the pickled artifacts exactly and reject any mismatch.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.artifacts import (
+    BUNDLE_DIRNAME,
+    BUNDLE_SOURCES,
+    load_artifacts,
+    load_serving_artifacts,
+    serves_bundle,
+)
+from backend.services.bundle import (
+    BOOSTER_FILENAME,
+    MANIFEST_FILENAME,
+    BundleError,
+    is_bundle,
+    load_bundle,
+    validate_bundle,
+    write_bundle,
+)
+from backend.services.folding import BoosterClassifier
+from backend.services.predictor import FEATURE_NAMES, predict_fault_matrix
+from backend.services.reload import artifacts_version
+
+
+DATASET_PATH = Path(__file__).parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+
+@pytest.fixture(scope="module")
+def pickled(artifacts_dir):
+    """Pickled artifacts and raw readings from the dataset."""
+    artifacts = load_artifacts(str(artifacts_dir))
+    raw = pd.read_csv(DATASET_PATH, usecols=FEATURE_NAMES, nrows=300)[FEATURE_NAMES].to_numpy()
+    return artifacts, raw
+
+
+@pytest.fixture
+def bundle_dir(tmp_path, pickled):
+    """A bundle written from the pickled artifacts."""
+    artifacts, _ = pickled
+    path = tmp_path / BUNDLE_DIRNAME
+    write_bundle(artifacts["model"], artifacts["preprocessor"], str(path))
+    return path
+
+
+class TestBundle:
+    """Test suite for writing, validating and loading bundles."""
+
+    def test_manifest_describes_the_bundle(self, bundle_dir):
+        """Test the manifest records format, version, features, labels and hashes."""
+        manifest = validate_bundle(str(bundle_dir))
+
+        assert is_bundle(str(bundle_dir))
+        assert manifest["format_version"] == 1
+        assert len(manifest["version"]) == 12
+        assert manifest["feature_names"] == FEATURE_NAMES
+        assert manifest["labels"]["0"] == "Normal"
+        assert set(manifest["files"]) == {BOOSTER_FILENAME, "scaler_mean.npy", "scaler_scale.npy"}
+
+    def test_version_is_content_addressed(self, tmp_path, pickled, bundle_dir):
+        """Test the same artifacts always get the same default version."""
+        artifacts, _ = pickled
+        again = write_bundle(artifacts["model"], artifacts["preprocessor"], str(tmp_path / "again"))
+
+        assert again["version"] == validate_bundle(str(bundle_dir))["version"]
+
+    def test_load_reproduces_pickled_artifacts(self, bundle_dir, pickled):
+        """Test bundle predictions and SHAP values equal the pickles' exactly."""
+        artifacts, raw = pickled
+        bundle = load_bundle(str(bundle_dir))
+
+        import shap
+        bundle["shap_explainer"] = shap.TreeExplainer(bundle["model"].booster_)
+        result = predict_fault_matrix(raw, **bundle)
+        expected = predict_fault_matrix(raw, **artifacts)
+
+        assert isinstance(bundle["model"], BoosterClassifier)
+        for actual, reference in zip(result, expected):
+            assert np.array_equal(actual, reference)
+
+    def test_scaler_is_memory_mapped(self, bundle_dir):
+        """Test the scaler arrays are read-only memory maps shared between processes."""
+        preprocessor = load_bundle(str(bundle_dir))["preprocessor"]
+
+        assert isinstance(preprocessor.mean_, np.memmap)
+        assert isinstance(preprocessor.scale_, np.memmap)
+        assert not preprocessor.mean_.flags.writeable
+
+    def test_tampered_file_is_rejected(self, bundle_dir):
+        """Test a file that no longer matches its hash fails validation."""
+        with open(bundle_dir / BOOSTER_FILENAME, "a") as f:
+            f.write("\n")
+
+        with pytest.raises(BundleError, match="does not match its hash"):
+            load_bundle(str(bundle_dir))
+
+    def test_mismatched_labels_are_rejected(self, bundle_dir):
+        """Test a bundle whose label map differs from FAULT_LABELS fails validation."""
+        manifest_path = bundle_dir / MANIFEST_FILENAME
+        manifest = json.loads(manifest_path.read_text())
+        manifest["labels"]["0"] = "Healthy"
+        manifest_path.write_text(json.dumps(manifest))
+
+        with pytest.raises(BundleError, match="labels"):
+            validate_bundle(str(bundle_dir))
+
+    @pytest.mark.parametrize("missing", ["files", BOOSTER_FILENAME, "scaler_scale.npy"])
+    def test_manifest_must_list_every_file(self, bundle_dir, missing):
+        """Test a manifest without its file list, or missing a file from it, fails validation."""
+        manifest_path = bundle_dir / MANIFEST_FILENAME
+        manifest = json.loads(manifest_path.read_text())
+        if missing == "files":
+            del manifest["files"]
+        else:
+            del manifest["files"][missing]
+        manifest_path.write_text(json.dumps(manifest))
+
+        with pytest.raises(BundleError, match="does not list"):
+            validate_bundle(str(bundle_dir))
+
+    def test_reordered_scaler_is_rejected(self, tmp_path, artifacts_dir, pickled):
+        """Test a scaler fitted on differently ordered features cannot be bundled."""
+        artifacts, _ = pickled
+        preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+        preprocessor.feature_names_in_ = preprocessor.feature_names_in_[::-1]
+
+        with pytest.raises(BundleError, match="order"):
+            write_bundle(artifacts["model"], preprocessor, str(tmp_path / "bundle"))
+        assert not is_bundle(str(tmp_path / "bundle"))
+
+
+@pytest.fixture
+def exported(tmp_path, artifacts_dir, pickled):
+    """A copy of the pickles with a bundle written from them, as the notebooks export them."""
+    artifacts, _ = pickled
+    for filename in ("lgbm_model.pkl", "preprocessor.pkl", "shap_explainer.pkl"):
+        shutil.copy(artifacts_dir / filename, tmp_path / filename)
+    write_bundle(
+        artifacts["model"],
+        artifacts["preprocessor"],
+        str(tmp_path / BUNDLE_DIRNAME),
+        sources={filename: str(tmp_path / filename) for filename in BUNDLE_SOURCES}
+    )
+    return tmp_path
+
+
+class TestServingFromBundle:
+    """Test suite for serving artifacts from a bundle."""
+
+    def test_serves_without_pickles(self, tmp_path, bundle_dir, pickled):
+        """Test a directory holding only the bundle serves the same predictions."""
+        artifacts, raw = pickled
+        assert not list(tmp_path.glob("*.pkl"))
+
+        served = load_serving_artifacts(str(tmp_path))
+        result = predict_fault_matrix(raw, **served)
+        expected = predict_fault_matrix(raw, **artifacts)
+
+        for actual, reference in zip(result, expected):
+            assert np.array_equal(actual, reference)
+
+    def test_falls_back_to_pickles(self, tmp_path, artifacts_dir):
+        """Test a directory without a bundle is served from the .pkl files."""
+        for filename in ("lgbm_model.pkl", "preprocessor.pkl", "shap_explainer.pkl"):
+            os.symlink(artifacts_dir / filename, tmp_path / filename)
+
+        served = load_serving_artifacts(str(tmp_path))
+
+        assert not isinstance(served["model"], BoosterClassifier)
+
+    def test_serves_bundle_of_current_pickles(self, exported):
+        """Test a bundle written from the pickles next to it is served."""
+        manifest = validate_bundle(str(exported / BUNDLE_DIRNAME))
+
+        served = load_serving_artifacts(str(exported))
+
+        assert set(manifest["source_files"]) == set(BUNDLE_SOURCES)
+        assert serves_bundle(str(exported))
+        assert artifacts_version(str(exported)) == manifest["version"]
+        assert isinstance(served["model"], BoosterClassifier)
+
+    def test_regenerated_pickles_are_served_over_stale_bundle(self, exported, capsys):
+        """Test pickles that changed after the bundle was written from them are served instead."""
+        preprocessor = joblib.load(exported / "preprocessor.pkl")
+        preprocessor.mean_ = preprocessor.mean_ + 1.0
+        joblib.dump(preprocessor, exported / "preprocessor.pkl")
+
+        served = load_serving_artifacts(str(exported))
+
+        assert not serves_bundle(str(exported))
+        assert artifacts_version(str(exported)) is None
+        assert not isinstance(served["model"], BoosterClassifier)
+        assert np.array_equal(served["preprocessor"].mean_, preprocessor.mean_)
+        assert "preprocessor.pkl changed after the bundle" in capsys.readouterr().out
+
+    def test_bundle_without_sources_is_stale_once_pickles_are_newer(self, tmp_path, artifacts_dir, pickled):
+        """Test a bundle that does not record its sources is not served over newer pickles."""
+        artifacts, _ = pickled
+        for filename in ("lgbm_model.pkl", "preprocessor.pkl", "shap_explainer.pkl"):
+            shutil.copy(artifacts_dir / filename, tmp_path / filename)
+        write_bundle(artifacts["model"], artifacts["preprocessor"], str(tmp_path / BUNDLE_DIRNAME))
+        manifest_mtime = os.path.getmtime(tmp_path / BUNDLE_DIRNAME / MANIFEST_FILENAME)
+
+        os.utime(tmp_path / "lgbm_model.pkl", (manifest_mtime - 60, manifest_mtime - 60))
+        os.utime(tmp_path / "preprocessor.pkl", (manifest_mtime - 60, manifest_mtime - 60))
+        assert serves_bundle(str(tmp_path))
+
+        os.utime(tmp_path / "lgbm_model.pkl", (manifest_mtime + 60, manifest_mtime + 60))
+        assert not serves_bundle(str(tmp_path))
@@ -0,0 +1,75 @@
+"""
+Tests for columnar batch responses.
+The columnar layout must carry exactly the predictions of the per-reading
+layout, and orjson and the standard library must write the same JSON.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from backend.services import columnar
+from backend.services.columnar import columnar_predictions, dumps
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, build_prediction_response
+
+
+@pytest.fixture
+def scored():
+    """Predictions, probabilities and SHAP values of five readings."""
+    rng = np.random.default_rng(0)
+    probabilities = rng.dirichlet(np.ones(len(FAULT_LABELS)), size=5)
+    # Not C-contiguous, as selecting the predicted class's SHAP values can leave them
+    shap_values = rng.normal(size=(len(FEATURE_NAMES), 5)).T
+    return probabilities.argmax(axis=1), probabilities, shap_values
+
+
+class TestColumnarPredictions:
+    """Test suite for columnar_predictions."""
+
+    def test_matches_per_reading_responses(self, scored):
+        """Test every row of the columnar layout is the PredictionResponse of that reading."""
+        predictions, probabilities, shap_values = scored
+
+        content = json.loads(dumps(columnar_predictions(predictions, probabilities, shap_values)))
+
+        assert content["labels"] == list(FAULT_LABELS.values())
+        assert content["feature_names"] == FEATURE_NAMES
+        assert content["prediction_ids"] is None
+        for row in range(len(predictions)):
+            expected = build_prediction_response(predictions[row], probabilities[row], shap_values[row])
+            assert content["prediction_labels"][row] == expected.prediction_label
+            assert dict(zip(content["labels"], content["probabilities"][row])) == expected.probabilities
+            assert dict(zip(content["feature_names"], content["shap_values"][row])) == expected.shap_values
+
+    def test_without_explanations(self, scored):
+        """Test skipped explanations give null SHAP values and carry the prediction ids."""
+        predictions, probabilities, _ = scored
+
+        content = json.loads(dumps(columnar_predictions(predictions, probabilities, None, ["a", "b", "c", "d", "e"])))
+
+        assert content["shap_values"] is None
+        assert content["prediction_ids"] == ["a", "b", "c", "d", "e"]
+
+
+class TestDumps:
+    """Test suite for dumps."""
+
+    def test_standard_library_fallback_writes_the_same_values(self, scored, monkeypatch):
+        """Test the fallback used without orjson writes the same document."""
+        content = columnar_predictions(*scored)
+        fast = dumps(content)
+
+        monkeypatch.setattr(columnar, "orjson", None)
+        fallback = dumps(content)
+
+        assert json.loads(fallback) == json.loads(fast)
+
+    def test_floats_read_back_exactly(self, scored):
+        """Test probabilities and SHAP values survive serialization bit for bit."""
+        _, probabilities, shap_values = scored
+
+        content = json.loads(dumps({"probabilities": probabilities, "shap_values": np.ascontiguousarray(shap_values)}))
+
+        np.testing.assert_array_equal(np.array(content["probabilities"]), probabilities)
+        np.testing.assert_array_equal(np.array(content["shap_values"]), shap_values)
@@ -3,12 +3,32 @@ Integration tests for FastAPI endpoints.
 Tests the /predict endpoint using FastAPI TestClient.
 """
 
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
 import pytest
 import numpy as np
 from unittest.mock import Mock, patch
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 
-from backend.main import app
+from backend.main import app, get_executor
+from backend.models.request import MAX_BATCH_SIZE
+from backend.services.batcher import MicroBatcher
+from backend.services.executor import ExecutorSaturatedError
+from backend.services.artifacts import load_serving_explainer
+from backend.services.explanations import ExplanationStore
+from backend.services.prediction_cache import PredictionCache
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.reload import load_artifact_set
+from backend.services.registry import ModelRegistry
+from backend.services.warmup import Warmup
+from backend.services.windows import rolling_features
 
 
 class TestServerStartup:
@@ -155,6 +175,78 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
 
 
+class TestProbes:
+    """Test suite for the liveness and readiness probes."""
+    
+    @pytest.fixture(autouse=True)
+    def state(self):
+        """Restore the artifacts and warm-up in app.state after each test."""
+        saved = {name: getattr(app.state, name, None) for name in ("model", "preprocessor", "shap_explainer", "warmup")}
+        yield
+        for name, value in saved.items():
+            setattr(app.state, name, value)
+    
+    def serve(self, artifacts, warmup=None):
+        """Put artifacts and a warm-up in app.state."""
+        app.state.model = artifacts["model"]
+        app.state.preprocessor = artifacts["preprocessor"]
+        app.state.shap_explainer = artifacts["shap_explainer"]
+        app.state.warmup = warmup
+    
+    def test_live(self, client):
+        """Test the liveness probe answers whatever the artifacts."""
+        app.state.model = None
+        response = client.get("/health/live")
+        
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+    
+    def test_not_ready_without_artifacts(self, client, mock_artifacts):
+        """Test readiness is refused while no model is loaded."""
+        self.serve({**mock_artifacts, "model": None})
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["model_loaded"] is False
+    
+    def test_ready_without_warmup(self, client, mock_artifacts):
+        """Test loaded artifacts are ready at once when warm-up is disabled."""
+        self.serve(mock_artifacts)
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["warmup"] is None
+    
+    @pytest.mark.parametrize("state,status,code", [
+        ("running", "warming_up", 503),
+        ("failed", "ready", 200),
+        ("skipped", "ready", 200),
+        ("done", "ready", 200),
+    ])
+    def test_gated_on_warmup(self, client, mock_artifacts, state, status, code):
+        """Test readiness waits for warm-up to finish, whatever its outcome, and reports its latency."""
+        warmup = Warmup()
+        warmup.state = state
+        self.serve(mock_artifacts, warmup)
+        response = client.get("/health/ready")
+        
+        assert response.status_code == code
+        assert response.json()["status"] == status
+        assert response.json()["warmup"]["state"] == state
+    
+    def test_warming_up_again_stays_ready(self, client, mock_artifacts):
+        """Test warming up again after a reload does not take a serving instance out of rotation."""
+        warmup = Warmup()
+        warmup.runs = 1
+        warmup.state = "running"
+        self.serve(mock_artifacts, warmup)
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+
 class TestPredictEndpoint:
     """Test suite for /predict endpoint."""
     
@@ -288,3 +380,934 @@ class TestPredictEndpoint:
         data = response.json()
         assert "detail" in data
         assert "Model artifacts not loaded" in data["detail"]
+
+
+class TestPredictBatchEndpoint:
+    """Test suite for /predict/batch endpoint."""
+    
+    @pytest.fixture
+    def batch_artifacts(self):
+        """Create mock artifacts that score two rows."""
+        preprocessor = Mock()
+        preprocessor.transform.side_effect = lambda df: df.to_numpy()
+        
+        model = Mock()
+        model.predict_proba.return_value = np.array([
+            [0.95, 0.02, 0.01, 0.01, 0.005, 0.005, 0.005, 0.005],
+            [0.05, 0.05, 0.05, 0.75, 0.03, 0.03, 0.02, 0.02]
+        ])
+        
+        explainer = Mock()
+        explainer.shap_values.return_value = np.zeros((2, 18, 8))
+        
+        return model, preprocessor, explainer
+    
+    def test_predict_batch_with_valid_payload(self, client, valid_sensor_payload, batch_artifacts):
+        """Test POST /predict/batch returns one prediction per reading, in order."""
+        app.state.model, app.state.preprocessor, app.state.shap_explainer = batch_artifacts
+        
+        response = client.post("/predict/batch", json={
+            "readings": [valid_sensor_payload, valid_sensor_payload]
+        })
+        
+        assert response.status_code == 200
+        predictions = response.json()["predictions"]
+        assert len(predictions) == 2
+        assert predictions[0]["prediction_label"] == "Normal"
+        assert predictions[1]["prediction_label"] == "Turbocharger Fault"
+        for prediction in predictions:
+            assert len(prediction["probabilities"]) == 8
+            assert len(prediction["shap_values"]) == 18
+    
+    def test_predict_batch_empty_readings(self, client):
+        """Test POST /predict/batch with no readings (should return 422)."""
+        response = client.post("/predict/batch", json={"readings": []})
+        
+        assert response.status_code == 422
+    
+    @pytest.mark.parametrize("content_type", ["application/octet-stream", "application/x-npy"])
+    def test_predict_batch_with_binary_payload(self, client, valid_sensor_payload, batch_artifacts, content_type):
+        """Test binary payloads are scored exactly like the same readings sent as JSON."""
+        app.state.model, app.state.preprocessor, app.state.shap_explainer = batch_artifacts
+        expected = client.post("/predict/batch", json={
+            "readings": [valid_sensor_payload, valid_sensor_payload]
+        }).json()
+        features = np.array([[valid_sensor_payload[name] for name in FEATURE_NAMES]] * 2)
+        if content_type == "application/octet-stream":
+            body = features.astype("<f4").tobytes()
+        else:
+            buffer = io.BytesIO()
+            np.save(buffer, features)
+            body = buffer.getvalue()
+        
+        response = client.post("/predict/batch", content=body, headers={"Content-Type": content_type})
+        
+        assert response.status_code == 200
+        assert response.json() == expected
+        transformed = app.state.preprocessor.transform.call_args.args[0]
+        np.testing.assert_allclose(transformed.to_numpy(), features, rtol=1e-6)
+    
+    def test_predict_batch_rejects_bad_binary_payloads(self, client, valid_sensor_payload, monkeypatch):
+        """Test non-finite, truncated, oversized and unsupported binary payloads are rejected before scoring."""
+        features = np.array([[valid_sensor_payload[name] for name in FEATURE_NAMES]] * 2, dtype="<f4")
+        features[1, FEATURE_NAMES.index("Oil_Temp")] = np.nan
+        raw = {"Content-Type": "application/octet-stream"}
+        
+        response = client.post("/predict/batch", content=features.tobytes(), headers=raw)
+        assert response.status_code == 422
+        assert "reading 1 Oil_Temp" in response.json()["detail"]
+        
+        response = client.post("/predict/batch", content=features.tobytes()[:-4], headers=raw)
+        assert response.status_code == 422
+        
+        too_many = np.zeros((MAX_BATCH_SIZE + 1, len(FEATURE_NAMES)), dtype="<f4")
+        response = client.post("/predict/batch", content=too_many.tobytes(), headers=raw)
+        assert response.status_code == 413
+        
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        response = client.post(
+            "/predict/batch",
+            content=b"ARROW1",
+            headers={"Content-Type": "application/vnd.apache.arrow.file"}
+        )
+        assert response.status_code == 415
+    
+    @pytest.mark.parametrize("value", [75.0, float("nan"), float("inf"), float("-inf")])
+    def test_predict_batch_json_and_binary_agree(self, client, valid_sensor_payload, batch_artifacts, value):
+        """Test the same readings are accepted or rejected alike as a JSON body and as a raw body."""
+        app.state.model, app.state.preprocessor, app.state.shap_explainer = batch_artifacts
+        readings = [valid_sensor_payload, {**valid_sensor_payload, "Oil_Temp": value}]
+        features = np.array([[reading[name] for name in FEATURE_NAMES] for reading in readings], dtype="<f4")
+        
+        as_json = client.post(
+            "/predict/batch",
+            content=json.dumps({"readings": readings}),
+            headers={"Content-Type": "application/json"}
+        )
+        as_raw = client.post(
+            "/predict/batch",
+            content=features.tobytes(),
+            headers={"Content-Type": "application/octet-stream"}
+        )
+        
+        assert as_json.status_code == as_raw.status_code
+        assert as_json.status_code == (200 if np.isfinite(value) else 422)
+        if not np.isfinite(value):
+            assert as_json.json()["detail"][0]["loc"] == ["body", "readings", 1, "Oil_Temp"]
+            assert as_json.json()["detail"][0]["input"] == str(value)
+            assert "reading 1 Oil_Temp" in as_raw.json()["detail"]
+    
+    def test_predict_batch_json_errors_locate_the_field(self, client, valid_sensor_payload):
+        """Test invalid JSON readings are reported with their location in the body, as for any body parameter."""
+        response = client.post("/predict/batch", json={
+            "readings": [{**valid_sensor_payload, "Shaft_RPM": "fast"}]
+        })
+        
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "readings", 0, "Shaft_RPM"]
+    
+    def test_predict_batch_columnar(self, client, valid_sensor_payload, batch_artifacts):
+        """Test format=columnar carries the same predictions, with the label and feature order sent once."""
+        app.state.model, app.state.preprocessor, app.state.shap_explainer = batch_artifacts
+        body = {"readings": [valid_sensor_payload, valid_sensor_payload]}
+        expected = client.post("/predict/batch", json=body).json()["predictions"]
+        
+        response = client.post("/predict/batch?format=columnar", json=body)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["X-Model-Version"] == "primary"
+        content = response.json()
+        assert content["feature_names"] == FEATURE_NAMES
+        assert content["prediction_labels"] == [prediction["prediction_label"] for prediction in expected]
+        for row, prediction in enumerate(expected):
+            assert dict(zip(content["labels"], content["probabilities"][row])) == prediction["probabilities"]
+            assert dict(zip(content["feature_names"], content["shap_values"][row])) == prediction["shap_values"]
+        assert content["prediction_ids"] is None
+    
+    def test_predict_batch_columnar_without_explanations(self, client, valid_sensor_payload, batch_artifacts):
+        """Test format=columnar with explain=false issues a prediction_id per reading for GET /explain."""
+        app.state.model, app.state.preprocessor, app.state.shap_explainer = batch_artifacts
+        app.state.explanation_store = ExplanationStore()
+        
+        response = client.post(
+            "/predict/batch?format=columnar&explain=false",
+            json={"readings": [valid_sensor_payload, valid_sensor_payload]}
+        )
+        
+        assert response.status_code == 200
+        content = response.json()
+        assert content["shap_values"] is None
+        assert len(set(content["prediction_ids"])) == 2
+        assert app.state.explanation_store.get(content["prediction_ids"][1]) is not None
+    
+    def test_predict_batch_unknown_format(self, client, valid_sensor_payload):
+        """Test an unknown response format is rejected."""
+        response = client.post("/predict/batch?format=xml", json={"readings": [valid_sensor_payload]})
+        
+        assert response.status_code == 422
+        assert "Unknown format" in response.json()["detail"]
+    
+    def test_predict_batch_without_loaded_artifacts(self, client, valid_sensor_payload):
+        """Test POST /predict/batch when artifacts are not loaded (should return 500)."""
+        app.state.model = None
+        app.state.preprocessor = None
+        app.state.shap_explainer = None
+        
+        response = client.post("/predict/batch", json={"readings": [valid_sensor_payload]})
+        
+        assert response.status_code == 500
+        assert "Model artifacts not loaded" in response.json()["detail"]
+
+
+class TestInferenceBackpressure:
+    """Test suite for inference executor integration."""
+    
+    def test_predict_returns_503_when_queue_full(self, client, valid_sensor_payload, mock_artifacts):
+        """Test POST /predict returns 503 with Retry-After when the executor is saturated."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        
+        saturated = Mock()
+        saturated.run_inference.side_effect = ExecutorSaturatedError("queue full")
+        app.state.executor = saturated
+        try:
+            response = client.post("/predict", json=valid_sensor_payload)
+        finally:
+            app.state.executor = None
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert "busy" in response.json()["detail"]
+    
+    def test_inference_metrics_endpoint(self, client, valid_sensor_payload, mock_artifacts):
+        """Test GET /metrics/inference reports pool size, queue depth and wait times."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        
+        assert client.post("/predict", json=valid_sensor_payload).status_code == 200
+        response = client.get("/metrics/inference")
+        
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("max_workers", "max_queue", "in_flight", "queue_depth", "completed", "rejected"):
+            assert key in data
+        assert data["completed"] >= 1
+        assert set(data["wait_ms"]) == {"mean", "p50", "p99", "max"}
+        assert data["shap_cache"] is None
+    
+    def test_predict_with_micro_batching_enabled(self, client, valid_sensor_payload, mock_artifacts):
+        """Test POST /predict keeps its response shape when routed through the micro-batcher."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        app.state.batcher = MicroBatcher(get_executor(), window_ms=1)
+        try:
+            response = client.post("/predict", json=valid_sensor_payload)
+            metrics = client.get("/metrics/inference").json()
+        finally:
+            app.state.batcher = None
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["prediction_label"] == "Normal"
+        assert data["probabilities"]["Normal"] == 0.95
+        assert len(data["shap_values"]) == 18
+        assert metrics["microbatch"]["batches"] == 1
+
+
+class TestDeferredExplanations:
+    """Test suite for explain=false and GET /explain/{prediction_id}."""
+    
+    @pytest.fixture(autouse=True)
+    def artifacts(self, mock_artifacts):
+        """Install mock artifacts scoring any number of rows, and a fresh explanation store."""
+        probabilities = mock_artifacts["model"].predict_proba.return_value
+        mock_artifacts["preprocessor"].transform.side_effect = lambda X: np.asarray(X, dtype=np.float64)
+        mock_artifacts["model"].predict_proba.side_effect = lambda X: np.repeat(probabilities, len(X), axis=0)
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        app.state.explanation_store = ExplanationStore()
+        return mock_artifacts
+    
+    def test_predict_without_explanation(self, client, valid_sensor_payload, artifacts):
+        """Test explain=false skips SHAP and returns a prediction_id instead."""
+        response = client.post("/predict", params={"explain": "false"}, json=valid_sensor_payload)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["prediction_label"] == "Normal"
+        assert data["probabilities"]["Normal"] == 0.95
+        assert data["shap_values"] is None
+        assert data["prediction_id"]
+        artifacts["shap_explainer"].shap_values.assert_not_called()
+    
+    def test_predict_with_explanation_by_default(self, client, valid_sensor_payload):
+        """Test SHAP values are still returned inline unless explain=false."""
+        data = client.post("/predict", json=valid_sensor_payload).json()
+        
+        assert len(data["shap_values"]) == 18
+        assert data["prediction_id"] is None
+    
+    def test_explain_later(self, client, valid_sensor_payload, artifacts):
+        """Test GET /explain/{prediction_id} computes the SHAP values on demand."""
+        prediction_id = client.post(
+            "/predict", params={"explain": "false"}, json=valid_sensor_payload
+        ).json()["prediction_id"]
+        
+        response = client.get(f"/explain/{prediction_id}")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["prediction_id"] == prediction_id
+        assert data["prediction_label"] == "Normal"
+        assert data["shap_values"]["Shaft_RPM"] == 0.05
+        assert len(data["shap_values"]) == 18
+        artifacts["shap_explainer"].shap_values.assert_called_once()
+    
+    def test_explain_unknown_prediction(self, client):
+        """Test GET /explain with an unknown or expired id returns 404."""
+        response = client.get("/explain/does-not-exist")
+        
+        assert response.status_code == 404
+        assert "not found or expired" in response.json()["detail"]
+    
+    def test_batch_evicts_earlier_prediction(self, client, valid_sensor_payload):
+        """Test a batch filling the store evicts an earlier prediction, and the 404 says why."""
+        app.state.explanation_store = ExplanationStore(max_entries=3)
+        prediction_id = client.post(
+            "/predict", params={"explain": "false"}, json=valid_sensor_payload
+        ).json()["prediction_id"]
+        
+        client.post("/predict/batch", params={"explain": "false"}, json={"readings": [valid_sensor_payload] * 3})
+        response = client.get(f"/explain/{prediction_id}")
+        
+        assert response.status_code == 404
+        assert "Only the most recent 3 predictions" in response.json()["detail"]
+        assert app.state.explanation_store.stats()["evicted"] == 1
+    
+    def test_batch_without_explanations(self, client, valid_sensor_payload):
+        """Test /predict/batch?explain=false gives every reading its own prediction_id."""
+        response = client.post(
+            "/predict/batch",
+            params={"explain": "false"},
+            json={"readings": [valid_sensor_payload, valid_sensor_payload]}
+        )
+        
+        assert response.status_code == 200
+        predictions = response.json()["predictions"]
+        ids = [prediction["prediction_id"] for prediction in predictions]
+        assert all(prediction["shap_values"] is None for prediction in predictions)
+        assert len(set(ids)) == 2
+        assert client.get(f"/explain/{ids[1]}").status_code == 200
+    
+    def test_micro_batched_predict_without_explanation(self, client, valid_sensor_payload, artifacts):
+        """Test explain=false also skips SHAP when /predict goes through the micro-batcher."""
+        app.state.batcher = MicroBatcher(get_executor(), window_ms=1)
+        try:
+            data = client.post("/predict", params={"explain": "false"}, json=valid_sensor_payload).json()
+        finally:
+            app.state.batcher = None
+        
+        assert data["shap_values"] is None
+        assert data["prediction_id"]
+        artifacts["shap_explainer"].shap_values.assert_not_called()
+
+
+class TestPredictionCacheEndpoint:
+    """Test suite for the prediction cache on /predict."""
+    
+    @pytest.fixture(autouse=True)
+    def cache(self, mock_artifacts):
+        """Install mock artifacts and an enabled prediction cache."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        app.state.explanation_store = ExplanationStore()
+        app.state.prediction_cache = PredictionCache()
+        yield app.state.prediction_cache
+        app.state.prediction_cache = None
+    
+    def test_repeated_reading_is_served_from_cache(self, client, valid_sensor_payload, mock_artifacts, cache):
+        """Test a repeated reading is answered without running the model again."""
+        first = client.post("/predict", json=valid_sensor_payload).json()
+        second = client.post("/predict", json=valid_sensor_payload).json()
+        
+        assert second == first
+        mock_artifacts["model"].predict_proba.assert_called_once()
+        assert cache.stats()["hits"] == 1
+    
+    def test_cached_predictions_get_fresh_ids(self, client, valid_sensor_payload):
+        """Test explain=false hits still get their own explainable prediction_id."""
+        ids = [
+            client.post("/predict", params={"explain": "false"}, json=valid_sensor_payload).json()["prediction_id"]
+            for _ in range(2)
+        ]
+        
+        assert ids[0] != ids[1]
+        assert client.get(f"/explain/{ids[1]}").status_code == 200
+    
+    def test_reloaded_model_is_not_served_stale_predictions(self, client, valid_sensor_payload, mock_artifacts):
+        """Test swapping the model in app.state invalidates the cache."""
+        client.post("/predict", json=valid_sensor_payload)
+        reloaded = Mock()
+        reloaded.predict_proba.return_value = np.array([[0.0, 0.9, 0.1, 0.0, 0.0, 0.0, 0.0, 0.0]])
+        app.state.model = reloaded
+        
+        data = client.post("/predict", json=valid_sensor_payload).json()
+        
+        assert data["prediction_label"] != "Normal"
+        reloaded.predict_proba.assert_called_once()
+    
+    def test_metrics_report_cache_counters(self, client, valid_sensor_payload):
+        """Test /metrics/inference includes the prediction cache counters."""
+        client.post("/predict", json=valid_sensor_payload)
+        client.post("/predict", json=valid_sensor_payload)
+        
+        stats = client.get("/metrics/inference").json()["prediction_cache"]
+        
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+
+class TestBackgroundLoading:
+    """Test suite for lazy imports and background artifact loading."""
+    
+    def test_import_does_not_load_heavy_modules(self):
+        """Test importing the API leaves LightGBM, pandas, sklearn, shap and joblib unloaded."""
+        script = (
+            "import sys\n"
+            "import backend.main\n"
+            "print(sorted(m for m in ('lightgbm', 'pandas', 'sklearn', 'shap', 'joblib') if m in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).parent.parent.parent,
+            env=os.environ,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        
+        assert result.stdout.strip() == "[]"
+    
+    def test_predictions_wait_for_artifacts(self, monkeypatch, artifacts_dir, valid_sensor_payload):
+        """Test requests sent right after startup wait for the artifacts instead of failing."""
+        monkeypatch.setattr("backend.main.ARTIFACTS_DIR", str(artifacts_dir))
+        with TestClient(app) as client:
+            assert client.get("/").status_code == 200
+            response = client.post("/predict", json=valid_sensor_payload)
+        
+        assert response.status_code == 200
+        assert len(response.json()["shap_values"]) == 18
+    
+    def test_predictions_without_explanations_do_not_wait_for_explainer(self, monkeypatch, artifacts_dir, valid_sensor_payload):
+        """Test explain=false is served while the explainer is still loading."""
+        monkeypatch.setattr("backend.main.ARTIFACTS_DIR", str(artifacts_dir))
+        release = threading.Event()
+        
+        def slow_explainer(model, artifacts_dir):
+            release.wait(30)
+            return load_serving_explainer(model, artifacts_dir)
+        
+        monkeypatch.setattr("backend.main.load_serving_explainer", slow_explainer)
+        with TestClient(app) as client:
+            try:
+                early = client.post("/predict", params={"explain": "false"}, json=valid_sensor_payload)
+                explainer_loaded = app.state.shap_explainer is not None
+            finally:
+                release.set()
+            explained = client.post("/predict", json=valid_sensor_payload)
+        
+        assert early.status_code == 200
+        assert early.json()["shap_values"] is None
+        assert not explainer_loaded
+        assert explained.status_code == 200
+        assert len(explained.json()["shap_values"]) == 18
+
+
+class TestPredictCsvEndpoint:
+    """Test suite for POST /predict/csv."""
+    
+    @pytest.fixture(autouse=True)
+    def serving(self, artifacts_dir):
+        """Serve a trained artifact set, which scores any batch size."""
+        saved = {name: getattr(app.state, name, None) for name in ("model", "preprocessor", "shap_explainer")}
+        artifacts, _ = load_artifact_set(str(artifacts_dir))
+        for name, value in artifacts.items():
+            setattr(app.state, name, value)
+        yield
+        for name, value in saved.items():
+            setattr(app.state, name, value)
+    
+    @pytest.fixture
+    def upload(self, valid_sensor_payload):
+        """A CSV log of three readings with Timestamp and Fault_Label."""
+        header = ["Timestamp", *valid_sensor_payload, "Fault_Label"]
+        rows = [[f"2024-01-01 00:00:0{second}", *valid_sensor_payload.values(), "0"] for second in range(3)]
+        return "\n".join(",".join(map(str, row)) for row in [header, *rows]) + "\n"
+    
+    def test_ndjson_results(self, client, upload, valid_sensor_payload):
+        """Test every row gets the prediction /predict gives, with its Timestamp and Fault_Label."""
+        expected = client.post("/predict", json=valid_sensor_payload).json()
+        
+        response = client.post("/predict/csv", content=upload, headers={"Content-Type": "text/csv"})
+        results = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [result["Timestamp"] for result in results] == [f"2024-01-01 00:00:0{second}" for second in range(3)]
+        for result in results:
+            assert result["Fault_Label"] == "0"
+            assert result["prediction_label"] == expected["prediction_label"]
+            assert result["probabilities"] == pytest.approx(expected["probabilities"])
+            assert result["shap_values"] is None
+    
+    def test_csv_results_with_explanations(self, client, upload):
+        """Test format=csv answers a header and one line per row, with SHAP columns when explain=true."""
+        response = client.post("/predict/csv", params={"format": "csv", "explain": "true"}, content=upload)
+        lines = response.text.splitlines()
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert len(lines) == 4
+        assert lines[0].split(",")[:3] == ["Timestamp", "Fault_Label", "prediction_label"]
+        assert "shap_Shaft_RPM" in lines[0]
+    
+    def test_streamed_results(self, client, upload):
+        """Test stream=true answers the same results as the default spooled response."""
+        spooled = client.post("/predict/csv", params={"format": "csv"}, content=upload)
+        
+        response = client.post("/predict/csv", params={"format": "csv", "stream": "true"}, content=upload)
+        
+        assert response.status_code == 200
+        assert response.text == spooled.text
+    
+    def test_streamed_failure_ends_with_error_record(self, client, upload, monkeypatch):
+        """Test with stream=true, a bad row after the first chunk ends the results with an error record."""
+        monkeypatch.setenv("AIMS_BULK_CHUNK_ROWS", "2")
+        
+        response = client.post("/predict/csv", params={"stream": "true"}, content=upload + "2024-01-01 00:00:03,fast\n")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert response.status_code == 200
+        assert [line["Timestamp"] for line in lines[:2]] == ["2024-01-01 00:00:00", "2024-01-01 00:00:01"]
+        assert lines[-1]["error"]["status_code"] == 422
+        assert "Could not parse lines 4-5" in lines[-1]["error"]["detail"]
+    
+    @pytest.mark.parametrize("params,content", [
+        ({"format": "xml"}, "Shaft_RPM\n1.0\n"),
+        ({}, "Shaft_RPM,Engine_Load\n1.0,2.0\n"),
+        ({}, ""),
+    ])
+    def test_rejects_bad_uploads(self, client, params, content):
+        """Test unknown formats, missing sensor columns and empty uploads return 422."""
+        response = client.post("/predict/csv", params=params, content=content)
+        
+        assert response.status_code == 422
+    
+    def test_rejects_unparsable_rows(self, client, upload):
+        """Test a non-numeric sensor value returns 422 naming its lines, not partial results."""
+        response = client.post("/predict/csv", content=upload + "2024-01-01 00:00:03,fast\n")
+        
+        assert response.status_code == 422
+        assert "Could not parse lines" in response.json()["detail"]
+    
+    def test_without_artifacts(self, client, upload):
+        """Test the upload is refused with 500 when the model is not loaded."""
+        app.state.model = None
+        
+        response = client.post("/predict/csv", content=upload)
+        
+        assert response.status_code == 500
+
+
+class TestEngineStream:
+    """Test suite for the /ws/engines/{engine_id} WebSocket stream."""
+    
+    @pytest.fixture(autouse=True)
+    def serving(self, artifacts_dir):
+        """Serve a trained artifact set, which scores any batch size."""
+        saved = {name: getattr(app.state, name, None) for name in ("model", "preprocessor", "shap_explainer")}
+        artifacts, _ = load_artifact_set(str(artifacts_dir))
+        for name, value in artifacts.items():
+            setattr(app.state, name, value)
+        yield
+        for name, value in saved.items():
+            setattr(app.state, name, value)
+    
+    def test_streams_predictions(self, client, valid_sensor_payload):
+        """Test every streamed reading gets the prediction /predict gives, in order, with its Timestamp."""
+        expected = client.post("/predict", json=valid_sensor_payload).json()
+        
+        with client.websocket_connect("/ws/engines/engine-1") as websocket:
+            for second in range(3):
+                websocket.send_json({**valid_sensor_payload, "Timestamp": second})
+            replies = [websocket.receive_json() for _ in range(3)]
+        
+        assert [reply["Timestamp"] for reply in replies] == [0, 1, 2]
+        for reply in replies:
+            assert reply["engine_id"] == "engine-1"
+            assert reply["prediction_label"] == expected["prediction_label"]
+            assert reply["probabilities"] == pytest.approx(expected["probabilities"])
+            assert reply["shap_values"] == pytest.approx(expected["shap_values"])
+    
+    def test_invalid_reading_keeps_stream_open(self, client, valid_sensor_payload):
+        """Test an invalid reading is answered with a 422 and later readings are still scored."""
+        with client.websocket_connect("/ws/engines/engine-1") as websocket:
+            websocket.send_json({**valid_sensor_payload, "Shaft_RPM": "fast"})
+            error = websocket.receive_json()
+            websocket.send_json([valid_sensor_payload, valid_sensor_payload])
+            replies = websocket.receive_json()
+        
+        assert error["status_code"] == 422
+        assert len(replies) == 2
+        assert all("prediction_label" in reply for reply in replies)
+    
+    def test_window_features(self, client, valid_sensor_payload):
+        """Test window=true adds the engine's rolling-window features to every reply."""
+        app.state.windows = None
+        readings = [{**valid_sensor_payload, "Oil_Temp": 75.0 + second} for second in range(3)]
+        
+        with client.websocket_connect("/ws/engines/engine-9?explain=false&window=true") as websocket:
+            for reading in readings:
+                websocket.send_json(reading)
+            replies = [websocket.receive_json() for _ in range(3)]
+        expected = rolling_features(np.array([[reading[name] for name in FEATURE_NAMES] for reading in readings]))
+        
+        for reply, features in zip(replies, expected.tolist()):
+            assert list(reply["window_features"].values()) == features
+        assert replies[2]["window_features"]["Oil_Temp_rolling_mean"] == pytest.approx(76.0)
+        assert client.get("/metrics/inference").json()["windows"]["engines"] == 1
+    
+    def test_history(self, client, valid_sensor_payload):
+        """Test streamed readings can be read back from /engines/{engine_id}/history by time range."""
+        app.state.history = None
+        with client.websocket_connect("/ws/engines/engine-5?explain=false") as websocket:
+            websocket.send_json([
+                {**valid_sensor_payload, "Oil_Temp": 70.0 + second, "Timestamp": f"2024-01-01 00:00:0{second}"}
+                for second in range(5)
+            ])
+            predictions = websocket.receive_json()
+        
+        history = client.get("/engines/engine-5/history", params={"start": "2024-01-01 00:00:01", "end": 1704067203})
+        latest = client.get("/engines/engine-5/history", params={"limit": 1})
+        
+        assert history.status_code == 200
+        body = history.json()
+        assert body["timestamps"] == [1704067201.0, 1704067202.0, 1704067203.0]
+        assert [reading[body["feature_names"].index("Oil_Temp")] for reading in body["readings"]] == [71.0, 72.0, 73.0]
+        assert body["prediction_labels"] == [prediction["prediction_label"] for prediction in predictions[1:4]]
+        assert body["probabilities"][0] == pytest.approx(list(predictions[1]["probabilities"].values()))
+        assert latest.json()["timestamps"] == [1704067204.0]
+        assert client.get("/metrics/inference").json()["history"]["engines"] == 1
+    
+    def test_history_errors(self, client):
+        """Test unknown engines get 404 and unparsable time ranges 422."""
+        app.state.history = None
+        
+        assert client.get("/engines/engine-unknown/history").status_code == 404
+        assert client.get("/engines/engine-unknown/history", params={"start": "yesterday"}).status_code == 422
+        assert client.get("/engines/engine-unknown/history", params={"limit": 0}).status_code == 422
+    
+    def test_deferred_explanations(self, client, valid_sensor_payload):
+        """Test explain=false streams predictions whose explanation can be fetched later."""
+        with client.websocket_connect("/ws/engines/engine-1?explain=false") as websocket:
+            websocket.send_json(valid_sensor_payload)
+            reply = websocket.receive_json()
+        
+        response = client.get(f"/explain/{reply['prediction_id']}")
+        
+        assert reply["shap_values"] is None
+        assert response.status_code == 200
+        assert len(response.json()["shap_values"]) == 18
+    
+    def test_binary_frames(self, client, valid_sensor_payload):
+        """Test format=npy streams .npy frames, answered with the predictions the JSON readings get."""
+        expected = client.post("/predict", json=valid_sensor_payload).json()
+        buffer = io.BytesIO()
+        np.save(buffer, np.array([[valid_sensor_payload[name] for name in FEATURE_NAMES]] * 2))
+        
+        with client.websocket_connect("/ws/engines/engine-1?format=npy") as websocket:
+            websocket.send_bytes(buffer.getvalue())
+            replies = websocket.receive_json()
+        
+        assert len(replies) == 2
+        for reply in replies:
+            assert reply["engine_id"] == "engine-1"
+            assert reply["prediction_label"] == expected["prediction_label"]
+            assert reply["probabilities"] == pytest.approx(expected["probabilities"])
+    
+    def test_closes_on_unknown_format(self, client):
+        """Test the connection is closed with 1008 when the format is unknown."""
+        with client.websocket_connect("/ws/engines/engine-1?format=xml") as websocket:
+            with pytest.raises(WebSocketDisconnect) as disconnect:
+                websocket.receive_json()
+        
+        assert disconnect.value.code == 1008
+    
+    def test_closes_without_artifacts(self, client):
+        """Test the connection is closed with 1011 when the model is not loaded."""
+        app.state.model = None
+        
+        with client.websocket_connect("/ws/engines/engine-1") as websocket:
+            with pytest.raises(WebSocketDisconnect) as disconnect:
+                websocket.receive_json()
+        
+        assert disconnect.value.code == 1011
+    
+    def test_stream_metrics(self, client, valid_sensor_payload):
+        """Test stream counts are reported in /metrics/inference."""
+        before = client.get("/metrics/inference").json()["streams"]["readings"]
+        with client.websocket_connect("/ws/engines/engine-1") as websocket:
+            websocket.send_json(valid_sensor_payload)
+            websocket.receive_json()
+        
+        streams = client.get("/metrics/inference").json()["streams"]
+        
+        assert streams["readings"] == before + 1
+        assert streams["open_connections"] == 0
+
+
+# Headers of a request authorised by the admin token TestHotReload configures
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+
+class TestHotReload:
+    """Test suite for POST /admin/reload."""
+    
+    @pytest.fixture
+    def reloaded_artifacts(self, mock_artifacts):
+        """Artifacts of a new model that predicts Fuel Injection Fault."""
+        model = Mock()
+        model.predict_proba.return_value = np.array([[0.0, 0.9, 0.1, 0.0, 0.0, 0.0, 0.0, 0.0]])
+        return {**mock_artifacts, "model": model}
+    
+    @pytest.fixture(autouse=True)
+    def serving(self, mock_artifacts, reloaded_artifacts, monkeypatch):
+        """Serve mock artifacts; reloading loads reloaded_artifacts as version v2."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        app.state.explanation_store = ExplanationStore()
+        app.state.artifacts_version = "v1"
+        monkeypatch.setenv("AIMS_ADMIN_TOKEN", ADMIN_HEADERS["X-Admin-Token"])
+        monkeypatch.setattr("backend.main.load_artifact_set", lambda artifacts_dir: (reloaded_artifacts, "v2"))
+        yield
+        app.state.artifacts_version = None
+        app.state.artifacts_fingerprint = None
+        app.state.reload_lock = None
+    
+    def test_reload_swaps_artifacts(self, client, valid_sensor_payload, reloaded_artifacts):
+        """Test a reload serves the new model and reports both versions."""
+        before = client.post("/predict", json=valid_sensor_payload).json()
+        
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+        after = client.post("/predict", json=valid_sensor_payload).json()
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "reloaded"
+        assert response.json()["version"] == "v2"
+        assert response.json()["previous_version"] == "v1"
+        assert app.state.model is reloaded_artifacts["model"]
+        assert before["prediction_label"] != after["prediction_label"]
+        assert client.get("/metrics/inference").json()["artifacts_version"] == "v2"
+    
+    def test_failed_reload_keeps_previous_artifacts(self, client, valid_sensor_payload, mock_artifacts, monkeypatch):
+        """Test artifacts that fail validation are not swapped in."""
+        def failing_load(artifacts_dir):
+            raise ValueError("Bundle file model.txt does not match its hash")
+        
+        monkeypatch.setattr("backend.main.load_artifact_set", failing_load)
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+        
+        assert response.status_code == 500
+        assert "still serving the previous artifacts" in response.json()["detail"]
+        assert app.state.model is mock_artifacts["model"]
+        assert client.post("/predict", json=valid_sensor_payload).status_code == 200
+    
+    def test_reload_forgets_stored_predictions(self, client, valid_sensor_payload):
+        """Test predictions made by the old model are not explained by the new one."""
+        prediction_id = client.post("/predict", params={"explain": "false"}, json=valid_sensor_payload).json()["prediction_id"]
+        
+        client.post("/admin/reload", headers=ADMIN_HEADERS)
+        
+        assert client.get(f"/explain/{prediction_id}").status_code == 404
+    
+    def test_in_flight_request_finishes_on_old_model(self, client, valid_sensor_payload, mock_artifacts):
+        """Test a request scoring during the reload is answered by the model it started with."""
+        started = threading.Event()
+        release = threading.Event()
+        old_probabilities = mock_artifacts["model"].predict_proba.return_value
+        
+        def slow_predict_proba(*args, **kwargs):
+            started.set()
+            release.wait(10)
+            return old_probabilities
+        
+        mock_artifacts["model"].predict_proba.side_effect = slow_predict_proba
+        in_flight = []
+        request = threading.Thread(target=lambda: in_flight.append(client.post("/predict", json=valid_sensor_payload)))
+        request.start()
+        try:
+            assert started.wait(10)
+            reload = client.post("/admin/reload", headers=ADMIN_HEADERS)
+        finally:
+            release.set()
+            request.join(10)
+        
+        assert reload.status_code == 200
+        assert in_flight[0].status_code == 200
+        assert in_flight[0].json()["prediction_label"] == "Normal"
+        assert client.post("/predict", json=valid_sensor_payload).json()["prediction_label"] != "Normal"
+    
+    def test_reload_warms_up_again(self, client, monkeypatch):
+        """Test a successful reload starts warm-up again, and a failed one does not."""
+        rewarm = Mock()
+        monkeypatch.setattr("backend.main.rewarm_in_background", rewarm)
+        
+        client.post("/admin/reload", headers=ADMIN_HEADERS)
+        monkeypatch.setattr("backend.main.load_artifact_set", Mock(side_effect=ValueError("corrupt")))
+        client.post("/admin/reload", headers=ADMIN_HEADERS)
+        
+        rewarm.assert_called_once_with()
+    
+    def test_concurrent_reload_is_rejected(self, client):
+        """Test a second reload is refused while one is in progress."""
+        lock = Mock()
+        lock.locked.return_value = True
+        app.state.reload_lock = lock
+        
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+        
+        assert response.status_code == 409
+    
+    def test_reload_is_disabled_without_admin_token(self, client, mock_artifacts, monkeypatch):
+        """Test the endpoint refuses every request when AIMS_ADMIN_TOKEN is not set."""
+        monkeypatch.delenv("AIMS_ADMIN_TOKEN")
+        
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+        
+        assert response.status_code == 403
+        assert app.state.model is mock_artifacts["model"]
+    
+    @pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+    def test_reload_requires_admin_token(self, client, mock_artifacts, headers):
+        """Test a request without the configured token does not reload."""
+        response = client.post("/admin/reload", headers=headers)
+        
+        assert response.status_code == 401
+        assert app.state.model is mock_artifacts["model"]
+
+
+class TestModelRegistryEndpoint:
+    """Test suite for model version routing and shadow scoring."""
+    
+    @pytest.fixture
+    def candidate_artifacts(self, mock_artifacts):
+        """Artifacts of a candidate model that predicts Fuel Injection Fault."""
+        model = Mock()
+        model.predict_proba.return_value = np.array([[0.0, 0.9, 0.1, 0.0, 0.0, 0.0, 0.0, 0.0]])
+        return {**mock_artifacts, "model": model}
+    
+    @pytest.fixture(autouse=True)
+    def registry(self, mock_artifacts, candidate_artifacts):
+        """Serve mock artifacts as the primary and the candidate as version v2."""
+        app.state.model = mock_artifacts["model"]
+        app.state.preprocessor = mock_artifacts["preprocessor"]
+        app.state.shap_explainer = mock_artifacts["shap_explainer"]
+        app.state.explanation_store = ExplanationStore()
+        registry = ModelRegistry({"v2": "/models/v2"})
+        registry.versions["v2"] = candidate_artifacts
+        app.state.registry = registry
+        yield registry
+        app.state.registry = None
+    
+    def test_header_selects_version(self, client, valid_sensor_payload, candidate_artifacts):
+        """Test X-Model-Version scores with that version and is echoed in the response."""
+        response = client.post("/predict", json=valid_sensor_payload, headers={"X-Model-Version": "v2"})
+        
+        assert response.status_code == 200
+        assert response.headers["X-Model-Version"] == "v2"
+        assert response.json()["prediction_label"] != "Normal"
+        candidate_artifacts["model"].predict_proba.assert_called_once()
+    
+    def test_requests_without_header_use_primary(self, client, valid_sensor_payload):
+        """Test requests are served by the primary when no routes are configured."""
+        response = client.post("/predict", json=valid_sensor_payload)
+        
+        assert response.headers["X-Model-Version"] == "primary"
+        assert response.json()["prediction_label"] == "Normal"
+    
+    def test_percentage_routes(self, client, valid_sensor_payload, registry):
+        """Test a 100% route sends requests without a header to the version."""
+        registry.routes = {"v2": 100.0}
+        
+        response = client.post("/predict", json=valid_sensor_payload)
+        
+        assert response.headers["X-Model-Version"] == "v2"
+    
+    def test_unknown_and_loading_versions(self, client, valid_sensor_payload, registry):
+        """Test unknown versions answer 404 and versions not loaded yet answer 503."""
+        unknown = client.post("/predict", json=valid_sensor_payload, headers={"X-Model-Version": "v9"})
+        del registry.versions["v2"]
+        loading = client.post("/predict", json=valid_sensor_payload, headers={"X-Model-Version": "v2"})
+        
+        assert unknown.status_code == 404
+        assert loading.status_code == 503
+        assert loading.headers["Retry-After"] == "1"
+    
+    def test_batch_uses_requested_version(self, client, valid_sensor_payload, candidate_artifacts):
+        """Test /predict/batch honours X-Model-Version."""
+        response = client.post(
+            "/predict/batch",
+            json={"readings": [valid_sensor_payload]},
+            headers={"X-Model-Version": "v2"}
+        )
+        
+        assert response.headers["X-Model-Version"] == "v2"
+        candidate_artifacts["model"].predict_proba.assert_called_once()
+    
+    def test_deferred_explanation_uses_version_that_predicted(self, client, valid_sensor_payload, candidate_artifacts):
+        """Test GET /explain uses the model version that made the prediction."""
+        prediction = client.post(
+            "/predict",
+            params={"explain": "false"},
+            json=valid_sensor_payload,
+            headers={"X-Model-Version": "v2"}
+        ).json()
+        
+        response = client.get(f"/explain/{prediction['prediction_id']}")
+        
+        assert response.status_code == 200
+        assert response.json()["prediction_label"] == prediction["prediction_label"]
+        candidate_artifacts["shap_explainer"].shap_values.assert_called_once()
+    
+    def test_shadow_scores_off_the_critical_path(self, client, valid_sensor_payload, registry, candidate_artifacts):
+        """Test the shadow version scores primary traffic and its comparison is reported."""
+        registry.shadow_version = "v2"
+        
+        response = client.post("/predict", json=valid_sensor_payload)
+        shadow = client.get("/metrics/inference").json()["registry"]["shadow"]
+        
+        assert response.json()["prediction_label"] == "Normal"
+        candidate_artifacts["model"].predict_proba.assert_called_once()
+        assert shadow["compared"] == 1
+        assert shadow["agreement"] == 0.0
+        assert shadow["max_probability_diff"] > 0.8
+        assert shadow["primary_ms"]["mean"] > 0
+        assert shadow["shadow_ms"]["mean"] > 0
+    
+    def test_failed_shadow_does_not_fail_request(self, client, valid_sensor_payload, registry, candidate_artifacts):
+        """Test errors of the shadow version are counted, never returned."""
+        registry.shadow_version = "v2"
+        candidate_artifacts["model"].predict_proba.side_effect = RuntimeError("broken candidate")
+        
+        response = client.post("/predict", json=valid_sensor_payload)
+        
+        assert response.status_code == 200
+        assert registry.stats()["shadow"]["failed"] == 1
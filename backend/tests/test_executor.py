@@ -0,0 +1,147 @@
+"""
+Unit tests for the bounded inference executor.
+Tests backpressure, metrics and that work runs off the event loop thread.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+
+
+@pytest.fixture
+def executor():
+    """Create a small thread executor: 1 worker and room for 1 queued job."""
+    executor = InferenceExecutor(max_workers=1, max_queue=1, kind="thread")
+    yield executor
+    executor.shutdown()
+
+
+class TestInferenceExecutor:
+    """Test suite for InferenceExecutor."""
+    
+    def test_runs_work_off_the_event_loop_thread(self, executor):
+        """Test submitted work executes on a pool thread, not the loop thread."""
+        async def scenario():
+            return threading.get_ident(), await executor.run(threading.get_ident)
+        
+        loop_thread, worker_thread = asyncio.run(scenario())
+        
+        assert loop_thread != worker_thread
+    
+    def test_passes_artifacts_as_keyword_arguments(self, executor):
+        """Test run_inference forwards artifacts to the predictor function in thread mode."""
+        def fake_predictor(reading, model, preprocessor, shap_explainer):
+            return reading, model, preprocessor, shap_explainer
+        
+        result = asyncio.run(executor.run_inference(
+            fake_predictor, "reading", model="m", preprocessor="p", shap_explainer="e"
+        ))
+        
+        assert result == ("reading", "m", "p", "e")
+    
+    def test_rejects_work_when_queue_is_full(self, executor):
+        """Test the third concurrent job is rejected immediately with 1 worker + 1 queue slot."""
+        release = threading.Event()
+        
+        async def scenario():
+            running = asyncio.ensure_future(executor.run(release.wait))
+            queued = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            
+            assert executor.in_flight == 2
+            assert executor.queue_depth == 1
+            
+            started = time.perf_counter()
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(release.wait)
+            rejection_time = time.perf_counter() - started
+            
+            release.set()
+            await asyncio.gather(running, queued)
+            return rejection_time
+        
+        rejection_time = asyncio.run(scenario())
+        
+        # Rejection must not wait for a worker
+        assert rejection_time < 0.05
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["in_flight"] == 0
+    
+    def test_stats_report_queue_wait_times(self, executor):
+        """Test wait times are recorded for jobs that had to queue."""
+        async def scenario():
+            await asyncio.gather(
+                executor.run(time.sleep, 0.05),
+                executor.run(time.sleep, 0.0)
+            )
+        
+        asyncio.run(scenario())
+        stats = executor.stats()
+        
+        assert stats["kind"] == "thread"
+        assert stats["max_workers"] == 1
+        assert stats["max_queue"] == 1
+        # The second job waited for the first one to release the single worker
+        assert stats["wait_ms"]["max"] >= 40.0
+        assert stats["wait_ms"]["p50"] <= stats["wait_ms"]["p99"] <= stats["wait_ms"]["max"]
+    
+    def test_errors_propagate_and_free_the_slot(self, executor):
+        """Test exceptions raised by the job reach the caller and do not leak capacity."""
+        def failing():
+            raise RuntimeError("boom")
+        
+        async def scenario():
+            with pytest.raises(RuntimeError, match="boom"):
+                await executor.run(failing)
+        
+        asyncio.run(scenario())
+        
+        assert executor.in_flight == 0
+    
+    def test_from_env(self, monkeypatch):
+        """Test executor configuration is read from environment variables."""
+        monkeypatch.setenv("AIMS_INFERENCE_WORKERS", "3")
+        monkeypatch.setenv("AIMS_INFERENCE_QUEUE_SIZE", "7")
+        monkeypatch.setenv("AIMS_INFERENCE_EXECUTOR", "thread")
+        
+        executor = InferenceExecutor.from_env()
+        try:
+            assert executor.max_workers == 3
+            assert executor.max_queue == 7
+            assert executor.kind == "thread"
+        finally:
+            executor.shutdown()
+    
+    def test_invalid_kind_rejected(self):
+        """Test an unknown executor kind raises ValueError."""
+        with pytest.raises(ValueError):
+            InferenceExecutor(kind="fiber")
+    
+    def test_cancelled_caller_keeps_slot_until_job_finishes(self, executor):
+        """Test cancelling a request does not free its slot while the job still runs, but frees a queued one."""
+        release = threading.Event()
+        
+        async def scenario():
+            running = asyncio.ensure_future(executor.run(release.wait))
+            queued = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            
+            running.cancel()
+            queued.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+            in_flight = executor.in_flight
+            
+            release.set()
+            while executor.in_flight:
+                await asyncio.sleep(0.01)
+            return in_flight
+        
+        # The queued job was cancelled before it started; the running one holds its slot
+        assert asyncio.run(scenario()) == 1
+        assert executor.stats()["completed"] == 1
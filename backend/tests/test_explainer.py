@@ -0,0 +1,128 @@
+"""
+Validation tests for the native LightGBM explainer.
+BoosterContribExplainer must reproduce shap_explainer.shap_values output.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.artifacts import load_artifacts, load_serving_artifacts
+from backend.services.explainer import BoosterContribExplainer, build_contrib_explainer
+from backend.services.folding import IdentityScaler
+from backend.services.predictor import FEATURE_NAMES, predict_fault_matrix
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+@pytest.fixture(scope="module")
+def exported_artifacts(artifacts_dir):
+    """An exported artifact set and scaled real readings from the dataset."""
+    preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+    model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+    shap_explainer = joblib.load(artifacts_dir / "shap_explainer.pkl")
+
+    dataset_path = PROJECT_ROOT / "data" / "marine_engine_fault_dataset.csv"
+    raw = pd.read_csv(dataset_path, usecols=FEATURE_NAMES, nrows=500)[FEATURE_NAMES]
+    X = pd.DataFrame(preprocessor.transform(raw), columns=FEATURE_NAMES)
+    return model, shap_explainer, X
+
+
+class TestBoosterContribExplainer:
+    """Test suite for BoosterContribExplainer."""
+
+    def test_matches_shap_explainer(self, exported_artifacts):
+        """Test SHAP values equal shap_explainer.shap_values on real readings."""
+        model, shap_explainer, X = exported_artifacts
+        explainer = build_contrib_explainer(model)
+
+        expected = np.asarray(shap_explainer.shap_values(X))
+        result = explainer.shap_values(X)
+
+        assert isinstance(explainer, BoosterContribExplainer)
+        assert result.shape == expected.shape == (len(X), 18, 8)
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-10)
+
+    def test_expected_value_matches_shap(self, exported_artifacts):
+        """Test the per-class bias equals the shap explainer's expected value."""
+        model, shap_explainer, _ = exported_artifacts
+        explainer = build_contrib_explainer(model)
+
+        np.testing.assert_allclose(explainer.expected_value, shap_explainer.expected_value, rtol=0, atol=1e-10)
+
+    def test_contributions_sum_to_raw_score(self, exported_artifacts):
+        """Test SHAP values plus bias add up to the model's raw scores (local accuracy)."""
+        model, _, X = exported_artifacts
+        explainer = build_contrib_explainer(model)
+
+        totals = explainer.contributions(X).sum(axis=2)
+
+        np.testing.assert_allclose(totals, model.booster_.predict(X.to_numpy(), raw_score=True), atol=1e-9)
+
+    def test_predictions_are_identical_through_predictor(self, exported_artifacts):
+        """Test predict_fault_matrix gives the same results with either explainer."""
+        model, shap_explainer, X = exported_artifacts
+        raw = X.to_numpy()[:50]
+
+        reference = predict_fault_matrix(raw, model, IdentityScaler(), shap_explainer)
+        native = predict_fault_matrix(raw, model, IdentityScaler(), build_contrib_explainer(model))
+
+        assert np.array_equal(native[0], reference[0])
+        np.testing.assert_allclose(native[2], reference[2], rtol=0, atol=1e-10)
+
+
+class TestNativeExplainerSelection:
+    """Test suite for selecting the explainer through AIMS_EXPLAINER."""
+
+    @pytest.mark.parametrize("fold", ["0", "1"])
+    def test_load_serving_artifacts_uses_native_explainer(self, monkeypatch, artifacts_dir, fold):
+        """Test AIMS_EXPLAINER=lightgbm swaps in the native explainer, folded or not."""
+        monkeypatch.setenv("AIMS_EXPLAINER", "lightgbm")
+        monkeypatch.setenv("AIMS_FOLD_SCALER", fold)
+        served = load_serving_artifacts(str(artifacts_dir))
+        monkeypatch.delenv("AIMS_EXPLAINER")
+        monkeypatch.delenv("AIMS_FOLD_SCALER")
+        original = load_artifacts(str(artifacts_dir))
+
+        assert isinstance(served["shap_explainer"], BoosterContribExplainer)
+
+        X = original["preprocessor"].mean_ + np.random.default_rng(4).normal(size=(20, 18)) * original["preprocessor"].scale_
+        served_result = predict_fault_matrix(X, **served)
+        original_result = predict_fault_matrix(X, **original)
+
+        assert np.array_equal(served_result[0], original_result[0])
+        np.testing.assert_allclose(served_result[2], original_result[2], rtol=0, atol=1e-10)
+
+    def test_shap_is_not_imported(self, artifacts_dir):
+        """Test serving with the native explainer never imports shap."""
+        script = (
+            "import sys\n"
+            "from backend.main import app\n"
+            "from backend.services.artifacts import load_serving_artifacts\n"
+            "load_serving_artifacts(sys.argv[1])\n"
+            "print('shap' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script, str(artifacts_dir)],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, "AIMS_EXPLAINER": "lightgbm"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip().splitlines()[-1] == "False"
+
+    def test_unknown_explainer_is_rejected(self, monkeypatch):
+        """Test an unknown explainer name fails loudly at load time."""
+        monkeypatch.setenv("AIMS_EXPLAINER", "lime")
+
+        with pytest.raises(ValueError, match="Unknown explainer"):
+            load_serving_artifacts()
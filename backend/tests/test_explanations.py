@@ -0,0 +1,110 @@
+"""
+Unit tests for the deferred explanation store.
+Uses a fake clock to exercise TTL expiry deterministically.
+"""
+
+import numpy as np
+import pytest
+
+from backend.models.request import MAX_BATCH_SIZE
+from backend.services.explanations import ExplanationStore
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestExplanationStore:
+    """Test suite for ExplanationStore."""
+    
+    def test_put_and_get(self):
+        """Test a stored prediction is returned with its features and class."""
+        store = ExplanationStore()
+        features = np.arange(18, dtype=np.float64)
+        
+        prediction_id = store.put(features, 3)
+        stored_features, prediction = store.get(prediction_id)
+        
+        assert prediction == 3
+        assert np.array_equal(stored_features, features)
+        assert store.get("unknown") is None
+    
+    def test_features_are_copied(self):
+        """Test later changes to the caller's array do not alter the stored input."""
+        store = ExplanationStore()
+        features = np.zeros(18)
+        
+        prediction_id = store.put(features, 0)
+        features[0] = 42.0
+        
+        assert store.get(prediction_id)[0][0] == 0.0
+    
+    def test_entries_expire_after_ttl(self):
+        """Test predictions cannot be explained once their TTL has passed."""
+        clock = FakeClock()
+        store = ExplanationStore(ttl_s=60, clock=clock)
+        
+        old_id = store.put(np.zeros(18), 0)
+        clock.now = 30.0
+        new_id = store.put(np.zeros(18), 1)
+        clock.now = 61.0
+        
+        assert store.get(old_id) is None
+        assert store.get(new_id) is not None
+        assert len(store) == 1
+        assert store.stats()["expired"] == 1
+    
+    def test_oldest_entries_are_evicted_at_capacity(self):
+        """Test the store never holds more than max_entries predictions."""
+        store = ExplanationStore(max_entries=3)
+        
+        ids = [store.put(np.full(18, i), i) for i in range(5)]
+        
+        assert len(store) == 3
+        assert store.get(ids[0]) is None
+        assert store.get(ids[1]) is None
+        assert store.get(ids[4])[1] == 4
+        assert store.stats()["evicted"] == 2
+    
+    def test_default_size_holds_more_than_a_batch(self):
+        """Test the default store outlasts a maximum-size batch, so one batch cannot evict everyone else's predictions."""
+        store = ExplanationStore()
+        earlier = store.put(np.zeros(18), 0)
+        
+        for _ in range(MAX_BATCH_SIZE):
+            store.put(np.ones(18), 1)
+        
+        assert store.max_entries > MAX_BATCH_SIZE
+        assert store.get(earlier) is not None
+    
+    def test_clear(self):
+        """Test clear drops every entry."""
+        store = ExplanationStore()
+        prediction_id = store.put(np.zeros(18), 0)
+        
+        store.clear()
+        
+        assert store.get(prediction_id) is None
+    
+    def test_from_env(self, monkeypatch):
+        """Test size and TTL are read from the environment."""
+        monkeypatch.setenv("AIMS_EXPLANATION_STORE_SIZE", "50")
+        monkeypatch.setenv("AIMS_EXPLANATION_TTL_S", "5")
+        
+        store = ExplanationStore.from_env()
+        
+        assert store.max_entries == 50
+        assert store.ttl_s == 5.0
+    
+    def test_invalid_configuration(self):
+        """Test non-positive sizes and TTLs are rejected."""
+        with pytest.raises(ValueError):
+            ExplanationStore(max_entries=0)
+        with pytest.raises(ValueError):
+            ExplanationStore(ttl_s=0)
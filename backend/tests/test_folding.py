@@ -0,0 +1,155 @@
+"""
+Equivalence tests for folding the StandardScaler into LightGBM split thresholds.
+The folded model must be bit-identical to preprocessor + model on raw readings.
+"""
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from backend.services.artifacts import load_artifacts, load_serving_artifacts
+from backend.services.folding import (
+    BoosterClassifier,
+    IdentityScaler,
+    fold_scaler_into_model,
+    raw_thresholds,
+)
+from backend.services.predictor import FEATURE_NAMES, predict_fault_matrix
+
+
+@pytest.fixture(scope="module")
+def trained_pair():
+    """Train a small scaler + multiclass LightGBM pair on synthetic sensor-like data."""
+    rng = np.random.default_rng(7)
+    means = rng.uniform(0.05, 1000.0, size=18)
+    scales = means * rng.uniform(0.01, 0.2, size=18)
+    X = means + rng.normal(size=(3000, 18)) * scales
+    y = (np.digitize(X[:, 0], np.quantile(X[:, 0], [0.25, 0.5, 0.75])) + (X[:, 5] > means[5])) % 4
+    
+    scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURE_NAMES))
+    model = lgb.LGBMClassifier(n_estimators=30, num_leaves=15, verbosity=-1, random_state=0)
+    model.fit(scaler.transform(pd.DataFrame(X, columns=FEATURE_NAMES)), y)
+    return model, scaler, X
+
+
+def scaled_probabilities(model, scaler, X):
+    """Reference path: scale with the preprocessor, then predict."""
+    return model.predict_proba(scaler.transform(pd.DataFrame(X, columns=FEATURE_NAMES)))
+
+
+class TestRawThresholds:
+    """Test suite for raw_thresholds."""
+    
+    def test_threshold_is_largest_raw_value_going_left(self):
+        """Test the folded threshold is exactly the boundary of the scaled split."""
+        rng = np.random.default_rng(0)
+        thresholds = rng.normal(size=1000)
+        mean = rng.uniform(-500, 500, size=1000)
+        scale = rng.uniform(1e-3, 100, size=1000)
+        
+        raw = raw_thresholds(thresholds, mean, scale)
+        
+        assert np.all((raw - mean) / scale <= thresholds)
+        assert np.all((np.nextafter(raw, np.inf) - mean) / scale > thresholds)
+
+
+class TestFoldScalerIntoModel:
+    """Test suite for fold_scaler_into_model."""
+    
+    def test_folded_predictions_are_bit_identical(self, trained_pair):
+        """Test folded probabilities equal preprocessor + model exactly on raw readings."""
+        model, scaler, X = trained_pair
+        folded = fold_scaler_into_model(model, scaler)
+        
+        assert isinstance(folded, BoosterClassifier)
+        assert np.array_equal(folded.predict_proba(X), scaled_probabilities(model, scaler, X))
+        assert np.array_equal(folded.predict(X), model.predict(scaler.transform(pd.DataFrame(X, columns=FEATURE_NAMES))))
+    
+    def test_bit_identical_at_split_boundaries(self, trained_pair):
+        """Test readings sitting exactly on (and one ulp around) every folded threshold."""
+        model, scaler, X = trained_pair
+        folded = fold_scaler_into_model(model, scaler)
+        
+        dump = folded.booster_.dump_model()
+        boundaries = []
+        
+        def collect(node):
+            if "split_feature" in node:
+                boundaries.append((node["split_feature"], node["threshold"]))
+                collect(node["left_child"])
+                collect(node["right_child"])
+        
+        for tree in dump["tree_info"]:
+            collect(tree["tree_structure"])
+        
+        rows = []
+        for i, (feature, threshold) in enumerate(boundaries):
+            for value in (np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)):
+                row = X[i % len(X)].copy()
+                row[feature] = value
+                rows.append(row)
+        rows = np.array(rows)
+        
+        assert np.array_equal(folded.predict_proba(rows), scaled_probabilities(model, scaler, rows))
+    
+    def test_predict_fault_matrix_with_folded_artifacts(self, trained_pair):
+        """Test the predictor gives identical probabilities with folded model + IdentityScaler."""
+        model, scaler, X = trained_pair
+        folded = fold_scaler_into_model(model, scaler)
+        
+        explainer = Mock()
+        explainer.shap_values.side_effect = lambda data: np.zeros((len(data), 18, 4))
+        
+        _, reference, _ = predict_fault_matrix(X[:200], model, scaler, explainer)
+        _, result, _ = predict_fault_matrix(X[:200], folded, IdentityScaler(), explainer)
+        
+        assert np.array_equal(result, reference)
+    
+    def test_zero_as_missing_is_rejected(self, trained_pair):
+        """Test models treating zero as missing cannot be folded (zero moves under scaling)."""
+        _, scaler, X = trained_pair
+        y = (X[:, 0] > np.median(X[:, 0])).astype(int)
+        model = lgb.LGBMClassifier(n_estimators=5, zero_as_missing=True, verbosity=-1)
+        model.fit(scaler.transform(pd.DataFrame(X, columns=FEATURE_NAMES)), y)
+        
+        with pytest.raises(ValueError, match="zero as missing"):
+            fold_scaler_into_model(model, scaler)
+    
+    def test_folded_trained_model_is_bit_identical(self, artifacts_dir):
+        """Test folding an exported artifact set on real readings from the dataset."""
+        preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+        model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+        
+        dataset_path = Path(__file__).parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+        X = pd.read_csv(dataset_path, usecols=FEATURE_NAMES)[FEATURE_NAMES].to_numpy()
+        
+        folded = fold_scaler_into_model(model, preprocessor)
+        reference = model.predict_proba(pd.DataFrame(
+            preprocessor.transform(pd.DataFrame(X, columns=FEATURE_NAMES)), columns=FEATURE_NAMES
+        ))
+        
+        assert np.array_equal(folded.predict_proba(X), reference)
+    
+    def test_load_serving_artifacts_folds_when_enabled(self, monkeypatch, artifacts_dir):
+        """Test AIMS_FOLD_SCALER=1 swaps in the folded model and an IdentityScaler."""
+        monkeypatch.setenv("AIMS_FOLD_SCALER", "1")
+        folded = load_serving_artifacts(str(artifacts_dir))
+        monkeypatch.delenv("AIMS_FOLD_SCALER")
+        original = load_artifacts(str(artifacts_dir))
+        
+        assert isinstance(folded["model"], BoosterClassifier)
+        assert isinstance(folded["preprocessor"], IdentityScaler)
+        
+        X = original["preprocessor"].mean_ + np.random.default_rng(1).normal(size=(20, 18)) * original["preprocessor"].scale_
+        folded_result = predict_fault_matrix(X, **folded)
+        original_result = predict_fault_matrix(X, **original)
+        
+        assert np.array_equal(folded_result[0], original_result[0])
+        assert np.array_equal(folded_result[1], original_result[1])
+        np.testing.assert_allclose(folded_result[2], original_result[2], atol=1e-12)
@@ -0,0 +1,129 @@
+"""
+Tests for the per-engine history store.
+Each engine must keep its most recent readings in order, time ranges must
+select the right readings, and memory must stay within the preallocated
+ring buffers.
+"""
+
+import numpy as np
+import pytest
+
+from backend.services.history import EngineHistory, timestamp_seconds
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+
+def scored(first: int, num_readings: int):
+    """Readings with timestamps first, first + 1, ... whose Shaft_RPM and predicted class follow the timestamp."""
+    timestamps = np.arange(first, first + num_readings, dtype=np.float64)
+    readings = np.zeros((num_readings, len(FEATURE_NAMES)))
+    readings[:, 0] = timestamps
+    probabilities = np.zeros((num_readings, len(FAULT_LABELS)))
+    probabilities[np.arange(num_readings), timestamps.astype(int) % len(FAULT_LABELS)] = 1.0
+    return timestamps, readings, probabilities
+
+
+class TestEngineHistory:
+    """Test suite for EngineHistory."""
+
+    def test_keeps_most_recent_readings_in_order(self):
+        """Test an engine keeps its last `retention` readings, oldest first, across wrap-arounds."""
+        history = EngineHistory(retention=10, max_engines=4)
+        for first in range(0, 25, 3):
+            history.record("engine-1", *scored(first, 3))
+
+        result = history.query("engine-1")
+
+        assert result["timestamps"].tolist() == list(range(17, 27))
+        assert result["readings"][:, 0].tolist() == list(range(17, 27))
+        assert result["predictions"].tolist() == [second % 8 for second in range(17, 27)]
+        assert result["readings"].dtype == np.float32
+
+    def test_frames_longer_than_retention(self):
+        """Test recording more readings than fit at once keeps the last of them."""
+        history = EngineHistory(retention=5, max_engines=1)
+        history.record("engine-1", *scored(0, 12))
+
+        assert history.query("engine-1")["timestamps"].tolist() == [7, 8, 9, 10, 11]
+
+    def test_time_range_and_limit(self):
+        """Test start and end are inclusive and limit keeps the most recent readings in the range."""
+        history = EngineHistory(retention=100, max_engines=1)
+        history.record("engine-1", *scored(0, 50))
+
+        assert history.query("engine-1", start=10, end=14)["timestamps"].tolist() == [10, 11, 12, 13, 14]
+        assert history.query("engine-1", start=10, end=14, limit=2)["timestamps"].tolist() == [13, 14]
+        assert history.query("engine-1", start=60)["timestamps"].tolist() == []
+        assert history.query("engine-2") is None
+
+    def test_engines_are_separate(self):
+        """Test readings of one engine never show up in another's history."""
+        history = EngineHistory(retention=10, max_engines=4)
+        history.record("engine-1", *scored(0, 4))
+        history.record("engine-2", *scored(100, 2))
+
+        assert history.query("engine-1")["timestamps"].tolist() == [0, 1, 2, 3]
+        assert history.query("engine-2")["timestamps"].tolist() == [100, 101]
+
+    def test_evicts_least_recent_engine(self):
+        """Test a new engine takes the slot of the engine that reported least recently, starting empty."""
+        history = EngineHistory(retention=10, max_engines=2)
+        history.record("a", *scored(0, 5))
+        history.record("b", *scored(0, 5))
+        history.record("a", *scored(5, 1))
+        history.record("c", *scored(50, 2))
+
+        stats = history.stats()
+
+        assert history.query("b") is None
+        assert history.query("c")["timestamps"].tolist() == [50, 51]
+        assert history.query("a")["timestamps"].tolist() == [0, 1, 2, 3, 4, 5]
+        assert stats["engines"] == 2
+        assert stats["evicted"] == 1
+        assert stats["recorded"] == 13
+
+    def test_memory_per_engine(self):
+        """Test an engine's history takes 113 bytes per retained reading."""
+        history = EngineHistory(retention=600, max_engines=3)
+        history.record("engine-1", *scored(0, 1))
+
+        assert history.bytes_per_engine == 600 * (8 + 18 * 4 + 8 * 4 + 1)
+        assert history.stats()["bytes"] == history.bytes_per_engine
+
+    def test_slots_are_allocated_on_first_record(self):
+        """Test no memory is held before an engine records, and evicted slots are reused."""
+        history = EngineHistory(retention=600, max_engines=2)
+
+        assert history.stats()["bytes"] == 0
+
+        for engine in range(5):
+            history.record(f"engine-{engine}", *scored(0, 1))
+
+        assert history.stats()["bytes"] == 2 * history.bytes_per_engine
+
+    def test_from_env(self, monkeypatch):
+        """Test retention and the engine bound are read from the environment, and invalid values refused."""
+        monkeypatch.setenv("AIMS_HISTORY_RETENTION", "3600")
+        monkeypatch.setenv("AIMS_HISTORY_MAX_ENGINES", "20")
+
+        history = EngineHistory.from_env()
+
+        assert (history.retention, history.max_engines) == (3600, 20)
+        with pytest.raises(ValueError):
+            EngineHistory(retention=0)
+
+
+class TestTimestampSeconds:
+    """Test suite for timestamp_seconds."""
+
+    @pytest.mark.parametrize("value, expected", [
+        (1704067205, 1704067205.0),
+        (1704067205.5, 1704067205.5),
+        ("2024-01-01 00:00:05", 1704067205.0),
+        ("2024-01-01T01:00:05+01:00", 1704067205.0),
+        ("yesterday", -1.0),
+        (None, -1.0),
+        (True, -1.0),
+    ])
+    def test_formats(self, value, expected):
+        """Test epoch seconds and ISO 8601 strings are read, naive ones as UTC, and anything else falls back."""
+        assert timestamp_seconds(value, default=-1.0) == expected
@@ -0,0 +1,148 @@
+"""
+Tests for binary request payloads.
+Every format must yield the same float64 matrix in FEATURE_NAMES order, and
+malformed payloads and non-finite readings must be rejected as a whole.
+"""
+
+import io
+import sys
+
+import numpy as np
+import pytest
+
+from backend.services.ingest import (
+    PayloadError,
+    UnsupportedFormatError,
+    binary_format,
+    parse_readings,
+    validate_readings,
+)
+from backend.services.predictor import FEATURE_NAMES
+
+
+@pytest.fixture
+def readings():
+    """Three readings whose values are exactly representable in float32."""
+    return np.arange(3 * len(FEATURE_NAMES), dtype=np.float64).reshape(3, -1) / 4
+
+
+def npy_bytes(array: np.ndarray) -> bytes:
+    """An array saved with numpy.save."""
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+class TestBinaryFormat:
+    """Test suite for binary_format."""
+
+    @pytest.mark.parametrize("content_type,expected", [
+        ("application/octet-stream", "raw"),
+        ("application/x-npy", "npy"),
+        ("Application/Vnd.Apache.Arrow.Stream; charset=binary", "arrow"),
+        ("application/vnd.apache.arrow.file", "arrow"),
+        ("application/json", None),
+        (None, None),
+    ])
+    def test_media_types(self, content_type, expected):
+        """Test Content-Type headers map to their payload format, and anything else to JSON."""
+        assert binary_format(content_type) == expected
+
+
+class TestParseReadings:
+    """Test suite for parse_readings."""
+
+    def test_raw(self, readings):
+        """Test raw little-endian float32 rows are parsed in FEATURE_NAMES order."""
+        result = parse_readings(readings.astype("<f4").tobytes(), "raw")
+
+        assert result.dtype == np.float64
+        assert result.flags.c_contiguous
+        np.testing.assert_array_equal(result, readings)
+
+    def test_raw_rejects_partial_readings(self, readings):
+        """Test a raw payload that is not a whole number of readings is rejected."""
+        with pytest.raises(PayloadError, match="72-byte readings"):
+            parse_readings(readings.astype("<f4").tobytes()[:-4], "raw")
+
+    @pytest.mark.parametrize("dtype", ["<f4", ">f8", "<i4"])
+    def test_npy(self, readings, dtype):
+        """Test .npy arrays of any float or integer dtype and byte order are parsed."""
+        expected = readings.astype(dtype)
+
+        np.testing.assert_array_equal(parse_readings(npy_bytes(expected), "npy"), expected)
+
+    def test_npy_single_reading(self, readings):
+        """Test a 1-D .npy array is one reading."""
+        assert parse_readings(npy_bytes(readings[0]), "npy").shape == (1, len(FEATURE_NAMES))
+
+    @pytest.mark.parametrize("payload,match", [
+        (b"not an array", "not a valid .npy"),
+        (npy_bytes(np.array([["a"] * len(FEATURE_NAMES)])), "float or integer"),
+        (npy_bytes(np.zeros((2, 3))), "shape"),
+        (npy_bytes(np.zeros((0, len(FEATURE_NAMES)))), "no readings"),
+    ])
+    def test_npy_rejects_bad_arrays(self, payload, match):
+        """Test malformed .npy payloads, wrong dtypes and wrong shapes are rejected."""
+        with pytest.raises(PayloadError, match=match):
+            parse_readings(payload, "npy")
+
+    def test_npy_does_not_unpickle(self):
+        """Test object arrays, which would need unpickling, are rejected."""
+        buffer = io.BytesIO()
+        np.save(buffer, np.array([object()] * len(FEATURE_NAMES)), allow_pickle=True)
+
+        with pytest.raises(PayloadError):
+            parse_readings(buffer.getvalue(), "npy")
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_arrow(self, readings, stream):
+        """Test Arrow IPC streams and files are parsed by column name, ignoring other columns."""
+        pa = pytest.importorskip("pyarrow")
+        columns = {"Timestamp": ["t0", "t1", "t2"]}
+        # Columns in reverse order, to check they are taken by name
+        for index in reversed(range(len(FEATURE_NAMES))):
+            columns[FEATURE_NAMES[index]] = readings[:, index]
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        writer = pa.ipc.new_stream(sink, table.schema) if stream else pa.ipc.new_file(sink, table.schema)
+        writer.write_table(table)
+        writer.close()
+
+        np.testing.assert_array_equal(parse_readings(sink.getvalue().to_pybytes(), "arrow"), readings)
+
+    def test_arrow_without_pyarrow(self, monkeypatch):
+        """Test Arrow payloads are reported as unsupported when pyarrow is not installed."""
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+        with pytest.raises(UnsupportedFormatError):
+            parse_readings(b"ARROW1", "arrow")
+
+    def test_unknown_format(self, readings):
+        """Test an unknown format is rejected."""
+        with pytest.raises(PayloadError, match="Unknown payload format"):
+            parse_readings(b"", "parquet")
+
+
+class TestValidateReadings:
+    """Test suite for validate_readings."""
+
+    def test_names_non_finite_values(self, readings):
+        """Test non-finite values are named by reading and sensor, at most five of them."""
+        readings[1, FEATURE_NAMES.index("Oil_Temp")] = np.nan
+        readings[2, :] = np.inf
+
+        with pytest.raises(PayloadError) as error:
+            validate_readings(readings)
+
+        message = str(error.value)
+        assert message.startswith("Sensor values must be finite: reading 1 Oil_Temp, reading 2 Shaft_RPM")
+        assert message.endswith(f"and {len(FEATURE_NAMES) + 1 - 5} more")
+
+    def test_accepts_finite_readings(self, readings):
+        """Test finite readings are returned as a C-contiguous float64 matrix."""
+        result = validate_readings(np.asfortranarray(readings.astype(np.float32)))
+
+        assert result.dtype == np.float64
+        assert result.flags.c_contiguous
+        np.testing.assert_array_equal(result, readings)
@@ -5,7 +5,7 @@ Tests validation logic for SensorInput and serialization for PredictionResponse.
 
 import pytest
 from pydantic import ValidationError
-from backend.models.request import SensorInput
+from backend.models.request import BatchSensorInput, MAX_BATCH_SIZE, SensorInput
 from backend.models.response import PredictionResponse
 
 
@@ -93,6 +93,16 @@ class TestSensorInput:
         errors = exc_info.value.errors()
         assert len(errors) > 0
         assert any('Shaft_RPM' in str(error['loc']) for error in errors)
+    
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+    def test_non_finite_values_rejected(self, value):
+        """Test SensorInput rejects NaN and infinite readings, as binary payloads do."""
+        data = {**SensorInput.model_config["json_schema_extra"]["example"], "Oil_Temp": value}
+        
+        with pytest.raises(ValidationError) as exc_info:
+            SensorInput(**data)
+        
+        assert exc_info.value.errors()[0]['loc'] == ('Oil_Temp',)
 
 
 class TestPredictionResponse:
@@ -148,3 +158,56 @@ class TestPredictionResponse:
         assert response_dict["prediction_label"] == "Normal"
         assert "probabilities" in response_dict
         assert "shap_values" in response_dict
+
+
+class TestBatchSensorInput:
+    """Test suite for BatchSensorInput validation."""
+    
+    @pytest.fixture
+    def reading(self):
+        """Create a single valid reading."""
+        return {
+            "Shaft_RPM": 950.0,
+            "Engine_Load": 70.0,
+            "Fuel_Flow": 120.0,
+            "Air_Pressure": 2.5,
+            "Ambient_Temp": 25.0,
+            "Oil_Temp": 75.0,
+            "Oil_Pressure": 3.5,
+            "Vibration_X": 0.05,
+            "Vibration_Y": 0.05,
+            "Vibration_Z": 0.05,
+            "Cylinder1_Pressure": 145.0,
+            "Cylinder1_Exhaust_Temp": 420.0,
+            "Cylinder2_Pressure": 145.0,
+            "Cylinder2_Exhaust_Temp": 420.0,
+            "Cylinder3_Pressure": 145.0,
+            "Cylinder3_Exhaust_Temp": 420.0,
+            "Cylinder4_Pressure": 145.0,
+            "Cylinder4_Exhaust_Temp": 420.0
+        }
+    
+    def test_valid_batch(self, reading):
+        """Test BatchSensorInput accepts a list of valid readings."""
+        batch = BatchSensorInput(readings=[reading, reading])
+        
+        assert len(batch.readings) == 2
+        assert all(isinstance(r, SensorInput) for r in batch.readings)
+    
+    def test_empty_batch_rejected(self):
+        """Test BatchSensorInput rejects an empty list (should raise ValidationError)."""
+        with pytest.raises(ValidationError):
+            BatchSensorInput(readings=[])
+    
+    def test_oversized_batch_rejected(self, reading):
+        """Test BatchSensorInput rejects more than MAX_BATCH_SIZE readings."""
+        with pytest.raises(ValidationError):
+            BatchSensorInput(readings=[reading] * (MAX_BATCH_SIZE + 1))
+    
+    def test_invalid_reading_reports_index(self, reading):
+        """Test a bad reading inside the batch is reported with its position."""
+        with pytest.raises(ValidationError) as exc_info:
+            BatchSensorInput(readings=[reading, {**reading, "Oil_Temp": "hot"}])
+        
+        errors = exc_info.value.errors()
+        assert errors[0]["loc"][:2] == ("readings", 1)
@@ -0,0 +1,176 @@
+"""
+Unit tests for the quantized-input prediction cache.
+Uses a fake clock to exercise TTL expiry deterministically.
+"""
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from backend.models.response import PredictionResponse
+from backend.services.folding import IdentityScaler
+from backend.services.prediction_cache import PredictionCache, feature_scale
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_response(label: str = "Normal", explained: bool = True) -> PredictionResponse:
+    """Build a prediction response with or without SHAP values."""
+    return PredictionResponse(
+        prediction_label=label,
+        probabilities={label: 1.0},
+        shap_values={f"feature_{i}": 0.1 * i for i in range(18)} if explained else None
+    )
+
+
+@pytest.fixture
+def artifacts():
+    """Stand-in artifacts; the cache only compares them by identity."""
+    preprocessor = StandardScaler().fit(np.random.default_rng(0).normal(size=(100, 18)) * 10.0)
+    return {"model": object(), "preprocessor": preprocessor, "shap_explainer": object()}
+
+
+class TestFeatureScale:
+    """Test suite for feature_scale."""
+
+    def test_uses_standard_scaler_scale(self, artifacts):
+        """Test the scaler's scale_ sets the per-feature step."""
+        preprocessor = artifacts["preprocessor"]
+
+        assert np.array_equal(feature_scale(preprocessor, 18), preprocessor.scale_)
+
+    def test_uses_folded_scale(self):
+        """Test folded artifacts keep the original scale on the IdentityScaler."""
+        scale = np.linspace(1.0, 2.0, 18)
+
+        assert np.array_equal(feature_scale(IdentityScaler(feature_scale=scale), 18), scale)
+
+    def test_falls_back_to_raw_units(self):
+        """Test preprocessors without a scale quantize in raw units."""
+        assert np.array_equal(feature_scale(IdentityScaler(), 18), np.ones(18))
+
+
+class TestPredictionCache:
+    """Test suite for PredictionCache."""
+
+    def test_nearby_readings_share_an_entry(self, artifacts):
+        """Test readings within the resolution hit the same entry and distant ones miss."""
+        cache = PredictionCache(resolution=0.01)
+        scale = artifacts["preprocessor"].scale_
+        reading = 5000 * 0.01 * scale
+        cache.put(reading, make_response(), **artifacts)
+
+        near = cache.get(reading + 0.001 * scale, True, **artifacts)
+        far = cache.get(reading + 0.05 * scale, True, **artifacts)
+
+        assert near is not None and near.prediction_label == "Normal"
+        assert far is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_returns_copies(self, artifacts):
+        """Test changes to a returned response do not alter the cached one."""
+        cache = PredictionCache()
+        reading = np.zeros(18)
+        cache.put(reading, make_response(), **artifacts)
+
+        cache.get(reading, True, **artifacts).prediction_id = "abc"
+
+        assert cache.get(reading, True, **artifacts).prediction_id is None
+
+    def test_explain_semantics(self, artifacts):
+        """Test unexplained entries only answer explain=false lookups."""
+        cache = PredictionCache()
+        reading = np.zeros(18)
+        cache.put(reading, make_response(explained=False), **artifacts)
+
+        assert cache.get(reading, True, **artifacts) is None
+        assert cache.get(reading, False, **artifacts) is not None
+
+        cache.put(reading, make_response(explained=True), **artifacts)
+        cache.put(reading, make_response(explained=False), **artifacts)
+
+        assert cache.get(reading, True, **artifacts).shap_values is not None
+        assert cache.get(reading, False, **artifacts).shap_values is None
+
+    def test_non_finite_readings_are_not_cached(self, artifacts):
+        """Test NaN readings are always scored."""
+        cache = PredictionCache()
+        reading = np.full(18, np.nan)
+        cache.put(reading, make_response(), **artifacts)
+
+        assert len(cache) == 0
+        assert cache.get(reading, True, **artifacts) is None
+
+    def test_entries_expire_after_ttl(self, artifacts):
+        """Test entries are dropped once their TTL has passed."""
+        clock = FakeClock()
+        cache = PredictionCache(ttl_s=60, clock=clock)
+        reading = np.zeros(18)
+        cache.put(reading, make_response(), **artifacts)
+
+        clock.now = 59.0
+        assert cache.get(reading, True, **artifacts) is not None
+        clock.now = 60.0
+        assert cache.get(reading, True, **artifacts) is None
+        assert len(cache) == 0
+
+    def test_memory_cap_evicts_least_recently_used(self, artifacts):
+        """Test the least recently used entry is evicted once max_bytes is exceeded."""
+        cache = PredictionCache(resolution=1.0, max_bytes=10000)
+        readings = [np.full(18, i * 100.0) for i in range(10)]
+        for reading in readings[:3]:
+            cache.put(reading, make_response(), **artifacts)
+        entry_bytes = cache.stats()["bytes"] // 3
+        cache.max_bytes = 3 * entry_bytes
+
+        cache.get(readings[0], True, **artifacts)
+        cache.put(readings[3], make_response(), **artifacts)
+
+        assert cache.get(readings[1], True, **artifacts) is None
+        assert cache.get(readings[0], True, **artifacts) is not None
+        assert cache.stats()["bytes"] <= cache.max_bytes
+        assert cache.stats()["evictions"] == 1
+
+    def test_cleared_when_artifacts_change(self, artifacts):
+        """Test a reload of the model invalidates every cached prediction."""
+        cache = PredictionCache()
+        reading = np.zeros(18)
+        cache.put(reading, make_response(), **artifacts)
+        reloaded = {**artifacts, "model": object()}
+
+        assert cache.get(reading, True, **reloaded) is None
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 1
+
+    def test_invalid_configuration(self):
+        """Test nonsensical limits are rejected."""
+        with pytest.raises(ValueError):
+            PredictionCache(resolution=0)
+        with pytest.raises(ValueError):
+            PredictionCache(max_bytes=0)
+        with pytest.raises(ValueError):
+            PredictionCache(ttl_s=0)
+
+    def test_from_env(self, monkeypatch):
+        """Test the cache is disabled by default and configured from the environment."""
+        monkeypatch.delenv("AIMS_PREDICTION_CACHE", raising=False)
+        assert PredictionCache.from_env() is None
+
+        monkeypatch.setenv("AIMS_PREDICTION_CACHE", "1")
+        monkeypatch.setenv("AIMS_PREDICTION_CACHE_RESOLUTION", "0.05")
+        monkeypatch.setenv("AIMS_PREDICTION_CACHE_MAX_MB", "2")
+        monkeypatch.setenv("AIMS_PREDICTION_CACHE_TTL_S", "30")
+        cache = PredictionCache.from_env()
+
+        assert cache.resolution == 0.05
+        assert cache.max_bytes == 2 * 1024 * 1024
+        assert cache.ttl_s == 30.0
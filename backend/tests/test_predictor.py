@@ -9,7 +9,16 @@ from unittest.mock import Mock
 
 from backend.models.request import SensorInput
 from backend.models.response import PredictionResponse
-from backend.services.predictor import predict_fault, FAULT_LABELS, FEATURE_NAMES
+from backend.services.folding import IdentityScaler
+from backend.services.predictor import (
+    explain_reading,
+    predict_fault,
+    predict_fault_batch,
+    predict_fault_row,
+    sensor_inputs_to_matrix,
+    FAULT_LABELS,
+    FEATURE_NAMES
+)
 
 
 class TestFaultLabels:
@@ -320,3 +329,290 @@ class TestPredictFault:
         
         # Verify SHAP values are finite numbers
         assert all(np.isfinite(v) for v in result.shap_values.values())
+
+
+class TestPredictFaultBatch:
+    """Test suite for the vectorized predict_fault_batch function."""
+    
+    @pytest.fixture
+    def sensor_inputs(self):
+        """Create three distinct SensorInputs."""
+        base = dict(zip(FEATURE_NAMES, [
+            950.0, 70.0, 120.0, 2.5, 25.0, 75.0, 3.5,
+            0.05, 0.05, 0.05, 145.0, 420.0, 145.0, 420.0,
+            145.0, 420.0, 145.0, 420.0
+        ]))
+        return [
+            SensorInput(**{**base, "Shaft_RPM": rpm})
+            for rpm in (900.0, 950.0, 1000.0)
+        ]
+    
+    @pytest.fixture
+    def mock_artifacts(self):
+        """Create mock artifacts that score three rows with different classes."""
+        preprocessor = Mock()
+        preprocessor.transform.side_effect = lambda df: df.to_numpy()
+        
+        model = Mock()
+        probabilities = np.full((3, 8), 0.02)
+        probabilities[0, 0] = 0.86
+        probabilities[1, 3] = 0.86
+        probabilities[2, 7] = 0.86
+        model.predict_proba.return_value = probabilities
+        
+        explainer = Mock()
+        shap_3d = np.zeros((3, 18, 8))
+        shap_3d[0, 0, 0] = 0.1
+        shap_3d[1, 0, 3] = 0.3
+        shap_3d[2, 0, 7] = 0.7
+        explainer.shap_values.return_value = shap_3d
+        
+        return model, preprocessor, explainer
+    
+    def test_sensor_inputs_to_matrix(self, sensor_inputs):
+        """Test readings are stacked into an (N, 18) matrix in FEATURE_NAMES order."""
+        matrix = sensor_inputs_to_matrix(sensor_inputs)
+        
+        assert matrix.shape == (3, 18)
+        assert matrix.dtype == np.float64
+        assert list(matrix[:, 0]) == [900.0, 950.0, 1000.0]
+        assert matrix[0, FEATURE_NAMES.index("Oil_Temp")] == 75.0
+    
+    def test_batch_scores_all_rows_in_one_pass(self, sensor_inputs, mock_artifacts):
+        """Test every artifact is called exactly once for the whole batch."""
+        model, preprocessor, explainer = mock_artifacts
+        
+        results = predict_fault_batch(sensor_inputs, model, preprocessor, explainer)
+        
+        assert len(results) == 3
+        assert all(isinstance(result, PredictionResponse) for result in results)
+        preprocessor.transform.assert_called_once()
+        model.predict_proba.assert_called_once()
+        explainer.shap_values.assert_called_once()
+        
+        # All rows are passed in a single (3, 18) matrix
+        assert model.predict_proba.call_args[0][0].shape == (3, 18)
+    
+    def test_batch_rows_keep_their_own_class(self, sensor_inputs, mock_artifacts):
+        """Test each row gets its own label, probabilities and predicted-class SHAP values."""
+        model, preprocessor, explainer = mock_artifacts
+        
+        results = predict_fault_batch(sensor_inputs, model, preprocessor, explainer)
+        
+        assert [r.prediction_label for r in results] == [
+            "Normal", "Turbocharger Fault", "Vibration Anomaly"
+        ]
+        assert results[1].probabilities["Turbocharger Fault"] == 0.86
+        assert [r.shap_values["Shaft_RPM"] for r in results] == [0.1, 0.3, 0.7]
+    
+    def test_batch_without_explanations_skips_shap(self, sensor_inputs, mock_artifacts):
+        """Test explain=False never calls the explainer and leaves shap_values empty."""
+        model, preprocessor, explainer = mock_artifacts
+        
+        results = predict_fault_batch(sensor_inputs, model, preprocessor, explainer, explain=False)
+        
+        explainer.shap_values.assert_not_called()
+        assert [r.prediction_label for r in results] == [
+            "Normal", "Turbocharger Fault", "Vibration Anomaly"
+        ]
+        assert all(r.shap_values is None for r in results)
+    
+    def test_batch_with_list_format_shap(self, sensor_inputs, mock_artifacts):
+        """Test predicted-class SHAP values are selected from list-format explainer output."""
+        model, preprocessor, _ = mock_artifacts
+        explainer = Mock()
+        per_class = [np.zeros((3, 18)) for _ in range(8)]
+        per_class[3][1, 0] = 0.3
+        explainer.shap_values.return_value = per_class
+        
+        results = predict_fault_batch(sensor_inputs, model, preprocessor, explainer)
+        
+        assert results[1].shap_values["Shaft_RPM"] == 0.3
+        assert results[0].shap_values["Shaft_RPM"] == 0.0
+    
+    def test_batch_matches_single_prediction_with_real_data(self):
+        """Test batch scoring agrees with predict_fault row by row on real artifacts."""
+        import joblib
+        from pathlib import Path
+        
+        artifacts_dir = Path(__file__).parent.parent / "artifacts"
+        preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+        model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+        shap_explainer = joblib.load(artifacts_dir / "shap_explainer.pkl")
+        
+        rng = np.random.default_rng(0)
+        means = preprocessor.mean_
+        scales = preprocessor.scale_
+        sensor_inputs = [
+            SensorInput(**dict(zip(FEATURE_NAMES, row)))
+            for row in (means + rng.normal(size=(5, 18)) * scales).tolist()
+        ]
+        
+        batch_results = predict_fault_batch(sensor_inputs, model, preprocessor, shap_explainer)
+        
+        for sensor_input, batch_result in zip(sensor_inputs, batch_results):
+            single_result = predict_fault(sensor_input, model, preprocessor, shap_explainer)
+            assert batch_result.prediction_label == single_result.prediction_label
+            for label, prob in single_result.probabilities.items():
+                assert batch_result.probabilities[label] == pytest.approx(prob, abs=1e-12)
+            for feature, value in single_result.shap_values.items():
+                assert batch_result.shap_values[feature] == pytest.approx(value, abs=1e-9)
+
+
+class TestPredictFaultRow:
+    """Test suite for the single-row fast path predict_fault_row."""
+    
+    @pytest.fixture
+    def sensor_input(self):
+        """Create a sample SensorInput."""
+        return SensorInput(**dict(zip(FEATURE_NAMES, [
+            950.0, 70.0, 120.0, 2.5, 25.0, 75.0, 3.5,
+            0.05, 0.05, 0.05, 145.0, 420.0, 145.0, 420.0,
+            145.0, 420.0, 145.0, 420.0
+        ])))
+    
+    @pytest.fixture
+    def mock_artifacts(self):
+        """Create mock artifacts predicting Turbocharger Fault."""
+        preprocessor = Mock()
+        preprocessor.transform.side_effect = lambda X: X * 2.0
+        
+        model = Mock()
+        probabilities = np.full((1, 8), 0.02)
+        probabilities[0, 3] = 0.86
+        model.predict_proba.return_value = probabilities
+        
+        explainer = Mock()
+        shap_3d = np.zeros((1, 18, 8))
+        shap_3d[0, 0, 3] = 0.3
+        explainer.shap_values.return_value = shap_3d
+        
+        return model, preprocessor, explainer
+    
+    def test_single_probability_call_without_pandas(self, sensor_input, mock_artifacts):
+        """Test the label comes from one predict_proba call on a plain (1, 18) array."""
+        model, preprocessor, explainer = mock_artifacts
+        
+        result = predict_fault_row(sensor_input, model, preprocessor, explainer)
+        
+        assert result.prediction_label == "Turbocharger Fault"
+        assert result.probabilities["Turbocharger Fault"] == 0.86
+        assert result.shap_values["Shaft_RPM"] == 0.3
+        model.predict.assert_not_called()
+        model.predict_proba.assert_called_once()
+        
+        features = model.predict_proba.call_args[0][0]
+        assert type(features) is np.ndarray
+        assert features.shape == (1, 18)
+        assert features[0, 0] == 1900.0
+    
+    def test_without_explanation_skips_shap(self, sensor_input, mock_artifacts):
+        """Test explain=False returns label and probabilities without calling the explainer."""
+        model, preprocessor, explainer = mock_artifacts
+        
+        result = predict_fault_row(sensor_input, model, preprocessor, explainer, explain=False)
+        
+        explainer.shap_values.assert_not_called()
+        assert result.prediction_label == "Turbocharger Fault"
+        assert result.shap_values is None
+    
+    def test_explain_reading_selects_predicted_class(self, sensor_input, mock_artifacts):
+        """Test a deferred explanation scales the stored reading and picks the stored class."""
+        model, preprocessor, explainer = mock_artifacts
+        features = np.array([getattr(sensor_input, name) for name in FEATURE_NAMES])
+        
+        shap_values = explain_reading(features, 3, model, preprocessor, explainer)
+        
+        assert shap_values["Shaft_RPM"] == 0.3
+        assert list(shap_values) == FEATURE_NAMES
+        assert explainer.shap_values.call_args[0][0][0, 0] == 1900.0
+        model.predict_proba.assert_not_called()
+    
+    def test_identity_scaler_is_skipped(self, sensor_input, mock_artifacts):
+        """Test folded artifacts score the raw buffered reading directly."""
+        model, _, explainer = mock_artifacts
+        
+        predict_fault_row(sensor_input, model, IdentityScaler(), explainer)
+        
+        features = model.predict_proba.call_args[0][0]
+        assert features[0, FEATURE_NAMES.index("Oil_Temp")] == 75.0
+    
+    def test_buffers_are_reused_within_a_thread(self, sensor_input, mock_artifacts):
+        """Test consecutive calls fill the same preallocated buffer."""
+        model, _, explainer = mock_artifacts
+        
+        predict_fault_row(sensor_input, model, IdentityScaler(), explainer)
+        first = model.predict_proba.call_args[0][0]
+        predict_fault_row(sensor_input, model, IdentityScaler(), explainer)
+        second = model.predict_proba.call_args[0][0]
+        
+        assert first is second
+    
+    def test_buffers_are_per_thread(self, sensor_input, mock_artifacts):
+        """Test concurrent worker threads never share a buffer."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        
+        model, _, explainer = mock_artifacts
+        both_scoring = threading.Barrier(2, timeout=5)
+        seen = []
+        
+        def predict_proba(X):
+            # Both threads hold their buffer at the same time
+            seen.append(X)
+            both_scoring.wait()
+            return np.full((1, 8), 0.125)
+        
+        model.predict_proba.side_effect = predict_proba
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: predict_fault_row(sensor_input, model, IdentityScaler(), explainer), range(2)))
+        
+        assert seen[0] is not seen[1]
+    
+    @pytest.mark.parametrize("scaled", [False, True])
+    def test_model_fitted_with_feature_names(self, scaled):
+        """Test a model fitted on named columns scores buffered rows without warnings, like predict_fault."""
+        import warnings
+        
+        import lightgbm as lgb
+        import pandas as pd
+        from sklearn.preprocessing import StandardScaler
+        
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(400, 18)), columns=FEATURE_NAMES)
+        model = lgb.LGBMClassifier(n_estimators=10, verbosity=-1).fit(X, np.arange(400) % 8)
+        preprocessor = StandardScaler().fit(X) if scaled else IdentityScaler()
+        explainer = Mock()
+        explainer.shap_values.return_value = np.zeros((1, 18, 8))
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for row in X.to_numpy()[:3].tolist():
+                sensor_input = SensorInput(**dict(zip(FEATURE_NAMES, row)))
+                result = predict_fault_row(sensor_input, model, preprocessor, explainer)
+                assert result == predict_fault(sensor_input, model, preprocessor, explainer)
+    
+    def test_matches_predict_fault_with_real_data(self):
+        """Test the fast path returns exactly what predict_fault returns on real artifacts."""
+        import joblib
+        from pathlib import Path
+        
+        artifacts_dir = Path(__file__).parent.parent / "artifacts"
+        preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+        model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+        shap_explainer = joblib.load(artifacts_dir / "shap_explainer.pkl")
+        
+        rng = np.random.default_rng(1)
+        rows = preprocessor.mean_ + rng.normal(size=(10, 18)) * preprocessor.scale_
+        
+        for row in rows.tolist():
+            sensor_input = SensorInput(**dict(zip(FEATURE_NAMES, row)))
+            expected = predict_fault(sensor_input, model, preprocessor, shap_explainer)
+            assert predict_fault_row(sensor_input, model, preprocessor, shap_explainer) == expected
+            
+            # A deferred explanation gives the same SHAP values
+            deferred = predict_fault_row(sensor_input, model, preprocessor, shap_explainer, explain=False)
+            prediction = list(FAULT_LABELS.values()).index(deferred.prediction_label)
+            assert explain_reading(
+                np.array(row), prediction, model, preprocessor, shap_explainer
+            ) == expected.shap_values
@@ -0,0 +1,145 @@
+"""
+Tests for the model version registry.
+Routing must respect headers and percentages, and shadow statistics must
+reflect how the shadow version compares with the primary.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from backend.services.registry import (
+    PRIMARY_VERSION,
+    ModelRegistry,
+    UnknownVersionError,
+    VersionNotLoadedError,
+    model_versions_from_env,
+    timed_inference,
+)
+
+
+def probabilities(label_index: int) -> dict[str, float]:
+    """Probabilities putting 0.9 on one of eight labels."""
+    return {f"label{i}": 0.9 if i == label_index else 0.1 / 7 for i in range(8)}
+
+
+@pytest.fixture
+def registry():
+    """Registry with two loaded versions, 30% of traffic routed to v2."""
+    registry = ModelRegistry(
+        {"v2": "/models/v2", "v3": "/models/v3"},
+        routes={"v2": 30},
+        shadow_version="v3",
+        rng=random.Random(0)
+    )
+    registry.versions = {"v2": {}, "v3": {}}
+    return registry
+
+
+class TestModelRegistry:
+    """Test suite for ModelRegistry."""
+
+    def test_parses_versions_from_env(self, monkeypatch):
+        """Test AIMS_MODEL_VERSIONS, AIMS_MODEL_ROUTES and AIMS_SHADOW_VERSION configure the registry."""
+        monkeypatch.setenv("AIMS_MODEL_VERSIONS", "pruned=/models/pruned, distilled=/models/distilled")
+        monkeypatch.setenv("AIMS_MODEL_ROUTES", "pruned=5")
+        monkeypatch.setenv("AIMS_SHADOW_VERSION", "distilled")
+
+        registry = ModelRegistry.from_env()
+
+        assert model_versions_from_env() == {"pruned": "/models/pruned", "distilled": "/models/distilled"}
+        assert registry.routes == {"pruned": 5.0}
+        assert registry.shadow_version == "distilled"
+
+    def test_disabled_without_versions(self, monkeypatch):
+        """Test from_env returns None when no extra versions are configured."""
+        monkeypatch.delenv("AIMS_MODEL_VERSIONS", raising=False)
+        assert ModelRegistry.from_env() is None
+
+    @pytest.mark.parametrize("kwargs", [
+        {"version_dirs": {"primary": "/models/a"}},
+        {"version_dirs": {"v2": "/models/v2"}, "routes": {"v3": 10}},
+        {"version_dirs": {"v2": "/models/v2"}, "routes": {"v2": 120}},
+        {"version_dirs": {"v2": "/models/v2"}, "shadow_version": "v3"},
+        {"version_dirs": {"v2": "/models/v2"}, "shadow_percent": 150},
+    ])
+    def test_rejects_invalid_configuration(self, kwargs):
+        """Test reserved names, unknown versions and out-of-range percentages are refused."""
+        with pytest.raises(ValueError):
+            ModelRegistry(**kwargs)
+
+    def test_malformed_env_is_rejected(self, monkeypatch):
+        """Test entries without name=value are refused."""
+        monkeypatch.setenv("AIMS_MODEL_VERSIONS", "/models/v2")
+        with pytest.raises(ValueError, match="name=value"):
+            ModelRegistry.from_env()
+
+    def test_routes_by_percentage(self, registry):
+        """Test about the configured share of requests without a header go to the version."""
+        routed = [registry.route() for _ in range(2000)]
+
+        assert set(routed) == {PRIMARY_VERSION, "v2"}
+        assert routed.count("v2") / len(routed) == pytest.approx(0.3, abs=0.05)
+        assert registry.stats()["routed"]["v2"] == routed.count("v2")
+
+    def test_header_overrides_routes(self, registry):
+        """Test a requested version is always used, and unknown versions are refused."""
+        assert {registry.route("v3") for _ in range(20)} == {"v3"}
+        assert registry.route(PRIMARY_VERSION) == PRIMARY_VERSION
+        with pytest.raises(UnknownVersionError):
+            registry.route("v9")
+
+    def test_versions_not_loaded_are_not_routed_to(self, registry):
+        """Test traffic of a version still loading goes to the primary, and requests for it are refused."""
+        del registry.versions["v2"]
+
+        assert {registry.route() for _ in range(200)} == {PRIMARY_VERSION}
+        with pytest.raises(VersionNotLoadedError):
+            registry.route("v2")
+
+    def test_shadow_statistics(self, registry):
+        """Test agreement, probability gap and latency percentiles of shadow comparisons."""
+        registry.record_shadow(probabilities(0), probabilities(0), 0.002, 0.001)
+        registry.record_shadow(probabilities(0), probabilities(3), None, 0.003)
+        registry.record_shadow_skipped()
+
+        shadow = registry.stats()["shadow"]
+
+        assert shadow["compared"] == 2
+        assert shadow["agreement"] == 0.5
+        assert shadow["max_probability_diff"] == pytest.approx(0.9 - 0.1 / 7)
+        assert shadow["skipped"] == 1
+        assert shadow["primary_ms"]["mean"] == pytest.approx(2.0)
+        assert shadow["shadow_ms"]["mean"] == pytest.approx(2.0)
+
+    def test_only_primary_traffic_is_shadowed(self, registry):
+        """Test readings served by other versions are never shadowed."""
+        assert registry.should_shadow(PRIMARY_VERSION)
+        assert not registry.should_shadow("v2")
+
+    def test_explanations_are_found_per_version(self, registry):
+        """Test stored predictions are looked up in the store of the version that made them."""
+        prediction_id = registry.explanation_stores["v2"].put(np.zeros(18), 4)
+
+        version, features, prediction = registry.find_explanation(prediction_id)
+
+        assert version == "v2"
+        assert prediction == 4
+        assert registry.find_explanation("unknown") is None
+
+    def test_load_skips_versions_that_fail(self, tmp_path, artifacts_dir):
+        """Test a version that cannot be loaded is reported but does not stop the others."""
+        registry = ModelRegistry({"good": str(artifacts_dir), "missing": str(tmp_path)})
+
+        registry.load()
+
+        assert set(registry.versions) == {"good"}
+        assert registry.stats()["versions"]["missing"] == {"loaded": False, "version": None}
+
+    def test_timed_inference(self):
+        """Test timed_inference returns the elapsed time and the result."""
+        elapsed, result = timed_inference(sum, [1, 2, 3])
+
+        assert result == 6
+        assert elapsed >= 0
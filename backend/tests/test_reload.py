@@ -0,0 +1,131 @@
+"""
+Tests for hot model reload.
+New artifacts must be checked before they serve, and the watcher must only
+reload complete, changed artifact sets.
+"""
+
+import asyncio
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from backend.services.artifacts import BUNDLE_DIRNAME, MODEL_FILENAME
+from backend.services.bundle import MANIFEST_FILENAME
+from backend.services.reload import (
+    WARMUP_READINGS,
+    ArtifactValidationError,
+    ArtifactWatcher,
+    artifacts_fingerprint,
+    artifacts_version,
+    load_artifact_set,
+    synthetic_readings,
+    warm_up,
+)
+
+
+@pytest.fixture(scope="module")
+def artifact_set(artifacts_dir):
+    """Trained artifacts, loaded the way a reload loads them."""
+    artifacts, _ = load_artifact_set(str(artifacts_dir))
+    return artifacts
+
+
+def run_watcher(watcher: ArtifactWatcher, scenario) -> None:
+    """Run the watcher while the scenario coroutine changes the directory."""
+    async def main():
+        task = asyncio.create_task(watcher.run())
+        try:
+            await scenario()
+        finally:
+            task.cancel()
+    asyncio.run(main())
+
+
+class TestWarmUp:
+    """Test suite for loading and warming up a new artifact set."""
+
+    def test_load_artifact_set_is_complete(self, artifact_set):
+        """Test a reload loads the model, preprocessor and explainer."""
+        assert set(artifact_set) == {"model", "preprocessor", "shap_explainer"}
+        assert artifact_set["shap_explainer"] is not None
+
+    def test_synthetic_readings_are_deterministic(self):
+        """Test every artifact set is warmed with the same finite readings."""
+        readings = synthetic_readings()
+
+        assert readings.shape == (WARMUP_READINGS, 18)
+        assert np.all(np.isfinite(readings))
+        assert np.array_equal(readings, synthetic_readings())
+
+    def test_rejects_non_finite_probabilities(self, artifact_set):
+        """Test a model returning NaN probabilities fails the warm-up."""
+        broken = Mock()
+        broken.predict_proba.return_value = np.full((WARMUP_READINGS, 8), np.nan)
+
+        with pytest.raises(ArtifactValidationError, match="finite distribution"):
+            warm_up(broken, artifact_set["preprocessor"], artifact_set["shap_explainer"])
+
+    def test_rejects_wrong_number_of_classes(self, artifact_set):
+        """Test a model trained on other fault types fails the warm-up."""
+        broken = Mock()
+        broken.predict_proba.return_value = np.full((WARMUP_READINGS, 7), 1 / 7)
+
+        with pytest.raises(ArtifactValidationError, match="shape"):
+            warm_up(broken, artifact_set["preprocessor"], artifact_set["shap_explainer"])
+
+
+class TestArtifactWatcher:
+    """Test suite for the artifacts directory watcher."""
+
+    def test_fingerprint_and_version(self, tmp_path):
+        """Test the fingerprint follows the files and the version comes from the bundle manifest."""
+        empty = artifacts_fingerprint(str(tmp_path))
+        (tmp_path / BUNDLE_DIRNAME).mkdir()
+        (tmp_path / BUNDLE_DIRNAME / MANIFEST_FILENAME).write_text(json.dumps({"version": "v2"}))
+
+        assert artifacts_fingerprint(str(tmp_path)) != empty
+        assert artifacts_version(str(tmp_path)) == "v2"
+        assert artifacts_version(str(tmp_path / "missing")) is None
+
+    def test_reloads_once_after_change(self, tmp_path):
+        """Test one change to the artifacts triggers exactly one reload."""
+        reload = Mock()
+
+        async def reload_fn():
+            reload()
+
+        async def scenario():
+            await asyncio.sleep(0.05)
+            (tmp_path / MODEL_FILENAME).write_bytes(b"model")
+            await asyncio.sleep(0.2)
+
+        run_watcher(ArtifactWatcher(reload_fn, str(tmp_path), poll_s=0.01), scenario)
+
+        reload.assert_called_once()
+
+    def test_failed_reload_is_not_retried(self, tmp_path):
+        """Test artifacts that fail to reload are not loaded again until they change."""
+        reload = Mock(side_effect=ValueError("bad bundle"))
+
+        async def reload_fn():
+            reload()
+
+        async def scenario():
+            await asyncio.sleep(0.05)
+            (tmp_path / MODEL_FILENAME).write_bytes(b"model")
+            await asyncio.sleep(0.2)
+
+        run_watcher(ArtifactWatcher(reload_fn, str(tmp_path), poll_s=0.01), scenario)
+
+        reload.assert_called_once()
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test from_env returns None unless AIMS_RELOAD_WATCH is set."""
+        monkeypatch.delenv("AIMS_RELOAD_WATCH", raising=False)
+        assert ArtifactWatcher.from_env(Mock()) is None
+
+        monkeypatch.setenv("AIMS_RELOAD_WATCH", "1")
+        monkeypatch.setenv("AIMS_RELOAD_POLL_S", "0.5")
+        assert ArtifactWatcher.from_env(Mock()).poll_s == 0.5
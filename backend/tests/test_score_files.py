@@ -0,0 +1,132 @@
+"""
+Tests for the offline batch-scoring CLI.
+Results must match the vectorized predictor row for row and keep input order,
+whether chunks are scored in this process or on a process pool.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import score_files
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES, predict_fault_matrix
+from backend.services.reload import load_artifact_set
+
+
+DATASET_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+
+@pytest.fixture(scope="module")
+def readings(tmp_path_factory) -> Path:
+    """The first 300 rows of the dataset, with their columns shuffled."""
+    frame = pd.read_csv(DATASET_PATH, nrows=300)
+    path = tmp_path_factory.mktemp("inputs") / "fleet.csv"
+    frame[frame.columns[::-1]].to_csv(path, index=False)
+    return path
+
+
+def expected_results(path: Path, artifacts_dir: Path, explain: bool):
+    """Predictions of the vectorized predictor for the readings in path."""
+    artifacts, _ = load_artifact_set(str(artifacts_dir))
+    features = pd.read_csv(path)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    return predict_fault_matrix(features, explain=explain, **artifacts)
+
+
+class TestScoreFiles:
+    """Test suite for the score_files CLI."""
+
+    def test_csv_matches_predictor(self, readings, artifacts_dir, tmp_path):
+        """Test every row carries the prediction of the vectorized predictor, in input order."""
+        code = score_files.main([str(readings), "--output-dir", str(tmp_path), "--format", "csv",
+                                 "--workers", "1", "--chunk-rows", "64", "--explain",
+                                 "--artifacts-dir", str(artifacts_dir)])
+        results = pd.read_csv(tmp_path / "fleet.scored.csv", dtype={"Timestamp": str})
+        predictions, probabilities, shap_values = expected_results(readings, artifacts_dir, explain=True)
+
+        assert code == 0
+        assert results["Timestamp"].tolist() == pd.read_csv(readings, dtype=str)["Timestamp"].tolist()
+        assert results["prediction_label"].tolist() == [FAULT_LABELS[p] for p in predictions]
+        np.testing.assert_allclose(results[[f"probability_{label}" for label in FAULT_LABELS.values()]], probabilities)
+        np.testing.assert_allclose(results[[f"shap_{name}" for name in FEATURE_NAMES]], shap_values)
+
+    def test_process_pool_matches_in_process(self, readings, artifacts_dir, tmp_path):
+        """Test chunks scored on a process pool are written in input order, as in-process."""
+        for workers in ("1", "2"):
+            code = score_files.main([str(readings), "--output-dir", str(tmp_path / workers), "--format", "csv",
+                                     "--workers", workers, "--chunk-rows", "50",
+                                     "--artifacts-dir", str(artifacts_dir)])
+            assert code == 0
+
+        in_process = pd.read_csv(tmp_path / "1" / "fleet.scored.csv")
+        pooled = pd.read_csv(tmp_path / "2" / "fleet.scored.csv")
+
+        assert "shap_Oil_Temp" not in pooled.columns
+        pd.testing.assert_frame_equal(pooled, in_process)
+
+    def test_missing_columns(self, artifacts_dir, tmp_path, capsys):
+        """Test a file without every sensor column fails and names the missing ones."""
+        path = tmp_path / "partial.csv"
+        pd.read_csv(DATASET_PATH, nrows=5).drop(columns=["Oil_Temp"]).to_csv(path, index=False)
+
+        code = score_files.main([str(path), "--output-dir", str(tmp_path), "--format", "csv", "--workers", "1",
+                                 "--artifacts-dir", str(artifacts_dir)])
+
+        assert code == 1
+        assert "Oil_Temp" in capsys.readouterr().out
+
+    def test_parquet_round_trip(self, readings, artifacts_dir, tmp_path):
+        """Test Parquet inputs are scored to Parquet outputs with the same results as CSV."""
+        pytest.importorskip("pyarrow")
+        parquet_input = tmp_path / "fleet.parquet"
+        pd.read_csv(readings, dtype={"Timestamp": str, "Fault_Label": str}).to_parquet(parquet_input, index=False)
+
+        code = score_files.main([str(parquet_input), "--output-dir", str(tmp_path), "--workers", "1",
+                                 "--artifacts-dir", str(artifacts_dir)])
+        results = pd.read_parquet(tmp_path / "fleet.scored.parquet")
+        predictions, _, _ = expected_results(readings, artifacts_dir, explain=False)
+
+        assert code == 0
+        assert results["prediction_label"].tolist() == [FAULT_LABELS[p] for p in predictions]
+
+    def test_header_only_input(self, artifacts_dir, tmp_path):
+        """Test a file without rows gets an output with the result columns and no rows."""
+        path = tmp_path / "empty.csv"
+        pd.read_csv(DATASET_PATH, nrows=0).to_csv(path, index=False)
+
+        code = score_files.main([str(path), "--output-dir", str(tmp_path), "--format", "csv", "--workers", "1",
+                                 "--explain", "--artifacts-dir", str(artifacts_dir)])
+        results = pd.read_csv(tmp_path / "empty.scored.csv")
+
+        assert code == 0
+        assert len(results) == 0
+        assert results.columns[:3].tolist() == ["Timestamp", "Fault_Label", "prediction_label"]
+        assert "shap_Oil_Temp" in results.columns
+
+    def test_explainer_is_only_needed_with_explain(self, readings, artifacts_dir, tmp_path, capsys):
+        """Test scoring without --explain works without shap_explainer.pkl, and with it fails up front."""
+        served = tmp_path / "artifacts"
+        served.mkdir()
+        for filename in ("lgbm_model.pkl", "preprocessor.pkl"):
+            (served / filename).symlink_to(artifacts_dir / filename)
+        args = [str(readings), "--output-dir", str(tmp_path), "--format", "csv", "--workers", "1",
+                "--artifacts-dir", str(served)]
+
+        assert score_files.main(args) == 0
+        assert score_files.main([*args, "--explain"]) == 1
+        assert "shap_explainer.pkl not found" in capsys.readouterr().out
+
+    def test_native_explainer_needs_no_explainer_file(self, readings, artifacts_dir, tmp_path, monkeypatch):
+        """Test AIMS_EXPLAINER=lightgbm explains without shap_explainer.pkl."""
+        monkeypatch.setenv("AIMS_EXPLAINER", "lightgbm")
+        served = tmp_path / "artifacts"
+        served.mkdir()
+        for filename in ("lgbm_model.pkl", "preprocessor.pkl"):
+            (served / filename).symlink_to(artifacts_dir / filename)
+
+        code = score_files.main([str(readings), "--output-dir", str(tmp_path), "--format", "csv", "--workers", "1",
+                                 "--explain", "--artifacts-dir", str(served)])
+
+        assert code == 0
+        assert "shap_Oil_Temp" in pd.read_csv(tmp_path / "fleet.scored.csv").columns
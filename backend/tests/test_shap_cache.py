@@ -0,0 +1,176 @@
+"""
+Tests for the SHAP value cache.
+Cached values must be exactly what the wrapped explainer returns.
+"""
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.artifacts import load_serving_artifacts
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.shap_cache import CachedExplainer
+from backend.services.tree_engine import build_numpy_engine
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+@pytest.fixture(scope="module")
+def exported_artifacts(artifacts_dir):
+    """An exported model and explainer, and scaled real readings from the dataset."""
+    preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+    model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+    shap_explainer = joblib.load(artifacts_dir / "shap_explainer.pkl")
+
+    dataset_path = PROJECT_ROOT / "data" / "marine_engine_fault_dataset.csv"
+    raw = pd.read_csv(dataset_path, usecols=FEATURE_NAMES, nrows=200)[FEATURE_NAMES]
+    return model, shap_explainer, preprocessor.transform(raw)
+
+
+def counting_explainer(num_classes: int = 8) -> Mock:
+    """Explainer stub whose SHAP values encode the row's first feature."""
+    explainer = Mock()
+    explainer.shap_values.side_effect = lambda X: np.repeat(
+        np.asarray(X)[:, :, None], num_classes, axis=2
+    )
+    return explainer
+
+
+class TestSplitSignatures:
+    """Test suite for FlatTreeEnsemble.split_signatures."""
+
+    def test_matches_searchsorted_for_any_batch_size(self, exported_artifacts):
+        """Test single rows and large batches get the same signatures."""
+        model, _, X = exported_artifacts
+        engine = build_numpy_engine(model)
+
+        expected = np.column_stack([
+            2 * np.searchsorted(thresholds, X[:, feature])
+            for feature, thresholds in enumerate(engine.split_thresholds)
+        ])
+
+        assert np.array_equal(engine.split_signatures(X), expected)
+        assert np.array_equal(np.vstack([engine.split_signatures(X[i:i + 1]) for i in range(len(X))]), expected)
+
+    def test_missing_values_get_their_own_code(self, exported_artifacts):
+        """Test NaN and zero readings are separated from other values."""
+        model, _, X = exported_artifacts
+        engine = build_numpy_engine(model)
+        row = X[:1].copy()
+        row[0, 0] = np.nan
+        row[0, 1] = 0.0
+
+        signature = engine.split_signatures(row)[0]
+
+        assert signature[0] == -1
+        assert signature[1] % 2 == 1
+
+    def test_equal_leaves_do_not_imply_equal_shap(self, exported_artifacts):
+        """Test why readings are not keyed on pred_leaf: same leaves, different SHAP values."""
+        model, shap_explainer, X = exported_artifacts
+        engine = build_numpy_engine(model)
+        booster = model.booster_
+        row = X[:1]
+
+        # Move one feature just past the nearest threshold off the row's decision paths
+        for feature, thresholds in enumerate(engine.split_thresholds):
+            above = thresholds[thresholds >= row[0, feature]]
+            if len(above) == 0:
+                continue
+            moved = row.copy()
+            moved[0, feature] = np.nextafter(above[0], np.inf)
+            if np.array_equal(booster.predict(moved, pred_leaf=True), booster.predict(row, pred_leaf=True)):
+                break
+        else:
+            pytest.skip("Every threshold lies on a decision path of this reading")
+
+        assert not np.array_equal(engine.split_signatures(moved), engine.split_signatures(row))
+        assert not np.array_equal(np.asarray(shap_explainer.shap_values(moved)), np.asarray(shap_explainer.shap_values(row)))
+
+
+class TestCachedExplainer:
+    """Test suite for CachedExplainer."""
+
+    def test_matches_wrapped_explainer(self, exported_artifacts):
+        """Test cached SHAP values equal the explainer's, for hits and misses alike."""
+        model, shap_explainer, X = exported_artifacts
+        cached = CachedExplainer(shap_explainer, model)
+        expected = np.asarray(shap_explainer.shap_values(X))
+
+        first = cached.shap_values(X[:120])
+        replayed = np.vstack([cached.shap_values(X[i:i + 1]) for i in range(len(X))])
+
+        assert np.array_equal(first, expected[:120])
+        assert np.array_equal(replayed, expected)
+        assert cached.stats()["hits"] == 120
+
+    def test_signature_matches_reuse_exact_values(self, exported_artifacts):
+        """Test a reading nudged within its split intervals is a hit with identical values."""
+        model, shap_explainer, X = exported_artifacts
+        cached = CachedExplainer(shap_explainer, model)
+        nudged = X[:1] * (1 + 1e-12)
+
+        cached.shap_values(X[:1])
+        result = cached.shap_values(nudged)
+
+        assert cached.stats()["hits"] == 1
+        assert np.array_equal(result, np.asarray(shap_explainer.shap_values(nudged)))
+
+    def test_only_distinct_misses_are_explained(self, exported_artifacts):
+        """Test duplicate and cached rows are not passed to the wrapped explainer."""
+        model, _, X = exported_artifacts
+        explainer = counting_explainer()
+        cached = CachedExplainer(explainer, model)
+
+        cached.shap_values(X[:2])
+        result = cached.shap_values(X[[0, 2, 2, 1]])
+
+        passed = explainer.shap_values.call_args[0][0]
+        assert np.array_equal(passed, X[[2]])
+        assert np.array_equal(result[:, :, 0], X[[0, 2, 2, 1]])
+        assert cached.stats()["misses"] == 3
+
+    def test_list_output_is_stacked(self, exported_artifacts):
+        """Test explainers returning one array per class are normalised to [N, F, C]."""
+        model, _, X = exported_artifacts
+        explainer = Mock()
+        explainer.shap_values.return_value = [np.full((1, 18), float(c)) for c in range(8)]
+        cached = CachedExplainer(explainer, model)
+
+        result = cached.shap_values(X[:1])
+
+        assert result.shape == (1, 18, 8)
+        assert np.array_equal(result[0, 0], np.arange(8.0))
+
+    def test_memory_cap_evicts_least_recently_used(self, exported_artifacts):
+        """Test the least recently used values are evicted once max_bytes is exceeded."""
+        model, _, X = exported_artifacts
+        cached = CachedExplainer(counting_explainer(), model)
+        cached.shap_values(X[:1])
+        cached.max_bytes = 2 * cached.stats()["bytes"]
+
+        cached.shap_values(X[1:2])
+        cached.shap_values(X[:1])
+        cached.shap_values(X[2:3])
+
+        assert len(cached) == 2
+        assert cached.stats()["evictions"] == 1
+        assert cached.stats()["bytes"] <= cached.max_bytes
+        cached.shap_values(X[:1])
+        assert cached.stats()["hits"] == 2
+
+    def test_load_serving_artifacts_wraps_explainer(self, monkeypatch, artifacts_dir):
+        """Test AIMS_SHAP_CACHE=1 wraps the configured explainer."""
+        monkeypatch.setenv("AIMS_SHAP_CACHE", "1")
+        monkeypatch.setenv("AIMS_SHAP_CACHE_MAX_MB", "8")
+        monkeypatch.setenv("AIMS_EXPLAINER", "lightgbm")
+
+        artifacts = load_serving_artifacts(str(artifacts_dir))
+
+        assert isinstance(artifacts["shap_explainer"], CachedExplainer)
+        assert artifacts["shap_explainer"].max_bytes == 8 * 1024 * 1024
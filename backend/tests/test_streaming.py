@@ -0,0 +1,280 @@
+"""
+Tests for per-engine telemetry streams.
+Replies must come back in frame order, bad frames must not close the
+connection, and a connection must never have more than max_in_flight frames
+being scored.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from backend.models.response import PredictionResponse
+from backend.services.executor import ExecutorSaturatedError
+from backend.services.history import EngineHistory
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.streaming import EngineStreams
+from backend.services.windows import WINDOW_FEATURE_NAMES, EngineWindows
+
+
+def reading(**overrides) -> dict:
+    """A valid reading, with overrides."""
+    values = {
+        "Shaft_RPM": 950.0, "Engine_Load": 70.0, "Fuel_Flow": 120.0, "Air_Pressure": 2.5,
+        "Ambient_Temp": 25.0, "Oil_Temp": 75.0, "Oil_Pressure": 3.5, "Vibration_X": 0.05,
+        "Vibration_Y": 0.05, "Vibration_Z": 0.05, "Cylinder1_Pressure": 145.0,
+        "Cylinder1_Exhaust_Temp": 420.0, "Cylinder2_Pressure": 145.0, "Cylinder2_Exhaust_Temp": 420.0,
+        "Cylinder3_Pressure": 145.0, "Cylinder3_Exhaust_Temp": 420.0, "Cylinder4_Pressure": 145.0,
+        "Cylinder4_Exhaust_Temp": 420.0,
+    }
+    return {**values, **overrides}
+
+
+class FakeWebSocket:
+    """Connection that delivers the given text or binary frames, then disconnects once every reply is sent."""
+
+    def __init__(self, frames: list[str | bytes]):
+        self.frames = list(frames)
+        self.sent: list = []
+        self.all_sent = asyncio.Event()
+
+    async def receive(self) -> dict:
+        if self.frames:
+            frame = self.frames.pop(0)
+            return {"type": "websocket.receive", "bytes" if isinstance(frame, bytes) else "text": frame}
+        await self.all_sent.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    def expect(self, num_replies: int):
+        """Disconnect once num_replies replies have been sent."""
+        async def wait():
+            while len(self.sent) < num_replies:
+                await asyncio.sleep(0.001)
+            self.all_sent.set()
+        return wait()
+
+
+def label_by_rpm(sensor_input) -> PredictionResponse:
+    """Prediction whose label carries the reading's Shaft_RPM, to check ordering."""
+    return PredictionResponse(prediction_label=str(sensor_input.Shaft_RPM), probabilities={"Normal": 1.0})
+
+
+def serve(streams: EngineStreams, frames: list[str | bytes], score, num_replies: int, **options) -> list:
+    """Serve one connection until num_replies replies were sent, and return them."""
+    websocket = FakeWebSocket(frames)
+
+    async def main():
+        await asyncio.gather(streams.serve(websocket, "engine-7", score, **options), websocket.expect(num_replies))
+
+    asyncio.run(asyncio.wait_for(main(), 10))
+    return websocket.sent
+
+
+class TestEngineStreams:
+    """Test suite for EngineStreams."""
+
+    def test_replies_in_frame_order(self):
+        """Test replies follow frame order even when later frames finish first."""
+        async def score(sensor_input):
+            # Earlier readings take longer
+            await asyncio.sleep((10 - sensor_input.Shaft_RPM) / 1000)
+            return label_by_rpm(sensor_input)
+
+        frames = [json.dumps(reading(Shaft_RPM=float(rpm), Timestamp=rpm)) for rpm in range(10)]
+        replies = serve(EngineStreams(), frames, score, 10)
+
+        assert [reply["prediction_label"] for reply in replies] == [str(float(rpm)) for rpm in range(10)]
+        assert [reply["Timestamp"] for reply in replies] == list(range(10))
+        assert {reply["engine_id"] for reply in replies} == {"engine-7"}
+
+    def test_array_frames_get_array_replies(self):
+        """Test a frame holding several readings is answered with one prediction per reading."""
+        async def score(sensor_input):
+            return label_by_rpm(sensor_input)
+
+        frames = [json.dumps([reading(Shaft_RPM=1.0), reading(Shaft_RPM=2.0)])]
+        replies = serve(EngineStreams(), frames, score, 1)
+
+        assert [reply["prediction_label"] for reply in replies[0]] == ["1.0", "2.0"]
+
+    def test_bad_frames_keep_the_connection_open(self):
+        """Test invalid JSON, invalid readings and failed predictions are answered with errors."""
+        async def score(sensor_input):
+            if sensor_input.Shaft_RPM == 1.0:
+                raise ExecutorSaturatedError("queue full")
+            if sensor_input.Shaft_RPM == 2.0:
+                raise RuntimeError("model exploded")
+            return label_by_rpm(sensor_input)
+
+        streams = EngineStreams()
+        frames = [
+            "not json",
+            json.dumps(reading(Shaft_RPM="fast", Timestamp=3)),
+            json.dumps(reading(Shaft_RPM=1.0)),
+            json.dumps(reading(Shaft_RPM=2.0)),
+            json.dumps(reading(Shaft_RPM=5.0)),
+        ]
+        replies = serve(streams, frames, score, 5)
+
+        assert [reply.get("status_code") for reply in replies] == [400, 422, 503, 500, None]
+        assert replies[1]["Timestamp"] == 3
+        assert "model exploded" in replies[3]["detail"]
+        assert replies[4]["prediction_label"] == "5.0"
+        assert streams.stats()["errors"] == 4
+        assert streams.stats()["readings"] == 1
+
+    def test_flow_control_bounds_frames_in_flight(self):
+        """Test a connection never has more than max_in_flight frames being scored."""
+        in_flight = 0
+        peak = 0
+
+        async def score(sensor_input):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.002)
+            in_flight -= 1
+            return label_by_rpm(sensor_input)
+
+        streams = EngineStreams(max_in_flight=3)
+        replies = serve(streams, [json.dumps(reading()) for _ in range(20)], score, 20)
+
+        assert len(replies) == 20
+        assert peak == 3
+        assert streams.stats()["throttled"] > 0
+        assert streams.stats()["open_connections"] == 0
+        assert streams.stats()["connections"] == 1
+
+    def test_window_features_follow_frame_order(self):
+        """Test valid readings update the engine's window in frame order, even when scored out of order."""
+        async def score(sensor_input):
+            await asyncio.sleep((10 - sensor_input.Shaft_RPM) / 1000)
+            return label_by_rpm(sensor_input)
+
+        windows = EngineWindows(window=4)
+        frames = [
+            json.dumps(reading(Shaft_RPM=1.0)),
+            json.dumps([reading(Shaft_RPM=2.0), reading(Shaft_RPM="fast"), reading(Shaft_RPM=4.0)]),
+            json.dumps(reading(Shaft_RPM=8.0)),
+        ]
+        replies = serve(EngineStreams(), frames, score, 3, windows=windows, window_features=True)
+
+        answered = [replies[0], replies[1][0], replies[1][2], replies[2]]
+        assert [reply["window_features"]["Shaft_RPM_delta"] for reply in answered] == [0.0, 1.0, 2.0, 4.0]
+        assert answered[-1]["window_features"]["Shaft_RPM_rolling_mean"] == pytest.approx(15.0 / 4)
+        assert "window_features" not in replies[1][1]
+        assert windows.stats()["readings"] == 4
+        assert list(answered[0]["window_features"]) == WINDOW_FEATURE_NAMES
+
+    def test_history_follows_frame_order(self):
+        """Test scored readings are recorded in frame order, and failed ones are not."""
+        async def score(sensor_input):
+            await asyncio.sleep((10 - sensor_input.Shaft_RPM) / 1000)
+            if sensor_input.Shaft_RPM == 3.0:
+                raise RuntimeError("model exploded")
+            return PredictionResponse(prediction_label="Normal", probabilities={"Normal": 1.0})
+
+        history = EngineHistory(retention=10, max_engines=1)
+        frames = [
+            json.dumps(reading(Shaft_RPM=1.0, Timestamp=100)),
+            json.dumps([reading(Shaft_RPM=2.0, Timestamp="1970-01-01 00:01:41"), reading(Shaft_RPM=3.0)]),
+            json.dumps([reading(Shaft_RPM="fast"), reading(Shaft_RPM=4.0, Timestamp=102)]),
+        ]
+        serve(EngineStreams(), frames, score, 3, history=history)
+
+        recorded = history.query("engine-7")
+        assert recorded["timestamps"].tolist() == [100, 101, 102]
+        assert recorded["readings"][:, 0].tolist() == [1.0, 2.0, 4.0]
+        assert recorded["predictions"].tolist() == [0, 0, 0]
+
+    def test_frame_failing_after_scoring_gets_error_reply(self):
+        """Test a frame whose window update or history record fails is answered with an error, and later frames are too."""
+        async def score(sensor_input):
+            return label_by_rpm(sensor_input)
+
+        class FlakyWindows(EngineWindows):
+            def update(self, engine_id, matrix):
+                if matrix[0, 0] == 1.0:
+                    raise RuntimeError("window store broken")
+                return super().update(engine_id, matrix)
+
+        class FlakyHistory(EngineHistory):
+            def record(self, engine_id, timestamps, readings, probabilities):
+                if readings[0, 0] == 2.0:
+                    raise RuntimeError("history full")
+                super().record(engine_id, timestamps, readings, probabilities)
+
+        streams = EngineStreams(max_in_flight=1)
+        history = FlakyHistory(retention=10, max_engines=1)
+        frames = [json.dumps(reading(Shaft_RPM=float(rpm))) for rpm in (1, 2, 3, 4)]
+        replies = serve(streams, frames, score, 4, windows=FlakyWindows(window=4), history=history)
+
+        assert [reply.get("status_code") for reply in replies] == [500, 500, None, None]
+        assert "window store broken" in replies[0]["detail"]
+        assert "history full" in replies[1]["detail"]
+        assert [reply["prediction_label"] for reply in replies[2:]] == ["3.0", "4.0"]
+        assert history.query("engine-7")["readings"][:, 0].tolist() == [3.0, 4.0]
+
+    def test_stopped_sender_ends_the_connection(self, monkeypatch):
+        """Test the connection ends with the sender's error instead of waiting for a slot forever."""
+        async def score(sensor_input):
+            return label_by_rpm(sensor_input)
+
+        async def broken_sender(*args):
+            raise RuntimeError("sender crashed")
+
+        streams = EngineStreams(max_in_flight=1)
+        monkeypatch.setattr(streams, "_send_replies", broken_sender)
+        frames = [json.dumps(reading(Shaft_RPM=float(rpm))) for rpm in range(3)]
+
+        with pytest.raises(RuntimeError, match="sender crashed"):
+            serve(streams, frames, score, 3)
+        assert streams.stats()["open_connections"] == 0
+
+    def test_binary_frames(self):
+        """Test binary frames hold readings in the connection's payload format, and text frames stay JSON."""
+        async def score(sensor_input):
+            return label_by_rpm(sensor_input)
+
+        features = np.array([[reading(Shaft_RPM=float(rpm))[name] for name in FEATURE_NAMES] for rpm in (1, 2)])
+        non_finite = features.copy()
+        non_finite[0, 0] = np.inf
+        history = EngineHistory(retention=10, max_engines=1)
+        frames = [
+            features.astype("<f4").tobytes(),
+            json.dumps(reading(Shaft_RPM=3.0)),
+            features[:1].astype("<f4").tobytes(),
+            non_finite.astype("<f4").tobytes(),
+            b"\x00" * 5,
+        ]
+        replies = serve(EngineStreams(), frames, score, 5, payload_format="raw", history=history)
+
+        assert [reply["prediction_label"] for reply in replies[0]] == ["1.0", "2.0"]
+        assert replies[1]["prediction_label"] == "3.0"
+        assert [reply["prediction_label"] for reply in replies[2]] == ["1.0"]
+        assert replies[3]["status_code"] == 422
+        assert "reading 0 Shaft_RPM" in replies[3]["detail"]
+        assert replies[4]["status_code"] == 422
+        assert history.query("engine-7")["readings"][:, 0].tolist() == [1.0, 2.0, 3.0, 1.0]
+
+    def test_binary_frames_without_payload_format_are_json(self):
+        """Test binary frames are decoded as JSON when the connection has no payload format."""
+        async def score(sensor_input):
+            return label_by_rpm(sensor_input)
+
+        replies = serve(EngineStreams(), [json.dumps(reading(Shaft_RPM=5.0)).encode()], score, 1)
+
+        assert replies[0]["prediction_label"] == "5.0"
+
+    def test_from_env(self, monkeypatch):
+        """Test AIMS_STREAM_MAX_IN_FLIGHT configures flow control, and invalid values are refused."""
+        monkeypatch.setenv("AIMS_STREAM_MAX_IN_FLIGHT", "5")
+        assert EngineStreams.from_env().max_in_flight == 5
+
+        with pytest.raises(ValueError):
+            EngineStreams(max_in_flight=0)
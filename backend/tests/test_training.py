@@ -0,0 +1,340 @@
+"""
+Tests for the training pipeline.
+Runs every stage on a small sample of the dataset and checks that reruns only
+redo the stages whose parameters or inputs changed.
+"""
+
+import os
+from types import SimpleNamespace
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+from backend.services.artifacts import MODEL_FILENAME, PREPROCESSOR_FILENAME
+from backend.services.folding import BoosterClassifier
+from backend.services.predictor import FEATURE_NAMES
+from backend.training.cache import StageCache, module_dependencies
+from backend.training.pipeline import DATASET_PATH, TrainingPipeline
+from backend.training.stages import BASE_PARAMS, _pruning_callback, tune
+
+STAGES = ["load", "split", "scale", "smote", "binning", "tune", "fit", "explain", "export"]
+
+# Module-level helper and constant of stage_with_helper, for the cache key tests
+SCALE = 2
+
+
+def scaled(x):
+    return x * SCALE
+
+
+def stage_with_helper(x):
+    return {"y": scaled(x)}
+
+
+def cached_stages(report):
+    """Names of the stages of a run report that were taken from the cache."""
+    return [entry["stage"] for entry in report if entry["cached"]]
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    """40 readings of every fault class of the dataset."""
+    df = pd.read_csv(DATASET_PATH)
+    sample = df.groupby("Fault_Label").sample(40, random_state=0)
+    path = tmp_path_factory.mktemp("data") / "sample.csv"
+    sample.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def trained(dataset, tmp_path_factory):
+    """A first run of the pipeline, with its cache and artifact directories."""
+    root = tmp_path_factory.mktemp("training")
+    dirs = {"artifacts_dir": str(root / "artifacts"), "cache_dir": str(root / "cache")}
+    pipeline = TrainingPipeline(dataset=dataset, n_trials=2, **dirs)
+    return pipeline, pipeline.run(), dirs
+
+
+class TestTrainingPipeline:
+    """Test suite for TrainingPipeline."""
+
+    def test_first_run_runs_every_stage(self, trained):
+        """Test a first run runs every stage and reports its time."""
+        _, report, _ = trained
+
+        assert [entry["stage"] for entry in report] == STAGES
+        assert cached_stages(report) == []
+        assert all(entry["seconds"] >= 0 for entry in report)
+
+    def test_exports_loadable_artifacts(self, trained):
+        """Test the exported model and scaler predict like the pipeline's own."""
+        pipeline, _, dirs = trained
+        model = joblib.load(os.path.join(dirs["artifacts_dir"], MODEL_FILENAME))
+        scaler = joblib.load(os.path.join(dirs["artifacts_dir"], PREPROCESSOR_FILENAME))
+        X_test = pipeline.values["X_test"]
+
+        np.testing.assert_array_equal(
+            model.predict(scaler.transform(X_test)),
+            pipeline.values["model"].predict(pipeline.values["X_test_scaled"])
+        )
+        assert set(pipeline.values["feature_importance"]) == set(FEATURE_NAMES)
+        assert 0 <= pipeline.values["metrics"]["f1_macro"] <= 1
+
+    def test_binned_fit_matches_classifier(self, trained):
+        """Test the exported BoosterClassifier predicts exactly like LGBMClassifier.fit on the same training set."""
+        pipeline, _, dirs = trained
+        values = pipeline.values
+        exported = joblib.load(os.path.join(dirs["artifacts_dir"], MODEL_FILENAME))
+
+        classifier = lgb.LGBMClassifier(**BASE_PARAMS, **values["best_params"])
+        classifier.fit(values["X_train_fit"], values["y_train_fit"])
+
+        assert isinstance(exported, BoosterClassifier)
+        np.testing.assert_array_equal(
+            exported.predict_proba(values["X_test_scaled"]),
+            classifier.predict_proba(values["X_test_scaled"])
+        )
+        np.testing.assert_array_equal(exported.predict(values["X_test_scaled"]), classifier.predict(values["X_test_scaled"]))
+
+    def test_tune_reports_trials(self, trained):
+        """Test tune takes n_estimators from early stopping and times every trial."""
+        pipeline, _, _ = trained
+        values = pipeline.values
+
+        assert 1 <= values["best_params"]["n_estimators"] <= 500
+        assert len(values["trial_f1"]) == len(values["trial_seconds"]) == 2
+        assert values["seconds_to_best"] in values["trial_seconds"]
+        assert values["best_f1"] == max(value for value in values["trial_f1"] if value is not None)
+
+    @pytest.mark.parametrize("use_smote", [False, True])
+    def test_tuning_is_reproducible_and_parallel_tuning_runs(self, trained, use_smote):
+        """Test tuning twice on one thread picks the same trials, and trials also run on several threads."""
+        pipeline, _, _ = trained
+        values = pipeline.values
+        args = (values["X_train_scaled"], values["y_train"], BASE_PARAMS, 3, 42, use_smote, 0.2, 42)
+
+        first, second = tune(*args), tune(*args)
+        parallel = tune(*args, n_jobs=2)
+
+        assert first["trial_f1"] == second["trial_f1"]
+        assert first["best_params"] == second["best_params"]
+        assert len(parallel["trial_f1"]) == 3
+
+    @pytest.mark.parametrize("use_smote", [False, True])
+    def test_trials_bin_without_validation_rows(self, trained, monkeypatch, use_smote):
+        """Test the bin boundaries of the trials are computed without the rows the trials are validated on."""
+        pipeline, _, _ = trained
+        values = pipeline.values
+        binned_from = []
+
+        class RecordingDataset(lgb.Dataset):
+            def __init__(self, data, *args, reference=None, **kwargs):
+                if reference is None:
+                    binned_from.append(np.asarray(data))
+                super().__init__(data, *args, reference=reference, **kwargs)
+
+        monkeypatch.setattr(lgb, "Dataset", RecordingDataset)
+        tune(values["X_train_scaled"], values["y_train"], BASE_PARAMS, 1, 42, use_smote, 0.2, 42)
+
+        _, valid_index = train_test_split(
+            np.arange(len(values["y_train"])), test_size=0.2, random_state=42, stratify=values["y_train"]
+        )
+        valid_rows = {row.tobytes() for row in values["X_train_scaled"][valid_index]}
+        assert binned_from
+        for data in binned_from:
+            assert not valid_rows & {row.tobytes() for row in data}
+
+    def test_rerun_is_cached(self, dataset, trained):
+        """Test rerunning with unchanged inputs takes every stage from the cache."""
+        pipeline, _, dirs = trained
+
+        rerun = TrainingPipeline(dataset=dataset, n_trials=2, **dirs)
+        report = rerun.run()
+
+        assert cached_stages(report) == STAGES
+        assert rerun.values["best_params"] == pipeline.values["best_params"]
+
+    def test_changed_parameter_reruns_from_its_stage(self, dataset, trained):
+        """Test changing the number of trials reruns tune but not the stages before it."""
+        _, _, dirs = trained
+
+        report = TrainingPipeline(dataset=dataset, n_trials=3, **dirs).run()
+
+        assert cached_stages(report)[:5] == ["load", "split", "scale", "smote", "binning"]
+        assert "tune" not in cached_stages(report)
+
+    def test_force_reruns_stage(self, dataset, trained):
+        """Test a forced stage is rerun even though it is cached."""
+        _, _, dirs = trained
+
+        report = TrainingPipeline(dataset=dataset, n_trials=2, **dirs).run(force=["explain"])
+
+        assert "explain" not in cached_stages(report)
+        assert "fit" in cached_stages(report)
+
+    def test_missing_export_is_rewritten(self, dataset, trained):
+        """Test deleting an exported file reruns only the export stage."""
+        _, _, dirs = trained
+        model_path = os.path.join(dirs["artifacts_dir"], MODEL_FILENAME)
+        os.remove(model_path)
+
+        report = TrainingPipeline(dataset=dataset, n_trials=2, **dirs).run()
+
+        assert cached_stages(report) == STAGES[:-1]
+        assert os.path.exists(model_path)
+
+    def test_missing_binned_dataset_is_rebuilt(self, dataset, trained):
+        """Test deleting the binned Dataset rebuilds it without rerunning the stages after it."""
+        pipeline, _, dirs = trained
+        os.remove(pipeline.values["binned"])
+
+        report = TrainingPipeline(dataset=dataset, n_trials=2, **dirs).run()
+
+        assert [stage for stage in STAGES if stage not in cached_stages(report)] == ["binning"]
+        assert os.path.exists(pipeline.values["binned"])
+
+    def test_without_cache_binned_dataset_is_temporary(self, dataset, tmp_path):
+        """Test without a cache directory the binned Dataset is removed with the pipeline."""
+        pipeline = TrainingPipeline(dataset=dataset, artifacts_dir=str(tmp_path), cache_dir=None)
+        pipeline.run(until="binning")
+        binned = pipeline.values["binned"]
+
+        assert os.path.exists(binned)
+        del pipeline
+        assert not os.path.exists(binned)
+
+    def test_until_stops_early(self, dataset, trained):
+        """Test until stops after the named stage."""
+        _, _, dirs = trained
+
+        report = TrainingPipeline(dataset=dataset, n_trials=2, **dirs).run(until="scale")
+
+        assert [entry["stage"] for entry in report] == ["load", "split", "scale"]
+
+    def test_unknown_stage(self, dataset, trained):
+        """Test naming an unknown stage raises ValueError before running anything."""
+        _, _, dirs = trained
+
+        with pytest.raises(ValueError, match="tuning"):
+            TrainingPipeline(dataset=dataset, **dirs).run(force=["tuning"])
+
+    def test_changed_dataset_reruns_everything(self, dataset, trained, tmp_path):
+        """Test a dataset with different content invalidates every stage."""
+        _, _, dirs = trained
+        changed = tmp_path / "changed.csv"
+        pd.read_csv(dataset).iloc[:-8].to_csv(changed, index=False)
+
+        report = TrainingPipeline(dataset=str(changed), n_trials=2, **dirs).run(until="scale")
+
+        assert cached_stages(report) == []
+
+
+class FakeTrial:
+    """Optuna trial recording reported values, with a fixed pruning decision."""
+
+    def __init__(self, prune: bool):
+        self.prune = prune
+        self.reported = []
+
+    def report(self, value, step):
+        self.reported.append((step, value))
+
+    def should_prune(self):
+        return self.prune
+
+
+class TestPruningCallback:
+    """Test suite for the LightGBM pruning callback."""
+
+    def env(self, iteration, *results):
+        return SimpleNamespace(iteration=iteration, evaluation_result_list=list(results))
+
+    def test_reports_negated_validation_loss(self):
+        """Test the validation loss is reported negated, at the iteration's step."""
+        trial = FakeTrial(prune=False)
+        callback = _pruning_callback(trial)
+
+        callback(self.env(3, ("training", "multi_logloss", 0.1, False), ("valid_0", "multi_logloss", 0.5, False)))
+
+        assert trial.reported == [(3, -0.5)]
+
+    def test_prunes(self):
+        """Test the trial is stopped when the pruner says so."""
+        callback = _pruning_callback(FakeTrial(prune=True))
+
+        with pytest.raises(optuna.TrialPruned):
+            callback(self.env(3, ("valid_0", "multi_logloss", 0.5, False)))
+
+    def test_ignores_other_metrics(self):
+        """Test metrics other than the validation loss are not reported."""
+        trial = FakeTrial(prune=True)
+
+        _pruning_callback(trial)(self.env(3, ("valid_0", "multi_error", 0.5, False)))
+
+        assert trial.reported == []
+
+
+class TestStageCache:
+    """Test suite for StageCache."""
+
+    def test_key_depends_on_params_and_inputs(self):
+        """Test the key changes with the parameters, the input digests and the dependencies."""
+        cache = StageCache("unused")
+
+        def stage(x, n):
+            return {"y": x * n}
+
+        key = cache.key(stage, {"n": 2}, {"x": "a"})
+
+        assert cache.key(stage, {"n": 2}, {"x": "a"}) == key
+        assert cache.key(stage, {"n": 3}, {"x": "a"}) != key
+        assert cache.key(stage, {"n": 2}, {"x": "b"}) != key
+        assert cache.key(stage, {"n": 2}, {"x": "a"}, dependencies=[cached_stages]) != key
+
+    def test_key_depends_on_module_helpers_and_constants(self, monkeypatch):
+        """Test the helpers and constants of the stage's module it uses are part of the key."""
+        cache = StageCache("unused")
+        key = cache.key(stage_with_helper, {}, {"x": "a"})
+
+        assert set(module_dependencies(stage_with_helper)) == {"scaled", "SCALE"}
+        monkeypatch.setattr(f"{__name__}.SCALE", 3)
+        assert cache.key(stage_with_helper, {}, {"x": "a"}) != key
+
+    def test_store_and_load(self, tmp_path):
+        """Test stored outputs load back with their digests."""
+        cache = StageCache(str(tmp_path))
+
+        digests = cache.store("stage", "k", {"y": np.arange(3)})
+        outputs, loaded_digests = cache.load("stage", "k")
+
+        np.testing.assert_array_equal(outputs["y"], np.arange(3))
+        assert loaded_digests == digests
+        assert cache.load("stage", "missing") is None
+
+    def test_prunes_least_recently_used(self, tmp_path):
+        """Test only the most recently used entries of a stage are kept."""
+        cache = StageCache(str(tmp_path), keep=2)
+        cache.store("stage", "a", {"y": 1})
+        cache.store("stage", "b", {"y": 2})
+        # Make "a" the most recently used entry
+        os.utime(tmp_path / "stage" / "b.joblib", (0, 0))
+        cache.load("stage", "a")
+
+        cache.store("stage", "c", {"y": 3})
+
+        assert cache.load("stage", "a") is not None
+        assert cache.load("stage", "b") is None
+        assert cache.load("stage", "c") is not None
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        """Test a corrupt entry is treated as missing."""
+        cache = StageCache(str(tmp_path))
+        (tmp_path / "stage").mkdir()
+        (tmp_path / "stage" / "k.joblib").write_bytes(b"not a pickle")
+
+        assert cache.load("stage", "k") is None
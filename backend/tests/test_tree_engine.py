@@ -0,0 +1,151 @@
+"""
+Equivalence tests for the pure-NumPy tree ensemble engine.
+The flattened engine must reproduce model.predict_proba of the LightGBM model.
+"""
+
+from pathlib import Path
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.artifacts import load_artifacts, load_serving_artifacts
+from backend.services.folding import fold_scaler_into_model
+from backend.services.predictor import FEATURE_NAMES, predict_fault_matrix
+from backend.services.tree_engine import FlatTreeEnsemble, build_numpy_engine
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """Synthetic 18-feature, 4-class data."""
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(3000, 18))
+    y = (np.digitize(X[:, 0], [-0.7, 0, 0.7]) + (X[:, 4] > X[:, 9])) % 4
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def trained_model(training_data):
+    """Small multiclass LightGBM model."""
+    X, y = training_data
+    model = lgb.LGBMClassifier(n_estimators=40, num_leaves=15, verbosity=-1, random_state=0)
+    model.fit(X, y)
+    return model
+
+
+class TestFlatTreeEnsemble:
+    """Test suite for FlatTreeEnsemble."""
+
+    def test_raw_scores_are_bit_identical(self, trained_model, training_data):
+        """Test summed leaf values equal LightGBM's raw scores exactly."""
+        X, _ = training_data
+        engine = build_numpy_engine(trained_model)
+
+        assert isinstance(engine, FlatTreeEnsemble)
+        assert np.array_equal(engine.raw_scores(X), trained_model.booster_.predict(X, raw_score=True))
+
+    def test_predict_proba_matches_model(self, trained_model, training_data):
+        """Test probabilities and predicted classes match the sklearn wrapper."""
+        X, _ = training_data
+        engine = build_numpy_engine(trained_model)
+
+        np.testing.assert_allclose(engine.predict_proba(X), trained_model.predict_proba(X), rtol=0, atol=1e-12)
+        assert np.array_equal(engine.predict(X), trained_model.predict(X))
+
+    def test_single_row_and_empty_batch(self, trained_model, training_data):
+        """Test shapes for a single reading and for no readings."""
+        X, _ = training_data
+        engine = build_numpy_engine(trained_model)
+
+        assert engine.predict_proba(X[:1]).shape == (1, 4)
+        assert engine.predict_proba(X[:0]).shape == (0, 4)
+
+    def test_nan_inputs_follow_missing_value_handling(self, training_data):
+        """Test NaN readings take the same branches as in LightGBM, with and without learned NaN splits."""
+        X, y = training_data
+        X_missing = X.copy()
+        X_missing[::5, 0] = np.nan
+        X_missing[::7, 4] = np.nan
+
+        for train_X in (X, X_missing):
+            model = lgb.LGBMClassifier(n_estimators=20, num_leaves=15, verbosity=-1, random_state=0)
+            model.fit(train_X, y)
+            engine = build_numpy_engine(model)
+
+            assert np.array_equal(engine.raw_scores(X_missing), model.booster_.predict(X_missing, raw_score=True))
+
+    def test_zero_as_missing(self, training_data):
+        """Test zero-as-missing splits send zeros the default direction."""
+        X, y = training_data
+        X_zeros = X.copy()
+        X_zeros[::4, 0] = 0.0
+        model = lgb.LGBMClassifier(n_estimators=20, zero_as_missing=True, verbosity=-1, random_state=0)
+        model.fit(X_zeros, y)
+        engine = build_numpy_engine(model)
+
+        assert np.array_equal(engine.raw_scores(X_zeros), model.booster_.predict(X_zeros, raw_score=True))
+
+    def test_categorical_splits_are_rejected(self):
+        """Test models with categorical splits are refused."""
+        rng = np.random.default_rng(0)
+        X = np.column_stack([rng.integers(0, 5, size=500), rng.normal(size=500)])
+        y = (X[:, 0] % 2).astype(int)
+        model = lgb.LGBMClassifier(n_estimators=5, min_child_samples=5, verbosity=-1)
+        model.fit(X, y, categorical_feature=[0])
+
+        with pytest.raises(ValueError, match="Categorical"):
+            FlatTreeEnsemble(model.booster_)
+
+    def test_exported_model_matches(self, artifacts_dir):
+        """Test the engine against an exported artifact set on real readings."""
+        preprocessor = joblib.load(artifacts_dir / "preprocessor.pkl")
+        model = joblib.load(artifacts_dir / "lgbm_model.pkl")
+
+        dataset_path = Path(__file__).parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+        X = preprocessor.transform(pd.read_csv(dataset_path, usecols=FEATURE_NAMES)[FEATURE_NAMES])
+
+        engine = build_numpy_engine(model)
+        reference = model.predict_proba(pd.DataFrame(X, columns=FEATURE_NAMES))
+
+        np.testing.assert_allclose(engine.predict_proba(X), reference, rtol=0, atol=1e-12)
+        assert np.array_equal(engine.predict(X), reference.argmax(axis=1))
+
+    def test_folded_model_matches(self, artifacts_dir):
+        """Test the engine also flattens a folded model taking raw readings."""
+        original = load_artifacts(str(artifacts_dir))
+        folded = fold_scaler_into_model(original["model"], original["preprocessor"])
+        preprocessor = original["preprocessor"]
+        X = preprocessor.mean_ + np.random.default_rng(2).normal(size=(500, 18)) * preprocessor.scale_
+
+        engine = build_numpy_engine(folded)
+
+        assert np.array_equal(engine.raw_scores(X), folded.booster_.predict(X, raw_score=True))
+
+
+class TestNumpyEngineSelection:
+    """Test suite for selecting the engine through AIMS_INFERENCE_ENGINE."""
+
+    def test_load_serving_artifacts_uses_numpy_engine(self, monkeypatch, artifacts_dir):
+        """Test AIMS_INFERENCE_ENGINE=numpy swaps in the flattened engine."""
+        monkeypatch.setenv("AIMS_INFERENCE_ENGINE", "numpy")
+        served = load_serving_artifacts(str(artifacts_dir))
+        monkeypatch.delenv("AIMS_INFERENCE_ENGINE")
+        original = load_artifacts(str(artifacts_dir))
+
+        assert isinstance(served["model"], FlatTreeEnsemble)
+
+        X = original["preprocessor"].mean_ + np.random.default_rng(1).normal(size=(20, 18)) * original["preprocessor"].scale_
+        served_result = predict_fault_matrix(X, **served)
+        original_result = predict_fault_matrix(X, **original)
+
+        assert np.array_equal(served_result[0], original_result[0])
+        np.testing.assert_allclose(served_result[1], original_result[1], rtol=0, atol=1e-12)
+
+    def test_unknown_engine_is_rejected(self, monkeypatch):
+        """Test an unknown engine name fails loudly at load time."""
+        monkeypatch.setenv("AIMS_INFERENCE_ENGINE", "tensorrt")
+
+        with pytest.raises(ValueError, match="Unknown inference engine"):
+            load_serving_artifacts()
@@ -0,0 +1,176 @@
+"""
+Tests for the startup warm-up.
+Warm-up must stop once latency is stable or its budget is spent, and record
+failures instead of raising them.
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from backend.services import warmup as warmup_module
+from backend.services.executor import ExecutorSaturatedError, InferenceExecutor
+from backend.services.reload import load_artifact_set, synthetic_readings
+from backend.services.warmup import Warmup
+
+
+@pytest.fixture(scope="module")
+def artifact_set(artifacts_dir):
+    """Trained artifacts, loaded the way a reload loads them."""
+    artifacts, _ = load_artifact_set(str(artifacts_dir))
+    return artifacts
+
+
+@pytest.fixture
+def executor():
+    """Thread executor with two workers."""
+    executor = InferenceExecutor(max_workers=2, max_queue=8, kind="thread")
+    yield executor
+    executor.shutdown()
+
+
+class SaturatedExecutor:
+    """Executor rejecting its first rejections jobs as if live traffic filled the queue."""
+
+    def __init__(self, executor, rejections):
+        self.executor = executor
+        self.max_workers = executor.max_workers
+        self.rejections = rejections
+
+    async def run_inference(self, fn, *args, **kwargs):
+        if self.rejections > 0:
+            self.rejections -= 1
+            raise ExecutorSaturatedError("queue full")
+        return await self.executor.run_inference(fn, *args, **kwargs)
+
+
+class TestWarmup:
+    """Test suite for Warmup."""
+
+    def test_stops_once_latency_is_stable(self, executor, artifact_set):
+        """Test a generous tolerance ends warm-up after the second round and reports warm latency."""
+        warmup = Warmup(tolerance=100.0, round_size=8)
+
+        asyncio.run(warmup.run(executor, **artifact_set))
+        stats = warmup.stats()
+
+        assert warmup.done
+        assert stats["state"] == "done"
+        assert stats["stable"]
+        assert stats["rounds"] == 2
+        assert len(stats["round_p50_ms"]) == 2
+        assert 0 < stats["p50_ms"] <= stats["p99_ms"]
+
+    def test_stops_after_max_rounds(self, executor, artifact_set):
+        """Test warm-up ends after max_rounds even when latency keeps moving."""
+        warmup = Warmup(tolerance=1e-12, round_size=4, max_rounds=3)
+
+        asyncio.run(warmup.run(executor, **artifact_set))
+
+        assert warmup.state == "done"
+        assert warmup.stats()["rounds"] == 3
+
+    def test_stops_after_time_budget(self, executor, artifact_set):
+        """Test warm-up ends once max_s has passed, whatever the latency."""
+        ticks = iter(range(100))
+        warmup = Warmup(max_s=2.0, tolerance=1e-12, round_size=4, clock=lambda: float(next(ticks)))
+
+        asyncio.run(warmup.run(executor, **artifact_set))
+
+        assert warmup.state == "done"
+        assert warmup.stats()["rounds"] == 1
+
+    def test_failure_is_recorded(self, executor, artifact_set):
+        """Test a model that cannot predict marks warm-up failed without raising."""
+        broken = Mock()
+        broken.predict_proba.side_effect = RuntimeError("model file is corrupt")
+        warmup = Warmup(round_size=4)
+
+        asyncio.run(warmup.run(executor, **{**artifact_set, "model": broken}))
+
+        assert warmup.done
+        assert warmup.state == "failed"
+        assert "corrupt" in warmup.error
+        assert warmup.stats()["p50_ms"] is None
+
+    def test_full_queue_is_retried(self, executor, artifact_set, monkeypatch):
+        """Test predictions rejected by a queue full of live traffic are retried, not a failure."""
+        monkeypatch.setattr(warmup_module, "SATURATED_RETRY_S", 0.001)
+        warmup = Warmup(tolerance=100.0, round_size=4)
+
+        asyncio.run(warmup.run(SaturatedExecutor(executor, rejections=5), **artifact_set))
+
+        assert warmup.state == "done"
+        assert warmup.error is None
+
+    def test_queue_full_for_the_whole_budget_is_skipped(self, executor, artifact_set, monkeypatch):
+        """Test warm-up gives up as skipped, not failed, when the queue stays full for max_s."""
+        monkeypatch.setattr(warmup_module, "SATURATED_RETRY_S", 0.001)
+        ticks = iter(range(100))
+        warmup = Warmup(max_s=3.0, round_size=4, clock=lambda: float(next(ticks)))
+
+        asyncio.run(warmup.run(SaturatedExecutor(executor, rejections=100), **artifact_set))
+
+        assert warmup.done
+        assert warmup.state == "skipped"
+        assert "queue full" in warmup.error
+        assert warmup.runs == 1
+
+    def test_runs_again_after_failure(self, executor, artifact_set):
+        """Test a second run starts afresh, so a warm-up that failed can succeed on new artifacts."""
+        broken = Mock()
+        broken.predict_proba.side_effect = RuntimeError("model file is corrupt")
+        warmup = Warmup(tolerance=100.0, round_size=4)
+        asyncio.run(warmup.run(executor, **{**artifact_set, "model": broken}))
+
+        asyncio.run(warmup.run(executor, **artifact_set))
+
+        assert warmup.state == "done"
+        assert warmup.error is None
+        assert warmup.runs == 2
+        assert warmup.stats()["rounds"] == 2
+
+    def test_from_env(self, monkeypatch):
+        """Test warm-up is on by default, configurable, and disabled with AIMS_WARMUP=0."""
+        monkeypatch.delenv("AIMS_WARMUP", raising=False)
+        monkeypatch.setenv("AIMS_WARMUP_MAX_S", "5")
+        monkeypatch.setenv("AIMS_WARMUP_TOLERANCE", "0.2")
+        warmup = Warmup.from_env()
+
+        assert warmup.max_s == 5.0
+        assert warmup.tolerance == 0.2
+        assert warmup.state == "pending"
+
+        monkeypatch.setenv("AIMS_WARMUP", "0")
+        assert Warmup.from_env() is None
+
+    @pytest.mark.parametrize("kwargs", [{"max_s": 0}, {"tolerance": 0}, {"round_size": 0}, {"max_rounds": 1}])
+    def test_rejects_invalid_configuration(self, kwargs):
+        """Test non-positive budgets and fewer than two rounds are refused."""
+        with pytest.raises(ValueError):
+            Warmup(**kwargs)
+
+
+class TestSyntheticReadings:
+    """Test suite for readings drawn from the training distribution."""
+
+    def test_follows_preprocessor_statistics(self):
+        """Test readings are drawn around the mean and spread the preprocessor was fitted on."""
+        preprocessor = Mock(spec=["mean_", "scale_"])
+        preprocessor.mean_ = np.arange(18, dtype=np.float64) * 100
+        preprocessor.scale_ = np.full(18, 0.01)
+
+        readings = synthetic_readings(256, preprocessor)
+
+        assert readings.shape == (256, 18)
+        np.testing.assert_allclose(readings.mean(axis=0), preprocessor.mean_, atol=0.01)
+        np.testing.assert_allclose(readings.std(axis=0), preprocessor.scale_, rtol=0.2)
+
+    def test_follows_folded_model_statistics(self, artifact_set):
+        """Test the IdentityScaler of a folded model carries the training statistics."""
+        readings = synthetic_readings(8, artifact_set["preprocessor"])
+
+        assert np.all(np.isfinite(readings))
+        assert not np.array_equal(readings, synthetic_readings(8))
@@ -0,0 +1,138 @@
+"""
+Tests for rolling-window features.
+Features computed reading by reading must equal the pandas rolling
+statistics, stay exact over long streams and be identical whether computed
+for training or while serving.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.predictor import FEATURE_NAMES
+from backend.services.windows import (
+    WINDOW_FEATURE_NAMES,
+    EngineWindows,
+    RollingWindow,
+    rolling_features,
+    rolling_features_frame,
+)
+
+
+DATASET_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "marine_engine_fault_dataset.csv"
+
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+@pytest.fixture(scope="module")
+def dataset() -> pd.DataFrame:
+    """The first 1000 readings of the dataset, one per second."""
+    return pd.read_csv(DATASET_PATH, nrows=1000)
+
+
+def statistic(features: np.ndarray, index: int) -> np.ndarray:
+    """The columns of one statistic of WINDOW_STATISTICS."""
+    return features[:, index * NUM_FEATURES:(index + 1) * NUM_FEATURES]
+
+
+class TestRollingWindow:
+    """Test suite for RollingWindow and rolling_features."""
+
+    def test_matches_pandas(self, dataset):
+        """Test the statistics equal pandas rolling mean/std, diff and EWMA of the float32 readings."""
+        readings = dataset[FEATURE_NAMES].astype(np.float32).astype(np.float64)
+
+        features = rolling_features(readings.to_numpy(), window=30, alpha=0.2)
+
+        assert features.shape == (1000, len(WINDOW_FEATURE_NAMES))
+        assert features.dtype == np.float32
+        np.testing.assert_allclose(statistic(features, 0), readings.rolling(30, min_periods=1).mean(), rtol=1e-6)
+        np.testing.assert_allclose(
+            statistic(features, 1), readings.rolling(30, min_periods=1).std(ddof=0), rtol=1e-4, atol=1e-6
+        )
+        np.testing.assert_allclose(statistic(features, 2), readings.diff().fillna(0.0), rtol=1e-6, atol=1e-4)
+        np.testing.assert_allclose(
+            statistic(features, 3), readings.ewm(alpha=0.2, adjust=False).mean(), rtol=1e-5
+        )
+
+    def test_no_drift_over_long_streams(self, dataset):
+        """Test the rolling statistics after many wrap-arounds equal those of the last window alone."""
+        readings = np.tile(dataset[FEATURE_NAMES].to_numpy(), (20, 1))
+        rolling = RollingWindow(window=64)
+        for reading in readings:
+            features = rolling.update(reading)
+
+        last_window = readings[-64:].astype(np.float32).astype(np.float64)
+        np.testing.assert_allclose(features[:NUM_FEATURES], last_window.mean(axis=0), rtol=1e-7)
+        np.testing.assert_allclose(features[NUM_FEATURES:2 * NUM_FEATURES], last_window.std(axis=0), rtol=1e-5)
+
+    def test_memory_is_fixed(self):
+        """Test a window holds float32 readings and no more memory after many updates."""
+        rolling = RollingWindow(window=60)
+        before = rolling.nbytes
+        for _ in range(200):
+            rolling.update(np.ones(NUM_FEATURES))
+
+        assert rolling.nbytes == before < 5 * 1024
+        assert rolling.count == 60
+
+    def test_rejects_invalid_parameters(self):
+        """Test windows of no readings and EWMA weights outside (0, 1] are refused."""
+        with pytest.raises(ValueError):
+            RollingWindow(window=0)
+        with pytest.raises(ValueError):
+            RollingWindow(alpha=0.0)
+
+
+class TestTrainingServingParity:
+    """The features training computes must be exactly those serving computes."""
+
+    def test_frame_matches_engine_windows(self, dataset):
+        """Test rolling_features_frame equals readings streamed per engine, bit for bit."""
+        frame = dataset.assign(engine=np.arange(len(dataset)) % 3).sample(frac=1.0, random_state=0)
+        windows = EngineWindows(window=20, alpha=0.3)
+
+        trained = rolling_features_frame(frame, window=20, alpha=0.3, engine_column="engine")
+
+        assert trained.index.equals(frame.index)
+        assert trained.columns.tolist() == WINDOW_FEATURE_NAMES
+        for engine, readings in dataset.assign(engine=np.arange(len(dataset)) % 3).groupby("engine"):
+            matrix = readings[FEATURE_NAMES].to_numpy()
+            # Streamed in frames of varying size
+            served = np.concatenate([windows.update(f"engine-{engine}", piece) for piece in np.array_split(matrix, 41)])
+            np.testing.assert_array_equal(trained.loc[readings.index].to_numpy(), served)
+
+
+class TestEngineWindows:
+    """Test suite for EngineWindows."""
+
+    def test_evicts_least_recent_engine(self):
+        """Test the engine that reported least recently loses its window beyond max_engines."""
+        windows = EngineWindows(window=5, max_engines=2)
+        reading = np.ones((1, NUM_FEATURES))
+        windows.update("a", reading)
+        windows.update("b", reading)
+        windows.update("a", reading)
+        windows.update("c", reading)
+
+        # "b" starts over: its first reading has no delta from the earlier one
+        features = windows.update("b", reading * 3)
+        stats = windows.stats()
+
+        assert statistic(features, 2).tolist() == [[0.0] * NUM_FEATURES]
+        assert stats["engines"] == 2
+        assert stats["evicted"] == 2
+        assert stats["readings"] == 5
+        assert stats["bytes"] == 2 * RollingWindow(window=5).nbytes
+
+    def test_from_env(self, monkeypatch):
+        """Test the window size, EWMA weight and engine bound are read from the environment."""
+        monkeypatch.setenv("AIMS_WINDOW_SIZE", "120")
+        monkeypatch.setenv("AIMS_WINDOW_ALPHA", "0.05")
+        monkeypatch.setenv("AIMS_WINDOW_MAX_ENGINES", "50")
+
+        windows = EngineWindows.from_env()
+
+        assert (windows.window, windows.alpha, windows.max_engines) == (120, 0.05, 50)
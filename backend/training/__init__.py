@@ -0,0 +1 @@
+"""Training pipeline for the AIMS model (run with `python -m backend.training`)."""
@@ -0,0 +1,6 @@
+"""Run the training pipeline: python -m backend.training --help"""
+import sys
+
+from backend.training.pipeline import main
+
+sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Content-addressed cache of training stage outputs.
+A stage's outputs are stored under a key hashed from the stage's code (with
+the helpers and constants of its module it uses), its parameters and the
+content digests of its inputs, so a stage is only rerun
+when one of those changes. Each entry also records the content digest of
+every output, which the keys of later stages are built from: a stage that is
+rerun but produces the same outputs leaves the later stages cached.
+"""
+import inspect
+import os
+from types import CodeType, ModuleType
+from typing import Any, Callable, Iterable, Optional
+
+
+def _global_names(code: CodeType) -> set[str]:
+    """Names a code object, and the functions nested in it, may look up as globals."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def module_dependencies(fn: Callable) -> dict[str, Any]:
+    """
+    Functions, classes and values of fn's module that fn uses, directly or
+    through the functions it calls.
+
+    Functions and classes defined in the module are followed and given by
+    their source; other module-level values, such as parameter dicts, are
+    given as is. Modules, and functions and classes defined elsewhere, are
+    not followed.
+
+    Args:
+        fn: Function to find the dependencies of
+
+    Returns:
+        Source or value of every dependency, by global name
+    """
+    found: dict[str, Any] = {}
+    pending = [fn]
+    while pending:
+        current = pending.pop()
+        for name in sorted(_global_names(current.__code__)):
+            if name in found or name not in fn.__globals__:
+                continue
+            value = fn.__globals__[name]
+            if isinstance(value, ModuleType):
+                continue
+            if inspect.isfunction(value) or inspect.isclass(value):
+                if value.__module__ != fn.__module__ or value is fn:
+                    continue
+                found[name] = inspect.getsource(value)
+                if inspect.isfunction(value):
+                    pending.append(value)
+            elif not callable(value):
+                found[name] = value
+    return found
+
+
+class StageCache:
+    """
+    Stage outputs stored with joblib, one file per entry, under
+    <directory>/<stage>/<key>.joblib.
+
+    Only the `keep` most recently used entries of each stage are kept.
+    """
+
+    def __init__(self, directory: str, keep: int = 5):
+        """
+        Args:
+            directory: Directory the entries are stored in; created if missing
+            keep: Entries kept per stage
+        """
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.directory = directory
+        self.keep = keep
+
+    def key(
+        self,
+        stage: Callable,
+        params: dict[str, Any],
+        input_digests: dict[str, str],
+        dependencies: Iterable[Callable] = ()
+    ) -> str:
+        """
+        Cache key of running a stage.
+
+        Args:
+            stage: Stage function; its source and its module_dependencies are
+                part of the key, so editing it, a helper it calls or a constant
+                it reads invalidates its entries
+            params: Keyword parameters the stage is called with
+            input_digests: Content digest of every input, by name
+            dependencies: Functions of other modules the stage calls, whose
+                source is part of the key too
+
+        Returns:
+            Hex digest identifying the stage's outputs
+        """
+        import joblib
+
+        sources = [inspect.getsource(fn) for fn in (stage, *dependencies)]
+        return joblib.hash((stage.__name__, sources, module_dependencies(stage), params, input_digests))
+
+    @staticmethod
+    def digests(outputs: dict[str, Any]) -> dict[str, str]:
+        """Content digest of every output, by name."""
+        import joblib
+
+        return {name: joblib.hash(value) for name, value in outputs.items()}
+
+    def load(self, stage_name: str, key: str) -> Optional[tuple[dict[str, Any], dict[str, str]]]:
+        """
+        Outputs and output digests stored under a key.
+
+        Returns:
+            (outputs, digests), or None if there is no readable entry
+        """
+        import joblib
+
+        path = self._path(stage_name, key)
+        try:
+            entry = joblib.load(path)
+        except (FileNotFoundError, EOFError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠ Warning: Ignoring unreadable cache entry {path}: {e}")
+            return None
+        # Mark the entry as recently used, so pruning keeps it
+        os.utime(path)
+        return entry["outputs"], entry["digests"]
+
+    def store(self, stage_name: str, key: str, outputs: dict[str, Any]) -> dict[str, str]:
+        """
+        Store a stage's outputs under a key and prune its oldest entries.
+
+        Returns:
+            Content digest of every output, by name
+        """
+        import joblib
+
+        digests = self.digests(outputs)
+        path = self._path(stage_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name, so an interrupted run leaves no partial entry
+        tmp_path = path + ".tmp"
+        joblib.dump({"outputs": outputs, "digests": digests}, tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(stage_name)
+        return digests
+
+    def _path(self, stage_name: str, key: str) -> str:
+        """File of an entry."""
+        return os.path.join(self.directory, stage_name, f"{key}.joblib")
+
+    def _prune(self, stage_name: str) -> None:
+        """Remove all but the `keep` most recently used entries of a stage."""
+        stage_dir = os.path.join(self.directory, stage_name)
+        entries = sorted(
+            (os.path.join(stage_dir, filename) for filename in os.listdir(stage_dir) if filename.endswith(".joblib")),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for path in entries[self.keep:]:
+            os.remove(path)
@@ -0,0 +1,274 @@
+"""
+Notebook-free training pipeline.
+Runs the steps of notebooks 02-04 as explicit stages: load, split, scale,
+smote, binning, tune, fit, explain and export. The dataset is read and split
+once, the training set is binned for LightGBM once, and every stage's outputs
+are cached (see StageCache) in backend/.training_cache, outside the
+artifacts directory the server watches, so a rerun only redoes the stages
+whose code, parameters or inputs changed. The wall time of every stage is reported.
+
+Usage (from the project root):
+    python -m backend.training                       # train and export to backend/artifacts
+    python -m backend.training --n-trials 100        # reruns tune and the stages after it
+    python -m backend.training --until fit           # stop after fitting, export nothing
+    python -m backend.training --force tune          # rerun tune even if cached
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from backend.services.artifacts import ARTIFACTS_DIR
+from backend.training import stages
+from backend.training.cache import StageCache
+
+# Dataset the model is trained on
+DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data",
+    "marine_engine_fault_dataset.csv"
+)
+
+# Directory stage outputs are cached in; not under ARTIFACTS_DIR, which ArtifactWatcher watches
+CACHE_DIR = os.path.join(os.path.dirname(ARTIFACTS_DIR), ".training_cache")
+
+# Directory, under the cache directory, the binning stage saves Datasets in
+BINNED_DIRNAME = "binned"
+
+
+class Stage:
+    """One step of the pipeline: a function of stages.py, the values it reads and its parameters."""
+
+    def __init__(
+        self,
+        fn: Callable[..., dict[str, Any]],
+        inputs: list[str],
+        params: Optional[dict[str, Any]] = None,
+        is_current: Optional[Callable[[dict[str, Any]], bool]] = None,
+        dependencies: Optional[list[Callable]] = None
+    ):
+        """
+        Args:
+            fn: Stage function, called with the inputs and parameters as keyword
+                arguments and returning a dict of named outputs
+            inputs: Names of the values, produced by earlier stages, fn reads
+            params: Keyword parameters fn is called with
+            is_current: For stages with side effects, whether cached outputs
+                still describe the world; the stage is rerun if not
+            dependencies: Functions of other modules fn calls; editing them
+                reruns fn too (the functions and constants of fn's own module
+                it uses are found by StageCache)
+        """
+        self.fn = fn
+        self.inputs = inputs
+        self.params = params or {}
+        self.is_current = is_current
+        self.dependencies = dependencies or []
+
+    @property
+    def name(self) -> str:
+        return self.fn.__name__
+
+
+class TrainingPipeline:
+    """
+    The training stages, wired together and run with a StageCache.
+
+    After run(), `values` holds every value the stages produced by name,
+    e.g. values["model"] and values["metrics"].
+    """
+
+    def __init__(
+        self,
+        dataset: str = DATASET_PATH,
+        artifacts_dir: str = ARTIFACTS_DIR,
+        cache_dir: Optional[str] = CACHE_DIR,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        use_smote: bool = False,
+        n_trials: int = 50,
+        seed: int = 42,
+        validation_size: float = 0.2,
+        n_jobs: int = 1,
+        base_params: Optional[dict[str, Any]] = None
+    ):
+        """
+        Args:
+            dataset: Dataset CSV to train on
+            artifacts_dir: Directory the export stage writes the serving artifacts to
+            cache_dir: Directory stage outputs and binned Datasets are cached
+                in, or None to run every stage without caching (binned Datasets
+                are then saved in a temporary directory, removed with the pipeline)
+            test_size: Fraction of readings held out for testing
+            random_state: Seed of the split and SMOTE
+            use_smote: Whether the model is tuned and fitted on the SMOTE-balanced training set
+            n_trials: Optuna trials of the tune stage
+            seed: Seed of the Optuna sampler
+            validation_size: Fraction of the training set trials are scored on
+            n_jobs: Optuna trials run concurrently; -1 runs one per CPU. Tuning
+                is only reproducible with 1
+            base_params: LightGBM parameters every model is trained with
+                (default: stages.BASE_PARAMS)
+        """
+        self.dataset = dataset
+        if cache_dir is not None:
+            self.cache = StageCache(cache_dir)
+            self._binned_tmp = None
+            binned_dir = os.path.join(cache_dir, BINNED_DIRNAME)
+        else:
+            self.cache = None
+            self._binned_tmp = tempfile.TemporaryDirectory(prefix="aims-binned-")
+            binned_dir = self._binned_tmp.name
+        base_params = dict(stages.BASE_PARAMS if base_params is None else base_params)
+        self.stages = [
+            Stage(stages.load, ["dataset"]),
+            Stage(stages.split, ["X", "y"], {"test_size": test_size, "random_state": random_state}),
+            Stage(stages.scale, ["X_train", "X_test"]),
+            Stage(stages.smote, ["X_train_scaled", "y_train"], {"enabled": use_smote, "random_state": random_state}),
+            Stage(
+                stages.binning,
+                ["X_train_fit", "y_train_fit"],
+                {"params": stages.binning_params(base_params), "directory": binned_dir},
+                is_current=stages.binned_file_exists
+            ),
+            Stage(
+                stages.tune,
+                ["X_train_scaled", "y_train"],
+                {
+                    "base_params": base_params,
+                    "n_trials": n_trials,
+                    "seed": seed,
+                    "use_smote": use_smote,
+                    "validation_size": validation_size,
+                    "random_state": random_state,
+                    "n_jobs": n_jobs,
+                }
+            ),
+            Stage(
+                stages.fit,
+                ["binned", "X_test_scaled", "y_test", "best_params"],
+                {"base_params": base_params}
+            ),
+            Stage(stages.explain, ["model", "X_test_scaled"]),
+            Stage(
+                stages.export,
+                ["scaler", "model", "explainer", "feature_importance"],
+                {"artifacts_dir": artifacts_dir},
+                is_current=stages.exported_files_intact
+            ),
+        ]
+        self.values: dict[str, Any] = {}
+
+    @property
+    def stage_names(self) -> list[str]:
+        return [stage.name for stage in self.stages]
+
+    def run(self, until: Optional[str] = None, force: Iterable[str] = ()) -> list[dict[str, Any]]:
+        """
+        Run the stages in order, taking unchanged ones from the cache.
+
+        Args:
+            until: Last stage to run; None runs them all
+            force: Stages rerun even when cached
+
+        Returns:
+            One {"stage", "seconds", "cached"} report per stage run, in order
+        """
+        force = set(force)
+        unknown = force - set(self.stage_names) | ({until} - set(self.stage_names) if until else set())
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+        # The dataset is identified by its content, not its path
+        self.values = {"dataset": self.dataset}
+        digests = {"dataset": stages.file_sha256(self.dataset)}
+        report = []
+        for stage in self.stages:
+            started = time.perf_counter()
+            cached = None
+            if self.cache is not None:
+                key = self.cache.key(
+                    stage.fn, stage.params, {name: digests[name] for name in stage.inputs}, stage.dependencies
+                )
+                if stage.name not in force:
+                    cached = self.cache.load(stage.name, key)
+                if cached is not None and stage.is_current is not None and not stage.is_current(cached[0]):
+                    cached = None
+
+            if cached is not None:
+                outputs, output_digests = cached
+            else:
+                outputs = stage.fn(**{name: self.values[name] for name in stage.inputs}, **stage.params)
+                if self.cache is not None:
+                    output_digests = self.cache.store(stage.name, key, outputs)
+                else:
+                    output_digests = StageCache.digests(outputs)
+            self.values.update(outputs)
+            digests.update(output_digests)
+
+            seconds = time.perf_counter() - started
+            report.append({"stage": stage.name, "seconds": seconds, "cached": cached is not None})
+            print(f"✓ {stage.name:<8} {seconds:>8.2f}s{'  (cached)' if cached is not None else ''}")
+            if stage.name == until:
+                break
+        return report
+
+
+def main(argv=None) -> int:
+    """Main execution function."""
+    stage_names = TrainingPipeline().stage_names
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", default=DATASET_PATH, help="dataset CSV to train on")
+    parser.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="directory the artifacts are exported to")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="directory stage outputs are cached in")
+    parser.add_argument("--no-cache", action="store_true", help="run every stage, without reading or writing the cache")
+    parser.add_argument("--n-trials", type=int, default=50, help="Optuna trials")
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="Optuna trials run concurrently (-1: one per CPU); tuning is only reproducible with 1"
+    )
+    parser.add_argument("--smote", action="store_true", help="tune and fit on the SMOTE-balanced training set")
+    parser.add_argument("--until", choices=stage_names, help="last stage to run")
+    parser.add_argument("--force", action="append", default=[], choices=stage_names, help="rerun a stage even if cached")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.dataset):
+        print(f"✗ ERROR: Dataset not found: {args.dataset}")
+        return 1
+
+    pipeline = TrainingPipeline(
+        dataset=args.dataset,
+        artifacts_dir=args.artifacts_dir,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        use_smote=args.smote,
+        n_trials=args.n_trials,
+        n_jobs=args.n_jobs
+    )
+    print("=" * 60)
+    print("AIMS Training Pipeline")
+    print("=" * 60)
+    started = time.perf_counter()
+    report = pipeline.run(until=args.until, force=args.force)
+
+    cached = sum(entry["cached"] for entry in report)
+    print("=" * 60)
+    print(f"✓ {len(report)} stages in {time.perf_counter() - started:.2f}s, {cached} from cache")
+    if "best_f1" in pipeline.values:
+        trial_f1 = pipeline.values["trial_f1"]
+        pruned = sum(value is None for value in trial_f1)
+        print(f"  Best validation macro F1: {pipeline.values['best_f1']:.4f} after "
+              f"{pipeline.values['seconds_to_best']:.2f}s of tuning ({len(trial_f1)} trials, {pruned} pruned)")
+        print(f"  Best params: {pipeline.values['best_params']}")
+    if "metrics" in pipeline.values:
+        print(f"  Test macro F1: {pipeline.values['metrics']['f1_macro']:.4f}")
+    if "files" in pipeline.values:
+        print(f"✓ Artifacts exported to {args.artifacts_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
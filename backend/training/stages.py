@@ -0,0 +1,464 @@
+"""
+Stages of the training pipeline.
+Each stage does what the matching notebook cells do, without the plots, and
+returns its outputs as a dict, so TrainingPipeline can cache them. Stages
+take their inputs and parameters as keyword arguments and have no other
+state.
+"""
+import hashlib
+import os
+from typing import Any
+
+import numpy as np
+
+from backend.services.artifacts import (
+    BUNDLE_DIRNAME,
+    BUNDLE_SOURCES,
+    EXPLAINER_FILENAME,
+    MODEL_FILENAME,
+    PREPROCESSOR_FILENAME,
+)
+from backend.services.predictor import FAULT_LABELS, FEATURE_NAMES
+
+# Feature importance table written next to the artifacts, as notebook 03 does
+FEATURE_IMPORTANCE_FILENAME = "feature_importance.csv"
+
+# Parameters every model is trained with, as in notebook 03
+BASE_PARAMS = {
+    "objective": "multiclass",
+    "num_class": len(FAULT_LABELS),
+    "metric": "multi_logloss",
+    "verbosity": -1,
+    "random_state": 42,
+}
+
+# LightGBM parameters that change how the features are binned into a Dataset
+BINNING_PARAMS = (
+    "max_bin",
+    "max_bin_by_feature",
+    "min_data_in_bin",
+    "bin_construct_sample_cnt",
+    "use_missing",
+    "zero_as_missing",
+)
+
+# Parameters of the binned Dataset. Without feature pre-filtering, features are
+# not dropped based on min_data_in_leaf, so one Dataset serves every
+# min_child_samples the trials try.
+DATASET_PARAMS = {"feature_pre_filter": False, "verbosity": -1}
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def binning_params(params: dict[str, Any]) -> dict[str, Any]:
+    """The parameters of a LightGBM parameter dict that change how features are binned."""
+    return {name: params[name] for name in BINNING_PARAMS if name in params}
+
+
+def load(dataset: str) -> dict[str, Any]:
+    """
+    Read the sensor features and fault labels of the dataset (notebook 02, section 1).
+
+    Args:
+        dataset: Path of the dataset CSV
+
+    Returns:
+        "X": DataFrame of the 18 sensor columns, "y": Series of fault labels
+    """
+    import pandas as pd
+
+    df = pd.read_csv(dataset)
+    return {"X": df[FEATURE_NAMES].copy(), "y": df["Fault_Label"].copy()}
+
+
+def split(X: Any, y: Any, test_size: float, random_state: int) -> dict[str, Any]:
+    """
+    Split the readings into stratified training and test sets (notebook 02, section 3).
+
+    Returns:
+        "X_train", "X_test", "y_train" and "y_test"
+    """
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y
+    )
+    return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+
+def scale(X_train: Any, X_test: Any) -> dict[str, Any]:
+    """
+    Fit a StandardScaler on the training set only and scale both sets (notebook 02, section 4).
+
+    Returns:
+        "scaler", and "X_train_scaled" and "X_test_scaled" as arrays
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaler.fit(X_train)
+    return {
+        "scaler": scaler,
+        "X_train_scaled": scaler.transform(X_train),
+        "X_test_scaled": scaler.transform(X_test),
+    }
+
+
+def smote(X_train_scaled: np.ndarray, y_train: Any, enabled: bool, random_state: int) -> dict[str, Any]:
+    """
+    Oversample minority classes of the scaled training set with SMOTE (notebook 02, section 6).
+
+    Notebook 03 tunes and fits the deployed model on the scaled training set
+    and only uses the balanced one for cross-validation, so SMOTE is off by
+    default and the training set passes through unchanged.
+
+    Returns:
+        "X_train_fit" and "y_train_fit": the training set the model is tuned and fitted on
+    """
+    y_train = np.asarray(y_train)
+    if not enabled:
+        return {"X_train_fit": X_train_scaled, "y_train_fit": y_train}
+
+    from imblearn.over_sampling import SMOTE
+
+    # k_neighbors must be less than the smallest class size
+    k_neighbors = min(5, int(np.bincount(y_train).min()) - 1)
+    X_balanced, y_balanced = SMOTE(random_state=random_state, k_neighbors=k_neighbors).fit_resample(
+        X_train_scaled, y_train
+    )
+    return {"X_train_fit": X_balanced, "y_train_fit": np.asarray(y_balanced)}
+
+
+def _pruning_callback(trial: Any, valid_name: str = "valid_0", metric: str = "multi_logloss"):
+    """
+    LightGBM callback reporting a trial's validation loss to Optuna after every
+    iteration, and stopping the trial when the pruner decides it is unpromising.
+
+    The loss is reported negated, so that higher is better, as for the F1 the
+    study maximizes.
+    """
+    import optuna
+
+    def callback(env):
+        for data_name, metric_name, value, _ in env.evaluation_result_list:
+            if data_name == valid_name and metric_name == metric:
+                trial.report(-value, step=env.iteration)
+                if trial.should_prune():
+                    raise optuna.TrialPruned(f"Pruned at iteration {env.iteration}")
+
+    return callback
+
+
+def binning(X_train_fit: np.ndarray, y_train_fit: np.ndarray, params: dict[str, Any], directory: str) -> dict[str, Any]:
+    """
+    Bin the training set into a LightGBM Dataset and save it as a LightGBM binary file.
+
+    LGBMClassifier.fit bins its input from scratch on every call. The fit
+    stage instead loads this file, so the final model's bin boundaries are
+    only computed when the training set or the binning parameters change:
+    the file is named by a hash of both. The tune stage does not use it, as
+    its bin boundaries would include the rows trials are validated on.
+
+    Args:
+        params: Binning parameters (see BINNING_PARAMS) the Dataset is built with
+        directory: Directory the binary file is saved in
+
+    Returns:
+        "binned": path of the binary file
+    """
+    import joblib
+    import lightgbm as lgb
+
+    path = os.path.join(directory, f"{joblib.hash((X_train_fit, y_train_fit, params))}.bin")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # Saved under a temporary name, so an interrupted run leaves no partial file
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        lgb.Dataset(X_train_fit, y_train_fit, params={**DATASET_PARAMS, **params}).save_binary(tmp_path)
+        os.replace(tmp_path, path)
+    return {"binned": path}
+
+
+def binned_file_exists(outputs: dict[str, Any]) -> bool:
+    """Whether the binary file of a cached binning is still on disk."""
+    return os.path.exists(outputs["binned"])
+
+
+def load_binned(binned: str, params: dict[str, Any]) -> Any:
+    """The Dataset saved by the binning stage, constructed, ready to train on."""
+    import lightgbm as lgb
+
+    return lgb.Dataset(binned, params={**DATASET_PARAMS, **params}).construct()
+
+
+def _booster_params(params: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    """Split LGBMClassifier parameters into lightgbm.train parameters and the number of rounds."""
+    params = dict(params)
+    return params, params.pop("n_estimators")
+
+
+def tune(
+    X_train_scaled: np.ndarray,
+    y_train: Any,
+    base_params: dict[str, Any],
+    n_trials: int,
+    seed: int,
+    use_smote: bool,
+    validation_size: float,
+    random_state: int,
+    n_jobs: int = 1,
+    early_stopping_rounds: int = 50
+) -> dict[str, Any]:
+    """
+    Search LightGBM hyperparameters with Optuna for the best macro F1 (notebook 03, section 2).
+
+    Unlike the notebook, trials never see the test set: each trial is trained
+    on part of the training set and scored on a stratified validation split of
+    the rest. With use_smote, only the part trained on is oversampled.
+
+    The bin boundaries of the trials are computed from the part trained on
+    (after oversampling, with use_smote) and the validation split is binned
+    with them, so no validation row shapes the bins. Trials share these
+    Datasets, built once per thread, as lgb.train updates the Dataset it
+    trains on; none of the searched parameters affects binning. Every
+    trial stops adding trees once the validation loss has not improved for
+    early_stopping_rounds iterations, and a median pruner stops trials whose
+    loss falls behind the earlier trials'. The tuned n_estimators is the best
+    trial's best iteration.
+
+    Trials are suggested by a seeded TPE sampler and run one at a time, so
+    reruns are reproducible. With n_jobs > 1 (-1: one per CPU) trials run on
+    that many threads, as LightGBM releases the GIL while training; the trials
+    suggested then depend on which finish first, so reruns are not
+    reproducible.
+
+    Returns:
+        "best_params", "best_f1" (validation macro F1 of the best trial),
+        "trial_f1" (the F1 of every trial, in order, None if pruned),
+        "trial_seconds" (seconds from the start of tuning until each trial
+        finished) and "seconds_to_best"
+    """
+    import threading
+    import time
+
+    import lightgbm as lgb
+    import optuna
+    from sklearn.metrics import f1_score
+    from sklearn.model_selection import train_test_split
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    y_train = np.asarray(y_train)
+    part_index, valid_index = train_test_split(
+        np.arange(len(y_train)),
+        test_size=validation_size,
+        random_state=random_state,
+        stratify=y_train
+    )
+    X_valid, y_valid = X_train_scaled[valid_index], y_train[valid_index]
+    part = smote(X_train_scaled[part_index], y_train[part_index], enabled=use_smote, random_state=random_state)
+    dataset_params = {**DATASET_PARAMS, **binning_params(base_params)}
+
+    def trial_sets():
+        """Training and validation sets of the trials, built by each thread running trials."""
+        train_set = lgb.Dataset(part["X_train_fit"], part["y_train_fit"], params=dataset_params).construct()
+        valid_set = lgb.Dataset(X_valid, y_valid, params=dataset_params, reference=train_set)
+        return train_set, valid_set.construct()
+
+    local = threading.local()
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    # Share the cores between the concurrent trials
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+
+    def objective(trial):
+        params = {
+            **base_params,
+            "num_leaves": trial.suggest_int("num_leaves", 20, 100),
+            "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+            "n_estimators": trial.suggest_int("n_estimators", 100, 500),
+            "max_depth": trial.suggest_int("max_depth", 3, 10),
+            "min_child_samples": trial.suggest_int("min_child_samples", 10, 50),
+            "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+            "n_jobs": threads,
+        }
+        params, num_boost_round = _booster_params(params)
+        if not hasattr(local, "sets"):
+            local.sets = trial_sets()
+        train_set, valid_set = local.sets
+        booster = lgb.train(
+            params,
+            train_set,
+            num_boost_round=num_boost_round,
+            valid_sets=[valid_set],
+            valid_names=["valid"],
+            callbacks=[
+                lgb.early_stopping(early_stopping_rounds, verbose=False),
+                _pruning_callback(trial, valid_name="valid"),
+            ]
+        )
+        trial.set_user_attr("best_iteration", booster.best_iteration)
+        y_pred = booster.predict(X_valid, num_iteration=booster.best_iteration).argmax(axis=1)
+        return f1_score(y_valid, y_pred, average="macro")
+
+    finished = {}
+    started = time.perf_counter()
+
+    def record_time(study, trial):
+        finished[trial.number] = time.perf_counter() - started
+
+    study = optuna.create_study(
+        direction="maximize",
+        study_name="lgbm_optimization",
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=20)
+    )
+    study.optimize(objective, n_trials=n_trials, n_jobs=n_jobs, callbacks=[record_time])
+    best = study.best_trial
+    return {
+        "best_params": {**best.params, "n_estimators": best.user_attrs["best_iteration"]},
+        "best_f1": best.value,
+        # Pruned trials keep their last reported loss as value
+        "trial_f1": [
+            trial.value if trial.state == optuna.trial.TrialState.COMPLETE else None
+            for trial in study.trials
+        ],
+        "trial_seconds": [finished[trial.number] for trial in study.trials],
+        "seconds_to_best": finished[best.number],
+    }
+
+
+def fit(
+    binned: str,
+    X_test_scaled: np.ndarray,
+    y_test: Any,
+    base_params: dict[str, Any],
+    best_params: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Train the final model with the best parameters and evaluate it on the test set (notebook 03, section 3).
+
+    The model is trained on the binned training set, so it is the same model
+    LGBMClassifier.fit would train on the training set with these parameters.
+    It is returned as a BoosterClassifier, the model type of the bundle, not
+    as the LGBMClassifier notebook 03 pickles: it predicts the same classes
+    and probabilities, but has none of the sklearn estimator API beyond
+    predict, predict_proba, booster_, n_classes_ and n_features_in_.
+
+    Returns:
+        "model", and "metrics" with the macro F1, precision and recall and the per-class F1
+    """
+    import lightgbm as lgb
+    from sklearn.metrics import f1_score, precision_score, recall_score
+
+    from backend.services.folding import BoosterClassifier
+
+    params, num_boost_round = _booster_params({**base_params, **best_params})
+    model = BoosterClassifier(
+        lgb.train(params, load_binned(binned, binning_params(base_params)), num_boost_round=num_boost_round)
+    )
+
+    y_pred = model.predict(X_test_scaled)
+    per_class = f1_score(y_test, y_pred, average=None, labels=list(FAULT_LABELS))
+    return {
+        "model": model,
+        "metrics": {
+            "f1_macro": float(f1_score(y_test, y_pred, average="macro")),
+            "precision_macro": float(precision_score(y_test, y_pred, average="macro")),
+            "recall_macro": float(recall_score(y_test, y_pred, average="macro")),
+            "f1_per_class": dict(zip(FAULT_LABELS.values(), per_class.tolist())),
+        },
+    }
+
+
+def explain(model: Any, X_test_scaled: np.ndarray) -> dict[str, Any]:
+    """
+    Build the SHAP explainer and rank the features by mean |SHAP| on the test set (notebook 04).
+
+    Returns:
+        "explainer", and "feature_importance": mean absolute SHAP value of
+        each feature over all classes, in FEATURE_NAMES order
+    """
+    import shap
+
+    explainer = shap.TreeExplainer(model.booster_)
+    shap_values = explainer.shap_values(X_test_scaled)
+    # Older shap versions return one [samples, features] array per class
+    if isinstance(shap_values, list):
+        shap_values = np.stack(shap_values, axis=2)
+    return {
+        "explainer": explainer,
+        "feature_importance": dict(zip(FEATURE_NAMES, np.abs(shap_values).mean(axis=(0, 2)).tolist())),
+    }
+
+
+def export(
+    scaler: Any,
+    model: Any,
+    explainer: Any,
+    feature_importance: dict[str, float],
+    artifacts_dir: str
+) -> dict[str, Any]:
+    """
+    Write the serving artifacts: the three pickles, the bundle and the feature importance table.
+
+    lgbm_model.pkl holds the model as given, a BoosterClassifier when it comes from fit.
+
+    Returns:
+        "files": SHA-256 of every file written, keyed by path
+    """
+    import joblib
+    import pandas as pd
+    from backend.services.bundle import MANIFEST_FILENAME, write_bundle
+
+    os.makedirs(artifacts_dir, exist_ok=True)
+    paths = {
+        PREPROCESSOR_FILENAME: scaler,
+        MODEL_FILENAME: model,
+        EXPLAINER_FILENAME: explainer,
+    }
+    written = []
+    for filename, artifact in paths.items():
+        path = os.path.join(artifacts_dir, filename)
+        joblib.dump(artifact, path)
+        written.append(path)
+
+    importance_path = os.path.join(artifacts_dir, FEATURE_IMPORTANCE_FILENAME)
+    pd.DataFrame(
+        sorted(feature_importance.items(), key=lambda item: item[1], reverse=True),
+        columns=["feature", "importance"]
+    ).to_csv(importance_path, index=False)
+    written.append(importance_path)
+
+    bundle_dir = os.path.join(artifacts_dir, BUNDLE_DIRNAME)
+    manifest = write_bundle(
+        model,
+        scaler,
+        bundle_dir,
+        sources={filename: os.path.join(artifacts_dir, filename) for filename in BUNDLE_SOURCES}
+    )
+    written.extend(os.path.join(bundle_dir, filename) for filename in [*manifest["files"], MANIFEST_FILENAME])
+
+    return {"files": {path: file_sha256(path) for path in written}}
+
+
+def exported_files_intact(outputs: dict[str, Any]) -> bool:
+    """Whether every file a cached export wrote is still on disk, unchanged."""
+    return all(
+        os.path.exists(path) and file_sha256(path) == digest
+        for path, digest in outputs["files"].items()
+    )
@@ -11,6 +11,7 @@ function App() {
     const [predictionLabel, setPredictionLabel] = useState(null);
     const [probabilities, setProbabilities] = useState(null);
     const [shapValues, setShapValues] = useState(null);
+    const [predictionId, setPredictionId] = useState(null);
     const [sensorValues, setSensorValues] = useState(null);
     const [error, setError] = useState(null);
     const [isGlossaryOpen, setIsGlossaryOpen] = useState(false);
@@ -20,7 +21,9 @@ function App() {
         try {
             setPredictionLabel(predictionData.prediction_label);
             setProbabilities(predictionData.probabilities);
-            setShapValues(predictionData.shap_values);
+            // SHAP values are deferred; they are fetched by prediction_id when viewed
+            setShapValues(predictionData.shap_values || null);
+            setPredictionId(predictionData.prediction_id || null);
             setSensorValues(inputSensorValues);
             setError(null);
         } catch (err) {
@@ -79,7 +82,7 @@ function App() {
                             probabilities={probabilities}
                             predictionLabel={predictionLabel}
                             onViewDetails={() => setIsExplainabilityOpen(true)}
-                            hasShapValues={!!shapValues}
+                            hasShapValues={!!shapValues || !!predictionId}
                         />
                         <SystemHealthRadar sensorValues={sensorValues} />
                     </div>
@@ -96,6 +99,8 @@ function App() {
                 isOpen={isExplainabilityOpen}
                 onClose={() => setIsExplainabilityOpen(false)}
                 shapValues={shapValues}
+                predictionId={predictionId}
+                onExplanationLoaded={setShapValues}
             />
         </div>
     );
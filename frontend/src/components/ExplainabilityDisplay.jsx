@@ -1,9 +1,49 @@
 import React from 'react';
+import axios from 'axios';
 import './ExplainabilityDisplay.css';
 
-const ExplainabilityDisplay = ({ shapValues }) => {
+const ExplainabilityDisplay = ({ shapValues, predictionId, onExplanationLoaded }) => {
     // React hooks must be called before any early returns
     const [tooltip, setTooltip] = React.useState({ visible: false, feature: '', value: 0, x: 0, y: 0 });
+    const [loading, setLoading] = React.useState(false);
+    const [loadError, setLoadError] = React.useState(null);
+
+    // Predictions are made with explain=false; fetch the SHAP values only when they are viewed
+    React.useEffect(() => {
+        if (shapValues || !predictionId) return undefined;
+
+        let cancelled = false;
+        setLoading(true);
+        setLoadError(null);
+        axios.get(`http://localhost:8000/explain/${predictionId}`)
+            .then((response) => {
+                if (!cancelled && onExplanationLoaded) {
+                    onExplanationLoaded(response.data.shap_values);
+                }
+            })
+            .catch((err) => {
+                if (!cancelled) {
+                    setLoadError(err.response?.data?.detail || 'Unable to load explanation. Please try again.');
+                    console.error('Explanation error:', err);
+                }
+            })
+            .finally(() => {
+                if (!cancelled) setLoading(false);
+            });
+
+        return () => {
+            cancelled = true;
+        };
+    }, [shapValues, predictionId, onExplanationLoaded]);
+
+    if (!shapValues && predictionId && (loading || loadError)) {
+        return (
+            <div className="explainability-display">
+                <h2>Feature Importance (SHAP Values)</h2>
+                <p className="no-data">{loadError || 'Loading explanation...'}</p>
+            </div>
+        );
+    }
 
     if (!shapValues || Object.keys(shapValues).length === 0) {
         return (
@@ -2,7 +2,7 @@ import React from 'react';
 import ExplainabilityDisplay from './ExplainabilityDisplay';
 import './ExplainabilityModal.css';
 
-const ExplainabilityModal = ({ isOpen, onClose, shapValues }) => {
+const ExplainabilityModal = ({ isOpen, onClose, shapValues, predictionId, onExplanationLoaded }) => {
     if (!isOpen) return null;
 
     return (
@@ -18,7 +18,11 @@ const ExplainabilityModal = ({ isOpen, onClose, shapValues }) => {
                     </button>
                 </div>
                 <div className="modal-body">
-                    <ExplainabilityDisplay shapValues={shapValues} />
+                    <ExplainabilityDisplay
+                        shapValues={shapValues}
+                        predictionId={predictionId}
+                        onExplanationLoaded={onExplanationLoaded}
+                    />
                 </div>
             </div>
         </div>
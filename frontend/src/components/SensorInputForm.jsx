@@ -122,7 +122,10 @@ const SensorInputForm = ({ onPredictionReceived }) => {
         setError(null);
 
         try {
-            const response = await axios.post('http://localhost:8000/predict', sensorValues);
+            // Explanations are loaded on demand from /explain/{prediction_id}
+            const response = await axios.post('http://localhost:8000/predict', sensorValues, {
+                params: { explain: false }
+            });
             if (onPredictionReceived) {
                 onPredictionReceived(response.data, sensorValues);
             }
@@ -1,8 +1,20 @@
 import React from 'react';
-import { render, screen } from '@testing-library/react';
+import { render, screen, waitFor } from '@testing-library/react';
 import ExplainabilityDisplay from '../ExplainabilityDisplay';
 
+// Mock axios
+jest.mock('axios', () => ({
+    get: jest.fn()
+}));
+
+// Get the mocked axios
+const axios = require('axios');
+
 describe('ExplainabilityDisplay', () => {
+    beforeEach(() => {
+        jest.clearAllMocks();
+    });
+
     const mockShapValues = {
         'Oil_Temp': 0.23,
         'Vibration_X': 0.15,
@@ -81,4 +93,43 @@ describe('ExplainabilityDisplay', () => {
         const chartContainer = container.querySelector('.recharts-responsive-container');
         expect(chartContainer).toBeInTheDocument();
     });
+
+    test('does not fetch when SHAP values are already provided', () => {
+        render(<ExplainabilityDisplay shapValues={mockShapValues} predictionId="abc123" />);
+
+        expect(axios.get).not.toHaveBeenCalled();
+    });
+
+    test('fetches deferred explanation by prediction id', async () => {
+        const onExplanationLoaded = jest.fn();
+        axios.get.mockResolvedValue({
+            data: { prediction_id: 'abc123', prediction_label: 'Normal', shap_values: mockShapValues }
+        });
+
+        render(
+            <ExplainabilityDisplay
+                shapValues={null}
+                predictionId="abc123"
+                onExplanationLoaded={onExplanationLoaded}
+            />
+        );
+
+        expect(screen.getByText(/Loading explanation/i)).toBeInTheDocument();
+        await waitFor(() => {
+            expect(onExplanationLoaded).toHaveBeenCalledWith(mockShapValues);
+        });
+        expect(axios.get).toHaveBeenCalledWith('http://localhost:8000/explain/abc123');
+    });
+
+    test('displays error when deferred explanation has expired', async () => {
+        axios.get.mockRejectedValue({
+            response: { data: { detail: "Prediction 'abc123' not found or expired. Please predict again." } }
+        });
+
+        render(<ExplainabilityDisplay shapValues={null} predictionId="abc123" onExplanationLoaded={jest.fn()} />);
+
+        await waitFor(() => {
+            expect(screen.getByText(/not found or expired/i)).toBeInTheDocument();
+        });
+    });
 });
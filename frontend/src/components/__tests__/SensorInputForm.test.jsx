@@ -108,7 +108,8 @@ describe('SensorInputForm', () => {
                     Engine_Load: 70,
                     Oil_Temp: 75,
                     Vibration_X: 0.05
-                })
+                }),
+                { params: { explain: false } }
             );
         });
 